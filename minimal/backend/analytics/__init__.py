@@ -1,5 +1,8 @@
 """Reward analytics helpers for the corrected pipeline."""
 
+from .catalog_kb import ErrorCatalogKB  # noqa: F401
+from .coverage import TokenIndex  # noqa: F401
+from .dedup import DedupIndex, dedupe  # noqa: F401
 from .rewards import (  # noqa: F401
     RewardResult,
     StepRewardsReport,
@@ -10,8 +13,12 @@ from .rewards import (  # noqa: F401
     rewards_step7,
     rewards_step45,
 )
+from .spans import Span, SpanScan, scan_spans  # noqa: F401
 
 __all__ = [
+    "DedupIndex",
+    "dedupe",
+    "ErrorCatalogKB",
     "RewardResult",
     "StepRewardsReport",
     "rewards_step1",
@@ -20,4 +27,8 @@ __all__ = [
     "rewards_step45",
     "rewards_step6",
     "rewards_step7",
+    "scan_spans",
+    "Span",
+    "SpanScan",
+    "TokenIndex",
 ]
@@ -0,0 +1,538 @@
+"""
+Batch re-scoring of stored step responses.
+
+The live pipeline scores one payload at a time (analytics.rewards). After a
+reward rule changes, history has to be re-scored: this module streams
+enhanced_step_responses run by run, rebuilds each step's reward input from the
+stored response, evaluates every check column-wise with pandas and writes the
+results to step_rewards under a new reward_version.
+
+Steps 4-6 need context from earlier steps of the same run (Step 3
+requirements, the Step 2 catalog, the Step 5 response); it is carried forward
+within each run with a grouped forward-fill, so runs are never split across
+scoring batches.
+
+Usage:
+    python -m analytics.batch_rewards --version rules-2025-10 [--db-url URL] [--dry-run]
+"""
+
+from __future__ import annotations
+
+import argparse
+import ast
+import json
+import logging
+import time
+from collections.abc import Iterable, Iterator, Sequence
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from .coverage import TokenIndex
+from .rewards import (
+    STEP1_BANNED_TERMS,
+    STEP1_REQUIRED_KEYS,
+    STEP2_GENERIC_HINTS,
+    STEP2_IMPACTS,
+    STEP2_REQUIRED_FIELDS,
+    STEP3_ARTIFACT_TYPES,
+    STEP3_PREEMBEDDED_TERMS,
+    STEP3_REQUIRED_FIELDS,
+    STEP6_REQUIRED_CORE,
+    STEP7_ERROR_RANGE,
+    STEP7_LINE_RANGE,
+    STEP7_SPAN_RANGE,
+    STEP45_SECTIONS,
+)
+from .spans import SPAN_PATTERN
+
+logger = logging.getLogger(__name__)
+
+STEP_COLUMNS = ["id", "run_timestamp", "step_number", "success", "full_response"]
+TEXT_STEPS = (4, 5)
+REWARD_COLUMNS = ["step_response_id", "run_timestamp", "step_number", "pass_rate", "num_tests", "detail_json"]
+
+# An ordered list of (check name, passed per row, optional detail per row)
+Checks = list[tuple[str, pd.Series, pd.Series | None]]
+
+
+def parse_response(text: Any) -> Any:
+    """Decode a stored response: JSON for steps 6-7, Python repr (str(dict)) for steps 1-3."""
+    if not isinstance(text, str) or not text:
+        return None
+    try:
+        return json.loads(text)
+    except ValueError:
+        pass
+    if text[0] not in "{[":
+        return None
+    try:
+        return ast.literal_eval(text)
+    except (ValueError, SyntaxError, TypeError, MemoryError, RecursionError):
+        return None
+
+
+def _long(rows: Iterable[tuple[Any, ...]], columns: Sequence[str]) -> pd.DataFrame:
+    """One row per nested item, tagged with the position ("row") of its parent."""
+    return pd.DataFrame(list(rows), columns=["row", *columns])
+
+
+def _all_by_row(flags: pd.Series, rows: pd.Series, n: int) -> pd.Series:
+    """Per-parent all(); parents without items pass, like all([])."""
+    out = np.ones(n, dtype=bool)
+    if len(flags):
+        failed = rows[~flags.to_numpy(dtype=bool)].unique()
+        out[failed] = False
+    return pd.Series(out)
+
+
+def _count_by_row(rows: pd.Series, n: int) -> np.ndarray:
+    return np.bincount(rows.to_numpy(dtype=np.int64), minlength=n) if len(rows) else np.zeros(n, dtype=np.int64)
+
+
+def _in_range(values: Any, low: int, high: int) -> pd.Series:
+    values = pd.Series(values)
+    return (values >= low) & (values <= high)
+
+
+def _dicts(payloads: Iterable[Any], success: Iterable[bool] | None = None) -> list[dict[str, Any]]:
+    """Reward input for steps whose live scorer sees the payload only when the step succeeded."""
+    if success is None:
+        return [p if isinstance(p, dict) else {} for p in payloads]
+    return [p if ok and isinstance(p, dict) else {} for p, ok in zip(payloads, success, strict=True)]
+
+
+def _score_step1(frame: pd.DataFrame) -> Checks:
+    categories = _dicts(frame["payload"], frame["success"])
+    n = len(categories)
+    keys = [sorted(c) for c in categories]
+    required = sorted(STEP1_REQUIRED_KEYS)
+
+    counts = pd.DataFrame(
+        {key: [len(c[key]) if isinstance(c.get(key), list) else 0 for c in categories] for key in required}
+    )
+    count_ok = ((counts >= 3) & (counts <= 5)).all(axis=1)
+
+    items = _long(
+        (
+            (row, key, item.strip().lower())
+            for row, c in enumerate(categories)
+            for key, values in c.items()
+            if isinstance(values, list)
+            for item in values
+            if isinstance(item, str)
+        ),
+        ["key", "item"],
+    ).drop_duplicates()
+    total = _count_by_row(items["row"], n)
+    unique = items.groupby("row")["item"].nunique().reindex(range(n), fill_value=0).to_numpy()
+    concrete = (items["item"].str.split().str.len() >= 2) & ~items["item"].str.contains(
+        "|".join(STEP1_BANNED_TERMS), regex=True
+    )
+
+    return [
+        (
+            "keys_exact",
+            pd.Series([set(k) == STEP1_REQUIRED_KEYS for k in keys]),
+            pd.Series([f"found={k}" for k in keys]),
+        ),
+        ("count_range", count_ok, pd.Series([f"counts={r}" for r in counts.to_numpy().tolist()])),
+        (
+            "no_overlaps",
+            pd.Series(unique == total),
+            pd.Series([f"unique={u} total={t}" for u, t in zip(unique, total, strict=True)]),
+        ),
+        ("subtopics_concrete", _all_by_row(concrete, items["row"], n), None),
+    ]
+
+
+def _catalog_entries(payload: Any) -> list[dict[str, Any]]:
+    """Step 2 catalog as the live step normalises it (dict entries, match_hint/code_pattern aliased)."""
+    if not isinstance(payload, dict) or not isinstance(payload.get("errors"), list):
+        return []
+    entries = []
+    for entry in payload["errors"]:
+        if not isinstance(entry, dict):
+            continue
+        entry = dict(entry)
+        if "match_hint" not in entry and "code_pattern" in entry:
+            entry["match_hint"] = entry["code_pattern"]
+        entries.append(entry)
+    return entries
+
+
+def _score_step2(frame: pd.DataFrame) -> Checks:
+    catalogs = [_catalog_entries(p) for p in frame["payload"]]
+    n = len(catalogs)
+    sizes = np.array([len(c) for c in catalogs], dtype=np.int64)
+
+    entries = _long(
+        (
+            (
+                row,
+                STEP2_REQUIRED_FIELDS <= entry.keys(),
+                entry.get("likelihood_strong_avoids") or 0,
+                entry.get("likelihood_weak_makes") or 0,
+                entry.get("impact"),
+                str(entry.get("mistake", "")),
+                entry.get("match_hint") if isinstance(entry.get("match_hint"), str) else None,
+            )
+            for row, catalog in enumerate(catalogs)
+            for entry in catalog
+        ),
+        ["has_fields", "strong", "weak", "impact", "mistake", "hint"],
+    )
+    rows = entries["row"]
+    strong = pd.to_numeric(entries["strong"], errors="coerce")
+    weak = pd.to_numeric(entries["weak"], errors="coerce")
+    mistakes = _text(entries["mistake"]).str.strip().str.lower()
+    distinct = mistakes.groupby(rows).nunique().reindex(range(n), fill_value=0).to_numpy() == sizes
+    hints = _text(entries["hint"].fillna("")).str.strip()
+    hint_ok = entries["hint"].notna() & (hints.str.len() >= 6) & ~hints.str.lower().isin(list(STEP2_GENERIC_HINTS))
+
+    return [
+        ("count_exact_6", pd.Series(sizes == 6), pd.Series([f"found={s}" for s in sizes])),
+        ("schema_fields", _all_by_row(entries["has_fields"].astype(bool), rows, n), None),
+        ("likelihood_ranges", _all_by_row(_in_range(strong, 0, 1) & _in_range(weak, 0, 1), rows, n), None),
+        ("impact_normalized", _all_by_row(entries["impact"].isin(list(STEP2_IMPACTS)), rows, n), None),
+        ("distinct_mistakes", pd.Series(distinct), None),
+        ("match_hint_present", _all_by_row(hint_ok, rows, n), None),
+    ]
+
+
+def _field(questions: list[dict[str, Any]], key: str, default: Any = "") -> pd.Series:
+    return pd.Series([q.get(key, default) for q in questions], dtype=object)
+
+
+def _text(values: Iterable[Any]) -> pd.Series:
+    """str() of every value (None -> "None", as the f-strings in analytics.rewards render it)."""
+    return pd.Series([str(v) for v in values], dtype=object)
+
+
+def _score_step3(frame: pd.DataFrame) -> Checks:
+    questions = _dicts(frame["payload"], frame["success"])
+    requirements = [len(r) if isinstance(r, list) else 0 for r in (q.get("requirements") for q in questions)]
+    artifacts = _field(questions, "artifact_type", None)
+    combined = (_text(_field(questions, "title")) + " " + _text(_field(questions, "question_text"))).str.lower()
+    preembedded = pd.Series(False, index=combined.index)
+    for term in STEP3_PREEMBEDDED_TERMS:
+        preembedded |= combined.str.contains(term, regex=False)
+
+    return [
+        ("fields_present", pd.Series([STEP3_REQUIRED_FIELDS <= q.keys() for q in questions], dtype=bool), None),
+        (
+            "requirements_count_4_6",
+            _in_range(requirements, 4, 6),
+            pd.Series([f"found={r}" for r in requirements], dtype=object),
+        ),
+        (
+            "artifact_type_valid",
+            artifacts.isin(list(STEP3_ARTIFACT_TYPES)),
+            pd.Series([f"found={a}" for a in artifacts], dtype=object),
+        ),
+        ("no_preembedded_mistakes", ~preembedded, None),
+        (
+            "success_criteria_present",
+            _text(_field(questions, "success_criteria")).str.strip().str.len() > 0,
+            None,
+        ),
+    ]
+
+
+def _score_step45(frame: pd.DataFrame) -> Checks:
+    texts = _text(frame["full_response"].fillna(""))
+    requirements = [r if isinstance(r, list) else [] for r in frame["requirements"]]
+    n = len(texts)
+
+    sections = pd.Series(True, index=texts.index)
+    for section in STEP45_SECTIONS:
+        sections &= texts.str.contains(section, regex=False)
+
+    lines = texts.str.split("\n").explode()
+    nonblank = lines[lines.fillna("").str.strip() != ""]
+    line_counts = _count_by_row(pd.Series(nonblank.index), n)
+
+    indexes = [TokenIndex(text) for text in texts]
+    tokens = _long(
+        (
+            (row, req, token)
+            for row, reqs in enumerate(requirements)
+            for req, r in enumerate(reqs)
+            for token in indexes[row].requirement_tokens(str(r))
+        ),
+        ["req", "token"],
+    )
+    found = pd.Series(
+        [token in indexes[row] for row, token in zip(tokens["row"], tokens["token"], strict=True)], dtype=bool
+    )
+    hits = (
+        found.groupby([tokens["row"], tokens["req"]]).any().groupby(level=0).sum().reindex(range(n), fill_value=0)
+        if len(tokens)
+        else pd.Series(0, index=range(n))
+    )
+    ratio = hits.to_numpy() / np.maximum(1, [len(r) for r in requirements])
+
+    return [
+        ("sections_present", sections, None),
+        ("length_24_120", _in_range(line_counts, 24, 120), pd.Series([f"lines={c}" for c in line_counts])),
+        ("coverage_soft>=0.5", pd.Series(ratio >= 0.5), pd.Series([f"coverage={r:.2f}" for r in ratio])),
+    ]
+
+
+def _score_step6(frame: pd.DataFrame) -> Checks:
+    judges = _dicts(frame["payload"], frame["success"])
+    n = len(judges)
+    known = [
+        {str(name).lower() for name in names} if isinstance(names, list) else set() for names in frame["catalog_names"]
+    ]
+    weak = [str(text).lower() for text in frame["weak_text"].fillna("")]
+
+    differentiated = np.array([j.get("differentiation_achieved") is True for j in judges])
+    failures = [j.get("failures_weaker") or [] for j in judges]
+    failures_present = np.array([bool(f) for f in failures])
+    subset = np.array([{str(name).strip().lower() for name in f} <= k for f, k in zip(failures, known, strict=True)])
+
+    evidence = _long(
+        (
+            (row, span.strip().lower() if isinstance(span, str) else None)
+            for row, j in enumerate(judges)
+            if isinstance(j.get("evidence_spans"), list)
+            for span in j["evidence_spans"]
+        ),
+        ["span"],
+    )
+    evidence_ok = pd.Series(
+        [
+            isinstance(span, str) and span in weak[row]
+            for row, span in zip(evidence["row"], evidence["span"], strict=True)
+        ],
+        dtype=bool,
+    )
+
+    return [
+        ("schema_core", pd.Series([STEP6_REQUIRED_CORE <= j.keys() for j in judges], dtype=bool), None),
+        ("failures_present", pd.Series(~differentiated | failures_present), None),
+        ("failures_subset_catalog", pd.Series(~differentiated | subset), None),
+        ("evidence_in_weak_text", _all_by_row(evidence_ok, evidence["row"], n), None),
+    ]
+
+
+def _assessment(payload: Any) -> dict[str, Any]:
+    """Step 7 reward input: the sanitized payload, or the raw model response of a failed attempt."""
+    if not isinstance(payload, dict):
+        return {}
+    if "validation_errors" in payload:
+        model_response = payload.get("model_response")
+        return model_response if isinstance(model_response, dict) else {}
+    return payload
+
+
+def _score_step7(frame: pd.DataFrame) -> Checks:
+    assessments = [_assessment(p) for p in frame["payload"]]
+    contents = []
+    for a in assessments:
+        lines = a.get("content")
+        if not isinstance(lines, list):
+            lines = a.get("code")
+        contents.append([str(line).rstrip("\r\n") for line in lines] if isinstance(lines, list) else [])
+    errors = [a["errors"] if isinstance(a.get("errors"), list) else [] for a in assessments]
+    n = len(assessments)
+
+    line_counts = np.array([len(c) for c in contents], dtype=np.int64)
+    error_counts = np.array([len(e) for e in errors], dtype=np.int64)
+    span_lengths = pd.Series(["\n".join(c) for c in contents], dtype=object).str.findall(SPAN_PATTERN).explode()
+    span_lengths = span_lengths.dropna().str.len()
+    span_rows = pd.Series(span_lengths.index)
+    span_counts = _count_by_row(span_rows, n)
+    ids = _long(
+        ((row, str(err.get("id", "")).strip()) for row, e in enumerate(errors) for err in e if isinstance(err, dict)),
+        ["id"],
+    )
+    id_counts = _count_by_row(ids["row"], n)
+    distinct_ids = ids.groupby("row")["id"].nunique().reindex(range(n), fill_value=0).to_numpy()
+
+    return [
+        ("line_count_24_60", _in_range(line_counts, *STEP7_LINE_RANGE), pd.Series([f"lines={c}" for c in line_counts])),
+        (
+            "error_count_1_5",
+            _in_range(error_counts, *STEP7_ERROR_RANGE),
+            pd.Series([f"errors={c}" for c in error_counts]),
+        ),
+        (
+            "spans_match_errors_len",
+            pd.Series(span_counts == error_counts),
+            pd.Series([f"spans={s} errors={e}" for s, e in zip(span_counts, error_counts, strict=True)]),
+        ),
+        (
+            "span_lengths_10_120",
+            _all_by_row(_in_range(span_lengths.to_numpy(), *STEP7_SPAN_RANGE), span_rows, n),
+            None,
+        ),
+        ("ids_unique", pd.Series(distinct_ids == id_counts), None),
+    ]
+
+
+SCORERS = {
+    1: _score_step1,
+    2: _score_step2,
+    3: _score_step3,
+    4: _score_step45,
+    5: _score_step45,
+    6: _score_step6,
+    7: _score_step7,
+}
+
+
+def _add_run_context(frame: pd.DataFrame) -> pd.DataFrame:
+    """Carry Step 3 requirements, Step 2 catalog names and the Step 5 response forward within each run."""
+    step, ok = frame["step_number"], frame["success"]
+    questions = frame["payload"].where((step == 3) & ok)
+    catalogs = frame["payload"].where((step == 2) & ok)
+    frame = frame.assign(
+        requirements=questions.map(lambda q: (q.get("requirements") or []) if isinstance(q, dict) else np.nan),
+        catalog_names=catalogs.map(
+            lambda c: (
+                [str(e.get("mistake", "")).strip() for e in _catalog_entries(c)] if isinstance(c, dict) else np.nan
+            )
+        ),
+        weak_text=frame["full_response"].where(step == 5),
+    )
+    context = ["requirements", "catalog_names", "weak_text"]
+    frame[context] = frame.groupby("run_timestamp", sort=False)[context].ffill()
+    return frame
+
+
+def _details_json(checks: Checks) -> list[str]:
+    names = [name for name, _, _ in checks]
+    passed = [flags.to_numpy(dtype=bool).tolist() for _, flags, _ in checks]
+    details = [detail.tolist() if detail is not None else None for _, _, detail in checks]
+    out = []
+    for i in range(len(passed[0]) if passed else 0):
+        out.append(
+            json.dumps(
+                [
+                    {"name": name, "passed": flags[i], "detail": detail[i] if detail is not None else ""}
+                    for name, flags, detail in zip(names, passed, details, strict=True)
+                ]
+            )
+        )
+    return out
+
+
+def score_frame(frame: pd.DataFrame) -> pd.DataFrame:
+    """
+    Score a frame of step responses (STEP_COLUMNS, whole runs, ordered by run then id).
+
+    Returns:
+        DataFrame with REWARD_COLUMNS, one row per scored step response
+    """
+    if frame.empty:
+        return pd.DataFrame(columns=REWARD_COLUMNS)
+    frame = frame.reset_index(drop=True)
+    frame["success"] = frame["success"].astype(bool)
+    # Steps 4-5 are free text; only the structured steps need decoding
+    structured = ~frame["step_number"].isin(TEXT_STEPS)
+    frame["payload"] = None
+    frame.loc[structured, "payload"] = pd.Series(
+        [parse_response(text) for text in frame.loc[structured, "full_response"]],
+        index=frame.index[structured],
+        dtype=object,
+    )
+    frame = _add_run_context(frame)
+
+    scored = []
+    for step, scorer in SCORERS.items():
+        part = frame[frame["step_number"] == step].reset_index(drop=True)
+        if part.empty:
+            continue
+        checks = scorer(part)
+        passed = np.column_stack([flags.to_numpy(dtype=bool) for _, flags, _ in checks])
+        scored.append(
+            pd.DataFrame(
+                {
+                    "step_response_id": part["id"],
+                    "run_timestamp": part["run_timestamp"],
+                    "step_number": step,
+                    "pass_rate": passed.mean(axis=1),
+                    "num_tests": len(checks),
+                    "detail_json": _details_json(checks),
+                }
+            )
+        )
+    if not scored:
+        return pd.DataFrame(columns=REWARD_COLUMNS)
+    return pd.concat(scored, ignore_index=True).sort_values("step_response_id", kind="stable")
+
+
+def iter_run_frames(batches: Iterable[Sequence[tuple[Any, ...]]]) -> Iterator[pd.DataFrame]:
+    """Regroup streamed row batches so no run is split between two frames."""
+    carry = pd.DataFrame(columns=STEP_COLUMNS)
+    for batch in batches:
+        frame = pd.DataFrame(list(batch), columns=STEP_COLUMNS)
+        frame = pd.concat([carry, frame], ignore_index=True) if len(carry) else frame
+        last_run = frame["run_timestamp"].iloc[-1]
+        tail = frame["run_timestamp"] == last_run
+        carry = frame[tail]
+        if (~tail).any():
+            yield frame[~tail]
+    if len(carry):
+        yield carry
+
+
+def rescore(repo: Any, reward_version: str, batch_size: int = 10_000, dry_run: bool = False) -> dict[str, Any]:
+    """
+    Re-score every stored step response and write the results under `reward_version`.
+
+    Args:
+        repo: persistence.repo.Repo
+        reward_version: Label stored in step_rewards.reward_version
+        batch_size: Rows fetched per round trip
+        dry_run: Score without writing
+
+    Returns:
+        Summary with row counts, mean pass rate per step and elapsed seconds
+    """
+    start = time.perf_counter()
+    scored_rows = written = 0
+    totals: dict[int, list[float]] = {}
+    for frame in iter_run_frames(repo.iter_step_responses(batch_size=batch_size)):
+        rewards = score_frame(frame)
+        scored_rows += len(rewards)
+        for step, rates in rewards.groupby("step_number")["pass_rate"]:
+            acc = totals.setdefault(int(step), [0.0, 0])
+            acc[0] += float(rates.sum())
+            acc[1] += len(rates)
+        if not dry_run:
+            # Series.tolist() yields Python scalars, which every DB driver can bind
+            rows = zip(*(rewards[column].tolist() for column in REWARD_COLUMNS), strict=True)
+            written += repo.save_rewards_batch(rows, reward_version)
+
+    elapsed = time.perf_counter() - start
+    logger.info(f"Re-scored {scored_rows} step responses as '{reward_version}' in {elapsed:.1f}s")
+    return {
+        "reward_version": reward_version,
+        "scored": scored_rows,
+        "written": written,
+        "mean_pass_rate": {step: round(total / count, 4) for step, (total, count) in sorted(totals.items())},
+        "elapsed_s": round(elapsed, 2),
+    }
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    from persistence.repo import Repo
+
+    parser = argparse.ArgumentParser(description="Re-score stored step responses with the current reward rules")
+    parser.add_argument("--version", required=True, help="reward_version label for the new step_rewards rows")
+    parser.add_argument("--db-url", default=None, help="Database URL or SQLite path (default: DATABASE_URL)")
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    parser.add_argument("--dry-run", action="store_true", help="Score without writing step_rewards rows")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    summary = rescore(Repo(args.db_url), args.version, batch_size=args.batch_size, dry_run=args.dry_run)
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""
+Error-catalog knowledge base.
+
+Every Step 2 catalog and every set of weak-model failures reported by the
+Step 6 judge is stored under a normalised key (lower-cased words, punctuation
+dropped), so "Off-by-one in loop bounds." and "off by one in loop bounds" count
+as the same mistake. A mistake is "proven" once the weak model has actually
+made it.
+
+top_mistakes() finds the stored subtopics of a topic that resemble the
+requested subtopic (character n-gram TF-IDF, so "LRU eviction" matches
+"LRU cache eviction policy"), merges near-identical mistakes and ranks them
+by how often they were proven. With enough proven mistakes, Step 2 reuses them
+instead of calling the model.
+
+Counting is done by the database (Repo.catalog_summary / Repo.failure_stats),
+so statistics over millions of rows never load the rows into memory.
+
+Enabled in the pipeline with AQU_CATALOG_KB=1:
+- AQU_CATALOG_KB_MIN_PROVEN: times a mistake must have been made before Step 2 may reuse it (default 1)
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import math
+import os
+import re
+from collections import Counter
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+# model_used / provider recorded for a Step 2 served from the knowledge base
+CATALOG_KB_MODEL = "error-catalog-kb"
+
+
+def normalize_key(text: Any) -> str:
+    """Lower-cased words separated by single spaces; punctuation and case differences vanish."""
+    return " ".join(_WORD.findall(str(text).lower()))
+
+
+def char_ngrams(text: str, n: int = 3) -> Counter:
+    """Character n-gram counts of the normalised text, padded so word edges count."""
+    padded = f" {normalize_key(text)} "
+    return Counter(padded[i : i + n] for i in range(max(0, len(padded) - n + 1)))
+
+
+class CharNgramIndex:
+    """
+    TF-IDF cosine similarity over character n-grams.
+
+    Args:
+        texts: Documents to index; search results refer to them by position
+        n: n-gram length
+    """
+
+    def __init__(self, texts: Sequence[str], n: int = 3):
+        self.texts = list(texts)
+        self.n = n
+        counts = [char_ngrams(text, n) for text in self.texts]
+        document_frequency = Counter(gram for grams in counts for gram in grams)
+        total = len(self.texts)
+        self.idf = {gram: math.log((1 + total) / (1 + df)) + 1 for gram, df in document_frequency.items()}
+        self._unseen_idf = math.log(1 + total) + 1
+        self.vectors = [self._vector(grams) for grams in counts]
+        self.postings: dict[str, list[int]] = {}
+        for position, vector in enumerate(self.vectors):
+            for gram in vector:
+                self.postings.setdefault(gram, []).append(position)
+
+    def _vector(self, grams: Counter) -> dict[str, float]:
+        weights = {gram: count * self.idf.get(gram, self._unseen_idf) for gram, count in grams.items()}
+        norm = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+        return {gram: w / norm for gram, w in weights.items()}
+
+    def search(self, text: str, k: int = 5, min_score: float = 0.0) -> list[tuple[int, float]]:
+        """Up to k (position, cosine) pairs, best first."""
+        query = self._vector(char_ngrams(text, self.n))
+        scores: dict[int, float] = {}
+        for gram, weight in query.items():
+            for position in self.postings.get(gram, ()):
+                scores[position] = scores.get(position, 0.0) + weight * self.vectors[position][gram]
+        ranked = sorted(((p, s) for p, s in scores.items() if s >= min_score), key=lambda item: (-item[1], item[0]))
+        return ranked[:k]
+
+
+@dataclass(frozen=True)
+class ProvenMistake:
+    """A stored catalog mistake ranked for a (topic, subtopic) lookup."""
+
+    key: str
+    entry: dict[str, Any]
+    subtopic: str
+    similarity: float  # of the stored subtopic to the requested one
+    seen: int  # catalogs that listed it
+    proven: int  # times the weak model made it
+
+    @property
+    def score(self) -> float:
+        return self.similarity * (self.proven + 0.1 * self.seen)
+
+
+@dataclass(frozen=True)
+class FailureStat:
+    """Aggregate count of one normalised weak-model failure."""
+
+    key: str
+    occurrences: int
+    runs: int
+    example: str
+
+
+class ErrorCatalogKB:
+    """
+    Persisted error-catalog entries and weak-model failures with similarity lookup.
+
+    Args:
+        repo: persistence.repo.Repo holding the catalog tables
+        min_similarity: Lowest subtopic similarity whose mistakes are considered
+        merge_similarity: Mistake keys at least this similar are merged into one
+        min_proven: Times a mistake must have been made to count as proven
+    """
+
+    def __init__(self, repo: Any, min_similarity: float = 0.35, merge_similarity: float = 0.8, min_proven: int = 1):
+        self.repo = repo
+        self.min_similarity = min_similarity
+        self.merge_similarity = merge_similarity
+        self.min_proven = min_proven
+
+    @classmethod
+    def from_env(cls, db_url: str | None = None, repo: Any | None = None) -> ErrorCatalogKB | None:
+        if os.getenv("AQU_CATALOG_KB", "").lower() not in ("1", "true", "yes"):
+            return None
+        if repo is None:
+            from persistence.repo import Repo
+
+            repo = Repo(db_url)
+        min_proven = int(os.getenv("AQU_CATALOG_KB_MIN_PROVEN", "1"))
+        logger.info(f"Error-catalog knowledge base enabled (min proven {min_proven})")
+        return cls(repo, min_proven=min_proven)
+
+    def record_catalog(
+        self, run_timestamp: str, topic: str, subtopic: str, difficulty: str, errors: Iterable[dict[str, Any]]
+    ) -> int:
+        """Store a Step 2 catalog; entries without a mistake name are skipped."""
+        entries = [
+            (normalize_key(entry["mistake"]), json.dumps(entry, ensure_ascii=False, sort_keys=True))
+            for entry in errors
+            if isinstance(entry, dict) and normalize_key(entry.get("mistake", ""))
+        ]
+        return self.repo.save_catalog_entries(run_timestamp, topic, subtopic, difficulty, entries)
+
+    def record_failures(self, run_timestamp: str, topic: str, subtopic: str, failures: Iterable[Any]) -> int:
+        """Store the weak-model failures named by the judge."""
+        pairs = [(normalize_key(failure), str(failure)) for failure in failures if normalize_key(failure)]
+        return self.repo.save_weak_failures(run_timestamp, topic, subtopic, pairs)
+
+    def top_mistakes(self, topic: str, subtopic: str, limit: int = 6) -> list[ProvenMistake]:
+        """Best stored mistakes for a subtopic of this topic, proven ones first."""
+        rows = self.repo.catalog_summary(topic)
+        if not rows:
+            return []
+
+        subtopics = sorted({row[0] for row in rows})
+        subtopic_index = CharNgramIndex(subtopics)
+        similarity = {
+            subtopics[position]: score
+            for position, score in subtopic_index.search(subtopic, k=len(subtopics), min_score=self.min_similarity)
+        }
+
+        candidates = [
+            ProvenMistake(key, json.loads(entry_json), stored_subtopic, similarity[stored_subtopic], seen, proven)
+            for stored_subtopic, key, seen, proven, entry_json in rows
+            if stored_subtopic in similarity
+        ]
+        candidates.sort(key=lambda m: (-m.score, -m.proven, m.key))
+
+        # Greedy merge: skip mistakes that are near-identical to one already chosen
+        key_index = CharNgramIndex([m.key for m in candidates])
+        chosen: list[ProvenMistake] = []
+        chosen_positions: set[int] = set()
+        for position, mistake in enumerate(candidates):
+            similar = key_index.search(mistake.key, k=len(candidates), min_score=self.merge_similarity)
+            if any(other in chosen_positions for other, _ in similar):
+                continue
+            chosen.append(mistake)
+            chosen_positions.add(position)
+            if len(chosen) == limit:
+                break
+        return chosen
+
+    def proven_catalog(self, topic: str, subtopic: str, size: int = 6) -> list[dict[str, Any]] | None:
+        """A full Step 2 catalog of proven mistakes, or None if there are not enough."""
+        proven = [m for m in self.top_mistakes(topic, subtopic, limit=size) if m.proven >= self.min_proven]
+        if len(proven) < size:
+            return None
+        return [dict(m.entry) for m in proven]
+
+    def failure_stats(self, topic: str | None = None, limit: int = 20) -> list[FailureStat]:
+        """Most frequent weak-model failures across all stored runs (optionally one topic)."""
+        return [FailureStat(*row) for row in self.repo.failure_stats(topic, limit)]
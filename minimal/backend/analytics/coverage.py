@@ -0,0 +1,101 @@
+"""
+Token-based requirement coverage.
+
+rewards_step45 asks whether a model response mentions each Step 3
+requirement. A TokenIndex tokenises the response once into a set of
+normalised words (lower-cased, optionally stemmed, stop words dropped), so each
+requirement token costs one set lookup and "cat" no longer matches inside
+"concatenate". The same index is used by the batch re-scorer.
+"""
+
+from __future__ import annotations
+
+import re
+from collections.abc import Iterable
+from functools import lru_cache
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+STOP_WORDS = frozenset(
+    {
+        "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "have", "in", "into", "is",
+        "it", "its", "of", "on", "or", "should", "that", "the", "their", "this", "to", "with", "must", "use",
+        "using", "all", "any", "each",
+    }
+)  # fmt: skip
+
+# "es" is a plural ending only after a sibilant (caches, boxes, processes); elsewhere only the "s" is
+_SIBILANT_ES = ("ses", "xes", "zes", "ches", "shes")
+# Words ending in these are already singular (class, process, status)
+_SINGULAR_S = ("ss", "us")
+
+# Ordered (suffix, replacement) rules applied after plurals are removed; the first one
+# leaving a stem of >= 3 characters wins
+_SUFFIXES = (
+    ("ation", "at"),
+    ("ing", ""),
+    ("ed", ""),
+    ("ly", ""),
+    ("e", ""),
+)
+
+
+def _singular(word: str) -> str:
+    if word.endswith("ies") and len(word) >= 6:
+        return word[:-3] + "y"
+    if word.endswith(_SIBILANT_ES) and len(word) >= 5:
+        return word[:-2]
+    if word.endswith("s") and not word.endswith(_SINGULAR_S) and len(word) >= 4:
+        return word[:-1]
+    return word
+
+
+@lru_cache(maxsize=8192)
+def stem(word: str) -> str:
+    """Light suffix-stripping stemmer (caching/cached/caches/cache -> cach, classes/class -> class)."""
+    word = _singular(word)
+    for suffix, replacement in _SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            return word[: len(word) - len(suffix)] + replacement
+    return word
+
+
+def tokenize(text: str, *, use_stemming: bool = True, stop_words: frozenset[str] = STOP_WORDS) -> list[str]:
+    """Lower-case word tokens with stop words removed (and stemmed if requested)."""
+    words = (word for word in _WORD.findall(str(text).lower()) if word not in stop_words)
+    return [stem(word) for word in words] if use_stemming else list(words)
+
+
+class TokenIndex:
+    """
+    Set of normalised tokens in a piece of text.
+
+    Args:
+        text: Text to index (tokenised once)
+        use_stemming: Reduce words to a common stem before matching
+        stop_words: Words ignored on both sides of the match
+    """
+
+    __slots__ = ("tokens", "use_stemming", "stop_words")
+
+    def __init__(self, text: str, *, use_stemming: bool = True, stop_words: frozenset[str] = STOP_WORDS):
+        self.use_stemming = use_stemming
+        self.stop_words = stop_words
+        self.tokens = frozenset(tokenize(text, use_stemming=use_stemming, stop_words=stop_words))
+
+    def __contains__(self, token: str) -> bool:
+        return token in self.tokens
+
+    def requirement_tokens(self, requirement: str) -> list[str]:
+        """A requirement normalised the same way as the indexed text."""
+        return tokenize(requirement, use_stemming=self.use_stemming, stop_words=self.stop_words)
+
+    def covers(self, requirement: str) -> bool:
+        """True if any content word of the requirement appears in the text."""
+        return any(token in self.tokens for token in self.requirement_tokens(requirement))
+
+    def coverage(self, requirements: Iterable[str]) -> float:
+        """Fraction of requirements covered (0.0 when there are none)."""
+        requirements = list(requirements)
+        hits = sum(1 for requirement in requirements if self.covers(str(requirement)))
+        return hits / max(1, len(requirements))
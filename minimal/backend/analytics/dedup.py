@@ -0,0 +1,308 @@
+"""
+Near-duplicate detection for generated questions and assessments.
+
+Texts are normalised (lower-cased, << >> markers and punctuation dropped),
+split into word shingles and summarised by a MinHash signature. Signatures are
+banded for locality-sensitive hashing, so a lookup only compares the handful of
+stored items that share a band bucket; candidates are then kept if their
+estimated Jaccard similarity reaches the threshold.
+
+The index is a small SQLite file kept next to pipeline_results.db. The
+orchestrator checks each Step 3 question against it before Steps 4-7 run and
+records every served question and assessment. Export tools use dedupe() with
+an in-memory index.
+
+Enabled in the pipeline with AQU_DEDUP=1:
+- AQU_DEDUP_THRESHOLD: estimated Jaccard similarity that counts as a duplicate (default 0.8)
+- AQU_DEDUP_ACTION:    "reseed" retries Step 3 with feedback, "reject" stops the run (default reseed)
+- AQU_DEDUP_PATH:      index file (default backend/dedup_index.sqlite)
+
+Backfill from stored runs:
+    python -m analytics.dedup --db-url pipeline_results.db [--index PATH]
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import logging
+import os
+import random
+import re
+import sqlite3
+import struct
+import threading
+import time
+from collections.abc import Callable, Iterable, Sequence
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, TypeVar
+
+from observability.metrics import DEDUP_CHECKS
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_INDEX_PATH = BASE_DIR / "dedup_index.sqlite"
+
+KIND_QUESTION = "question"
+KIND_ASSESSMENT = "assessment"
+DEDUP_ACTIONS = ("reseed", "reject")
+
+_WORD = re.compile(r"[a-z0-9]+")
+_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+T = TypeVar("T")
+
+
+def question_text(question: dict[str, Any]) -> str:
+    """The part of a Step 3 question that identifies it (title and question text)."""
+    return f"{question.get('title', '')}\n{question.get('question_text', '')}"
+
+
+def assessment_text(assessment: dict[str, Any]) -> str:
+    """Step 7 assessment content as one string."""
+    content = assessment.get("content") or assessment.get("code") or []
+    return "\n".join(str(line) for line in content) if isinstance(content, list) else str(content)
+
+
+def shingles(text: str, size: int = 3) -> set[str]:
+    """Overlapping word n-grams of normalised text (the whole text if it is shorter)."""
+    words = _WORD.findall(str(text).lower())
+    if len(words) <= size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i : i + size]) for i in range(len(words) - size + 1)}
+
+
+def _hash32(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=4).digest(), "little")
+
+
+@dataclass(frozen=True)
+class Match:
+    """A stored item similar to the query text."""
+
+    key: str
+    similarity: float
+    topic: str = ""
+
+
+class DedupIndex:
+    """
+    MinHash/LSH index of question and assessment texts, stored in SQLite.
+
+    Args:
+        path: SQLite file (":memory:" for a throwaway index)
+        threshold: Estimated Jaccard similarity at or above which texts are duplicates
+        num_perm: MinHash signature length
+        bands: LSH bands (num_perm must divide evenly); more bands find lower similarities
+        shingle_size: Words per shingle
+    """
+
+    def __init__(
+        self,
+        path: str | Path = DEFAULT_INDEX_PATH,
+        threshold: float = 0.8,
+        num_perm: int = 64,
+        bands: int = 16,
+        shingle_size: int = 3,
+    ):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+        if not 0.0 < threshold <= 1.0:
+            raise ValueError(f"threshold must be in (0, 1], got {threshold}")
+        self.path = str(path)
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        # Fixed seed: signatures must be comparable across processes and restarts
+        rng = random.Random(1)
+        self._perms = [(rng.randrange(1, _PRIME), rng.randrange(0, _PRIME)) for _ in range(num_perm)]
+        self._lock = threading.Lock()
+
+        if self.path != ":memory:":
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        with self._lock, self._conn:
+            if self.path != ":memory:":
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS signatures (
+                    kind TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    topic TEXT NOT NULL DEFAULT '',
+                    signature BLOB NOT NULL,
+                    created_at REAL NOT NULL,
+                    PRIMARY KEY (kind, key)
+                )
+                """
+            )
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS buckets (
+                    kind TEXT NOT NULL,
+                    band INTEGER NOT NULL,
+                    bucket INTEGER NOT NULL,
+                    key TEXT NOT NULL
+                )
+                """
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_buckets_lookup ON buckets(kind, band, bucket)")
+
+    @classmethod
+    def from_env(cls, default_path: str | Path = DEFAULT_INDEX_PATH) -> DedupIndex | None:
+        if os.getenv("AQU_DEDUP", "").lower() not in ("1", "true", "yes"):
+            return None
+        threshold = float(os.getenv("AQU_DEDUP_THRESHOLD", "0.8"))
+        path = os.getenv("AQU_DEDUP_PATH") or default_path
+        logger.info(f"Near-duplicate index enabled at {path} (threshold {threshold:g})")
+        return cls(path, threshold=threshold)
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def signature(self, text: str) -> tuple[int, ...]:
+        """MinHash signature of the text's shingles (all max values for empty text)."""
+        hashes = [_hash32(shingle) for shingle in shingles(text, self.shingle_size)]
+        if not hashes:
+            return (_MAX_HASH,) * self.num_perm
+        return tuple(min(((a * h + b) % _PRIME) & _MAX_HASH for h in hashes) for a, b in self._perms)
+
+    def _band_buckets(self, signature: Sequence[int]) -> list[tuple[int, int]]:
+        buckets = []
+        for band in range(self.bands):
+            chunk = signature[band * self.rows : (band + 1) * self.rows]
+            digest = hashlib.blake2b(struct.pack(f"<{self.rows}I", *chunk), digest_size=8).digest()
+            buckets.append((band, int.from_bytes(digest, "little", signed=True)))
+        return buckets
+
+    def _pack(self, signature: Sequence[int]) -> bytes:
+        return struct.pack(f"<{self.num_perm}I", *signature)
+
+    def _unpack(self, blob: bytes) -> tuple[int, ...]:
+        return struct.unpack(f"<{self.num_perm}I", blob)
+
+    def query(self, kind: str, text: str, threshold: float | None = None) -> list[Match]:
+        """Stored items of this kind at or above the threshold, most similar first."""
+        threshold = self.threshold if threshold is None else threshold
+        signature = self.signature(text)
+        with self._lock:
+            candidates: set[str] = set()
+            for band, bucket in self._band_buckets(signature):
+                rows = self._conn.execute(
+                    "SELECT key FROM buckets WHERE kind = ? AND band = ? AND bucket = ?", (kind, band, bucket)
+                )
+                candidates.update(key for (key,) in rows)
+            stored = [
+                self._conn.execute(
+                    "SELECT key, topic, signature FROM signatures WHERE kind = ? AND key = ?", (kind, key)
+                ).fetchone()
+                for key in candidates
+            ]
+        matches = []
+        for key, topic, blob in filter(None, stored):
+            other = self._unpack(blob)
+            similarity = sum(1 for x, y in zip(signature, other, strict=True) if x == y) / self.num_perm
+            if similarity >= threshold:
+                matches.append(Match(key, similarity, topic))
+        return sorted(matches, key=lambda match: (-match.similarity, match.key))
+
+    def find_duplicate(self, kind: str, text: str) -> Match | None:
+        """The closest stored near-duplicate, if any."""
+        matches = self.query(kind, text)
+        DEDUP_CHECKS.inc(kind=kind, result="duplicate" if matches else "unique")
+        return matches[0] if matches else None
+
+    def add(self, kind: str, key: str, text: str, topic: str = "") -> None:
+        """Store (or replace) an item's signature and its LSH buckets."""
+        signature = self.signature(text)
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM buckets WHERE kind = ? AND key = ?", (kind, key))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO signatures (kind, key, topic, signature, created_at) VALUES (?, ?, ?, ?, ?)",
+                (kind, key, topic, self._pack(signature), time.time()),
+            )
+            self._conn.executemany(
+                "INSERT INTO buckets (kind, band, bucket, key) VALUES (?, ?, ?, ?)",
+                [(kind, band, bucket, key) for band, bucket in self._band_buckets(signature)],
+            )
+
+    def count(self, kind: str) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM signatures WHERE kind = ?", (kind,)).fetchone()[0]
+
+
+def dedupe(
+    items: Iterable[T],
+    text_of: Callable[[T], str],
+    threshold: float = 0.8,
+    seen: Iterable[T] = (),
+) -> tuple[list[T], list[T]]:
+    """
+    Split items into (kept, dropped), dropping near-duplicates of earlier items.
+
+    Items in `seen` (e.g. assessments already exported) count as earlier items
+    but are not returned.
+    """
+    index = DedupIndex(":memory:", threshold=threshold)
+    try:
+        for position, item in enumerate(seen):
+            index.add("item", f"seen-{position}", text_of(item))
+        kept, dropped = [], []
+        for position, item in enumerate(items):
+            text = text_of(item)
+            if index.query("item", text):
+                dropped.append(item)
+                continue
+            index.add("item", f"new-{position}", text)
+            kept.append(item)
+        return kept, dropped
+    finally:
+        index.close()
+
+
+def backfill(repo: Any, index: DedupIndex, batch_size: int = 10_000) -> dict[str, int]:
+    """Index every successful Step 3 question and Step 7 assessment stored in the repo."""
+    from .batch_rewards import parse_response
+
+    added = {KIND_QUESTION: 0, KIND_ASSESSMENT: 0}
+    for batch in repo.iter_step_responses(batch_size=batch_size):
+        for _, run_timestamp, step_number, success, full_response in batch:
+            if not success or step_number not in (3, 7):
+                continue
+            payload = parse_response(full_response)
+            if not isinstance(payload, dict):
+                continue
+            if step_number == 3:
+                index.add(KIND_QUESTION, run_timestamp, question_text(payload))
+                added[KIND_QUESTION] += 1
+            else:
+                index.add(KIND_ASSESSMENT, run_timestamp, assessment_text(payload))
+                added[KIND_ASSESSMENT] += 1
+    return added
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Build the near-duplicate index from stored pipeline runs.")
+    parser.add_argument("--db-url", default=None, help="Database URL or SQLite path (default: DATABASE_URL)")
+    parser.add_argument("--index", default=str(DEFAULT_INDEX_PATH), help="Index file to write")
+    parser.add_argument("--threshold", type=float, default=0.8)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    from persistence.repo import Repo
+
+    index = DedupIndex(args.index, threshold=args.threshold)
+    try:
+        added = backfill(Repo(args.db_url), index)
+    finally:
+        index.close()
+    logger.info(f"Indexed {added[KIND_QUESTION]} questions and {added[KIND_ASSESSMENT]} assessments into {args.index}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,26 @@
-import re
 from dataclasses import dataclass
 from typing import Any
 
+from .coverage import TokenIndex
+from .spans import scan_spans
+
+# Rule constants shared with the batch scorer (analytics.batch_rewards)
+STEP1_REQUIRED_KEYS = frozenset({"Beginner", "Intermediate", "Advanced"})
+STEP1_BANNED_TERMS = ("overview", "introduction", "basics", "general", "misc")
+STEP2_REQUIRED_FIELDS = frozenset(
+    {"mistake", "why_wrong", "match_hint", "impact", "domain_specific", "likelihood_strong_avoids", "likelihood_weak_makes"}
+)
+STEP2_IMPACTS = frozenset({"Minor", "Moderate", "Major"})
+STEP2_GENERIC_HINTS = frozenset({"bad", "wrong", "error", "issue"})
+STEP3_REQUIRED_FIELDS = frozenset({"title", "question_text", "context", "artifact_type", "requirements", "success_criteria"})
+STEP3_ARTIFACT_TYPES = frozenset({"code", "prose", "math", "email", "table", "diagram", "plan", "pseudo", "query", "other"})
+STEP3_PREEMBEDDED_TERMS = ("<<", "fix the", "bug")
+STEP45_SECTIONS = ("### OUTPUT", "### RATIONALE", "### CONSIDERATIONS")
+STEP6_REQUIRED_CORE = frozenset({"differentiation_achieved", "failures_weaker", "reasoning"})
+STEP7_LINE_RANGE = (24, 60)
+STEP7_ERROR_RANGE = (1, 5)
+STEP7_SPAN_RANGE = (10, 120)
+
 
 @dataclass
 class RewardResult:
@@ -24,7 +43,7 @@ class StepRewardsReport:
 
 def rewards_step1(categories: dict[str, list[str]]) -> StepRewardsReport:
     categories = categories or {}
-    required_keys = {"Beginner", "Intermediate", "Advanced"}
+    required_keys = STEP1_REQUIRED_KEYS
     results: list[RewardResult] = []
 
     key_set = set(categories.keys())
@@ -41,7 +60,7 @@ def rewards_step1(categories: dict[str, list[str]]) -> StepRewardsReport:
     total_items = sum(len(v) for v in lowered.values())
     results.append(RewardResult("no_overlaps", len(union) == total_items, f"unique={len(union)} total={total_items}"))
 
-    banned_terms = {"overview", "introduction", "basics", "general", "misc"}
+    banned_terms = STEP1_BANNED_TERMS
     concrete = True
     for items in lowered.values():
         for item in items:
@@ -61,7 +80,7 @@ def rewards_step2(error_catalog: list[dict[str, Any]]) -> StepRewardsReport:
 
     results.append(RewardResult("count_exact_6", len(errors) == 6, f"found={len(errors)}"))
 
-    required_fields = {"mistake", "why_wrong", "match_hint", "impact", "domain_specific", "likelihood_strong_avoids", "likelihood_weak_makes"}
+    required_fields = STEP2_REQUIRED_FIELDS
     field_check = all(required_fields <= set(entry.keys()) for entry in errors if isinstance(entry, dict))
     results.append(RewardResult("schema_fields", field_check))
 
@@ -72,13 +91,13 @@ def rewards_step2(error_catalog: list[dict[str, Any]]) -> StepRewardsReport:
     )
     results.append(RewardResult("likelihood_ranges", likelihood_ok))
 
-    impacts_ok = all(entry.get("impact") in {"Minor", "Moderate", "Major"} for entry in errors if isinstance(entry, dict))
+    impacts_ok = all(entry.get("impact") in STEP2_IMPACTS for entry in errors if isinstance(entry, dict))
     results.append(RewardResult("impact_normalized", impacts_ok))
 
     mistake_names = [str(entry.get("mistake", "")).strip().lower() for entry in errors if isinstance(entry, dict)]
     results.append(RewardResult("distinct_mistakes", len(set(mistake_names)) == len(mistake_names)))
 
-    generic = {"bad", "wrong", "error", "issue"}
+    generic = STEP2_GENERIC_HINTS
     hint_quality = all(
         isinstance(entry.get("match_hint"), str) and len(entry["match_hint"].strip()) >= 6 and
         entry["match_hint"].strip().lower() not in generic
@@ -92,7 +111,7 @@ def rewards_step2(error_catalog: list[dict[str, Any]]) -> StepRewardsReport:
 def rewards_step3(question: dict[str, Any]) -> StepRewardsReport:
     question = question or {}
     results: list[RewardResult] = []
-    required_fields = {"title", "question_text", "context", "artifact_type", "requirements", "success_criteria"}
+    required_fields = STEP3_REQUIRED_FIELDS
     results.append(RewardResult("fields_present", required_fields <= set(question.keys())))
 
     requirements = question.get("requirements") or []
@@ -100,12 +119,12 @@ def rewards_step3(question: dict[str, Any]) -> StepRewardsReport:
         requirements = []
     results.append(RewardResult("requirements_count_4_6", 4 <= len(requirements) <= 6, f"found={len(requirements)}"))
 
-    valid_artifacts = {"code", "prose", "math", "email", "table", "diagram", "plan", "pseudo", "query", "other"}
+    valid_artifacts = STEP3_ARTIFACT_TYPES
     artifact_ok = question.get("artifact_type") in valid_artifacts
     results.append(RewardResult("artifact_type_valid", artifact_ok, f"found={question.get('artifact_type')}"))
 
     combined_text = f"{question.get('title', '')} {question.get('question_text', '')}".lower()
-    preembedded = any(term in combined_text for term in ("<<", "fix the", "bug"))
+    preembedded = any(term in combined_text for term in STEP3_PREEMBEDDED_TERMS)
     results.append(RewardResult("no_preembedded_mistakes", not preembedded))
 
     success_criteria_ok = bool(str(question.get("success_criteria", "")).strip())
@@ -119,18 +138,13 @@ def rewards_step45(output_text: str, requirements: list[str]) -> StepRewardsRepo
     requirements = requirements or []
 
     results: list[RewardResult] = []
-    sections_present = all(section in output_text for section in ("### OUTPUT", "### RATIONALE", "### CONSIDERATIONS"))
+    sections_present = all(section in output_text for section in STEP45_SECTIONS)
     results.append(RewardResult("sections_present", sections_present))
 
     lines = [line for line in output_text.splitlines() if line.strip()]
     results.append(RewardResult("length_24_120", 24 <= len(lines) <= 120, f"lines={len(lines)}"))
 
-    hits = 0
-    for req in requirements:
-        tokens = str(req).split()
-        if any(tok.lower() in output_text.lower() for tok in tokens):
-            hits += 1
-    coverage_ratio = hits / max(1, len(requirements))
+    coverage_ratio = TokenIndex(output_text).coverage(requirements)
     results.append(RewardResult("coverage_soft>=0.5", coverage_ratio >= 0.5, f"coverage={coverage_ratio:.2f}"))
 
     return StepRewardsReport(step=45, results=results)
@@ -142,7 +156,7 @@ def rewards_step6(judge_obj: dict[str, Any], known_mistake_names: list[str], wea
     weak_text = weak_text or ""
 
     results: list[RewardResult] = []
-    required_core = {"differentiation_achieved", "failures_weaker", "reasoning"}
+    required_core = STEP6_REQUIRED_CORE
     results.append(RewardResult("schema_core", required_core <= set(judge_obj.keys())))
 
     if judge_obj.get("differentiation_achieved") is True:
@@ -175,18 +189,17 @@ def rewards_step7(assessment_obj: dict[str, Any]) -> StepRewardsReport:
     if not isinstance(lines, list):
         lines = []
     lines = [str(line).rstrip("\r\n") for line in lines]
-    results.append(RewardResult("line_count_24_60", 24 <= len(lines) <= 60, f"lines={len(lines)}"))
+    results.append(RewardResult("line_count_24_60", STEP7_LINE_RANGE[0] <= len(lines) <= STEP7_LINE_RANGE[1], f"lines={len(lines)}"))
 
     errors = assessment_obj.get("errors")
     if not isinstance(errors, list):
         errors = []
-    results.append(RewardResult("error_count_1_5", 1 <= len(errors) <= 5, f"errors={len(errors)}"))
+    results.append(RewardResult("error_count_1_5", STEP7_ERROR_RANGE[0] <= len(errors) <= STEP7_ERROR_RANGE[1], f"errors={len(errors)}"))
 
-    joined = "\n".join(lines)
-    spans = re.findall(r"<<([^<>]+)>>", joined)
+    spans = scan_spans(lines).texts
     results.append(RewardResult("spans_match_errors_len", len(spans) == len(errors), f"spans={len(spans)} errors={len(errors)}"))
 
-    span_lengths_ok = all(10 <= len(span) <= 120 for span in spans)
+    span_lengths_ok = all(STEP7_SPAN_RANGE[0] <= len(span) <= STEP7_SPAN_RANGE[1] for span in spans)
     results.append(RewardResult("span_lengths_10_120", span_lengths_ok))
 
     ids = [str((err or {}).get("id", "")).strip() for err in errors if isinstance(err, dict)]
@@ -0,0 +1,120 @@
+"""
+Single-pass scanner for << >> error spans in Step 7 assessment content.
+
+The validator and the Step 7 reward checks both need the marked spans, their
+counts and whether the delimiters are balanced. scan_spans() walks the content
+once and returns an immutable SpanScan that answers all of those questions;
+results are cached by content so consumers scoring the same assessment share
+one scan.
+
+Span matching follows the historical regex `<<([^<>]+)>>`: a span is the
+non-empty text between the last `<<` and the next `>>`, containing no `<` or `>`.
+"""
+
+from __future__ import annotations
+
+import re
+from collections import Counter
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+_TOKENS = re.compile(r"<<|>>|\n")
+# Regex with the same span semantics, for vectorised use (pandas .str.findall)
+SPAN_PATTERN = r"<<([^<>]+)>>"
+
+
+@dataclass(frozen=True)
+class Span:
+    """One marked span: inner text, offsets into the joined content and 1-based line."""
+
+    text: str
+    start: int  # offset of the opening <<
+    end: int  # offset just past the closing >>
+    line: int
+
+
+@dataclass(frozen=True)
+class SpanScan:
+    """Everything known about the spans in one piece of content."""
+
+    spans: tuple[Span, ...]
+    open_count: int  # raw << delimiters (same as content.count("<<"))
+    close_count: int  # raw >> delimiters
+    issues: tuple[str, ...]  # nesting / stray / unclosed delimiters, with line numbers
+    unbalanced_lines: tuple[int, ...]  # lines whose own << and >> counts differ
+    _counts: Counter = field(default_factory=Counter, repr=False, compare=False)
+
+    @property
+    def texts(self) -> list[str]:
+        return [span.text for span in self.spans]
+
+    @property
+    def balanced(self) -> bool:
+        return self.open_count == self.close_count
+
+    def occurrences(self, text: str) -> int:
+        """Number of spans whose inner text is exactly `text`."""
+        return self._counts[text]
+
+
+def _scan(content: str) -> SpanScan:
+    spans: list[Span] = []
+    issues: list[str] = []
+    unbalanced_lines: list[int] = []
+    opens = closes = line_opens = line_closes = 0
+    line = 1
+    open_at: int | None = None
+    open_line = 1
+
+    for match in _TOKENS.finditer(content):
+        token, pos = match.group(), match.start()
+        if token == "\n":
+            if line_opens != line_closes:
+                unbalanced_lines.append(line)
+            line += 1
+            line_opens = line_closes = 0
+        elif token == "<<":
+            opens += 1
+            line_opens += 1
+            if open_at is not None:
+                issues.append(f"line {line}: '<<' opened again before the span from line {open_line} was closed")
+            open_at, open_line = pos, line
+        else:
+            closes += 1
+            line_closes += 1
+            if open_at is None:
+                issues.append(f"line {line}: '>>' without a matching '<<'")
+                continue
+            # Innermost opener: the last '<' before this '>>' must end a '<<'
+            inner_start = content.rfind("<", open_at, pos) + 1
+            inner = content[inner_start:pos]
+            if content[inner_start - 2] == "<" and inner and ">" not in inner:
+                spans.append(Span(inner, inner_start - 2, pos + 2, open_line))
+            else:
+                issues.append(f"line {open_line}: malformed span {content[open_at:pos + 2]!r}")
+            open_at = None
+
+    if line_opens != line_closes:
+        unbalanced_lines.append(line)
+    if open_at is not None:
+        issues.append(f"line {open_line}: '<<' is never closed")
+
+    return SpanScan(
+        spans=tuple(spans),
+        open_count=opens,
+        close_count=closes,
+        issues=tuple(issues),
+        unbalanced_lines=tuple(unbalanced_lines),
+        _counts=Counter(span.text for span in spans),
+    )
+
+
+_scan_cached = lru_cache(maxsize=256)(_scan)
+
+
+def scan_spans(content: str | Iterable[str]) -> SpanScan:
+    """Scan content (a string or a list of lines) for << >> spans; cached by content."""
+    if not isinstance(content, str):
+        content = "\n".join(content)
+    return _scan_cached(content)
@@ -5,18 +5,30 @@ This module contains all the route handlers for the FastAPI application.
 Handlers are kept thin and delegate business logic to services and the pipeline.
 """
 
+import asyncio
 import json
 import logging
 from datetime import datetime
 from pathlib import Path
 
-from fastapi import HTTPException, Query
-from fastapi.responses import StreamingResponse
+from fastapi import HTTPException, Query, Request
+from fastapi.responses import JSONResponse, StreamingResponse
 
 from api.main import MOCK_PIPELINE, app, get_pipeline
 from api.models import GenerateRequest, HealthResponse, QuestionResponse
-from api.streaming import format_sse_message, run_pipeline_streaming
-from config.prompts_loader import load_prompts
+from api.streaming import (
+    BODY_FULL,
+    encode_events,
+    format_sse_message,
+    gzip_requested,
+    run_pipeline_streaming,
+    step_store,
+)
+from config.registry import get_registry
+from config.templates import TemplateError, compile_template
+from observability.metrics import SSE_CONNECTIONS, SSE_CONNECTIONS_TOTAL
+from services.budget import STOP_BUDGET_REFUSED, BudgetExceededError, get_governor
+from services.readiness import get_readiness
 
 logger = logging.getLogger(__name__)
 
@@ -39,6 +51,22 @@ async def health_check():
     )
 
 
+@app.get("/ready")
+async def readiness_check():
+    """
+    Readiness check.
+
+    Reports the latest background probe round of every provider tier and the
+    database (one round every AQU_READINESS_INTERVAL_S). Returns 503 when the
+    database is down or a tier has no provider answering.
+    """
+    if MOCK_PIPELINE:
+        return {"ready": True, "mock": True, "dependencies": {}}
+
+    report = await asyncio.to_thread(get_readiness().report)
+    return JSONResponse(report, status_code=200 if report["ready"] else 503)
+
+
 @app.get("/api/models")
 async def get_models():
     """
@@ -109,9 +137,15 @@ async def get_models():
 
 @app.get("/api/generate-stream")
 async def generate_stream(
+    request: Request,
     topic: str = Query(..., description="AI/ML topic for question generation", min_length=3),
     max_retries: int = Query(3, description="Max retries for hard question", ge=1, le=5),
     provider: str = Query("anthropic", description="Model provider: 'anthropic' or 'openai'"),
+    body: str = Query(
+        BODY_FULL,
+        pattern="^(full|preview)$",
+        description="'full' sends each step's response_full; 'preview' sends a preview (full text via /api/steps/{id})",
+    ),
 ):
     """
     Stream the 7-step pipeline execution in real-time using Server-Sent Events (SSE).
@@ -122,16 +156,25 @@ async def generate_stream(
     Each event contains:
     - step_number: Which step (1-7)
     - description: What this step does
-    - response: The LLM's response
+    - response_full (body=full) or response_preview (body=preview): The LLM's response
+    - step_id (body=preview): Key for GET /api/steps/{step_id}
     - success: Whether the step succeeded
     - timestamp: When the step completed
     - metadata: Additional info (model used, duration, etc.)
 
+    With AQU_SSE_GZIP=1 the stream is gzip-encoded for clients that accept it.
     The stream ends with a "done" event containing the final result.
     """
     logger.info(f"Stream request received for topic: {topic}")
 
+    # Once the stream starts the status is 200, so refuse over-budget runs up front
+    governor = get_governor()
+    if governor is not None and not MOCK_PIPELINE:
+        governor.admit(topic)
+
     async def event_generator():
+        SSE_CONNECTIONS.inc()
+        SSE_CONNECTIONS_TOTAL.inc()
         try:
             p = get_pipeline(provider)
             start_time = datetime.now()
@@ -142,7 +185,7 @@ async def generate_stream(
             )
 
             # Run streaming pipeline
-            async for step_data in run_pipeline_streaming(p, topic, max_retries):
+            async for step_data in run_pipeline_streaming(p, topic, max_retries, body=body):
                 yield format_sse_message(step_data, event_type="step")
 
             # Send completion event
@@ -159,18 +202,36 @@ async def generate_stream(
             yield format_sse_message(
                 {"event": "error", "error": str(e), "timestamp": datetime.now().isoformat()}, event_type="error"
             )
+        finally:
+            SSE_CONNECTIONS.dec()
 
+    headers = {
+        "Cache-Control": "no-cache",
+        "Connection": "keep-alive",
+        "X-Accel-Buffering": "no",  # Disable nginx buffering
+    }
+    gzip = gzip_requested(request.headers.get("accept-encoding", ""))
+    if gzip:
+        headers.update({"Content-Encoding": "gzip", "Vary": "Accept-Encoding"})
     return StreamingResponse(
-        event_generator(),
-        media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "X-Accel-Buffering": "no",  # Disable nginx buffering
-        },
+        encode_events(event_generator(), gzip=gzip), media_type="text/event-stream", headers=headers
     )
 
 
+@app.get("/api/steps/{step_id}")
+async def get_step(step_id: str):
+    """
+    Full response of a step recently streamed with body=preview.
+
+    Steps are kept in memory while the store's size cap allows; older ones
+    return 404 and are available from /api/runs/{run_id}/steps.
+    """
+    step = step_store.get(step_id)
+    if step is None:
+        raise HTTPException(404, f"Step not found or expired: {step_id}")
+    return {"step_id": step_id, **step}
+
+
 @app.post("/api/generate", response_model=QuestionResponse)
 async def generate_question(
     request: GenerateRequest, provider: str = Query("anthropic", description="Model provider: 'anthropic' or 'openai'")
@@ -192,6 +253,10 @@ async def generate_question(
         # Run full pipeline (blocking)
         pipeline_result = p.run_full_pipeline(topic=request.topic, max_attempts=request.max_retries)
 
+        if pipeline_result.stop_reason == STOP_BUDGET_REFUSED:
+            # The run's spend cap refused a call; retrying immediately would be refused again
+            raise HTTPException(status_code=429, detail="Question generation stopped: run budget exhausted")
+
         if not pipeline_result.final_success:
             # Extract error details
             failed_steps = [s for s in pipeline_result.steps_completed if not s.success]
@@ -234,7 +299,7 @@ async def generate_question(
         logger.info(f"Question generated successfully in {generation_time:.2f}s")
         return QuestionResponse(**assessment)
 
-    except HTTPException:
+    except (HTTPException, BudgetExceededError):
         raise
     except Exception as e:
         logger.exception("Unexpected error during question generation")
@@ -271,8 +336,15 @@ async def update_prompt(request: dict):
     if step not in valid_steps:
         raise HTTPException(status_code=400, detail=f"Invalid step. Must be one of: {', '.join(valid_steps)}")
 
+    # Reject templates the step could not render before they reach a pipeline run
+    try:
+        compile_template(new_prompt, step)
+    except TemplateError as exc:
+        raise HTTPException(status_code=400, detail=f"Invalid prompt template: {exc}") from exc
+
     try:
-        prompts = load_prompts()
+        registry = get_registry()
+        prompts = registry.snapshot().prompts
         if step not in prompts:
             raise HTTPException(status_code=404, detail=f"Step '{step}' not found in prompt configuration")
 
@@ -313,17 +385,18 @@ async def update_prompt(request: dict):
         with changes_path.open("w", encoding="utf-8") as fh:
             json.dump(prompt_changes, fh, indent=2)
 
-        # Reload merged prompts
-        merged_prompts = load_prompts()
-        updated_prompt = merged_prompts.get(step, {})
+        # Swap in the new snapshot now rather than waiting for the file watcher
+        snapshot = registry.refresh()
+        updated_prompt = snapshot.prompts.get(step, {})
 
-        logger.info(f"Prompt override saved for step: {step}")
+        logger.info(f"Prompt override saved for step: {step} (config version {snapshot.version})")
 
         return {
             "success": True,
             "step": step,
             "updated_prompt": updated_prompt,
-            "message": "Prompt override saved to prompts_changes.json. Reload the pipeline to pick up changes.",
+            "config_version": snapshot.version,
+            "message": "Prompt override saved to prompts_changes.json. New pipeline runs will use it.",
         }
 
     except HTTPException:
@@ -342,9 +415,8 @@ async def get_prompts():
     Get the merged prompt configuration (base + overrides).
     """
     try:
-        prompts = load_prompts()
-        logger.info("Prompts retrieved successfully")
-        return {"success": True, "prompts": prompts}
+        snapshot = get_registry().snapshot()
+        return {"success": True, "prompts": snapshot.prompts, "config_version": snapshot.version}
     except FileNotFoundError as exc:
         raise HTTPException(status_code=404, detail=str(exc)) from exc
     except Exception as exc:
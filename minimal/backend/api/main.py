@@ -3,15 +3,28 @@ FastAPI application initialization and configuration.
 
 This module sets up the FastAPI app, CORS middleware, and manages
 the pipeline singleton instances.
+
+The pipeline (and with it boto3/openai) is imported on first use, and the
+startup hook builds the default one on a background thread, so a cold start
+answers /health before the SDKs have loaded.
 """
 
 import logging
 import os
+import threading
+import time
+from typing import TYPE_CHECKING
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
+
+from observability.metrics import render_metrics
+from services.budget import BudgetExceededError
+from services.readiness import get_readiness
 
-from corrected_7step_pipeline import CorrectedSevenStepPipeline
+if TYPE_CHECKING:
+    from corrected_7step_pipeline import CorrectedSevenStepPipeline
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
@@ -52,54 +65,98 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+PROVIDERS = ("anthropic", "openai")
+
 # Pipeline singleton instances (keyed by provider)
-pipelines: dict[str, CorrectedSevenStepPipeline] = {}
+pipelines: dict[str, "CorrectedSevenStepPipeline"] = {}
+_pipeline_locks = {provider: threading.Lock() for provider in PROVIDERS}
 
+# Seconds a client should wait while a pipeline is still being built
+STARTING_RETRY_AFTER_S = 5
 
-def get_pipeline(provider: str = "anthropic") -> CorrectedSevenStepPipeline:
+
+def get_pipeline(provider: str = "anthropic", wait: bool = False) -> "CorrectedSevenStepPipeline":
     """
     Lazy initialization of pipeline singleton for specified provider.
 
     Args:
         provider: Either "anthropic" or "openai" (default: "anthropic")
+        wait: Block while another thread is building this pipeline instead of raising 503
 
     Returns:
         Pipeline instance for the specified provider
 
     Raises:
-        HTTPException: If pipeline is in mock mode or initialization fails
+        HTTPException: If pipeline is in mock mode, still starting up, or initialization fails
     """
-    global pipelines
-
     if MOCK_PIPELINE:
         raise HTTPException(503, "Pipeline is disabled in mock mode.")
 
     # Validate provider
-    if provider not in ["anthropic", "openai"]:
+    if provider not in PROVIDERS:
         raise HTTPException(400, f"Invalid provider: {provider}. Must be 'anthropic' or 'openai'")
 
-    # Initialize pipeline for this provider if not already done
-    if provider not in pipelines:
-        logger.info(f"Initializing CorrectedSevenStepPipeline with provider: {provider}...")
-        try:
-            pipelines[provider] = CorrectedSevenStepPipeline(provider=provider)
-            logger.info(f"Pipeline initialized successfully for provider: {provider}")
-        except Exception as e:
-            logger.error(f"Failed to initialize pipeline for provider '{provider}': {e}")
-            raise HTTPException(500, f"Failed to initialize pipeline: {str(e)}")
+    if provider in pipelines:
+        return pipelines[provider]
+
+    # Request handlers run on the event loop; waiting out the startup build there would stall /health too
+    lock = _pipeline_locks[provider]
+    if not lock.acquire(blocking=wait):
+        raise HTTPException(
+            503,
+            f"Pipeline for provider '{provider}' is still starting up.",
+            headers={"Retry-After": str(STARTING_RETRY_AFTER_S)},
+        )
+    try:
+        if provider not in pipelines:
+            logger.info(f"Initializing CorrectedSevenStepPipeline with provider: {provider}...")
+            try:
+                from corrected_7step_pipeline import CorrectedSevenStepPipeline
+
+                pipeline = CorrectedSevenStepPipeline(provider=provider)
+                # With provider failover on, readiness probes feed the router's circuit breakers
+                if hasattr(pipeline.runtime_client, "record_probe"):
+                    get_readiness().attach_router(pipeline.runtime_client)
+                pipelines[provider] = pipeline
+                logger.info(f"Pipeline initialized successfully for provider: {provider}")
+            except Exception as e:
+                logger.error(f"Failed to initialize pipeline for provider '{provider}': {e}")
+                raise HTTPException(500, f"Failed to initialize pipeline: {str(e)}")
+    finally:
+        lock.release()
 
     return pipelines[provider]
 
 
+def _warm_up(provider: str = "anthropic") -> None:
+    started = time.perf_counter()
+    try:
+        get_pipeline(provider, wait=True)
+        logger.info(
+            f"Server ready to accept requests ({provider} pipeline built in {time.perf_counter() - started:.1f}s)"
+        )
+    except Exception as e:
+        logger.error(f"Startup failed: {e}")
+
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    """Expose in-process counters and latency histograms in Prometheus text format."""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@app.exception_handler(BudgetExceededError)
+async def budget_exceeded(request: Request, exc: BudgetExceededError):
+    """Runs refused by the budget governor are rate limited until its caps reset."""
+    headers = {"Retry-After": str(exc.retry_after_s)} if exc.retry_after_s else None
+    return JSONResponse(status_code=429, content={"detail": str(exc), "scope": exc.scope}, headers=headers)
+
+
 @app.on_event("startup")
 async def startup_event():
-    """Pre-initialize pipeline on server startup"""
+    """Build the default pipeline in the background; /health answers meanwhile with pipeline_ready=false."""
     logger.info("Server starting up...")
     if MOCK_PIPELINE:
         logger.info("Mock mode enabled – skipping pipeline initialization.")
         return
-    try:
-        get_pipeline()
-        logger.info("Server ready to accept requests")
-    except Exception as e:
-        logger.error(f"Startup failed: {e}")
+    threading.Thread(target=_warm_up, name="pipeline-warmup", daemon=True).start()
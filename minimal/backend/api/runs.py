@@ -0,0 +1,190 @@
+"""
+Run-history endpoints for browsing past pipeline runs.
+
+Pages are keyset-paginated: each response carries an opaque next_cursor that
+encodes the last row returned, so every page is one indexed range scan no
+matter how deep the client pages. Step listings leave out full_response unless
+include_response=true. With format=ndjson (or Accept: application/x-ndjson)
+rows are streamed one JSON object per line as they are read, followed by a
+final {"next_cursor": ...} line.
+"""
+
+import base64
+import json
+import logging
+import os
+from collections.abc import Iterator
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+from fastapi import Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+
+from api.main import app
+from persistence.repo import Repo
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+MAX_PAGE_JSON = 500
+MAX_PAGE_NDJSON = 10_000
+BOOLEAN_COLUMNS = ("success", "differentiation_achieved", "final_success")
+
+
+@lru_cache(maxsize=1)
+def get_repo() -> Repo:
+    """Repository for the pipeline database (DATABASE_URL, else backend/pipeline_results.db)."""
+    return Repo(os.environ.get("DATABASE_URL") or str(BASE_DIR / "pipeline_results.db"))
+
+
+def encode_cursor(values: list[Any]) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> list[Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, UnicodeDecodeError) as e:
+        raise HTTPException(400, f"Invalid cursor: {cursor!r}") from e
+    if not isinstance(values, list):
+        raise HTTPException(400, f"Invalid cursor: {cursor!r}")
+    return values
+
+
+def _serialize(row: dict[str, Any]) -> dict[str, Any]:
+    """JSON-safe row: booleans stored as 0/1 by SQLite become bools, timestamps ISO strings."""
+    out = {}
+    for key, value in row.items():
+        if key in BOOLEAN_COLUMNS and value is not None:
+            value = bool(value)
+        elif isinstance(value, datetime):
+            value = value.isoformat()
+        out[key] = value
+    return out
+
+
+def _wants_ndjson(request: Request, fmt: str | None) -> bool:
+    if fmt is not None:
+        return fmt == "ndjson"
+    return NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+def _page(rows: Iterator[dict[str, Any]], limit: int, cursor_of) -> tuple[list[dict[str, Any]], str | None]:
+    """Collect one page (the query fetched limit + 1 rows to detect a following page)."""
+    page = [_serialize(row) for row in rows]
+    if len(page) <= limit:
+        return page, None
+    page = page[:limit]
+    return page, encode_cursor(cursor_of(page[-1]))
+
+
+def _ndjson(rows: Iterator[dict[str, Any]], limit: int, cursor_of) -> Iterator[str]:
+    """Stream rows as NDJSON lines, then a trailing next_cursor line."""
+    sent = 0
+    last = None
+    try:
+        for row in rows:
+            if sent == limit:
+                break
+            last = _serialize(row)
+            sent += 1
+            yield json.dumps(last, ensure_ascii=False) + "\n"
+        else:
+            last = None  # fewer than limit + 1 rows: this was the last page
+    finally:
+        rows.close()  # release the database cursor even if the client disconnects
+    next_cursor = encode_cursor(cursor_of(last)) if last is not None else None
+    yield json.dumps({"next_cursor": next_cursor}) + "\n"
+
+
+def _page_limit(limit: int, ndjson: bool) -> int:
+    maximum = MAX_PAGE_NDJSON if ndjson else MAX_PAGE_JSON
+    if limit > maximum:
+        raise HTTPException(400, f"limit must be <= {maximum} for {'ndjson' if ndjson else 'json'} responses")
+    return limit
+
+
+@app.get("/api/runs")
+def list_runs(
+    request: Request,
+    limit: int = Query(50, ge=1, description="Runs per page"),
+    cursor: str | None = Query(None, description="next_cursor from the previous page"),
+    topic: str | None = Query(None, description="Only runs for this topic"),
+    success: bool | None = Query(None, description="Only runs whose final_success matches"),
+    since: date | None = Query(None, description="Only runs started on or after this date"),
+    until: date | None = Query(None, description="Only runs started on or before this date"),
+    format: str | None = Query(None, pattern="^(json|ndjson)$", description="Response format"),
+    repo: Repo = Depends(get_repo),
+):
+    """
+    List pipeline runs, newest first.
+
+    Returns {"runs": [...], "next_cursor": str | null}, or NDJSON lines.
+    """
+    ndjson = _wants_ndjson(request, format)
+    limit = _page_limit(limit, ndjson)
+    after = None
+    if cursor is not None:
+        values = decode_cursor(cursor)
+        if len(values) != 2 or not all(isinstance(v, str) for v in values):
+            raise HTTPException(400, f"Invalid cursor: {cursor!r}")
+        after = (values[0], values[1])
+
+    rows = repo.iter_runs(
+        limit + 1,
+        after=after,
+        topic=topic,
+        success=success,
+        since=since.strftime("%Y%m%d") if since else None,
+        until=(until + timedelta(days=1)).strftime("%Y%m%d") if until else None,
+    )
+
+    def cursor_of(row):
+        return [row["run_timestamp"], row["topic"]]
+
+    if ndjson:
+        return StreamingResponse(_ndjson(rows, limit, cursor_of), media_type=NDJSON_MEDIA_TYPE)
+    runs, next_cursor = _page(rows, limit, cursor_of)
+    return {"runs": runs, "next_cursor": next_cursor}
+
+
+@app.get("/api/runs/{run_id}/steps")
+def list_run_steps(
+    run_id: str,
+    request: Request,
+    limit: int = Query(50, ge=1, description="Steps per page"),
+    cursor: str | None = Query(None, description="next_cursor from the previous page"),
+    include_response: bool = Query(False, description="Include each step's full_response"),
+    format: str | None = Query(None, pattern="^(json|ndjson)$", description="Response format"),
+    repo: Repo = Depends(get_repo),
+):
+    """
+    List the steps recorded for one run (run_id is its run_timestamp), in order.
+
+    Returns {"run_timestamp": ..., "steps": [...], "next_cursor": str | null}, or NDJSON lines.
+    """
+    ndjson = _wants_ndjson(request, format)
+    limit = _page_limit(limit, ndjson)
+    after_id = None
+    if cursor is not None:
+        values = decode_cursor(cursor)
+        if len(values) != 1 or not isinstance(values[0], int):
+            raise HTTPException(400, f"Invalid cursor: {cursor!r}")
+        after_id = values[0]
+
+    if not repo.run_exists(run_id):
+        raise HTTPException(404, f"Run not found: {run_id}")
+
+    rows = repo.iter_run_steps(run_id, limit + 1, after_id=after_id, include_response=include_response)
+
+    def cursor_of(row):
+        return [row["id"]]
+
+    if ndjson:
+        return StreamingResponse(_ndjson(rows, limit, cursor_of), media_type=NDJSON_MEDIA_TYPE)
+    steps, next_cursor = _page(rows, limit, cursor_of)
+    return {"run_timestamp": run_id, "steps": steps, "next_cursor": next_cursor}
@@ -3,16 +3,106 @@ Server-Sent Events (SSE) streaming implementation for real-time pipeline updates
 
 This module handles the streaming of pipeline execution steps to clients,
 allowing them to see each step complete as it happens.
+
+With body="full" step events include response_full. With body="preview"
+they carry only the first PREVIEW_CHARS characters and a step_id, and the
+full text is fetched from GET /api/steps/{step_id} while it is still in the
+in-memory step store. Events are serialised with orjson when it is
+installed. With AQU_SSE_GZIP=1 the stream is gzip-compressed for clients
+that accept it, with a sync flush after every event so nothing is held back.
 """
 
 import asyncio
+import contextvars
 import json
 import logging
-from collections.abc import AsyncGenerator
+import os
+import threading
+import uuid
+import zlib
+from collections import OrderedDict
+from collections.abc import AsyncGenerator, AsyncIterator
 from datetime import datetime
+from typing import Any
+
+from observability.metrics import SSE_BYTES
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup, stdlib json is the fallback
+    orjson = None
 
 logger = logging.getLogger(__name__)
 
+BODY_FULL = "full"
+BODY_PREVIEW = "preview"
+PREVIEW_CHARS = 500
+GZIP_LEVEL = 6
+
+
+def dumps(data: Any) -> str:
+    """Compact JSON text for an event (orjson when installed)."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS).decode()
+        except TypeError:  # orjson.JSONEncodeError; let json report or handle it
+            pass
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+
+
+class StepBodyStore:
+    """
+    Recently streamed step responses, for fetching by step_id.
+
+    Args:
+        max_chars: Total response characters kept; the oldest steps are evicted first
+    """
+
+    def __init__(self, max_chars: int = 20_000_000):
+        self.max_chars = max_chars
+        self._lock = threading.Lock()
+        self._steps: OrderedDict[str, dict[str, Any]] = OrderedDict()
+        self._chars = 0
+
+    def put(self, step: dict[str, Any]) -> str:
+        step_id = uuid.uuid4().hex
+        with self._lock:
+            self._steps[step_id] = step
+            self._chars += len(step.get("response_full") or "")
+            while self._chars > self.max_chars and len(self._steps) > 1:
+                _, evicted = self._steps.popitem(last=False)
+                self._chars -= len(evicted.get("response_full") or "")
+        return step_id
+
+    def get(self, step_id: str) -> dict[str, Any] | None:
+        with self._lock:
+            return self._steps.get(step_id)
+
+
+step_store = StepBodyStore()
+
+
+def gzip_requested(accept_encoding: str) -> bool:
+    """Whether to gzip an SSE stream: AQU_SSE_GZIP=1 and the client accepts gzip."""
+    enabled = os.getenv("AQU_SSE_GZIP", "").lower() in ("1", "true", "yes")
+    return enabled and "gzip" in accept_encoding.lower()
+
+
+async def encode_events(messages: AsyncIterator[str], gzip: bool = False) -> AsyncGenerator[bytes, None]:
+    """UTF-8 encode formatted SSE messages, gzip-compressing each one with a sync flush when asked."""
+    encoding = "gzip" if gzip else "identity"
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS) if gzip else None
+    async for message in messages:
+        chunk = message.encode("utf-8")
+        if compressor is not None:
+            chunk = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        SSE_BYTES.inc(len(chunk), encoding=encoding)
+        yield chunk
+    if compressor is not None:
+        tail = compressor.flush()
+        SSE_BYTES.inc(len(tail), encoding=encoding)
+        yield tail
+
 
 def format_sse_message(data: dict, event_type: str = "message") -> str:
     """
@@ -29,11 +119,12 @@ def format_sse_message(data: dict, event_type: str = "message") -> str:
     Returns:
         Formatted SSE message string
     """
-    json_data = json.dumps(data)
-    return f"event: {event_type}\ndata: {json_data}\n\n"
+    return f"event: {event_type}\ndata: {dumps(data)}\n\n"
 
 
-async def run_pipeline_streaming(pipeline, topic: str, max_retries: int) -> AsyncGenerator[dict, None]:
+async def run_pipeline_streaming(
+    pipeline, topic: str, max_retries: int, body: str = BODY_FULL
+) -> AsyncGenerator[dict, None]:
     """
     Run the pipeline and yield each step as it completes.
 
@@ -44,6 +135,7 @@ async def run_pipeline_streaming(pipeline, topic: str, max_retries: int) -> Asyn
         pipeline: CorrectedSevenStepPipeline instance
         topic: Topic for question generation
         max_retries: Maximum retry attempts for differentiation
+        body: BODY_FULL to include each step's response_full, BODY_PREVIEW for a preview only
 
     Yields:
         Dictionary containing step data or final results
@@ -51,64 +143,80 @@ async def run_pipeline_streaming(pipeline, topic: str, max_retries: int) -> Asyn
     # Run the pipeline generator in a thread pool to avoid blocking
     loop = asyncio.get_event_loop()
 
+    # Every step runs inside one copied context so that state kept in context
+    # variables (e.g. the open tracing span) follows the generator from one
+    # executor thread to the next.
+    ctx = contextvars.copy_context()
+
     # Create iterator from the streaming pipeline
     def create_generator():
         """Create the synchronous generator"""
         return pipeline.run_full_pipeline_streaming(topic, max_attempts=max_retries)
 
     # Run in executor
-    gen = await loop.run_in_executor(None, create_generator)
+    gen = await loop.run_in_executor(None, ctx.run, create_generator)
 
     # Iterate through the generator
-    while True:
-        try:
-            # Get next item from generator (in thread pool)
-            item = await loop.run_in_executor(None, lambda: next(gen, None))
-
-            if item is None:
-                # Generator exhausted
+    try:
+        while True:
+            try:
+                # Get next item from generator (in thread pool)
+                item = await loop.run_in_executor(None, ctx.run, next, gen, None)
+
+                if item is None:
+                    # Generator exhausted
+                    break
+
+                # Check if this is a final result or a step
+                if isinstance(item, dict) and "final_result" in item:
+                    # This is the final result
+                    final_result = item["final_result"]
+                    assessment = item.get("assessment")
+
+                    yield {
+                        "type": "final",
+                        "success": final_result.final_success,
+                        "differentiation_achieved": final_result.differentiation_achieved,
+                        "total_attempts": final_result.total_attempts,
+                        "stopped_at_step": final_result.stopped_at_step,
+                        "stop_reason": final_result.stop_reason,
+                        "assessment": assessment,
+                        "metadata": {
+                            "topic": final_result.topic,
+                            "subtopic": final_result.subtopic,
+                            "difficulty": final_result.difficulty,
+                            "weak_model_failures": final_result.weak_model_failures,
+                        },
+                    }
+                    break
+                else:
+                    # This is a PipelineStep object
+                    step_data = {
+                        "type": "step",
+                        "step_number": item.step_number,
+                        "description": item.step_name,
+                        "model": item.model_used,
+                        "provider": getattr(item, "provider", ""),
+                        "success": item.success,
+                        "timestamp": item.timestamp,
+                        "response_length": len(item.response or ""),
+                    }
+                    if body == BODY_FULL:
+                        step_data["response_full"] = item.response  # Full response for debugging
+                    else:
+                        # Only preview clients fetch the body later; full events already carried it
+                        step_data["step_id"] = step_store.put({**step_data, "response_full": item.response})
+                        step_data["response_preview"] = item.response[:PREVIEW_CHARS] if item.response else None
+
+                    yield step_data
+
+            except StopIteration:
+                # Generator finished
                 break
-
-            # Check if this is a final result or a step
-            if isinstance(item, dict) and "final_result" in item:
-                # This is the final result
-                final_result = item["final_result"]
-                assessment = item.get("assessment")
-
-                yield {
-                    "type": "final",
-                    "success": final_result.final_success,
-                    "differentiation_achieved": final_result.differentiation_achieved,
-                    "total_attempts": final_result.total_attempts,
-                    "stopped_at_step": final_result.stopped_at_step,
-                    "assessment": assessment,
-                    "metadata": {
-                        "topic": final_result.topic,
-                        "subtopic": final_result.subtopic,
-                        "difficulty": final_result.difficulty,
-                        "weak_model_failures": final_result.weak_model_failures,
-                    },
-                }
+            except Exception as e:
+                logger.exception("Error in streaming pipeline")
+                yield {"type": "error", "error": str(e), "timestamp": datetime.now().isoformat()}
                 break
-            else:
-                # This is a PipelineStep object
-                step_data = {
-                    "type": "step",
-                    "step_number": item.step_number,
-                    "description": item.step_name,
-                    "model": item.model_used,
-                    "success": item.success,
-                    "timestamp": item.timestamp,
-                    "response_preview": item.response[:500] if item.response else None,
-                    "response_full": item.response,  # Full response for debugging
-                }
-
-                yield step_data
-
-        except StopIteration:
-            # Generator finished
-            break
-        except Exception as e:
-            logger.exception("Error in streaming pipeline")
-            yield {"type": "error", "error": str(e), "timestamp": datetime.now().isoformat()}
-            break
+    finally:
+        # Close the generator in its own context so any open spans end cleanly
+        await loop.run_in_executor(None, ctx.run, gen.close)
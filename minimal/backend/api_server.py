@@ -7,6 +7,7 @@ The original monolithic implementation has been split into:
 - api/models.py - Pydantic request/response models
 - api/endpoints.py - Route handlers
 - api/streaming.py - SSE streaming implementation
+- api/runs.py - Run-history browsing (paginated JSON / NDJSON)
 
 This file remains as the entry point for backward compatibility.
 """
@@ -16,6 +17,7 @@ from api.main import app
 
 # Import all endpoints to register them with the app
 import api.endpoints  # noqa: F401
+import api.runs  # noqa: F401
 
 if __name__ == "__main__":
     import uvicorn
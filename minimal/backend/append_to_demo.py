@@ -2,13 +2,16 @@
 """
 Append pipeline results to dev mode demo assessments.
 
-Creates a scrollable tab interface with multiple assessments.
+Creates a scrollable tab interface with multiple assessments. Each result is
+written as its own shard under frontend/public/demo (see persistence/demo_shards.py).
 """
 
 import json
 import sys
 from pathlib import Path
 
+from persistence.demo_shards import DEFAULT_EXPORT_DIR, DemoShardStore
+
 
 def load_pipeline_result(results_file: str) -> dict:
     """Load a pipeline result JSON file."""
@@ -63,16 +66,15 @@ def create_pipeline_steps(result: dict, index: int) -> list:
     return pipeline_steps
 
 
-def append_assessments_to_demo(results_files: list[str], output_file: str):
+def append_assessments_to_demo(results_files: list[str], export_dir: str | Path = DEFAULT_EXPORT_DIR):
     """
-    Append multiple pipeline results to demoData.dev.js
+    Append multiple pipeline results to the sharded demo export.
 
     Args:
         results_files: List of pipeline result JSON files
-        output_file: Path to demoData.dev.js
+        export_dir: Export directory holding manifest.jsonl and shards/
     """
-    assessments = []
-    all_pipeline_steps = []
+    items = []
 
     for idx, results_file in enumerate(results_files, start=1):
         print(f"Loading {results_file}...")
@@ -81,29 +83,17 @@ def append_assessments_to_demo(results_files: list[str], output_file: str):
         # Check if it's a frontend_demo_data format or raw results
         if 'assessment' in result:
             demo_assessment = create_demo_assessment(result, idx)
-            assessments.append(demo_assessment)
-
-            # Also collect pipeline steps
             pipeline_steps = create_pipeline_steps(result, idx)
-            all_pipeline_steps.extend(pipeline_steps)
+            items.append((demo_assessment, pipeline_steps))
 
             print(f"  ✅ Added: {demo_assessment['title']} with {len(pipeline_steps)} pipeline steps")
         else:
             print(f"  ⚠️  Skipped: No assessment found in {results_file}")
 
-    # Create the JavaScript export for demoData.dev.js
-    js_content = "// demoData.dev.js\n"
-    js_content += "// Dev mode demo assessments with full 7-step pipeline data\n"
-    js_content += f"// Generated from {len(results_files)} recent pipeline runs\n\n"
-    js_content += f"export const demoAssessments = {json.dumps(assessments, indent=2)};\n\n"
-    js_content += f"export const demoPipelineSteps = {json.dumps(all_pipeline_steps, indent=2)};\n\n"
-    js_content += "export default demoAssessments;\n"
+    # Only the new shards are written; the manifest gets one line per assessment
+    added, skipped = DemoShardStore(export_dir).append(items)
 
-    # Write to file
-    with open(output_file, 'w') as f:
-        f.write(js_content)
-
-    print(f"\n✅ Wrote {len(assessments)} assessments and {len(all_pipeline_steps)} pipeline steps to {output_file}")
+    print(f"\n✅ Wrote {len(added)} assessment shards to {export_dir} ({len(skipped)} already exported)")
     print("   These will appear as tabs in Dev + Demo mode with full pipeline visualization")
 
 
@@ -116,9 +106,7 @@ def main():
         sys.exit(1)
 
     results_files = sys.argv[1:]
-    output_file = Path(__file__).parent.parent / 'frontend' / 'src' / 'demoData.dev.js'
-
-    append_assessments_to_demo(results_files, str(output_file))
+    append_assessments_to_demo(results_files)
 
 
 if __name__ == '__main__':
@@ -1,8 +1,8 @@
-import re
 from dataclasses import dataclass
 from typing import Any
 
 from ..validators.assessment import validate_assessment_payload
+from .spans import scan_spans
 
 
 @dataclass
@@ -85,9 +85,9 @@ def rewards_step7(assessment_obj: dict[str, Any]) -> StepRewardsReport:
     ok, _, issues = validate_assessment_payload(assessment_obj)
     res.append(RewardResult("validator_ok", ok, "; ".join(issues[:3])))
     lines = assessment_obj.get("content", [])
-    joined = "\n".join(lines) if isinstance(lines, list) else str(lines)
-    spans = re.findall(r"<<([^<>]+)>>", joined)
+    scan = scan_spans(lines if isinstance(lines, list) else str(lines))
+    spans = scan.texts
     res.append(RewardResult("spans_match_errors_len", len(spans) == len(assessment_obj.get("errors", [])), f"spans={len(spans)} errors={len(assessment_obj.get('errors', []))}"))
-    res.append(RewardResult("no_crossline_spans", all(line.count("<<")==line.count(">>") for line in (lines or []))))
+    res.append(RewardResult("no_crossline_spans", not scan.unbalanced_lines))
     res.append(RewardResult("span_lengths_10_120", all(10 <= len(s) <= 120 for s in spans)))
     return StepRewardsReport(step=7, results=res)
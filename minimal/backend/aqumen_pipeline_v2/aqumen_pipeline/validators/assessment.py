@@ -1,6 +1,6 @@
-import re
 from typing import Any
 
+from ..analytics.spans import scan_spans
 from ..config import ALLOWED_DIFFICULTIES, MAX_CODE_LINES, MAX_ERROR_SPAN, MIN_CODE_LINES, MIN_ERROR_SPAN
 
 
@@ -37,17 +37,16 @@ def validate_assessment_payload(payload: dict[str, Any]) -> tuple[bool, dict[str
         errors.append("errors must be an array of objects.")
         err_items = []
 
-    joined = "\n".join(lines)
-    spans = re.findall(r"<<([^<>]+)>>", joined)
+    scan = scan_spans(lines)
+    spans = scan.texts
     if not spans:
         errors.append("No << >> spans found in content.")
 
     if spans and err_items and len(spans) != len(err_items):
         errors.append(f"Number of spans ({len(spans)}) must equal number of errors ({len(err_items)})." )
 
-    for ln in lines:
-        if ln.count("<<") != ln.count(">>"):
-            errors.append("Unbalanced << >> in a line.")
+    for _ in scan.unbalanced_lines:
+        errors.append("Unbalanced << >> in a line.")
 
     sanitized_errors = []
     seen_ids = set()
@@ -63,7 +62,7 @@ def validate_assessment_payload(payload: dict[str, Any]) -> tuple[bool, dict[str
         seen_ids.add(sid)
         if not (MIN_ERROR_SPAN <= len(sid) <= MAX_ERROR_SPAN):
             errors.append(f"Error id '{sid}' length must be {MIN_ERROR_SPAN}-{MAX_ERROR_SPAN} (found {len(sid)})." )
-        if joined.count(f"<<{sid}>>") != 1:
+        if scan.occurrences(sid) != 1:
             errors.append(f"Error id '{sid}' must appear exactly once in content.")
         if not isinstance(desc, str) or not desc.strip():
             errors.append(f"Error '{sid}' missing description.")
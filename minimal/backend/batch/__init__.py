@@ -0,0 +1,17 @@
+"""Batch execution of the pipeline over topic manifests (resumable, concurrency-limited)."""
+
+from .checkpoint import Checkpoint
+from .manifest import BatchItem, items_from_topics, read_manifest
+from .progress import ProgressSnapshot, ProgressTracker
+from .runner import BatchRunner, BatchSummary
+
+__all__ = [
+    "BatchItem",
+    "BatchRunner",
+    "BatchSummary",
+    "Checkpoint",
+    "ProgressSnapshot",
+    "ProgressTracker",
+    "items_from_topics",
+    "read_manifest",
+]
@@ -0,0 +1,94 @@
+"""
+Append-only JSONL checkpoint of finished batch items.
+
+Each finished item appends one line and fsyncs it before the runner moves on,
+so after a crash the file holds every item that completed. On restart the
+items recorded as "success" or "failed" are skipped; "error" items (the
+pipeline raised) are run again. A line cut short by the crash is ignored.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+STATUS_SUCCESS = "success"  # pipeline produced an assessment
+STATUS_FAILED = "failed"  # pipeline finished without one (not retried on resume)
+STATUS_ERROR = "error"  # pipeline raised; retried on resume
+COMPLETE_STATUSES = (STATUS_SUCCESS, STATUS_FAILED)
+
+
+class Checkpoint:
+    """
+    Records of finished items, keyed by manifest id (the latest record per id wins).
+
+    Args:
+        path: JSONL file; created on first write
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._records = self._load()
+        # A crash mid-write leaves a partial last line; start the next record on a fresh one
+        self._torn_tail = self.path.exists() and self.path.stat().st_size > 0 and not self._ends_with_newline()
+
+    def _ends_with_newline(self) -> bool:
+        with open(self.path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    def _load(self) -> dict[str, dict[str, Any]]:
+        records: dict[str, dict[str, Any]] = {}
+        if not self.path.exists():
+            return records
+        with open(self.path, encoding="utf-8") as f:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning(f"Ignoring unreadable checkpoint line {self.path}:{line_number}")
+                    continue
+                records[record["id"]] = record
+        return records
+
+    def records(self) -> dict[str, dict[str, Any]]:
+        with self._lock:
+            return dict(self._records)
+
+    def completed(self) -> set[str]:
+        """Ids that a resumed batch should skip."""
+        with self._lock:
+            return {item_id for item_id, record in self._records.items() if record["status"] in COMPLETE_STATUSES}
+
+    def record(self, item_id: str, status: str, **fields: Any) -> dict[str, Any]:
+        """Durably append one item's outcome."""
+        record = {"id": item_id, "status": status, "finished_at": time.time(), **fields}
+        line = json.dumps(record, ensure_ascii=False, default=str) + "\n"
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                if self._torn_tail:
+                    f.write("\n")
+                    self._torn_tail = False
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+            self._records[item_id] = record
+        return record
+
+    def reset(self) -> None:
+        """Forget every record (start the batch over)."""
+        with self._lock:
+            self.path.unlink(missing_ok=True)
+            self._records = {}
+            self._torn_tail = False
@@ -0,0 +1,116 @@
+"""
+Topic manifests for batch runs.
+
+A manifest lists one pipeline run per row:
+
+    topics.csv      topic,id,max_attempts      (only "topic" is required)
+    topics.jsonl    {"topic": "LangChain", "id": "lc", "max_attempts": 2}
+                    "Gradio"                   (a bare string is just a topic)
+
+Every item gets a stable id (given, or derived from the topic) which keys its
+checkpoint record, so a resumed batch skips exactly the items already done.
+"""
+
+from __future__ import annotations
+
+import csv
+import json
+import re
+from collections.abc import Iterable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+DEFAULT_MAX_ATTEMPTS = 3
+
+_SLUG = re.compile(r"[^a-z0-9]+")
+
+
+@dataclass(frozen=True)
+class BatchItem:
+    """One pipeline run requested by a manifest."""
+
+    id: str
+    topic: str
+    max_attempts: int = DEFAULT_MAX_ATTEMPTS
+
+
+def _slug(topic: str) -> str:
+    return _SLUG.sub("-", topic.lower()).strip("-")[:64] or "topic"
+
+
+def _item(row: Any, where: str, default_attempts: int) -> tuple[str | None, str, int]:
+    if isinstance(row, str):
+        row = {"topic": row}
+    if not isinstance(row, dict):
+        raise ValueError(f"{where}: expected an object or a topic string, got {type(row).__name__}")
+    topic = str(row.get("topic") or "").strip()
+    if not topic:
+        raise ValueError(f"{where}: missing topic")
+    raw_attempts = row.get("max_attempts")
+    try:
+        max_attempts = int(raw_attempts) if raw_attempts not in (None, "") else default_attempts
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"{where}: invalid max_attempts {raw_attempts!r}") from e
+    if max_attempts < 1:
+        raise ValueError(f"{where}: max_attempts must be >= 1")
+    item_id = str(row.get("id") or "").strip() or None
+    return item_id, topic, max_attempts
+
+
+def _assign_ids(rows: Iterable[tuple[str | None, str, int]]) -> list[BatchItem]:
+    """Explicit ids must be unique; derived ids of repeated topics get -2, -3, ... suffixes."""
+    items: list[BatchItem] = []
+    used: set[str] = set()
+    for item_id, topic, max_attempts in rows:
+        if item_id is not None:
+            if item_id in used:
+                raise ValueError(f"Duplicate manifest id: {item_id!r}")
+        else:
+            base = item_id = _slug(topic)
+            n = 1
+            while item_id in used:
+                n += 1
+                item_id = f"{base}-{n}"
+        used.add(item_id)
+        items.append(BatchItem(item_id, topic, max_attempts))
+    return items
+
+
+def items_from_topics(topics: Iterable[str], max_attempts: int = DEFAULT_MAX_ATTEMPTS) -> list[BatchItem]:
+    """Batch items for a plain list of topics."""
+    return _assign_ids(_item(topic, f"topic {n}", max_attempts) for n, topic in enumerate(topics, 1))
+
+
+def read_manifest(path: str | Path, max_attempts: int = DEFAULT_MAX_ATTEMPTS) -> list[BatchItem]:
+    """
+    Read a .csv or .jsonl manifest.
+
+    Args:
+        path: Manifest file
+        max_attempts: Used for rows that do not set their own
+
+    Raises:
+        ValueError: Unknown extension, missing topics or duplicate ids (with the offending line)
+    """
+    path = Path(path)
+    suffix = path.suffix.lower()
+    with open(path, encoding="utf-8", newline="") as f:
+        if suffix == ".csv":
+            reader = csv.DictReader(f)
+            if not reader.fieldnames or "topic" not in reader.fieldnames:
+                raise ValueError(f"{path}: CSV manifest needs a 'topic' column")
+            rows = [_item(row, f"{path}:{reader.line_num}", max_attempts) for row in reader]
+        elif suffix in (".jsonl", ".ndjson"):
+            rows = []
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except json.JSONDecodeError as e:
+                    raise ValueError(f"{path}:{line_number}: invalid JSON ({e.msg})") from e
+                rows.append(_item(row, f"{path}:{line_number}", max_attempts))
+        else:
+            raise ValueError(f"{path}: unsupported manifest type {suffix!r} (use .csv or .jsonl)")
+    return _assign_ids(rows)
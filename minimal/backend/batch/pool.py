@@ -0,0 +1,135 @@
+"""
+Process-pool mode for the batch runner.
+
+With threads, every worker shares one interpreter, so once model calls overlap
+the CPU-side work of a run (JSON encoding, reward scoring, validation, log
+formatting, SQLite writes) serialises on the GIL. In process mode:
+
+- each worker process builds its own pipeline, runtime and read connection and
+  runs one item at a time;
+- database writes and checkpoint records go over one queue to a single writer
+  process (persistence.queue_repo), so SQLite never sees concurrent writers and
+  an item's rows are committed before its checkpoint line;
+- the model-call cap is a semaphore shared by all workers;
+- results return to the parent, which reports progress.
+
+Spawned processes re-import the pipeline, so the pipeline factory must be
+picklable (a class or module-level function). It is called as factory(repo=...).
+"""
+
+from __future__ import annotations
+
+import logging
+import multiprocessing
+from collections.abc import Callable, Iterable
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Any
+
+from clients.concurrency import get_limiter
+from persistence.queue_repo import QueueRepo, drain
+
+from .checkpoint import Checkpoint
+from .manifest import BatchItem
+from .runner import execute_item
+
+logger = logging.getLogger(__name__)
+
+MSG_CHECKPOINT = "checkpoint"
+
+# Per-process state of a pool worker (set by _init_worker)
+_worker: dict[str, Any] = {}
+
+
+def _init_worker(
+    pipeline_factory: Callable[..., Any], write_queue: Any, db_url: str, shared_slots: Any, priority: str
+) -> None:
+    if shared_slots is not None:
+        limiter = get_limiter()
+        limiter.set_limit(None)
+        limiter.share(shared_slots)
+    _worker.update(factory=pipeline_factory, queue=write_queue, db_url=db_url, priority=priority, pipeline=None)
+
+
+def _worker_pipeline() -> Any:
+    if _worker["pipeline"] is None:
+        _worker["pipeline"] = _worker["factory"](repo=QueueRepo(_worker["queue"], _worker["db_url"]))
+    return _worker["pipeline"]
+
+
+def _process_item(item: BatchItem) -> tuple[str, dict[str, Any]]:
+    status, fields = execute_item(_worker_pipeline, item, _worker["priority"])
+    _worker["queue"].put((MSG_CHECKPOINT, item.id, status, fields))
+    return status, fields
+
+
+def _writer_main(db_url: str, write_queue: Any, checkpoint_path: str | None) -> None:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s [writer] %(message)s")
+    from persistence.repo import Repo
+
+    checkpoint = Checkpoint(checkpoint_path) if checkpoint_path else None
+
+    def record(item_id: str, status: str, fields: dict[str, Any]) -> None:
+        if checkpoint is not None:
+            checkpoint.record(item_id, status, **fields)
+
+    applied = drain(write_queue, Repo(db_url), {MSG_CHECKPOINT: record})
+    logger.info(f"Writer applied {applied} messages")
+
+
+def run_in_processes(
+    items: Iterable[BatchItem],
+    pipeline_factory: Callable[..., Any],
+    processes: int,
+    db_url: str,
+    checkpoint_path: str | None,
+    priority: str,
+    on_start: Callable[[BatchItem], None],
+    on_result: Callable[[BatchItem, str, dict[str, Any]], None],
+) -> None:
+    """Run items on `processes` worker processes, calling on_result in the parent as each finishes."""
+    ctx = multiprocessing.get_context("spawn")
+    write_queue = ctx.Queue()
+    writer = ctx.Process(
+        target=_writer_main, args=(db_url, write_queue, checkpoint_path), name="batch-writer", daemon=True
+    )
+    writer.start()
+    limit = get_limiter().limit
+    shared_slots = ctx.BoundedSemaphore(limit) if limit is not None else None
+
+    try:
+        with ProcessPoolExecutor(
+            max_workers=processes,
+            mp_context=ctx,
+            initializer=_init_worker,
+            initargs=(pipeline_factory, write_queue, db_url, shared_slots, priority),
+        ) as executor:
+            queued = iter(items)
+            in_flight: dict[Any, BatchItem] = {}
+
+            def submit_next() -> None:
+                item = next(queued, None)
+                if item is not None:
+                    on_start(item)
+                    in_flight[executor.submit(_process_item, item)] = item
+
+            # Keep one item per worker in flight so an interrupt leaves nothing queued
+            for _ in range(processes):
+                submit_next()
+            try:
+                while in_flight:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        item = in_flight.pop(future)
+                        status, fields = future.result()
+                        on_result(item, status, fields)
+                        submit_next()
+            except BaseException:
+                executor.shutdown(wait=True, cancel_futures=True)
+                raise
+    finally:
+        # Workers have exited (flushing their queue feeders); let the writer finish the backlog
+        write_queue.put(None)
+        writer.join()
+
+    if writer.exitcode:
+        raise RuntimeError(f"Batch writer process exited with code {writer.exitcode}")
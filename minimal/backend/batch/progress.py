@@ -0,0 +1,148 @@
+"""
+Live progress for a batch: throughput, real spend and ETA.
+
+Cost and tokens come from the UsageMetrics each runtime records into the run's
+RunContext, so they are what the providers billed (cache hits cost nothing),
+not an estimate. Throughput and ETA only count items finished in this session,
+so a resumed batch is not credited with work done before the restart.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+
+
+def format_duration(seconds: float | None) -> str:
+    if seconds is None:
+        return "?"
+    seconds = int(round(seconds))
+    hours, rest = divmod(seconds, 3600)
+    minutes, secs = divmod(rest, 60)
+    if hours:
+        return f"{hours}h{minutes:02d}m"
+    if minutes:
+        return f"{minutes}m{secs:02d}s"
+    return f"{secs}s"
+
+
+@dataclass(frozen=True)
+class ProgressSnapshot:
+    """Batch progress at one moment."""
+
+    total: int
+    resumed: int  # already complete in the checkpoint when the batch started
+    succeeded: int
+    failed: int
+    errors: int
+    running: int
+    elapsed_s: float
+    cost_usd: float
+    input_tokens: int
+    output_tokens: int
+
+    @property
+    def finished(self) -> int:
+        """Items finished in this session."""
+        return self.succeeded + self.failed + self.errors
+
+    @property
+    def remaining(self) -> int:
+        return max(0, self.total - self.resumed - self.finished)
+
+    @property
+    def runs_per_minute(self) -> float:
+        return self.finished * 60 / self.elapsed_s if self.elapsed_s > 0 else 0.0
+
+    @property
+    def cost_per_run(self) -> float | None:
+        return self.cost_usd / self.finished if self.finished else None
+
+    @property
+    def eta_s(self) -> float | None:
+        if not self.remaining:
+            return 0.0
+        if not self.finished:
+            return None
+        return self.remaining * self.elapsed_s / self.finished
+
+    @property
+    def projected_cost_usd(self) -> float | None:
+        """Spend so far plus the average run cost for every remaining item."""
+        if self.cost_per_run is None:
+            return None
+        return self.cost_usd + self.cost_per_run * self.remaining
+
+    def format(self) -> str:
+        done = self.resumed + self.finished
+        parts = [
+            f"{done}/{self.total} done ({self.succeeded} ok, {self.failed} failed, {self.errors} errors, "
+            f"{self.running} running)",
+            f"{self.runs_per_minute:.2f} runs/min",
+            f"${self.cost_usd:.4f} spent ({self.input_tokens + self.output_tokens:,} tokens)",
+        ]
+        if self.projected_cost_usd is not None:
+            parts.append(f"~${self.projected_cost_usd:.2f} projected")
+        parts.append(f"ETA {format_duration(self.eta_s)}")
+        return " | ".join(parts)
+
+
+class ProgressTracker:
+    """
+    Thread-safe counters updated by batch workers.
+
+    Args:
+        total: Items in the manifest
+        resumed: Items skipped because the checkpoint already has them
+        clock: Monotonic time source (injectable for tests)
+    """
+
+    def __init__(self, total: int, resumed: int = 0, clock: Callable[[], float] = time.monotonic):
+        self.total = total
+        self.resumed = resumed
+        self._clock = clock
+        self._started = clock()
+        self._lock = threading.Lock()
+        self._succeeded = 0
+        self._failed = 0
+        self._errors = 0
+        self._running = 0
+        self._cost_usd = 0.0
+        self._input_tokens = 0
+        self._output_tokens = 0
+
+    def start_item(self) -> None:
+        with self._lock:
+            self._running += 1
+
+    def finish_item(self, status: str, usage: dict[str, float] | None = None) -> None:
+        """Count an item as finished with a checkpoint status ("success", "failed" or "error")."""
+        usage = usage or {}
+        with self._lock:
+            self._running -= 1
+            if status == "success":
+                self._succeeded += 1
+            elif status == "failed":
+                self._failed += 1
+            else:
+                self._errors += 1
+            self._cost_usd += usage.get("cost_usd", 0.0)
+            self._input_tokens += int(usage.get("input_tokens", 0))
+            self._output_tokens += int(usage.get("output_tokens", 0))
+
+    def snapshot(self) -> ProgressSnapshot:
+        with self._lock:
+            return ProgressSnapshot(
+                total=self.total,
+                resumed=self.resumed,
+                succeeded=self._succeeded,
+                failed=self._failed,
+                errors=self._errors,
+                running=self._running,
+                elapsed_s=self._clock() - self._started,
+                cost_usd=self._cost_usd,
+                input_tokens=self._input_tokens,
+                output_tokens=self._output_tokens,
+            )
@@ -0,0 +1,334 @@
+"""
+Resumable batch runner for the 7-step pipeline.
+
+Runs every item of a topic manifest on a pool of worker threads. Each worker
+owns its own pipeline (orchestrators keep per-run state), while the number of
+model requests in flight across all workers is capped by the process-wide
+limiter in clients.concurrency. Each finished item is checkpointed before the
+next is reported, so re-running the same command after a crash continues
+with the items that had not finished.
+
+With --processes the items run in worker processes instead and a single
+writer process owns the database and checkpoint (batch/pool.py). With --waves
+the items move through the pipeline together and their model calls go out
+as Bedrock batch-inference jobs, one wave per step (batch/waves.py).
+
+    python -m batch.runner topics.csv --workers 4 --max-concurrent-calls 6
+    python -m batch.runner topics.csv --processes 4 --max-concurrent-calls 6
+    python -m batch.runner topics.csv --waves --wave-size 300
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import threading
+import time
+from collections.abc import Callable, Sequence
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from functools import partial
+from pathlib import Path
+from typing import Any
+
+from clients.batch_inference import BatchSubmitter, BedrockBatchSubmitter
+from clients.concurrency import get_limiter
+from clients.context import run_scope
+from observability.metrics import BATCH_ITEMS
+from services.budget import STOP_BUDGET_REFUSED
+from services.scheduler import BATCH, REFILL, priority_scope
+
+from .checkpoint import STATUS_ERROR, STATUS_FAILED, STATUS_SUCCESS, Checkpoint
+from .manifest import DEFAULT_MAX_ATTEMPTS, BatchItem, items_from_topics, read_manifest
+from .progress import ProgressSnapshot, ProgressTracker, format_duration
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_CHECKPOINT = BASE_DIR / "results" / "batch_checkpoint.jsonl"
+
+
+DEFAULT_DB_PATH = BASE_DIR / "pipeline_results.db"
+
+
+@dataclass(frozen=True)
+class BatchSummary:
+    """Outcome of BatchRunner.run()."""
+
+    progress: ProgressSnapshot
+    records: dict[str, dict[str, Any]]  # checkpoint records of this batch's items, by id
+
+
+def execute_item(get_pipeline: Callable[[], Any], item: BatchItem, priority: str = BATCH) -> tuple[str, dict[str, Any]]:
+    """Run one item; returns its checkpoint status and fields (outcome, real usage, duration)."""
+    started = time.monotonic()
+    fields: dict[str, Any] = {"topic": item.topic}
+    # Runtimes add each call's UsageMetrics to this scope through the pipeline's own nested run scope;
+    # the scheduler queues the item's model calls behind interactive requests
+    with priority_scope(priority), run_scope(f"batch:{item.id}") as scope:
+        try:
+            pipeline = get_pipeline()
+            result = pipeline.run_full_pipeline(item.topic, item.max_attempts)
+        except Exception as exc:
+            logger.exception(f"Batch item {item.id} ({item.topic}) raised")
+            status = STATUS_ERROR
+            fields["error"] = f"{type(exc).__name__}: {exc}"
+        else:
+            status = STATUS_SUCCESS if result.final_success else STATUS_FAILED
+            if result.stop_reason == STOP_BUDGET_REFUSED:
+                # Stopped by the run's spend cap, not by the models: retry on resume like a refused start
+                status = STATUS_ERROR
+                fields["error"] = f"Run stopped at Step {result.stopped_at_step}: {result.stop_reason}"
+            fields.update(
+                run_timestamp=getattr(pipeline, "run_timestamp", None),
+                subtopic=result.subtopic,
+                difficulty=result.difficulty,
+                stopped_at_step=result.stopped_at_step,
+                total_attempts=result.total_attempts,
+                weak_model_failures=result.weak_model_failures,
+            )
+    fields.update(scope.usage(), duration_s=round(time.monotonic() - started, 3))
+    return status, fields
+
+
+class BatchRunner:
+    """
+    Run manifest items concurrently with checkpointing and progress reports.
+
+    Args:
+        pipeline_factory: Builds one pipeline per worker (must provide run_full_pipeline);
+                          in process mode it must be picklable and is called as factory(repo=...)
+        checkpoint: Where finished items are recorded; None disables resume
+        workers: Concurrent pipeline runs (threads)
+        report: Called with a snapshot after every item and on each heartbeat
+        report_interval_s: Seconds between heartbeat reports while items are running (0 disables)
+        processes: Run items in this many worker processes instead of threads (0 = threads)
+        db_url: Database the writer process writes to in process mode
+        priority: Scheduler class for the batch's model calls ("batch" or "refill")
+        submitter: Run items in waves whose model calls go out as batch-inference jobs
+                   (see batch.waves); the factory is then called as factory(runtime=...)
+        wave_size: Items run together per group of waves
+    """
+
+    def __init__(
+        self,
+        pipeline_factory: Callable[..., Any],
+        checkpoint: Checkpoint | None = None,
+        workers: int = 1,
+        report: Callable[[ProgressSnapshot], None] | None = None,
+        report_interval_s: float = 30.0,
+        processes: int = 0,
+        db_url: str | Path = DEFAULT_DB_PATH,
+        priority: str = BATCH,
+        submitter: BatchSubmitter | None = None,
+        wave_size: int = 200,
+    ):
+        if workers < 1:
+            raise ValueError(f"workers must be >= 1, got {workers}")
+        if processes < 0:
+            raise ValueError(f"processes must be >= 0, got {processes}")
+        self.pipeline_factory = pipeline_factory
+        self.checkpoint = checkpoint
+        self.workers = workers
+        self.report = report or (lambda snapshot: logger.info(snapshot.format()))
+        self.report_interval_s = report_interval_s
+        self.processes = processes
+        self.db_url = str(db_url)
+        self.priority = priority
+        self.submitter = submitter
+        self.wave_size = wave_size
+        self._local = threading.local()
+
+    def _pipeline(self) -> Any:
+        pipeline = getattr(self._local, "pipeline", None)
+        if pipeline is None:
+            pipeline = self._local.pipeline = self.pipeline_factory()
+        return pipeline
+
+    def _finished(self, item: BatchItem, status: str, fields: dict[str, Any], tracker: ProgressTracker) -> None:
+        BATCH_ITEMS.inc(outcome=status)
+        tracker.finish_item(status, fields)
+        logger.info(f"[{status}] {item.id}: {item.topic}")
+        self.report(tracker.snapshot())
+
+    def _record(self, item: BatchItem, status: str, fields: dict[str, Any]) -> None:
+        if self.checkpoint is not None:
+            self.checkpoint.record(item.id, status, **fields)
+
+    def _run_item(self, item: BatchItem, tracker: ProgressTracker) -> tuple[str, dict[str, Any]]:
+        tracker.start_item()
+        status, fields = execute_item(self._pipeline, item, self.priority)
+        self._record(item, status, fields)
+        return status, fields
+
+    def _run_threads(self, pending: list[BatchItem], tracker: ProgressTracker) -> None:
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="batch") as executor:
+            futures = {executor.submit(self._run_item, item, tracker): item for item in pending}
+            try:
+                for future in as_completed(futures):
+                    status, fields = future.result()
+                    self._finished(futures[future], status, fields, tracker)
+            except BaseException:
+                # Ctrl-C / fatal error: drop queued items; running ones finish and are checkpointed
+                executor.shutdown(wait=True, cancel_futures=True)
+                raise
+
+    def _run_processes(self, pending: list[BatchItem], tracker: ProgressTracker) -> None:
+        from .pool import run_in_processes
+
+        run_in_processes(
+            pending,
+            self.pipeline_factory,
+            self.processes,
+            self.db_url,
+            str(self.checkpoint.path) if self.checkpoint is not None else None,
+            self.priority,
+            on_start=lambda item: tracker.start_item(),
+            on_result=lambda item, status, fields: self._finished(item, status, fields, tracker),
+        )
+
+    def _run_waves(self, pending: list[BatchItem], tracker: ProgressTracker) -> None:
+        from .waves import run_in_waves
+
+        def finished(item: BatchItem, status: str, fields: dict[str, Any]) -> None:
+            self._record(item, status, fields)
+            self._finished(item, status, fields, tracker)
+
+        run_in_waves(
+            pending,
+            self.pipeline_factory,
+            self.submitter,
+            self.wave_size,
+            self.priority,
+            on_start=lambda item: tracker.start_item(),
+            on_result=finished,
+        )
+
+    def run(self, items: Sequence[BatchItem]) -> BatchSummary:
+        """Run every item not already complete in the checkpoint."""
+        done = self.checkpoint.completed() if self.checkpoint else set()
+        pending = [item for item in items if item.id not in done]
+        tracker = ProgressTracker(len(items), resumed=len(items) - len(pending))
+        if done:
+            logger.info(f"Resuming batch: {len(items) - len(pending)} of {len(items)} items already complete")
+
+        stop = threading.Event()
+        heartbeat = None
+        if self.report_interval_s > 0 and pending:
+            heartbeat = threading.Thread(target=self._heartbeat, args=(tracker, stop), daemon=True)
+            heartbeat.start()
+        try:
+            if self.submitter is not None:
+                self._run_waves(pending, tracker)
+            elif self.processes:
+                self._run_processes(pending, tracker)
+            else:
+                self._run_threads(pending, tracker)
+        finally:
+            stop.set()
+            if heartbeat is not None:
+                heartbeat.join()
+
+        records: dict[str, dict[str, Any]] = {}
+        if self.checkpoint is not None:
+            if self.processes:
+                self.checkpoint = Checkpoint(self.checkpoint.path)  # written by the writer process
+            stored = self.checkpoint.records()
+            records = {item.id: stored[item.id] for item in items if item.id in stored}
+        return BatchSummary(tracker.snapshot(), records)
+
+    def _heartbeat(self, tracker: ProgressTracker, stop: threading.Event) -> None:
+        while not stop.wait(self.report_interval_s):
+            self.report(tracker.snapshot())
+
+
+def default_checkpoint_path(manifest: str | Path | None) -> Path:
+    """<manifest>.checkpoint.jsonl next to the manifest (results/batch_checkpoint.jsonl without one)."""
+    if manifest is None:
+        return DEFAULT_CHECKPOINT
+    manifest = Path(manifest)
+    return manifest.with_name(f"{manifest.stem}.checkpoint.jsonl")
+
+
+def main(argv: list[str] | None = None, default_topics: Sequence[str] | None = None) -> BatchSummary:
+    parser = argparse.ArgumentParser(description="Run the 7-step pipeline over a topic manifest.")
+    parser.add_argument("manifest", nargs="?" if default_topics else None, help="Topic manifest (.csv or .jsonl)")
+    parser.add_argument("--checkpoint", help="Checkpoint file (default: <manifest>.checkpoint.jsonl)")
+    parser.add_argument("--fresh", action="store_true", help="Discard the checkpoint and run every item")
+    parser.add_argument("--workers", type=int, default=1, help="Concurrent pipeline runs (default 1)")
+    parser.add_argument("--parallel", action="store_true", help="Shorthand for --workers 5")
+    parser.add_argument(
+        "--processes", type=int, default=0, help="Run items in this many worker processes with one DB writer"
+    )
+    parser.add_argument(
+        "--max-concurrent-calls",
+        type=int,
+        default=None,
+        help="Model requests in flight across all workers (default: AQU_MAX_CONCURRENT_CALLS, else unlimited)",
+    )
+    parser.add_argument(
+        "--priority", default=BATCH, choices=(BATCH, REFILL), help="Scheduler class for the batch's model calls"
+    )
+    parser.add_argument("--max-attempts", type=int, default=DEFAULT_MAX_ATTEMPTS, help="Default per item")
+    parser.add_argument("--provider", default="anthropic", choices=("anthropic", "openai"))
+    parser.add_argument("--report-every", type=float, default=30.0, help="Seconds between progress reports")
+    parser.add_argument(
+        "--waves",
+        action="store_true",
+        help="Send model calls as Bedrock batch-inference jobs, step by step (AQU_BATCH_S3_URI, AQU_BATCH_ROLE_ARN)",
+    )
+    parser.add_argument("--wave-size", type=int, default=200, help="Items run together in wave mode (default 200)")
+    args = parser.parse_args(argv)
+    if args.waves and (args.provider != "anthropic" or args.processes):
+        parser.error("--waves runs Anthropic models on Bedrock in one process; drop --provider openai / --processes")
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    if args.manifest:
+        items = read_manifest(args.manifest, args.max_attempts)
+    else:
+        items = items_from_topics(default_topics or (), args.max_attempts)
+    checkpoint = Checkpoint(args.checkpoint or default_checkpoint_path(args.manifest))
+    if args.fresh:
+        checkpoint.reset()
+    if args.max_concurrent_calls is not None:
+        get_limiter().set_limit(args.max_concurrent_calls)
+    workers = 5 if args.parallel and args.workers == 1 else args.workers
+
+    from legacy_pipeline import LegacyPipelineOrchestrator
+
+    submitter = BedrockBatchSubmitter.from_env() if args.waves else None
+    limit = get_limiter().limit
+    pool = f"{args.processes} processes" if args.processes else f"{workers} workers"
+    if submitter is not None:
+        pool = f"waves of up to {args.wave_size} items"
+    logger.info(
+        f"Batch of {len(items)} items, {pool}, "
+        f"{limit if limit is not None else 'unlimited'} concurrent model calls, checkpoint {checkpoint.path}"
+    )
+    runner = BatchRunner(
+        partial(LegacyPipelineOrchestrator, provider=args.provider),
+        checkpoint=checkpoint,
+        workers=workers,
+        report_interval_s=args.report_every,
+        processes=args.processes,
+        priority=args.priority,
+        submitter=submitter,
+        wave_size=args.wave_size,
+    )
+    summary = runner.run(items)
+
+    progress = summary.progress
+    print(f"\nBatch finished in {format_duration(progress.elapsed_s)}: {progress.format()}")
+    for item_id, record in summary.records.items():
+        if record["status"] == STATUS_SUCCESS:
+            print(f"✅ {item_id}: run {record.get('run_timestamp')} (${record.get('cost_usd', 0.0):.4f})")
+        elif record["status"] == STATUS_FAILED:
+            print(f"❌ {item_id}: stopped at Step {record.get('stopped_at_step')}")
+        else:
+            print(f"⚠️  {item_id}: {record.get('error')}")
+    return summary
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""
+Wave mode for the batch runner: model calls go out as offline batch jobs.
+
+On-demand Bedrock calls are rate limited, which bounds a nightly refill of
+hundreds of topics. Batch inference accepts many requests in one job at a
+lower per-token price, but answers after minutes or hours. Wave mode runs a
+group of items concurrently, each with its own pipeline on a WaveRuntime:
+
+- A run's model call is held in a WaveCollector instead of being sent.
+- When every live run is waiting on a call, the held calls form a wave. Each
+  model's calls in the wave are submitted as one JSONL job through a
+  pluggable submitter (clients.batch_inference).
+- Responses are handed back. Each run continues to its next step and waits
+  again, so runs move through Step 1, then Step 2, and so on together.
+- A run that fails a step finishes early and simply takes part in no later
+  waves. Retries (Step 3 attempts, Step 7 repairs) join whichever wave is
+  next.
+
+Groups smaller than the submitter's min_records run on demand. The step
+logic, validation and persistence are the same as in thread mode.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import queue
+import threading
+import time
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from typing import Any
+
+from clients.batch_inference import BatchSubmitter
+from clients.bedrock import BedrockRuntime, encode_body
+from observability.metrics import BATCH_WAVE_RECORDS
+
+from .manifest import BatchItem
+from .runner import execute_item
+
+logger = logging.getLogger(__name__)
+
+BATCH_PRICE_FACTOR = 0.5  # batch inference bills half the on-demand token price
+ON_DEMAND = "on_demand"
+
+
+@dataclass
+class _HeldCall:
+    model_id: str
+    body: dict[str, Any]
+    output: Any = None
+
+
+class WaveCollector:
+    """
+    Holds model calls from concurrent runs and submits them in waves.
+
+    Args:
+        submitter: Runs one JSONL job per model and wave
+        name: Prefix for job names (default: aqumen-<timestamp>)
+    """
+
+    def __init__(self, submitter: BatchSubmitter, name: str | None = None):
+        self.submitter = submitter
+        self.name = name or time.strftime("aqumen-%Y%m%d-%H%M%S")
+        self.waves = 0
+        self._cond = threading.Condition()
+        self._participants = 0
+        self._held: list[_HeldCall] = []
+
+    def join(self, count: int = 1) -> None:
+        """Count runs as live; each calls leave() when it finishes."""
+        with self._cond:
+            self._participants += count
+
+    def leave(self) -> None:
+        with self._cond:
+            self._participants -= 1
+            self._cond.notify_all()
+
+    def request(self, model_id: str, body: dict[str, Any]) -> Any:
+        """Block until this call's wave has run; returns its output line or ON_DEMAND."""
+        call = _HeldCall(model_id, body)
+        with self._cond:
+            self._held.append(call)
+            self._cond.notify_all()
+            while call.output is None:
+                self._cond.wait()
+        return call.output
+
+    def _next_wave(self) -> list[_HeldCall] | None:
+        with self._cond:
+            while not (self._held and len(self._held) >= self._participants):
+                if self._participants <= 0 and not self._held:
+                    return None
+                self._cond.wait()
+            wave, self._held = self._held, []
+        return wave
+
+    def serve(self) -> None:
+        """Submit waves until every participant has left."""
+        while (wave := self._next_wave()) is not None:
+            self._run_wave(wave)
+
+    def _run_wave(self, wave: list[_HeldCall]) -> None:
+        self.waves += 1
+        by_model: dict[str, list[_HeldCall]] = {}
+        for call in wave:
+            by_model.setdefault(call.model_id, []).append(call)
+        logger.info(f"Wave {self.waves}: {len(wave)} calls for {len(by_model)} models")
+
+        outputs: dict[int, Any] = {}
+        for group, (model_id, calls) in enumerate(by_model.items(), 1):
+            if len(calls) < getattr(self.submitter, "min_records", 0):
+                BATCH_WAVE_RECORDS.inc(len(calls), mode=ON_DEMAND)
+                outputs.update((id(call), ON_DEMAND) for call in calls)
+                continue
+            records = [{"recordId": f"{n:06d}", "modelInput": call.body} for n, call in enumerate(calls)]
+            job_name = f"{self.name}-w{self.waves:03d}-{group}"
+            try:
+                lines = self.submitter.run(job_name, model_id, records)
+                missing = "record missing from batch output"
+            except Exception as exc:
+                logger.exception(f"Batch job {job_name} failed")
+                lines, missing = {}, f"batch job failed: {exc}"
+            BATCH_WAVE_RECORDS.inc(len(calls), mode="batch")
+            for record, call in zip(records, calls, strict=True):
+                outputs[id(call)] = lines.get(record["recordId"]) or {"error": {"errorMessage": missing}}
+
+        with self._cond:
+            for call in wave:
+                call.output = outputs[id(call)]
+            self._cond.notify_all()
+
+
+class WaveRuntime(BedrockRuntime):
+    """BedrockRuntime whose calls wait for the collector's next wave (billed at the batch price)."""
+
+    def __init__(self, collector: WaveCollector, region: str = "us-west-2"):
+        super().__init__(region)
+        self.collector = collector
+        self.response_cache = None
+        self._batched = threading.local()
+
+    def _calculate_cost(self, model_id: str, usage: dict[str, int]) -> float:
+        cost = super()._calculate_cost(model_id, usage)
+        return cost * BATCH_PRICE_FACTOR if getattr(self._batched, "active", False) else cost
+
+    def _invoke_with_retry(
+        self,
+        model_id: str,
+        body: dict[str, Any],
+        max_retries: int | None = None,
+        base_delay: float | None = None,
+    ) -> tuple[dict[str, Any], Any]:
+        start_time = time.time()
+        output = self.collector.request(model_id, json.loads(encode_body(body)))
+        if output == ON_DEMAND:
+            return super()._invoke_with_retry(model_id, body, max_retries, base_delay)
+        if "modelOutput" not in output:
+            error = output.get("error") or {}
+            message = error.get("errorMessage", error) if isinstance(error, dict) else error
+            raise RuntimeError(f"Batch record failed: {message}")
+
+        data = output["modelOutput"]
+        self._batched.active = True
+        try:
+            metrics = self._log_usage_from_data(model_id, data, start_time)
+        finally:
+            self._batched.active = False
+        return data, metrics
+
+
+def _wave_pipeline(pipeline_factory: Callable[..., Any], collector: WaveCollector) -> Any:
+    pipeline = pipeline_factory(runtime=WaveRuntime(collector))
+    invoker = getattr(pipeline, "invoker", None)
+    if invoker is not None:
+        # Calls queue in the wave; a run holding a scheduler slot there would stall the others
+        invoker.scheduler = None
+    return pipeline
+
+
+def run_in_waves(
+    items: Iterable[BatchItem],
+    pipeline_factory: Callable[..., Any],
+    submitter: BatchSubmitter,
+    wave_size: int,
+    priority: str,
+    on_start: Callable[[BatchItem], None],
+    on_result: Callable[[BatchItem, str, dict[str, Any]], None],
+) -> None:
+    """
+    Run items `wave_size` at a time, calling on_result as each finishes.
+
+    The pipeline factory is called as factory(runtime=...) once per item.
+    """
+    items = list(items)
+    for offset in range(0, len(items), wave_size):
+        group = items[offset : offset + wave_size]
+        collector = WaveCollector(submitter)
+        results: queue.Queue = queue.Queue()
+
+        def run(item: BatchItem, collector: WaveCollector = collector, results: queue.Queue = results) -> None:
+            try:
+                status, fields = execute_item(lambda: _wave_pipeline(pipeline_factory, collector), item, priority)
+            finally:
+                collector.leave()
+            results.put((item, status, fields))
+
+        # Every run counts as live before any starts, so the first wave waits for all of them
+        collector.join(len(group))
+        coordinator = threading.Thread(target=collector.serve, name="wave-coordinator", daemon=True)
+        coordinator.start()
+        for item in group:
+            on_start(item)
+            threading.Thread(target=run, args=(item,), name=f"wave-{item.id}", daemon=True).start()
+        for _ in group:
+            on_result(*results.get())
+        coordinator.join()
+        logger.info(f"Finished {len(group)} items in {collector.waves} waves")
@@ -0,0 +1,88 @@
+"""
+Cold-start benchmark for the API server.
+
+    python bench_cold_start.py                     # 5 runs, median and worst
+    python bench_cold_start.py --runs 10 --max-seconds 1.5
+
+Each run starts a fresh interpreter that imports api_server, runs the startup
+hook and requests /health, as a free-tier instance does after spinning up.
+It reports the import time, the time to the first /health answer (from
+interpreter start) and any SDK that was imported before the app started. The
+pipeline keeps building on its warm-up thread; the probe exits without
+waiting for it. With --max-seconds the exit status is 1 when the median time
+to first /health is over the limit or an SDK loaded eagerly.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent
+
+# Modules the server must not import before its first request
+HEAVY_MODULES = ("boto3", "openai", "psycopg2", "legacy_pipeline", "corrected_7step_pipeline")
+
+PROBE = f"""
+import json, os, sys, time
+started = time.perf_counter()
+import api_server
+imported = time.perf_counter()
+eager = [name for name in {HEAVY_MODULES!r} if name in sys.modules]
+from fastapi.testclient import TestClient
+with TestClient(api_server.app) as client:
+    response = client.get("/health")
+    answered = time.perf_counter()
+    print(json.dumps({{
+        "import_s": imported - started,
+        "health_s": answered - started,
+        "status": response.status_code,
+        "pipeline_ready": response.json().get("pipeline_ready"),
+        "eager_modules": eager,
+    }}), flush=True)
+    os._exit(0)
+"""
+
+
+def measure_cold_start() -> dict:
+    """One cold start in a fresh interpreter; adds process_s (wall time including interpreter start-up)."""
+    env = {key: value for key, value in os.environ.items() if key != "AQU_MOCK_PIPELINE"}
+    started = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-c", PROBE], cwd=BACKEND_DIR, env=env, capture_output=True, text=True, timeout=120
+    )
+    elapsed = time.perf_counter() - started
+    lines = completed.stdout.strip().splitlines()
+    if completed.returncode != 0 or not lines:
+        raise RuntimeError(f"Cold-start probe failed ({completed.returncode}): {completed.stderr[-2000:]}")
+    result = json.loads(lines[-1])
+    result["process_s"] = elapsed
+    return result
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Measure API server cold start to first /health")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters to start (default: 5)")
+    parser.add_argument("--max-seconds", type=float, help="Fail when the median time to first /health exceeds this")
+    args = parser.parse_args()
+
+    results = [measure_cold_start() for _ in range(args.runs)]
+    for key, label in (("import_s", "import api_server"), ("health_s", "first /health"), ("process_s", "process")):
+        values = [result[key] for result in results]
+        print(f"{label:>18}: median {statistics.median(values):.3f}s, worst {max(values):.3f}s")
+
+    eager = sorted({name for result in results for name in result["eager_modules"]})
+    if eager:
+        print(f"Imported before the first request: {', '.join(eager)}")
+    median = statistics.median(result["health_s"] for result in results)
+    if args.max_seconds is not None and (eager or median > args.max_seconds):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,178 @@
+"""
+Submitters for offline (batch) model inference.
+
+A submitter takes one JSONL job for one model, in Bedrock's batch-inference
+record format, and returns the output lines by record id:
+
+    input:  {"recordId": "000001", "modelInput": {...InvokeModel body...}}
+    output: {"recordId": "000001", "modelInput": {...}, "modelOutput": {...response...}}
+            {"recordId": "000002", "modelInput": {...}, "error": {"errorMessage": "..."}}
+
+- BedrockBatchSubmitter uploads the job to S3, starts a model invocation job
+  and polls until it finishes. Bedrock rejects jobs below a minimum record
+  count, so it reports min_records and smaller groups run on demand.
+- LocalFileSubmitter writes the same files to a directory and answers each
+  record with a callable. It is a stand-in for tests and dry runs.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import time
+from collections.abc import Callable, Iterable
+from pathlib import Path
+from typing import Any, Protocol
+
+logger = logging.getLogger(__name__)
+
+JOB_SUCCEEDED = frozenset({"Completed", "PartiallyCompleted"})
+JOB_FAILED = frozenset({"Failed", "Stopped", "Expired"})
+
+
+class BatchSubmitter(Protocol):
+    min_records: int
+
+    def run(self, job_name: str, model_id: str, records: list[dict[str, Any]]) -> dict[str, dict[str, Any]]:
+        """Run one job to completion and return its output lines by recordId."""
+        ...
+
+
+def dump_records(records: Iterable[dict[str, Any]]) -> str:
+    return "".join(json.dumps(record) + "\n" for record in records)
+
+
+def parse_output(text: str) -> dict[str, dict[str, Any]]:
+    """Output lines by recordId; unreadable lines are skipped (their records count as missing)."""
+    lines = {}
+    for raw in text.splitlines():
+        if not raw.strip():
+            continue
+        try:
+            line = json.loads(raw)
+        except json.JSONDecodeError:
+            logger.warning(f"Skipping unreadable batch output line: {raw[:200]}")
+            continue
+        lines[str(line.get("recordId"))] = line
+    return lines
+
+
+class LocalFileSubmitter:
+    """
+    File-based stand-in for a batch service.
+
+    Args:
+        directory: Where <job>.jsonl and <job>.jsonl.out are written
+        respond: Called as respond(model_id, model_input) for each record; returns the model response
+        min_records: Smaller groups are sent back to run on demand
+    """
+
+    def __init__(
+        self, directory: str | Path, respond: Callable[[str, dict[str, Any]], dict[str, Any]], min_records: int = 0
+    ):
+        self.directory = Path(directory)
+        self.respond = respond
+        self.min_records = min_records
+        self.jobs: list[tuple[str, str, int]] = []  # (job name, model, records) in submission order
+
+    def run(self, job_name: str, model_id: str, records: list[dict[str, Any]]) -> dict[str, dict[str, Any]]:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        input_path = self.directory / f"{job_name}.jsonl"
+        input_path.write_text(dump_records(records), encoding="utf-8")
+        self.jobs.append((job_name, model_id, len(records)))
+
+        outputs = []
+        for record in records:
+            line = {"recordId": record["recordId"], "modelInput": record["modelInput"]}
+            try:
+                line["modelOutput"] = self.respond(model_id, record["modelInput"])
+            except Exception as exc:
+                line["error"] = {"errorMessage": f"{type(exc).__name__}: {exc}"}
+            outputs.append(line)
+        output_path = self.directory / f"{job_name}.jsonl.out"
+        output_path.write_text(dump_records(outputs), encoding="utf-8")
+        return parse_output(output_path.read_text(encoding="utf-8"))
+
+
+class BedrockBatchSubmitter:
+    """
+    Runs jobs with Bedrock batch inference (CreateModelInvocationJob).
+
+    Args:
+        s3_uri: s3://bucket/prefix for job input and output
+        role_arn: Service role Bedrock assumes to read and write that prefix
+        region: AWS region of the jobs
+        poll_s: Seconds between job status checks
+        min_records: Groups below Bedrock's per-job minimum run on demand instead
+    """
+
+    def __init__(
+        self, s3_uri: str, role_arn: str, region: str = "us-west-2", poll_s: float = 60.0, min_records: int = 100
+    ):
+        if not s3_uri.startswith("s3://"):
+            raise ValueError(f"s3_uri must start with s3://, got {s3_uri!r}")
+        self.bucket, _, prefix = s3_uri[len("s3://") :].partition("/")
+        self.prefix = prefix.strip("/")
+        self.role_arn = role_arn
+        self.region = region
+        self.poll_s = poll_s
+        self.min_records = min_records
+        self._bedrock = None
+        self._s3 = None
+
+    @classmethod
+    def from_env(cls) -> BedrockBatchSubmitter:
+        s3_uri = os.getenv("AQU_BATCH_S3_URI", "")
+        role_arn = os.getenv("AQU_BATCH_ROLE_ARN", "")
+        if not s3_uri or not role_arn:
+            raise ValueError("Batch inference needs AQU_BATCH_S3_URI and AQU_BATCH_ROLE_ARN")
+        return cls(
+            s3_uri,
+            role_arn,
+            region=os.getenv("AWS_REGION", "us-west-2"),
+            poll_s=float(os.getenv("AQU_BATCH_POLL_S", "60")),
+            min_records=int(os.getenv("AQU_BATCH_MIN_RECORDS", "100")),
+        )
+
+    def _clients(self) -> tuple[Any, Any]:
+        if self._bedrock is None:
+            import boto3
+
+            self._bedrock = boto3.client("bedrock", region_name=self.region)
+            self._s3 = boto3.client("s3", region_name=self.region)
+        return self._bedrock, self._s3
+
+    def _key(self, *parts: str) -> str:
+        return "/".join(part for part in (self.prefix, *parts) if part)
+
+    def run(self, job_name: str, model_id: str, records: list[dict[str, Any]]) -> dict[str, dict[str, Any]]:
+        bedrock, s3 = self._clients()
+        input_key = self._key(job_name, "input.jsonl")
+        s3.put_object(Bucket=self.bucket, Key=input_key, Body=dump_records(records).encode("utf-8"))
+        job_arn = bedrock.create_model_invocation_job(
+            jobName=job_name,
+            roleArn=self.role_arn,
+            modelId=model_id,
+            inputDataConfig={
+                "s3InputDataConfig": {"s3Uri": f"s3://{self.bucket}/{input_key}", "s3InputFormat": "JSONL"}
+            },
+            outputDataConfig={"s3OutputDataConfig": {"s3Uri": f"s3://{self.bucket}/{self._key(job_name, 'output')}/"}},
+        )["jobArn"]
+        logger.info(f"Submitted batch job {job_name} ({len(records)} records for {model_id})")
+
+        while True:
+            job = bedrock.get_model_invocation_job(jobIdentifier=job_arn)
+            status = job["status"]
+            if status in JOB_SUCCEEDED:
+                break
+            if status in JOB_FAILED:
+                raise RuntimeError(f"Batch job {job_name} {status.lower()}: {job.get('message', '')}")
+            time.sleep(self.poll_s)
+
+        # Bedrock writes <output prefix>/<job id>/<input file name>.out
+        job_id = job_arn.rsplit("/", 1)[-1]
+        output_key = self._key(job_name, "output", job_id, "input.jsonl.out")
+        text = s3.get_object(Bucket=self.bucket, Key=output_key)["Body"].read().decode("utf-8")
+        logger.info(f"Batch job {job_name} {status.lower()}")
+        return parse_output(text)
@@ -1,16 +1,65 @@
 import json
 import logging
 import random
+import threading
 import time
 from dataclasses import dataclass
 from typing import Any
 
-import boto3
-from botocore.config import Config
 from botocore.exceptions import BotoCoreError, ClientError
 
+from observability.metrics import (
+    MODEL_CALL_DURATION,
+    MODEL_CALLS,
+    MODEL_COST,
+    MODEL_RETRIES,
+    MODEL_THROTTLES,
+    MODEL_TOKENS,
+    MODEL_TRUNCATIONS,
+)
+from observability.tracing import span
+
+from .concurrency import model_slot
+from .context import current_run, observe_call
+from .response_cache import ResponseCache
+
 logger = logging.getLogger(__name__)
 
+PROVIDER_NAME = "anthropic"
+THROTTLING_ERROR_CODES = {"ThrottlingException", "TooManyRequestsException", "ServiceQuotaExceededException"}
+# Errors caused by the request itself; retrying it (anywhere) fails the same way
+NON_RETRYABLE_ERROR_CODES = {
+    "AccessDeniedException",
+    "ValidationException",
+    "ResourceNotFoundException",
+    "UnsupportedMediaTypeException",
+}
+STOP_MAX_TOKENS = "max_tokens"
+MIN_THINKING_BUDGET = 1024  # smallest budget_tokens Claude accepts
+CHARS_PER_TOKEN = 4
+
+
+def encode_body(body: dict[str, Any]) -> str:
+    """Serialise a request body, splicing in a precompiled ToolSpec's JSON instead of re-encoding it."""
+    tools = body.get("tools")
+    fragment = getattr(tools, "json", None)
+    if not isinstance(fragment, str):
+        return json.dumps(body)
+    rest = json.dumps({key: value for key, value in body.items() if key != "tools"})
+    return f'{rest[:-1]}, "tools": {fragment}}}' if len(rest) > 2 else f'{{"tools": {fragment}}}'
+
+
+def is_throttle(exc: BaseException) -> bool:
+    return isinstance(exc, ClientError) and exc.response.get("Error", {}).get("Code") in THROTTLING_ERROR_CODES
+
+
+def is_transient(exc: BaseException) -> bool:
+    """Throttling, service and connection errors; the ones _invoke_with_retry retries."""
+    if isinstance(exc, ClientError):
+        return exc.response.get("Error", {}).get("Code") not in NON_RETRYABLE_ERROR_CODES
+    return isinstance(exc, BotoCoreError)
+
+
 @dataclass
 class UsageMetrics:
     """Token usage and cost metrics from AWS Bedrock response"""
@@ -21,6 +70,8 @@ class UsageMetrics:
     total_cost_usd: float = 0.0
     model_id: str = ""
     response_time_ms: int = 0
+    stop_reason: str = ""
+    thinking_tokens: int = 0  # estimated from the returned thinking text; included in output_tokens
 
 class BedrockRuntime:
     # Pricing per 1M tokens (approximate, should be updated periodically)
@@ -41,22 +92,40 @@ class BedrockRuntime:
         self._client: Any | None = None
         self._import_error: Exception | None = None
         self.usage_log: list[UsageMetrics] = []
-        try:
-            retry_config = Config(
-                retries={
-                    "max_attempts": 10,
-                    "mode": "adaptive",
-                }
-            )
-            self._client = boto3.client(
-                "bedrock-runtime", region_name=region, config=retry_config
-            )
-        except Exception as exc:  # pragma: no cover -- runtime dependency
-            self._import_error = exc
-            self._client = None
+        # Retry policy defaults; a routing layer may shorten these to fail over sooner
+        self.max_retries = 5
+        self.base_delay = 40.0
+        # Opt-in cache for deterministic calls (AQU_RESPONSE_CACHE=1)
+        self.response_cache: ResponseCache | None = ResponseCache.from_env()
+        self._client_lock = threading.Lock()
+
+    def _connect(self) -> Any | None:
+        """Create the boto3 client on first use; importing boto3 would otherwise slow every cold start."""
+        with self._client_lock:
+            if self._client is None and self._import_error is None:
+                try:
+                    import boto3
+                    from botocore.config import Config
+
+                    retry_config = Config(
+                        retries={
+                            "max_attempts": 10,
+                            "mode": "adaptive",
+                        }
+                    )
+                    self._client = boto3.client(
+                        "bedrock-runtime", region_name=self.region, config=retry_config
+                    )
+                except Exception as exc:  # pragma: no cover -- runtime dependency
+                    self._import_error = exc
+            return self._client
+
+    @property
+    def available(self) -> bool:
+        return self._connect() is not None
 
     def _ensure_client(self) -> Any:
-        if self._client is None:
+        if self._connect() is None:
             raise RuntimeError(
                 "Bedrock client unavailable. Set AWS credentials and install boto3. "
                 f"Root cause: {self._import_error}"
@@ -77,6 +146,9 @@ class BedrockRuntime:
     def _log_usage_from_data(self, model_id: str, response_data: dict[str, Any], start_time: float) -> UsageMetrics:
         """Extract usage information from parsed response data and calculate cost"""
         usage_data = response_data.get('usage', {})
+        thinking_chars = sum(
+            len(block.get("thinking", "")) for block in response_data.get("content", []) if block.get("type") == "thinking"
+        )
 
         metrics = UsageMetrics(
             input_tokens=usage_data.get('input_tokens', 0),
@@ -85,10 +157,24 @@ class BedrockRuntime:
             cache_read_input_tokens=usage_data.get('cache_read_input_tokens', 0),
             total_cost_usd=self._calculate_cost(model_id, usage_data),
             model_id=model_id,
-            response_time_ms=int((time.time() - start_time) * 1000)
+            response_time_ms=int((time.time() - start_time) * 1000),
+            stop_reason=response_data.get("stop_reason") or "",
+            thinking_tokens=thinking_chars // CHARS_PER_TOKEN,
         )
 
         self.usage_log.append(metrics)
+        run = current_run()
+        if run is not None:
+            run.record_usage(metrics)
+        observe_call(metrics)
+        if metrics.stop_reason == STOP_MAX_TOKENS:
+            MODEL_TRUNCATIONS.inc(provider=PROVIDER_NAME, model=model_id)
+            logger.warning(f"Model {model_id} hit max_tokens after {metrics.output_tokens} output tokens")
+        MODEL_CALL_DURATION.observe(metrics.response_time_ms / 1000, provider=PROVIDER_NAME, model=model_id)
+        MODEL_CALLS.inc(provider=PROVIDER_NAME, model=model_id, outcome="success")
+        MODEL_TOKENS.inc(metrics.input_tokens, provider=PROVIDER_NAME, model=model_id, direction="input")
+        MODEL_TOKENS.inc(metrics.output_tokens, provider=PROVIDER_NAME, model=model_id, direction="output")
+        MODEL_COST.inc(metrics.total_cost_usd, provider=PROVIDER_NAME, model=model_id)
         logger.info(f"Model {model_id}: {metrics.input_tokens} input, {metrics.output_tokens} output tokens, "
                    f"cost: ${metrics.total_cost_usd:.4f}, time: {metrics.response_time_ms}ms")
 
@@ -98,8 +184,8 @@ class BedrockRuntime:
         self,
         model_id: str,
         body: dict[str, Any],
-        max_retries: int = 5,
-        base_delay: float = 40.0
+        max_retries: int | None = None,
+        base_delay: float | None = None,
     ) -> tuple[dict[str, Any], UsageMetrics]:
         """
         Invoke model with exponential backoff retry logic.
@@ -109,64 +195,95 @@ class BedrockRuntime:
         - max_retries=5: Gives 6 total attempts
         - Post-success delay: 2s to help prevent rate limit hits
         """
-        client = self._ensure_client()
-
-        for attempt in range(max_retries + 1):
-            start_time = time.time()
-            try:
-                response = client.invoke_model(
-                    modelId=model_id,
-                    body=json.dumps(body),
-                    contentType="application/json",
-                    accept="application/json",
-                )
-
-                # Read and parse response body once
-                response_data = json.loads(response["body"].read())
-
-                # Log usage from parsed data
-                metrics = self._log_usage_from_data(model_id, response_data, start_time)
-
-                # Small delay after successful call to help prevent rate limits
-                time.sleep(2)
-
-                return response_data, metrics
-
-            except ClientError as e:
-                error_code = e.response['Error']['Code']
-
-                # Don't retry on certain errors
-                non_retryable_errors = {
-                    'AccessDeniedException',
-                    'ValidationException',
-                    'ResourceNotFoundException',
-                    'UnsupportedMediaTypeException'
-                }
-
-                if error_code in non_retryable_errors:
-                    logger.error(f"Non-retryable error {error_code}: {e}")
-                    raise
-
-                # Retry on throttling and service errors
-                if attempt == max_retries:
-                    logger.error(f"Max retries ({max_retries}) exceeded for {error_code}")
-                    raise
-
-                # Calculate exponential backoff with jitter
-                delay = base_delay * (2 ** attempt) + random.uniform(0, 1)
-                logger.warning(f"Retryable error {error_code} on attempt {attempt + 1}/{max_retries + 1}. "
-                             f"Retrying in {delay:.2f}s...")
-                time.sleep(delay)
-
-            except BotoCoreError as e:
-                if attempt == max_retries:
-                    logger.error(f"Max retries ({max_retries}) exceeded for BotoCoreError: {e}")
-                    raise
-
-                delay = base_delay * (2 ** attempt) + random.uniform(0, 1)
-                logger.warning(f"BotoCoreError on attempt {attempt + 1}/{max_retries + 1}. "
-                             f"Retrying in {delay:.2f}s: {e}")
-                time.sleep(delay)
+        if max_retries is None:
+            max_retries = self.max_retries
+        if base_delay is None:
+            base_delay = self.base_delay
+        cache = self.response_cache if self.response_cache is not None and self.response_cache.applies(body) else None
+
+        with span("model_call", provider=PROVIDER_NAME, model=model_id) as call_span:
+            if cache is not None:
+                cached = cache.get(model_id, body)
+                if cached is not None:
+                    call_span.set_attribute("cache", "hit")
+                    return cached, UsageMetrics(model_id=model_id)
+
+            client = self._ensure_client()
+            payload = encode_body(body)
+            for attempt in range(max_retries + 1):
+                start_time = time.time()
+                try:
+                    with span("invoke", attempt=attempt + 1), model_slot(model_id, is_throttle):
+                        response = client.invoke_model(
+                            modelId=model_id,
+                            body=payload,
+                            contentType="application/json",
+                            accept="application/json",
+                        )
+
+                        # Read and parse response body once
+                        response_data = json.loads(response["body"].read())
+
+                    # Log usage from parsed data
+                    metrics = self._log_usage_from_data(model_id, response_data, start_time)
+                    call_span.set_attributes(
+                        attempts=attempt + 1,
+                        input_tokens=metrics.input_tokens,
+                        output_tokens=metrics.output_tokens,
+                        cost_usd=metrics.total_cost_usd,
+                    )
+
+                    if cache is not None and response_data.get("content"):
+                        cache.put(model_id, body, response_data)
+
+                    # Small delay after successful call to help prevent rate limits
+                    with span("rate_limit_pause", delay_s=2):
+                        time.sleep(2)
+
+                    return response_data, metrics
+
+                except ClientError as e:
+                    error_code = e.response['Error']['Code']
+
+                    # Don't retry on certain errors
+                    if error_code in NON_RETRYABLE_ERROR_CODES:
+                        logger.error(f"Non-retryable error {error_code}: {e}")
+                        MODEL_CALLS.inc(provider=PROVIDER_NAME, model=model_id, outcome="error")
+                        raise
+
+                    if error_code in THROTTLING_ERROR_CODES:
+                        MODEL_THROTTLES.inc(provider=PROVIDER_NAME, model=model_id)
+
+                    # Retry on throttling and service errors
+                    if attempt == max_retries:
+                        logger.error(f"Max retries ({max_retries}) exceeded for {error_code}")
+                        MODEL_CALLS.inc(provider=PROVIDER_NAME, model=model_id, outcome="error")
+                        raise
+
+                    MODEL_RETRIES.inc(provider=PROVIDER_NAME, model=model_id, reason=error_code)
+
+                    # Calculate exponential backoff with jitter
+                    delay = base_delay * (2 ** attempt) + random.uniform(0, 1)
+                    logger.warning(f"Retryable error {error_code} on attempt {attempt + 1}/{max_retries + 1}. "
+                                 f"Retrying in {delay:.2f}s...")
+                    with span("retry_backoff", attempt=attempt + 1, reason=error_code, delay_s=round(delay, 2)):
+                        time.sleep(delay)
+
+                except BotoCoreError as e:
+                    if attempt == max_retries:
+                        logger.error(f"Max retries ({max_retries}) exceeded for BotoCoreError: {e}")
+                        MODEL_CALLS.inc(provider=PROVIDER_NAME, model=model_id, outcome="error")
+                        raise
+
+                    MODEL_RETRIES.inc(provider=PROVIDER_NAME, model=model_id, reason=type(e).__name__)
+
+                    delay = base_delay * (2 ** attempt) + random.uniform(0, 1)
+                    logger.warning(f"BotoCoreError on attempt {attempt + 1}/{max_retries + 1}. "
+                                 f"Retrying in {delay:.2f}s: {e}")
+                    with span(
+                        "retry_backoff", attempt=attempt + 1, reason=type(e).__name__, delay_s=round(delay, 2)
+                    ):
+                        time.sleep(delay)
 
         raise RuntimeError("Should not reach here")
 
@@ -203,6 +320,30 @@ class BedrockRuntime:
             "model_breakdown": model_breakdown
         }
 
+    @staticmethod
+    def is_transient(exc: BaseException) -> bool:
+        """Whether another attempt, or another provider, may succeed where this call failed."""
+        return is_transient(exc)
+
+    @staticmethod
+    def is_throttle(exc: BaseException) -> bool:
+        """Whether the model refused the call for load: reachable, but busy."""
+        return is_throttle(exc)
+
+    def probe(self, model_id: str) -> None:
+        """Send a one-token request to the model through its call slot (no retry loop, cache or usage log)."""
+        body = {
+            "anthropic_version": "bedrock-2023-05-31",
+            "max_tokens": 1,
+            "messages": [{"role": "user", "content": "ping"}],
+        }
+        # The slot keeps probes inside the adaptive limit, and a throttled probe backs that limit off
+        with model_slot(model_id, is_throttle):
+            response = self._ensure_client().invoke_model(
+                modelId=model_id, body=json.dumps(body), contentType="application/json", accept="application/json"
+            )
+            response["body"].read()
+
     def invoke(
         self,
         model_id: str,
@@ -231,7 +372,12 @@ class BedrockRuntime:
         thinking_budget: int = 2048,
         temperature: float = 0.0,
     ) -> dict[str, Any]:
-        """Invoke model with tools, retry logic and cost tracking"""
+        """
+        Invoke model with tools, retry logic and cost tracking.
+
+        max_tokens is the room for the answer; with extended thinking the
+        request reserves thinking_budget (at least 1024) on top of it.
+        """
         temp_value = temperature
         if use_thinking:
             temp_value = 1.0  # Claude Extended Thinking requires temperature = 1
@@ -243,10 +389,11 @@ class BedrockRuntime:
             "temperature": temp_value,
         }
         if use_thinking:
-            # Claude requires budget_tokens < max_tokens; we cap at 1024 for stability.
-            effective_budget = min(1024, max_tokens - 1)
-            if effective_budget <= 0:
-                raise ValueError("max_tokens must be greater than 1 when extended thinking is enabled.")
+            # budget_tokens counts toward max_tokens, so the answer keeps its own max_tokens
+            if max_tokens < 1:
+                raise ValueError("max_tokens must be positive when extended thinking is enabled.")
+            effective_budget = max(MIN_THINKING_BUDGET, thinking_budget)
+            body["max_tokens"] = max_tokens + effective_budget
             body["thinking"] = {
                 "type": "enabled",
                 "budget_tokens": effective_budget,
@@ -0,0 +1,298 @@
+"""
+Process-wide limit on in-flight model calls.
+
+Runtimes wrap each provider request in model_slot(). When
+AQU_MAX_CONCURRENT_CALLS requests are already in flight, further callers block
+until one finishes, however many pipelines or batch workers are running. A
+slot covers only the request itself, not retry back-off or the post-call
+pause, so a throttled call does not hold capacity while it sleeps.
+
+Unset or 0 means unlimited; batch runners can also change the limit at runtime
+with get_limiter().set_limit(). Worker processes of one batch share() a
+multiprocessing semaphore so the cap holds across the whole pool.
+
+With AQU_ADAPTIVE_CONCURRENCY=1 each model also gets its own AdaptiveLimiter.
+A call takes its model's slot first and the process-wide slot inside it, so
+no global slot is held while waiting on a model's limit. That limit grows by
+one slot per window of successful calls and is cut by AQU_AIMD_BACKOFF on
+every throttling burst (AIMD), so concurrent calls back off together instead
+of each retrying into the same quota. The current limits are exported as
+aqumen_model_concurrency_limit.
+
+Callers can add a slot of their own with request_slot(); the Invoker uses it
+to queue requests in the priority scheduler. It is taken inside the model's
+slot and, like the others, only for the request itself.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from collections.abc import Callable, Iterator
+from contextlib import AbstractContextManager, contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import Any
+
+from observability.metrics import MODEL_CALLS_IN_FLIGHT, MODEL_CONCURRENCY_LIMIT
+
+logger = logging.getLogger(__name__)
+
+
+class ConcurrencyLimiter:
+    """
+    Counting semaphore whose limit can be changed while calls are in flight.
+
+    Args:
+        limit: Maximum concurrent holders (None or < 1 for unlimited)
+    """
+
+    def __init__(self, limit: int | None = None):
+        self._cond = threading.Condition()
+        self._limit = self._normalize(limit)
+        self._in_flight = 0
+        self._waiting = 0
+        self._shared = None
+
+    @staticmethod
+    def _normalize(limit: int | None) -> int | None:
+        return limit if limit is not None and limit > 0 else None
+
+    @property
+    def limit(self) -> int | None:
+        return self._limit
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def waiting(self) -> int:
+        return self._waiting
+
+    def set_limit(self, limit: int | None) -> None:
+        """Change the limit; lowering it lets in-flight calls finish, raising it wakes waiters."""
+        with self._cond:
+            self._limit = self._normalize(limit)
+            self._cond.notify_all()
+
+    def _publish(self) -> None:
+        MODEL_CALLS_IN_FLIGHT.set(self._in_flight)
+
+    def share(self, semaphore: Any) -> None:
+        """Also hold a slot of a semaphore shared with other processes for every call."""
+        self._shared = semaphore
+
+    def acquire(self) -> None:
+        with self._cond:
+            self._waiting += 1
+            try:
+                while self._limit is not None and self._in_flight >= self._limit:
+                    self._cond.wait()
+            finally:
+                self._waiting -= 1
+            self._in_flight += 1
+            self._publish()
+        if self._shared is not None:
+            try:
+                self._shared.acquire()
+            except BaseException:
+                self._release_local()
+                raise
+
+    def release(self) -> None:
+        if self._shared is not None:
+            self._shared.release()
+        self._release_local()
+
+    def _release_local(self) -> None:
+        with self._cond:
+            self._in_flight -= 1
+            self._publish()
+            self._cond.notify()
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+
+class AdaptiveLimiter(ConcurrencyLimiter):
+    """
+    Limiter for one model whose limit follows throttling (additive increase, multiplicative decrease).
+
+    Every successful call adds 1/limit to the window, so the limit grows by one
+    after a full window of successes. A throttled call multiplies the window by
+    `backoff`; throttles from calls that started before the last cut belong to
+    the same burst and are ignored.
+
+    Args:
+        model_id: Model the limiter is for (metric label)
+        initial: Starting limit
+        minimum: Lowest limit a throttling burst can cut to
+        maximum: Highest limit successes can grow to
+        backoff: Factor applied to the limit on throttling
+    """
+
+    def __init__(self, model_id: str, initial: int = 4, minimum: int = 1, maximum: int = 64, backoff: float = 0.5):
+        if not 0 < backoff < 1:
+            raise ValueError(f"backoff must be between 0 and 1, got {backoff}")
+        self.model_id = model_id
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.backoff = backoff
+        self._window = float(min(max(initial, self.minimum), self.maximum))
+        self._epoch = 0
+        super().__init__(int(self._window))
+        MODEL_CONCURRENCY_LIMIT.set(self._limit, model=model_id)
+
+    def _publish(self) -> None:
+        pass
+
+    def record_success(self) -> None:
+        with self._cond:
+            self._window = min(self.maximum, self._window + 1 / self._limit)
+            self._apply()
+
+    def record_throttle(self, epoch: int) -> None:
+        """Cut the limit unless a throttle from a call started since `epoch` already did."""
+        with self._cond:
+            if epoch < self._epoch:
+                return
+            self._epoch += 1
+            self._window = max(self.minimum, self._window * self.backoff)
+            self._apply()
+            logger.warning(f"Throttled on {self.model_id}; concurrency limit now {self._limit}")
+
+    def _apply(self) -> None:
+        limit = int(self._window)
+        if limit != self._limit:
+            self._limit = limit
+            MODEL_CONCURRENCY_LIMIT.set(limit, model=self.model_id)
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, is_throttle: Callable[[BaseException], bool] | None = None) -> Iterator[None]:
+        """Hold a slot; the call's outcome adjusts the limit (exceptions matching is_throttle cut it)."""
+        self.acquire()
+        epoch = self._epoch
+        try:
+            yield
+        except Exception as exc:
+            if is_throttle is not None and is_throttle(exc):
+                self.record_throttle(epoch)
+            raise
+        else:
+            self.record_success()
+        finally:
+            self.release()
+
+
+class AdaptiveConcurrency:
+    """
+    One AdaptiveLimiter per model, created on first use.
+
+    Args:
+        initial: Starting limit per model
+        maximum: Highest limit per model
+        backoff: Factor applied to a model's limit on throttling
+    """
+
+    def __init__(self, initial: int = 4, maximum: int = 64, backoff: float = 0.5):
+        self.initial = initial
+        self.maximum = maximum
+        self.backoff = backoff
+        self._lock = threading.Lock()
+        self._limiters: dict[str, AdaptiveLimiter] = {}
+
+    @classmethod
+    def from_env(cls) -> AdaptiveConcurrency | None:
+        if os.getenv("AQU_ADAPTIVE_CONCURRENCY", "").lower() not in ("1", "true", "yes"):
+            return None
+        initial = int(os.getenv("AQU_AIMD_INITIAL", "4"))
+        maximum = int(os.getenv("AQU_AIMD_MAX", "64"))
+        backoff = float(os.getenv("AQU_AIMD_BACKOFF", "0.5"))
+        logger.info(f"Adaptive concurrency enabled (start {initial}, max {maximum} per model, backoff {backoff})")
+        return cls(initial, maximum, backoff)
+
+    def limiter(self, model_id: str) -> AdaptiveLimiter:
+        with self._lock:
+            if model_id not in self._limiters:
+                self._limiters[model_id] = AdaptiveLimiter(
+                    model_id, self.initial, maximum=self.maximum, backoff=self.backoff
+                )
+            return self._limiters[model_id]
+
+    def limits(self) -> dict[str, int]:
+        with self._lock:
+            return {model_id: limiter.limit for model_id, limiter in self._limiters.items()}
+
+
+def _limit_from_env() -> int | None:
+    raw = os.getenv("AQU_MAX_CONCURRENT_CALLS", "").strip()
+    if not raw:
+        return None
+    try:
+        return int(raw)
+    except ValueError:
+        logger.warning(f"Ignoring invalid AQU_MAX_CONCURRENT_CALLS={raw!r}")
+        return None
+
+
+_limiter = ConcurrencyLimiter(_limit_from_env())
+
+
+def get_limiter() -> ConcurrencyLimiter:
+    """The limiter shared by every runtime in this process."""
+    return _limiter
+
+
+_adaptive: AdaptiveConcurrency | None = None
+_adaptive_lock = threading.Lock()
+_adaptive_loaded = False
+
+
+def get_adaptive() -> AdaptiveConcurrency | None:
+    """The per-model adaptive limiters (None unless AQU_ADAPTIVE_CONCURRENCY=1)."""
+    global _adaptive, _adaptive_loaded
+    with _adaptive_lock:
+        if not _adaptive_loaded:
+            _adaptive = AdaptiveConcurrency.from_env()
+            _adaptive_loaded = True
+        return _adaptive
+
+
+_request_slot: ContextVar[Callable[[], AbstractContextManager[Any]] | None] = ContextVar(
+    "aqumen_request_slot", default=None
+)
+
+
+@contextmanager
+def request_slot(slot: Callable[[], AbstractContextManager[Any]]) -> Iterator[None]:
+    """Also hold slot() around every provider request made in this block (and threads that copy its context)."""
+    token = _request_slot.set(slot)
+    try:
+        yield
+    finally:
+        _request_slot.reset(token)
+
+
+@contextmanager
+def model_slot(
+    model_id: str | None = None, is_throttle: Callable[[BaseException], bool] | None = None
+) -> Iterator[None]:
+    """
+    Hold one of the process-wide model-call slots.
+
+    With adaptive concurrency on, the call first takes a slot of its model's
+    limiter, and is_throttle tells that limiter which failures were throttling.
+    A caller's request_slot() is taken next, then the process-wide slot.
+    """
+    adaptive = get_adaptive() if model_id is not None else None
+    model_limiter = adaptive.limiter(model_id).slot(is_throttle) if adaptive is not None else nullcontext()
+    caller_slot = _request_slot.get()
+    with model_limiter, (caller_slot() if caller_slot is not None else nullcontext()), _limiter.slot():
+        yield
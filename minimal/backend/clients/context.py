@@ -0,0 +1,110 @@
+"""
+Per-run state shared with the runtime layer.
+
+The orchestrator opens a run_scope() for each pipeline run; runtime wrappers
+read current_run() to enforce per-run budgets. Outside a run scope there is
+no RunContext and wrappers fall back to their unbudgeted behaviour.
+
+Runtimes report every billed call with record_usage(). Scopes nest: usage is
+added to the current run and to every enclosing scope, so a batch runner that
+wraps each pipeline run in its own scope sees that run's real token cost.
+A scope with a spend budget (services.budget.RunBudget) is charged as well.
+
+observe_calls() collects the UsageMetrics of the calls made inside it, for
+callers that size later requests from what earlier ones produced.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any
+
+
+@dataclass
+class RunContext:
+    """Mutable counters for one pipeline run (safe to share across worker threads)."""
+
+    run_id: str
+    hedges_used: int = 0
+    model_calls: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cost_usd: float = 0.0
+    budget: Any = None
+    parent: RunContext | None = field(default=None, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def try_consume_hedge(self, limit: int) -> bool:
+        """Reserve one hedge from the run's budget; False once `limit` is reached."""
+        with self._lock:
+            if self.hedges_used >= limit:
+                return False
+            self.hedges_used += 1
+            return True
+
+    def record_usage(self, metrics: Any) -> None:
+        """Add one call's UsageMetrics to this run and every enclosing scope."""
+        run: RunContext | None = self
+        while run is not None:
+            with run._lock:
+                run.model_calls += 1
+                run.input_tokens += metrics.input_tokens
+                run.output_tokens += metrics.output_tokens
+                run.cost_usd += metrics.total_cost_usd
+            if run.budget is not None:
+                run.budget.charge(metrics.total_cost_usd)
+            run = run.parent
+
+    def usage(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "model_calls": self.model_calls,
+                "input_tokens": self.input_tokens,
+                "output_tokens": self.output_tokens,
+                "cost_usd": self.cost_usd,
+            }
+
+
+_current_run: ContextVar[RunContext | None] = ContextVar("aqumen_current_run", default=None)
+# A list (not a value) so calls made in copied contexts, e.g. hedges, still report into it
+_call_observer: ContextVar[list[Any] | None] = ContextVar("aqumen_call_observer", default=None)
+
+
+def current_run() -> RunContext | None:
+    return _current_run.get()
+
+
+@contextmanager
+def run_scope(run_id: str) -> Iterator[RunContext]:
+    """Make a fresh RunContext (nested in the current one, if any) current for the duration of a run."""
+    previous = _current_run.get()
+    run = RunContext(run_id, parent=previous)
+    # Restore explicitly (not via token): pipeline generators may resume on another thread
+    _current_run.set(run)
+    try:
+        yield run
+    finally:
+        _current_run.set(previous)
+
+
+@contextmanager
+def observe_calls() -> Iterator[list[Any]]:
+    """Collect the UsageMetrics of every call billed in this block, hedged duplicates included."""
+    previous = _call_observer.get()
+    calls: list[Any] = []
+    _call_observer.set(calls)
+    try:
+        yield calls
+    finally:
+        _call_observer.set(previous)
+
+
+def observe_call(metrics: Any) -> None:
+    """Report one billed call to the enclosing observe_calls() block, if any."""
+    calls = _call_observer.get()
+    if calls is not None:
+        calls.append(metrics)
@@ -0,0 +1,154 @@
+"""
+Request hedging for tail-latency reduction.
+
+HedgedRuntime wraps a BedrockRuntime/OpenAIRuntime. For hedged models it tracks
+the recent latency distribution; when a call runs past the configured
+percentile it fires one duplicate and returns whichever finishes first. The
+slower call is left to finish in the background (its usage is still logged).
+Each hedge is charged against the current run's budget (see clients.context),
+so the extra spend per run is bounded; outside a run no hedges are sent.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import logging
+import math
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any
+
+from observability.metrics import HEDGE_BUDGET_EXHAUSTED, HEDGED_CALLS
+from observability.tracing import current_span
+
+from .context import current_run
+
+logger = logging.getLogger(__name__)
+
+
+class LatencyTracker:
+    """Rolling window of call latencies per model."""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.window = window
+        self.min_samples = min_samples
+        self._samples: dict[str, deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, model_id: str, seconds: float) -> None:
+        with self._lock:
+            samples = self._samples.get(model_id)
+            if samples is None:
+                samples = self._samples[model_id] = deque(maxlen=self.window)
+            samples.append(seconds)
+
+    def percentile(self, model_id: str, pct: float) -> float | None:
+        """Nearest-rank percentile (0 < pct < 1), or None until min_samples are seen."""
+        with self._lock:
+            samples = sorted(self._samples.get(model_id, ()))
+        if len(samples) < self.min_samples:
+            return None
+        rank = max(1, math.ceil(pct * len(samples)))
+        return samples[rank - 1]
+
+
+class HedgedRuntime:
+    """
+    Runtime wrapper that hedges slow calls to selected models.
+
+    Args:
+        runtime: Underlying BedrockRuntime/OpenAIRuntime
+        hedge_models: Model IDs eligible for hedging
+        percentile: Latency percentile after which a duplicate is sent
+        budget_per_run: Maximum hedges per pipeline run
+        tracker: Latency tracker (shared between wrappers if desired)
+    """
+
+    def __init__(
+        self,
+        runtime: Any,
+        hedge_models: set[str],
+        percentile: float = 0.95,
+        budget_per_run: int = 2,
+        tracker: LatencyTracker | None = None,
+        max_workers: int = 8,
+    ):
+        self.runtime = runtime
+        self.hedge_models = set(hedge_models)
+        self.percentile = percentile
+        self.budget_per_run = budget_per_run
+        self.tracker = tracker or LatencyTracker()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hedge")
+
+    def __getattr__(self, name: str) -> Any:
+        # Everything not hedged (usage_log, get_total_cost, ...) is the wrapped runtime's
+        return getattr(self.runtime, name)
+
+    def invoke(self, model_id: str, prompt: str, max_tokens: int = 2048, temperature: float = 0.0) -> str:
+        return self._call(model_id, self.runtime.invoke, prompt, max_tokens=max_tokens, temperature=temperature)
+
+    def invoke_with_tools(
+        self,
+        model_id: str,
+        prompt: str,
+        tools: list[dict[str, Any]],
+        max_tokens: int = 2048,
+        use_thinking: bool = False,
+        thinking_budget: int = 2048,
+        temperature: float = 0.0,
+    ) -> dict[str, Any]:
+        return self._call(
+            model_id,
+            self.runtime.invoke_with_tools,
+            prompt,
+            tools,
+            max_tokens=max_tokens,
+            use_thinking=use_thinking,
+            thinking_budget=thinking_budget,
+            temperature=temperature,
+        )
+
+    def _timed(self, model_id: str, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        start = time.monotonic()
+        result = fn(model_id, *args, **kwargs)
+        self.tracker.record(model_id, time.monotonic() - start)
+        return result
+
+    def _submit(self, model_id: str, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+        # Each call gets its own context copy so spans/run state follow it into the pool
+        ctx = contextvars.copy_context()
+        return self._executor.submit(ctx.run, self._timed, model_id, fn, *args, **kwargs)
+
+    def _call(self, model_id: str, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        threshold = self.tracker.percentile(model_id, self.percentile) if model_id in self.hedge_models else None
+        run = current_run()
+        if threshold is None or run is None:
+            return self._timed(model_id, fn, *args, **kwargs)
+
+        primary = self._submit(model_id, fn, *args, **kwargs)
+        done, _ = wait([primary], timeout=threshold)
+        if done:
+            return primary.result()
+
+        if not run.try_consume_hedge(self.budget_per_run):
+            HEDGE_BUDGET_EXHAUSTED.inc(model=model_id)
+            return primary.result()
+
+        logger.info(f"Hedging {model_id}: no response after {threshold:.1f}s (p{self.percentile * 100:g})")
+        current_span().add_event("hedge", model=model_id, threshold_s=round(threshold, 2))
+        hedge = self._submit(model_id, fn, *args, **kwargs)
+        names = {primary: "primary", hedge: "hedge"}
+
+        pending = {primary, hedge}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    HEDGED_CALLS.inc(model=model_id, winner=names[future])
+                    return future.result()
+
+        HEDGED_CALLS.inc(model=model_id, winner="none")
+        return primary.result()  # both failed: surface the original call's error
@@ -2,14 +2,75 @@ import json
 import logging
 import os
 import random
+import sys
+import threading
 import time
 from dataclasses import dataclass
 from typing import Any
 
-from openai import APIConnectionError, APIError, OpenAI, RateLimitError
+from observability.metrics import (
+    MODEL_CALL_DURATION,
+    MODEL_CALLS,
+    MODEL_COST,
+    MODEL_RETRIES,
+    MODEL_THROTTLES,
+    MODEL_TOKENS,
+    MODEL_TRUNCATIONS,
+)
+from observability.tracing import span
+
+from .concurrency import model_slot
+from .context import current_run, observe_call
 
 logger = logging.getLogger(__name__)
 
+PROVIDER_NAME = "openai"
+STOP_MAX_TOKENS = "max_tokens"
+PROBE_MAX_TOKENS = 16  # reasoning models may spend a few tokens before answering
+
+
+def is_throttle(exc: BaseException) -> bool:
+    # Only a loaded SDK can have raised a RateLimitError
+    openai = sys.modules.get("openai")
+    return openai is not None and isinstance(exc, openai.RateLimitError)
+
+
+def is_transient(exc: BaseException) -> bool:
+    """Rate limits, connection failures, timeouts and 5xx answers; not errors caused by the request."""
+    openai = sys.modules.get("openai")
+    if openai is None:
+        return False
+    if isinstance(exc, (openai.RateLimitError, openai.APIConnectionError, openai.InternalServerError)):
+        return True
+    return isinstance(exc, openai.APIStatusError) and exc.status_code == 408
+
+
+def _stop_reason(response: Any) -> str:
+    """The first choice's finish_reason, with "length" named as Anthropic names it."""
+    choices = getattr(response, "choices", None) or []
+    reason = getattr(choices[0], "finish_reason", None) if choices else None
+    return STOP_MAX_TOKENS if reason == "length" else reason or ""
+
+
+def to_openai_tools(tools: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Convert Anthropic-style tool specs (name/description/input_schema) to OpenAI function tools."""
+    converted = []
+    for tool in tools:
+        if tool.get("type") == "function" or "input_schema" not in tool:
+            converted.append(tool)
+            continue
+        converted.append(
+            {
+                "type": "function",
+                "function": {
+                    "name": tool["name"],
+                    "description": tool.get("description", ""),
+                    "parameters": tool["input_schema"],
+                },
+            }
+        )
+    return converted
+
 @dataclass
 class UsageMetrics:
     """Token usage and cost metrics from OpenAI response"""
@@ -20,6 +81,8 @@ class UsageMetrics:
     total_cost_usd: float = 0.0
     model_id: str = ""
     response_time_ms: int = 0
+    stop_reason: str = ""
+    thinking_tokens: int = 0
 
 class OpenAIRuntime:
     # Pricing per 1M tokens (approximate, update as OpenAI releases pricing)
@@ -37,43 +100,57 @@ class OpenAIRuntime:
 
     def __init__(self):
         self.usage_log: list[UsageMetrics] = []
-        self._client: OpenAI | None = None
+        # Retry policy defaults; a routing layer may shorten these to fail over sooner
+        self.max_retries = 5
+        self.base_delay = 2.0
+        self._client: Any | None = None
         self._is_azure = False
         self._import_error: Exception | None = None
+        self._client_lock = threading.Lock()
 
-        try:
-            # Check for Azure OpenAI configuration
-            azure_endpoint = os.getenv("AZURE_OPENAI_ENDPOINT")
-            azure_api_key = os.getenv("AZURE_OPENAI_API_KEY")
-
-            if azure_endpoint and azure_api_key:
-                # Azure OpenAI configuration
-                self._is_azure = True
-                base_url = azure_endpoint.rstrip("/")
-                if "/openai" not in base_url:
-                    base_url = f"{base_url}/openai/v1/"
-
-                self._client = OpenAI(
-                    base_url=base_url,
-                    api_key=azure_api_key,
-                )
-                logger.info("Initialized Azure OpenAI client")
-            else:
-                # Direct OpenAI API
-                api_key = os.getenv("OPENAI_API_KEY")
-                if not api_key:
-                    raise ValueError("OPENAI_API_KEY or Azure credentials not found")
-
-                self._client = OpenAI(api_key=api_key)
-                logger.info("Initialized OpenAI client")
-
-        except Exception as exc:
-            self._import_error = exc
-            self._client = None
-            logger.error(f"Failed to initialize OpenAI client: {exc}")
-
-    def _ensure_client(self) -> OpenAI:
-        if self._client is None:
+    def _connect(self) -> Any | None:
+        """Create the SDK client on first use; importing openai would otherwise slow every cold start."""
+        with self._client_lock:
+            if self._client is None and self._import_error is None:
+                try:
+                    from openai import OpenAI
+
+                    # Check for Azure OpenAI configuration
+                    azure_endpoint = os.getenv("AZURE_OPENAI_ENDPOINT")
+                    azure_api_key = os.getenv("AZURE_OPENAI_API_KEY")
+
+                    if azure_endpoint and azure_api_key:
+                        # Azure OpenAI configuration
+                        self._is_azure = True
+                        base_url = azure_endpoint.rstrip("/")
+                        if "/openai" not in base_url:
+                            base_url = f"{base_url}/openai/v1/"
+
+                        self._client = OpenAI(
+                            base_url=base_url,
+                            api_key=azure_api_key,
+                        )
+                        logger.info("Initialized Azure OpenAI client")
+                    else:
+                        # Direct OpenAI API
+                        api_key = os.getenv("OPENAI_API_KEY")
+                        if not api_key:
+                            raise ValueError("OPENAI_API_KEY or Azure credentials not found")
+
+                        self._client = OpenAI(api_key=api_key)
+                        logger.info("Initialized OpenAI client")
+
+                except Exception as exc:
+                    self._import_error = exc
+                    logger.error(f"Failed to initialize OpenAI client: {exc}")
+            return self._client
+
+    @property
+    def available(self) -> bool:
+        return self._connect() is not None
+
+    def _ensure_client(self) -> Any:
+        if self._connect() is None:
             raise RuntimeError(
                 "OpenAI client unavailable. Set OPENAI_API_KEY or Azure credentials. "
                 f"Root cause: {self._import_error}"
@@ -119,10 +196,23 @@ class OpenAIRuntime:
             cache_read_input_tokens=usage_dict["cache_read_input_tokens"],
             total_cost_usd=self._calculate_cost(model_id, usage_dict),
             model_id=model_id,
-            response_time_ms=int((time.time() - start_time) * 1000)
+            response_time_ms=int((time.time() - start_time) * 1000),
+            stop_reason=_stop_reason(response),
         )
 
         self.usage_log.append(metrics)
+        run = current_run()
+        if run is not None:
+            run.record_usage(metrics)
+        observe_call(metrics)
+        if metrics.stop_reason == STOP_MAX_TOKENS:
+            MODEL_TRUNCATIONS.inc(provider=PROVIDER_NAME, model=model_id)
+            logger.warning(f"Model {model_id} hit max_tokens after {metrics.output_tokens} output tokens")
+        MODEL_CALL_DURATION.observe(metrics.response_time_ms / 1000, provider=PROVIDER_NAME, model=model_id)
+        MODEL_CALLS.inc(provider=PROVIDER_NAME, model=model_id, outcome="success")
+        MODEL_TOKENS.inc(metrics.input_tokens, provider=PROVIDER_NAME, model=model_id, direction="input")
+        MODEL_TOKENS.inc(metrics.output_tokens, provider=PROVIDER_NAME, model=model_id, direction="output")
+        MODEL_COST.inc(metrics.total_cost_usd, provider=PROVIDER_NAME, model=model_id)
         logger.info(f"Model {model_id}: {metrics.input_tokens} input, {metrics.output_tokens} output tokens, "
                    f"cost: ${metrics.total_cost_usd:.4f}, time: {metrics.response_time_ms}ms")
 
@@ -135,8 +225,8 @@ class OpenAIRuntime:
         tools: list[dict[str, Any]] | None = None,
         max_tokens: int = 2048,
         temperature: float = 0.0,
-        max_retries: int = 5,
-        base_delay: float = 2.0
+        max_retries: int | None = None,
+        base_delay: float | None = None,
     ) -> tuple[Any, UsageMetrics]:
         """
         Invoke model with exponential backoff retry logic.
@@ -145,7 +235,12 @@ class OpenAIRuntime:
         - base_delay=2s: Retries at 2s, 4s, 8s, 16s, 32s
         - max_retries=5: Gives 6 total attempts
         """
+        if max_retries is None:
+            max_retries = self.max_retries
+        if base_delay is None:
+            base_delay = self.base_delay
         client = self._ensure_client()
+        from openai import APIConnectionError, APIError, RateLimitError
 
         # Use Azure deployment name if configured
         if self._is_azure:
@@ -154,53 +249,72 @@ class OpenAIRuntime:
         else:
             model_to_use = model_id
 
-        for attempt in range(max_retries + 1):
-            start_time = time.time()
-            try:
-                # Build request parameters
-                request_params = {
-                    "model": model_to_use,
-                    "messages": messages,
-                    "temperature": temperature,
-                }
-
-                # GPT-5 uses max_completion_tokens instead of max_tokens
-                if "gpt-5" in model_id:
-                    request_params["max_completion_tokens"] = max_tokens
-                else:
-                    request_params["max_tokens"] = max_tokens
-
-                # Add tools if provided
-                if tools:
-                    request_params["tools"] = tools
-                    request_params["tool_choice"] = "required"
-
-                response = client.chat.completions.create(**request_params)
-
-                # Log usage
-                metrics = self._log_usage_from_response(model_id, response, start_time)
-
-                return response, metrics
-
-            except RateLimitError:
-                if attempt == max_retries:
-                    logger.error(f"Max retries ({max_retries}) exceeded for RateLimitError")
-                    raise
-
-                delay = base_delay * (2 ** attempt) + random.uniform(0, 1)
-                logger.warning(f"Rate limit error on attempt {attempt + 1}/{max_retries + 1}. "
-                             f"Retrying in {delay:.2f}s...")
-                time.sleep(delay)
-
-            except (APIError, APIConnectionError) as e:
-                if attempt == max_retries:
-                    logger.error(f"Max retries ({max_retries}) exceeded for {type(e).__name__}")
-                    raise
-
-                delay = base_delay * (2 ** attempt) + random.uniform(0, 1)
-                logger.warning(f"{type(e).__name__} on attempt {attempt + 1}/{max_retries + 1}. "
-                             f"Retrying in {delay:.2f}s: {e}")
-                time.sleep(delay)
+        with span("model_call", provider=PROVIDER_NAME, model=model_id) as call_span:
+            for attempt in range(max_retries + 1):
+                start_time = time.time()
+                try:
+                    # Build request parameters
+                    request_params = {
+                        "model": model_to_use,
+                        "messages": messages,
+                        "temperature": temperature,
+                    }
+
+                    # GPT-5 uses max_completion_tokens instead of max_tokens
+                    if "gpt-5" in model_id:
+                        request_params["max_completion_tokens"] = max_tokens
+                    else:
+                        request_params["max_tokens"] = max_tokens
+
+                    # Add tools if provided
+                    if tools:
+                        request_params["tools"] = to_openai_tools(tools)
+                        request_params["tool_choice"] = "required"
+
+                    with span("invoke", attempt=attempt + 1), model_slot(model_id, is_throttle):
+                        response = client.chat.completions.create(**request_params)
+
+                    # Log usage
+                    metrics = self._log_usage_from_response(model_id, response, start_time)
+                    call_span.set_attributes(
+                        attempts=attempt + 1,
+                        input_tokens=metrics.input_tokens,
+                        output_tokens=metrics.output_tokens,
+                        cost_usd=metrics.total_cost_usd,
+                    )
+
+                    return response, metrics
+
+                except RateLimitError:
+                    MODEL_THROTTLES.inc(provider=PROVIDER_NAME, model=model_id)
+                    if attempt == max_retries:
+                        logger.error(f"Max retries ({max_retries}) exceeded for RateLimitError")
+                        MODEL_CALLS.inc(provider=PROVIDER_NAME, model=model_id, outcome="error")
+                        raise
+
+                    MODEL_RETRIES.inc(provider=PROVIDER_NAME, model=model_id, reason="RateLimitError")
+
+                    delay = base_delay * (2 ** attempt) + random.uniform(0, 1)
+                    logger.warning(f"Rate limit error on attempt {attempt + 1}/{max_retries + 1}. "
+                                 f"Retrying in {delay:.2f}s...")
+                    with span("retry_backoff", attempt=attempt + 1, reason="RateLimitError", delay_s=round(delay, 2)):
+                        time.sleep(delay)
+
+                except (APIError, APIConnectionError) as e:
+                    if attempt == max_retries:
+                        logger.error(f"Max retries ({max_retries}) exceeded for {type(e).__name__}")
+                        MODEL_CALLS.inc(provider=PROVIDER_NAME, model=model_id, outcome="error")
+                        raise
+
+                    MODEL_RETRIES.inc(provider=PROVIDER_NAME, model=model_id, reason=type(e).__name__)
+
+                    delay = base_delay * (2 ** attempt) + random.uniform(0, 1)
+                    logger.warning(f"{type(e).__name__} on attempt {attempt + 1}/{max_retries + 1}. "
+                                 f"Retrying in {delay:.2f}s: {e}")
+                    with span(
+                        "retry_backoff", attempt=attempt + 1, reason=type(e).__name__, delay_s=round(delay, 2)
+                    ):
+                        time.sleep(delay)
 
         raise RuntimeError("Should not reach here")
 
@@ -237,6 +351,26 @@ class OpenAIRuntime:
             "model_breakdown": model_breakdown
         }
 
+    @staticmethod
+    def is_transient(exc: BaseException) -> bool:
+        """Whether another attempt, or another provider, may succeed where this call failed."""
+        return is_transient(exc)
+
+    @staticmethod
+    def is_throttle(exc: BaseException) -> bool:
+        """Whether the model refused the call for load: reachable, but busy."""
+        return is_throttle(exc)
+
+    def probe(self, model_id: str) -> None:
+        """Send a minimal request to the model through its call slot (no SDK retries or usage log)."""
+        client = self._ensure_client()
+        model = os.getenv("AZURE_OPENAI_DEPLOYMENT", model_id) if self._is_azure else model_id
+        limit = "max_completion_tokens" if "gpt-5" in model_id else "max_tokens"
+        with model_slot(model_id, is_throttle):
+            client.with_options(max_retries=0).chat.completions.create(
+                model=model, messages=[{"role": "user", "content": "ping"}], **{limit: PROBE_MAX_TOKENS}
+            )
+
     def invoke(
         self,
         model_id: str,
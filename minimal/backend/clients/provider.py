@@ -2,12 +2,22 @@
 Multi-provider model configuration and selection.
 
 Supports switching between Anthropic (via AWS Bedrock) and OpenAI models
-for the 3-tier pipeline architecture.
+for the 3-tier pipeline architecture. With AQU_PROVIDER_FAILOVER=1 the
+requested provider is wrapped in a RoutingRuntime that fails over to the
+equivalent tier on the other provider while its circuit breaker is open.
+With AQU_HEDGE=1 slow calls to the hedged tiers (default: strong) get a
+duplicate request once they pass AQU_HEDGE_PERCENTILE of recent latency.
 """
+import logging
+import os
 from typing import Any
 
 from .bedrock import BedrockRuntime
+from .hedging import HedgedRuntime
 from .openai_client import OpenAIRuntime
+from .routing import BreakerConfig, RoutingRuntime
+
+logger = logging.getLogger(__name__)
 
 # Model tier mappings
 ANTHROPIC_MODELS = {
@@ -43,20 +53,57 @@ def get_model_provider(provider: str = "anthropic") -> tuple[Any, dict[str, str]
         >>> client.invoke(models["strong"], "Hello")
     """
     provider = provider.lower()
+    client, models = _build_runtime(provider)
 
-    if provider == "anthropic":
-        client = BedrockRuntime(region="us-west-2")
-        models = ANTHROPIC_MODELS
-    elif provider == "openai":
-        client = OpenAIRuntime()
-        models = OPENAI_MODELS
+    if _env_flag("AQU_PROVIDER_FAILOVER"):
+        client = _with_failover(provider, client, models)
     else:
-        raise ValueError(
-            f"Unsupported provider: {provider}. Must be 'anthropic' or 'openai'"
-        )
+        client = _with_hedging(client, models)
 
     return client, models
 
+def _env_flag(name: str) -> bool:
+    return os.getenv(name, "").lower() in ("1", "true", "yes")
+
+def _build_runtime(provider: str) -> tuple[Any, dict[str, str]]:
+    if provider == "anthropic":
+        return BedrockRuntime(region="us-west-2"), ANTHROPIC_MODELS
+    if provider == "openai":
+        return OpenAIRuntime(), OPENAI_MODELS
+    raise ValueError(
+        f"Unsupported provider: {provider}. Must be 'anthropic' or 'openai'"
+    )
+
+def _with_failover(provider: str, client: Any, models: dict[str, str]) -> Any:
+    """Wrap the primary runtime in a RoutingRuntime with the other provider as fallback."""
+    fallback = "openai" if provider == "anthropic" else "anthropic"
+    fallback_client, fallback_models = _build_runtime(fallback)
+    if not fallback_client.available:
+        logger.warning(f"Provider failover requested but {fallback} is unavailable; using {provider} only")
+        return _with_hedging(client, models)
+
+    # Fail over after a short retry burst instead of sitting in a long backoff
+    client.max_retries = int(os.getenv("AQU_FAILOVER_PRIMARY_RETRIES", "1"))
+    return RoutingRuntime(
+        {
+            provider: (_with_hedging(client, models), models),
+            fallback: (_with_hedging(fallback_client, fallback_models), fallback_models),
+        },
+        config=BreakerConfig.from_env(),
+    )
+
+def _with_hedging(client: Any, models: dict[str, str]) -> Any:
+    """Wrap a runtime in a HedgedRuntime when AQU_HEDGE is enabled."""
+    if not _env_flag("AQU_HEDGE"):
+        return client
+    tiers = [t.strip() for t in os.getenv("AQU_HEDGE_TIERS", "strong").split(",") if t.strip()]
+    return HedgedRuntime(
+        client,
+        hedge_models={models[tier] for tier in tiers if tier in models},
+        percentile=float(os.getenv("AQU_HEDGE_PERCENTILE", "0.95")),
+        budget_per_run=int(os.getenv("AQU_HEDGE_BUDGET", "2")),
+    )
+
 def get_provider_info(provider: str = "anthropic") -> dict[str, Any]:
     """
     Get information about a provider's models without initializing the client.
@@ -0,0 +1,151 @@
+"""
+Content-addressed on-disk cache for deterministic model responses.
+
+Keys are sha256(model id + canonical request body), so any change to the
+prompt, tools, max_tokens or model produces a new entry. Only deterministic
+calls are cached: temperature 0 and no extended thinking. Entries live in a
+small SQLite file and the least recently used ones are evicted once the total
+stored size passes max_bytes.
+
+Enabled with AQU_RESPONSE_CACHE=1:
+- AQU_RESPONSE_CACHE_PATH:   database file (default backend/cache/model_responses.sqlite)
+- AQU_RESPONSE_CACHE_MAX_MB: size budget before eviction (default 256)
+- AQU_RESPONSE_CACHE_STEPS:  comma-separated step labels to cache (default: all)
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+
+from observability.instrument import current_step
+from observability.metrics import RESPONSE_CACHE_LOOKUPS
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_CACHE_PATH = BASE_DIR / "cache" / "model_responses.sqlite"
+
+
+def cache_key(model_id: str, body: dict[str, Any]) -> str:
+    """Stable hash of the model and request body (key order independent)."""
+    canonical = json.dumps(body, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(f"{model_id}\n{canonical}".encode()).hexdigest()
+
+
+def is_cacheable(body: dict[str, Any]) -> bool:
+    """Only temperature-0 calls without extended thinking are deterministic enough to cache."""
+    return "thinking" not in body and float(body.get("temperature", 1.0)) == 0.0
+
+
+class ResponseCache:
+    """
+    SQLite-backed response store with LRU eviction by total size.
+
+    Args:
+        path: SQLite database file
+        max_bytes: Total stored response size before least-recently-used entries are evicted
+        steps: Step labels allowed to use the cache (None = every call)
+    """
+
+    def __init__(self, path: str | Path, max_bytes: int = 256 * 1024 * 1024, steps: set[str] | None = None):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.steps = steps
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    model_id TEXT NOT NULL,
+                    response TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL,
+                    hits INTEGER NOT NULL DEFAULT 0
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses(last_access)")
+
+    @classmethod
+    def from_env(cls) -> ResponseCache | None:
+        if os.getenv("AQU_RESPONSE_CACHE", "").lower() not in ("1", "true", "yes"):
+            return None
+        steps_env = os.getenv("AQU_RESPONSE_CACHE_STEPS", "").strip()
+        steps = {s.strip() for s in steps_env.split(",") if s.strip()} or None
+        max_mb = float(os.getenv("AQU_RESPONSE_CACHE_MAX_MB", "256"))
+        path = os.getenv("AQU_RESPONSE_CACHE_PATH") or DEFAULT_CACHE_PATH
+        logger.info(f"Model response cache enabled at {path} (max {max_mb:g} MB, steps: {steps or 'all'})")
+        return cls(path, max_bytes=int(max_mb * 1024 * 1024), steps=steps)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:  # commit on success, roll back on error
+                yield conn
+        finally:
+            conn.close()
+
+    def applies(self, body: dict[str, Any]) -> bool:
+        """Whether this call (in the current step) may be served from / stored in the cache."""
+        if not is_cacheable(body):
+            return False
+        return self.steps is None or current_step() in self.steps
+
+    def get(self, model_id: str, body: dict[str, Any]) -> dict[str, Any] | None:
+        key = cache_key(model_id, body)
+        with self._lock, self._connect() as conn:
+            row = conn.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE responses SET last_access = ?, hits = hits + 1 WHERE key = ?", (time.time(), key)
+                )
+        RESPONSE_CACHE_LOOKUPS.inc(model=model_id, result="hit" if row else "miss")
+        return json.loads(row[0]) if row else None
+
+    def put(self, model_id: str, body: dict[str, Any], response: dict[str, Any]) -> None:
+        payload = json.dumps(response, separators=(",", ":"), ensure_ascii=False)
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO responses (key, model_id, response, size, created_at, last_access, hits)
+                VALUES (?, ?, ?, ?, ?, ?, 0)
+                """,
+                (cache_key(model_id, body), model_id, payload, len(payload), now, now),
+            )
+            self._evict(conn)
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        doomed = []
+        for key, size in conn.execute("SELECT key, size FROM responses ORDER BY last_access"):
+            if total <= self.max_bytes:
+                break
+            doomed.append((key,))
+            total -= size
+        conn.executemany("DELETE FROM responses WHERE key = ?", doomed)
+        logger.info(f"Response cache evicted {len(doomed)} entries")
+
+    def stats(self) -> dict[str, Any]:
+        with self._connect() as conn:
+            entries, size, hits = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(hits), 0) FROM responses"
+            ).fetchone()
+        return {"entries": entries, "bytes": size, "hits": hits, "max_bytes": self.max_bytes}
@@ -0,0 +1,312 @@
+"""
+Provider routing with per-model circuit breakers.
+
+RoutingRuntime exposes the same invoke()/invoke_with_tools() surface as
+BedrockRuntime and OpenAIRuntime, but sits in front of one runtime per provider.
+Every (provider, model) pair has a CircuitBreaker fed by call outcomes and
+latency. When the preferred route's breaker is open, or a call to it fails with
+a throttling, availability or timeout error, the request is sent to the
+equivalent tier on the other provider (ANTHROPIC_MODELS <-> OPENAI_MODELS).
+Errors caused by the request itself (validation, access denied, a malformed
+tool schema) are raised at once: every provider would reject it, and they say
+nothing about the route's health.
+
+The provider/model that actually served the most recent call is kept in a
+context variable so the orchestrator can record it on each PipelineStep.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any
+
+from observability.metrics import CIRCUIT_BREAKER_STATE, PROVIDER_FAILOVERS
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+HALF_OPEN = "half_open"
+OPEN = "open"
+
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised when every route for a model is short-circuited."""
+
+
+@dataclass(frozen=True)
+class BreakerConfig:
+    """Thresholds for a CircuitBreaker."""
+
+    window: int = 20  # most recent calls considered
+    min_calls: int = 4  # don't judge a route on fewer calls than this
+    failure_rate: float = 0.5  # open when this share of calls failed...
+    slow_call_s: float = 180.0  # ...or when calls slower than this...
+    slow_call_rate: float = 0.8  # ...make up this share of the window
+    cooldown_s: float = 120.0  # time spent open before a half-open probe
+
+    @classmethod
+    def from_env(cls) -> BreakerConfig:
+        """Build a config from AQU_BREAKER_* environment overrides."""
+        defaults = cls()
+        return cls(
+            window=int(os.getenv("AQU_BREAKER_WINDOW", defaults.window)),
+            min_calls=int(os.getenv("AQU_BREAKER_MIN_CALLS", defaults.min_calls)),
+            failure_rate=float(os.getenv("AQU_BREAKER_FAILURE_RATE", defaults.failure_rate)),
+            slow_call_s=float(os.getenv("AQU_BREAKER_SLOW_CALL_S", defaults.slow_call_s)),
+            slow_call_rate=float(os.getenv("AQU_BREAKER_SLOW_CALL_RATE", defaults.slow_call_rate)),
+            cooldown_s=float(os.getenv("AQU_BREAKER_COOLDOWN_S", defaults.cooldown_s)),
+        )
+
+
+class CircuitBreaker:
+    """
+    Rolling-window circuit breaker driven by error rate and slow-call rate.
+
+    closed -> open when either rate crosses its threshold; open -> half-open once
+    the cooldown has elapsed, letting a single probe through; the probe's
+    outcome closes the breaker again or re-opens it for another cooldown.
+    """
+
+    def __init__(
+        self,
+        provider: str,
+        model: str,
+        config: BreakerConfig | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.provider = provider
+        self.model = model
+        self.config = config or BreakerConfig()
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._outcomes: deque[tuple[bool, bool]] = deque(maxlen=self.config.window)  # (failed, slow)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        CIRCUIT_BREAKER_STATE.set(0, provider=provider, model=model)
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+
+    def allow_request(self) -> bool:
+        """Return True if a call may be sent down this route now."""
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self, duration_s: float) -> None:
+        self._record(failed=False, duration_s=duration_s)
+
+    def record_failure(self, duration_s: float = 0.0) -> None:
+        self._record(failed=True, duration_s=duration_s)
+
+    def _record(self, failed: bool, duration_s: float) -> None:
+        slow = duration_s >= self.config.slow_call_s
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._probe_in_flight = False
+                if failed or slow:
+                    self._transition(OPEN)
+                else:
+                    self._outcomes.clear()
+                    self._transition(CLOSED)
+                return
+
+            self._outcomes.append((failed, slow))
+            if self._state == CLOSED and len(self._outcomes) >= self.config.min_calls:
+                total = len(self._outcomes)
+                failures = sum(1 for f, _ in self._outcomes if f)
+                slow_calls = sum(1 for _, s in self._outcomes if s)
+                if failures / total >= self.config.failure_rate or slow_calls / total >= self.config.slow_call_rate:
+                    self._transition(OPEN)
+
+    def _maybe_half_open(self) -> None:
+        if self._state == OPEN and self._clock() - self._opened_at >= self.config.cooldown_s:
+            self._transition(HALF_OPEN)
+
+    def _transition(self, state: str) -> None:
+        if state == OPEN:
+            self._opened_at = self._clock()
+            logger.warning(f"Circuit breaker opened for {self.provider}/{self.model}")
+        elif state == CLOSED and self._state != CLOSED:
+            logger.info(f"Circuit breaker closed for {self.provider}/{self.model}")
+        self._state = state
+        CIRCUIT_BREAKER_STATE.set(_STATE_VALUES[state], provider=self.provider, model=self.model)
+
+
+@dataclass(frozen=True)
+class ServedBy:
+    """Provider and model that answered a routed call."""
+
+    provider: str
+    model: str
+
+
+_served_by: ContextVar[ServedBy | None] = ContextVar("aqumen_served_by", default=None)
+
+
+def is_transient(runtime: Any, exc: BaseException) -> bool:
+    """Whether another route may succeed; runtimes without an is_transient() classifier treat every error so."""
+    classify = getattr(runtime, "is_transient", None)
+    return classify(exc) if classify is not None else True
+
+
+def pop_served_by() -> ServedBy | None:
+    """Return the route that served the latest call in this context and clear it."""
+    served = _served_by.get()
+    _served_by.set(None)
+    return served
+
+
+class RoutingRuntime:
+    """
+    Runtime facade that fails over between providers using circuit breakers.
+
+    Args:
+        routes: provider name -> (runtime, tier -> model id); the first entry is preferred
+        config: Breaker thresholds shared by every route
+    """
+
+    def __init__(self, routes: dict[str, tuple[Any, dict[str, str]]], config: BreakerConfig | None = None):
+        if not routes:
+            raise ValueError("RoutingRuntime needs at least one route")
+        self.routes = routes
+        self.primary = next(iter(routes))
+        self.config = config or BreakerConfig()
+        self._breakers: dict[tuple[str, str], CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def breaker(self, provider: str, model: str) -> CircuitBreaker:
+        key = (provider, model)
+        with self._lock:
+            breaker = self._breakers.get(key)
+            if breaker is None:
+                breaker = self._breakers[key] = CircuitBreaker(provider, model, self.config)
+            return breaker
+
+    def _candidates(self, model_id: str) -> list[tuple[str, Any, str]]:
+        """Routes for a model: the provider that owns model_id first, then its tier elsewhere."""
+        owner, tier = self.primary, None
+        for provider, (_, models) in self.routes.items():
+            for tier_name, candidate in models.items():
+                if candidate == model_id:
+                    owner, tier = provider, tier_name
+                    break
+            if tier is not None:
+                break
+
+        candidates = [(owner, self.routes[owner][0], model_id)]
+        if tier is None:
+            return candidates
+        for provider, (runtime, models) in self.routes.items():
+            if provider != owner and tier in models:
+                candidates.append((provider, runtime, models[tier]))
+        return candidates
+
+    def _call(self, method: str, model_id: str, *args: Any, **kwargs: Any) -> Any:
+        candidates = self._candidates(model_id)
+        preferred = candidates[0][0]
+        skip_reason = ""
+        last_exc: Exception | None = None
+
+        for provider, runtime, model in candidates:
+            breaker = self.breaker(provider, model)
+            if not breaker.allow_request():
+                skip_reason = skip_reason or "circuit_open"
+                continue
+
+            if provider != preferred:
+                PROVIDER_FAILOVERS.inc(from_provider=preferred, to_provider=provider, reason=skip_reason)
+                logger.warning(f"Failing over {model_id} -> {provider}/{model} ({skip_reason})")
+
+            start = time.monotonic()
+            try:
+                result = getattr(runtime, method)(model, *args, **kwargs)
+            except Exception as exc:
+                if not is_transient(runtime, exc):
+                    # The provider answered; the request was at fault
+                    breaker.record_success(time.monotonic() - start)
+                    _served_by.set(None)
+                    raise
+                breaker.record_failure(time.monotonic() - start)
+                logger.warning(f"{provider}/{model} failed: {exc}")
+                last_exc = exc
+                skip_reason = skip_reason or "error"
+                continue
+
+            breaker.record_success(time.monotonic() - start)
+            _served_by.set(ServedBy(provider, model))
+            return result
+
+        _served_by.set(None)
+        if last_exc is not None:
+            raise last_exc
+        raise CircuitOpenError(f"All routes for {model_id} are short-circuited")
+
+    def invoke(self, model_id: str, prompt: str, max_tokens: int = 2048, temperature: float = 0.0) -> str:
+        return self._call("invoke", model_id, prompt, max_tokens=max_tokens, temperature=temperature)
+
+    def invoke_with_tools(
+        self,
+        model_id: str,
+        prompt: str,
+        tools: list[dict[str, Any]],
+        max_tokens: int = 2048,
+        use_thinking: bool = False,
+        thinking_budget: int = 2048,
+        temperature: float = 0.0,
+    ) -> dict[str, Any]:
+        return self._call(
+            "invoke_with_tools",
+            model_id,
+            prompt,
+            tools,
+            max_tokens=max_tokens,
+            use_thinking=use_thinking,
+            thinking_budget=thinking_budget,
+            temperature=temperature,
+        )
+
+    @property
+    def usage_log(self) -> list[Any]:
+        return [metrics for runtime, _ in self.routes.values() for metrics in runtime.usage_log]
+
+    def get_total_cost(self) -> float:
+        return sum(runtime.get_total_cost() for runtime, _ in self.routes.values())
+
+    def get_usage_summary(self) -> dict[str, Any]:
+        return {provider: runtime.get_usage_summary() for provider, (runtime, _) in self.routes.items()}
+
+    def record_probe(self, provider: str, model: str, ok: bool, duration_s: float) -> None:
+        """Count a readiness probe of a route as a call, so a failing route opens before traffic finds it."""
+        route = self.routes.get(provider)
+        if route is None or model not in route[1].values():
+            return
+        breaker = self.breaker(provider, model)
+        if ok:
+            breaker.record_success(duration_s)
+        else:
+            breaker.record_failure(duration_s)
+
+    def breaker_states(self) -> dict[str, str]:
+        """Current state of every breaker, keyed "provider/model"."""
+        with self._lock:
+            breakers = list(self._breakers.values())
+        return {f"{b.provider}/{b.model}": b.state for b in breakers}
@@ -5,9 +5,17 @@ Separates prompt/tool tracking from source of truth.
 """
 
 from .prompts_loader import load_prompts, merge_prompt_changes
+from .registry import ConfigRegistry, ConfigSnapshot, get_registry
+from .templates import CompiledTemplate, TemplateError, compile_template
 from .tools_loader import load_tools, merge_tool_changes
 
 __all__ = [
+    'CompiledTemplate',
+    'ConfigRegistry',
+    'ConfigSnapshot',
+    'TemplateError',
+    'compile_template',
+    'get_registry',
     'load_prompts',
     'merge_prompt_changes',
     'load_tools',
@@ -0,0 +1,74 @@
+"""
+Read-only dict/list containers for shared configuration.
+
+FrozenDict and FrozenList subclass dict and list, so JSON encoding and
+isinstance checks keep working, but every mutating method raises TypeError.
+copy()/deepcopy() return plain mutable containers for callers that need to
+edit a private copy.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+
+def _readonly(self, *args: Any, **kwargs: Any) -> None:
+    raise TypeError(f"{type(self).__name__} is read-only; deepcopy() it to get a mutable copy")
+
+
+class FrozenDict(dict):
+    """dict that rejects mutation; copy()/deepcopy() return plain mutable containers."""
+
+    __slots__ = ()
+    __setitem__ = __delitem__ = clear = pop = popitem = setdefault = update = _readonly
+    __ior__ = _readonly
+
+    def copy(self) -> dict[str, Any]:
+        return dict(self)
+
+    def __copy__(self) -> dict[str, Any]:
+        return dict(self)
+
+    def __deepcopy__(self, memo: dict[int, Any]) -> dict[str, Any]:
+        return thaw(self)
+
+    def __reduce__(self):
+        return (FrozenDict, (dict(self),))
+
+
+class FrozenList(list):
+    """list that rejects mutation; copy()/deepcopy() return plain mutable containers."""
+
+    __slots__ = ()
+    __setitem__ = __delitem__ = append = clear = extend = insert = pop = remove = reverse = sort = _readonly
+    __iadd__ = __imul__ = _readonly
+
+    def copy(self) -> list[Any]:
+        return list(self)
+
+    def __copy__(self) -> list[Any]:
+        return list(self)
+
+    def __deepcopy__(self, memo: dict[int, Any]) -> list[Any]:
+        return thaw(self)
+
+    def __reduce__(self):
+        return (FrozenList, (list(self),))
+
+
+def freeze(value: Any) -> Any:
+    """Recursively convert dicts/lists into their read-only counterparts."""
+    if isinstance(value, dict):
+        return FrozenDict((k, freeze(v)) for k, v in value.items())
+    if isinstance(value, list):
+        return FrozenList(freeze(v) for v in value)
+    return value
+
+
+def thaw(value: Any) -> Any:
+    """Recursively convert frozen containers back into plain dicts/lists."""
+    if isinstance(value, dict):
+        return {k: thaw(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [thaw(v) for v in value]
+    return value  # JSON scalars are immutable
@@ -5,7 +5,6 @@ Utilities for loading pipeline prompt templates with UI-managed overrides.
 from __future__ import annotations
 
 import json
-from copy import deepcopy
 from pathlib import Path
 from typing import Any
 
@@ -45,27 +44,19 @@ def merge_prompt_changes(
     Overrides replace the matching keys from the base definition while keeping any
     untouched metadata so downstream callers always see a complete prompt entry.
     """
-    merged: dict[str, dict[str, Any]] = {}
-
-    for key, value in base_prompts.items():
-        merged[key] = deepcopy(value) if isinstance(value, dict) else value
+    # Shallow merge: nested values are shared with the inputs, so callers must
+    # treat the result as read-only (the config registry freezes it).
+    merged: dict[str, dict[str, Any]] = dict(base_prompts)
 
     for step, override in overrides.items():
         if step.startswith("_"):
             continue  # metadata entries
 
-        if not isinstance(override, dict):
-            merged[step] = deepcopy(override)
-            continue
-
         base_entry = merged.get(step, {})
-        if isinstance(base_entry, dict):
-            merged_entry = deepcopy(base_entry)
-            merged_entry.update({k: deepcopy(v) for k, v in override.items()})
+        if isinstance(override, dict) and isinstance(base_entry, dict):
+            merged[step] = {**base_entry, **override}
         else:
-            merged_entry = deepcopy(override)
-
-        merged[step] = merged_entry
+            merged[step] = override
 
     return merged
 
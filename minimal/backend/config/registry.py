@@ -0,0 +1,178 @@
+"""
+In-memory registry of merged prompt and tool configuration.
+
+The registry keeps one immutable ConfigSnapshot (prompts.json + prompts_changes.json,
+tools.json + tools_changes.json) and swaps in a new one whenever any of the
+four files changes on disk. A background thread polls file mtimes, so readers
+never touch the filesystem: snapshot() is a single attribute read.
+
+Each snapshot carries a content hash (`version`). Pipeline runs take a snapshot
+when they start and keep it until they finish, so edits made mid-run only
+affect runs started afterwards.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from .frozen import FrozenDict, freeze
+from .prompts_loader import PROMPTS_CHANGES_FILE, PROMPTS_FILE, load_prompts
+from .templates import compile_step_templates
+from .tool_specs import compile_tool_specs
+from .tools_loader import TOOLS_CHANGES_FILE, TOOLS_FILE, load_tools
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ConfigSnapshot:
+    """Immutable merged prompt/tool configuration tagged with a content hash."""
+
+    prompts: FrozenDict
+    tools: FrozenDict
+    version: str
+    loaded_at: float
+    tool_specs: FrozenDict = field(default_factory=FrozenDict)  # step key -> precompiled ToolSpec
+    templates: FrozenDict = field(default_factory=FrozenDict)  # step key -> validated CompiledTemplate
+
+
+def build_snapshot(
+    *,
+    prompts_path: Path | None = None,
+    prompts_changes_path: Path | None = None,
+    tools_path: Path | None = None,
+    tools_changes_path: Path | None = None,
+) -> ConfigSnapshot:
+    """
+    Load, merge and freeze the configuration files.
+
+    Raises:
+        TemplateError: If a step prompt uses a placeholder its step cannot fill
+    """
+    prompts = load_prompts(prompts_path=prompts_path, overrides_path=prompts_changes_path)
+    tools = load_tools(tools_path=tools_path, overrides_path=tools_changes_path)
+    canonical = json.dumps({"prompts": prompts, "tools": tools}, sort_keys=True, ensure_ascii=False)
+    version = hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:12]
+    frozen_tools = freeze(tools)
+    return ConfigSnapshot(
+        freeze(prompts),
+        frozen_tools,
+        version,
+        time.time(),
+        tool_specs=compile_tool_specs(frozen_tools),
+        templates=compile_step_templates(prompts),
+    )
+
+
+class ConfigRegistry:
+    """
+    Holds the current ConfigSnapshot and reloads it when the source files change.
+
+    Args:
+        prompts_path / prompts_changes_path / tools_path / tools_changes_path: Files to watch
+        poll_interval: Seconds between mtime checks in the background watcher
+    """
+
+    def __init__(
+        self,
+        *,
+        prompts_path: Path = PROMPTS_FILE,
+        prompts_changes_path: Path = PROMPTS_CHANGES_FILE,
+        tools_path: Path = TOOLS_FILE,
+        tools_changes_path: Path = TOOLS_CHANGES_FILE,
+        poll_interval: float = 2.0,
+    ):
+        self._paths = {
+            "prompts_path": Path(prompts_path),
+            "prompts_changes_path": Path(prompts_changes_path),
+            "tools_path": Path(tools_path),
+            "tools_changes_path": Path(tools_changes_path),
+        }
+        self.poll_interval = poll_interval
+        self._reload_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watcher: threading.Thread | None = None
+        self._signature = self._file_signature()
+        self._snapshot = build_snapshot(**self._paths)
+
+    def snapshot(self) -> ConfigSnapshot:
+        """Current configuration (no disk I/O)."""
+        return self._snapshot
+
+    @property
+    def version(self) -> str:
+        return self._snapshot.version
+
+    def _file_signature(self) -> tuple[tuple[int, int] | None, ...]:
+        signature = []
+        for path in self._paths.values():
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                signature.append(None)
+            else:
+                signature.append((stat.st_mtime_ns, stat.st_size))
+        return tuple(signature)
+
+    def refresh(self, force: bool = False) -> ConfigSnapshot:
+        """
+        Reload if any watched file changed (or unconditionally with force=True).
+
+        A file that fails to parse (e.g. caught mid-write) or a template with an
+        unknown placeholder keeps the previous snapshot in place; the next poll retries.
+        """
+        with self._reload_lock:
+            signature = self._file_signature()
+            if not force and signature == self._signature:
+                return self._snapshot
+            try:
+                snapshot = build_snapshot(**self._paths)
+            except (OSError, ValueError) as exc:
+                logger.warning(f"Keeping config version {self._snapshot.version}; reload failed: {exc}")
+                return self._snapshot
+            self._signature = signature
+            if snapshot.version != self._snapshot.version:
+                logger.info(f"Config reloaded: version {self._snapshot.version} -> {snapshot.version}")
+                self._snapshot = snapshot
+            return self._snapshot
+
+    def start(self) -> None:
+        """Start the background mtime watcher (idempotent)."""
+        if self._watcher is not None and self._watcher.is_alive():
+            return
+        self._stop.clear()
+        self._watcher = threading.Thread(target=self._watch, name="config-registry", daemon=True)
+        self._watcher.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join(timeout=self.poll_interval + 1)
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.refresh()
+            except Exception as exc:  # pragma: no cover - the watcher must never die
+                logger.warning(f"Config watcher error: {exc}")
+
+
+_registry: ConfigRegistry | None = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> ConfigRegistry:
+    """Process-wide registry over the default config files, with its watcher running."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ConfigRegistry(poll_interval=float(os.getenv("AQU_CONFIG_POLL_S", "2.0")))
+            _registry.start()
+        return _registry
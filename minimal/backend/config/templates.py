@@ -0,0 +1,161 @@
+"""
+Precompiled prompt templates.
+
+Prompt templates use str.format syntax. Parsing them on every call is wasted
+work, and a typo in a placeholder only surfaces as a KeyError once the step
+runs - after earlier (paid) steps have already completed. compile_template()
+parses a template once, checks its placeholders against the variables the
+step actually supplies, and returns a CompiledTemplate whose render() only
+concatenates the pre-split pieces.
+"""
+
+from __future__ import annotations
+
+import string
+from collections.abc import Mapping
+from functools import lru_cache
+from typing import Any
+
+from .frozen import FrozenDict
+
+# Variables each step passes when rendering its prompt. Templates may use any
+# subset of these; anything else would fail at render time.
+STEP_TEMPLATE_VARIABLES: dict[str, frozenset[str]] = {
+    "step1_difficulty_categories": frozenset({"topic"}),
+    "step2_error_catalog": frozenset({"topic", "subtopic", "difficulty"}),
+    "step3_strategic_question": frozenset(
+        {"topic", "subtopic", "difficulty", "catalog_names", "failure_feedback"}
+    ),
+    "step4_test_sonnet": frozenset(
+        {"context", "artifact", "title", "question_text", "requirements", "success_criteria"}
+    ),
+    "step5_test_haiku": frozenset(
+        {"context", "artifact", "title", "question_text", "requirements", "success_criteria"}
+    ),
+    "step6_judge_responses": frozenset(
+        {"question_text", "context", "requirements", "error_patterns_text", "sonnet_response", "haiku_response"}
+    ),
+    "step7_student_assessment": frozenset(
+        {
+            "haiku_failures",
+            "haiku_response_preview",
+            "sonnet_response_preview",
+            "min_code_lines",
+            "max_code_lines",
+            "min_error_span",
+            "max_error_span",
+            "min_errors",
+            "max_errors",
+            "allowed_difficulties",
+            "topic",
+            "subtopic",
+            "validation_feedback",
+        }
+    ),
+}
+
+_CONVERTERS = {"r": repr, "s": str, "a": ascii}
+_formatter = string.Formatter()
+
+
+class TemplateError(ValueError):
+    """A prompt template that cannot be rendered by its step."""
+
+
+class CompiledTemplate:
+    """
+    A parsed str.format template.
+
+    Args:
+        text: Template source
+        parts: (literal, field, format_spec, conversion) tuples from string.Formatter.parse
+    """
+
+    __slots__ = ("text", "fields", "_parts")
+
+    def __init__(self, text: str, parts: tuple[tuple[str, str | None, str | None, str | None], ...]):
+        self.text = text
+        self._parts = parts
+        self.fields = frozenset(field for _, field, _, _ in parts if field is not None)
+
+    def __repr__(self) -> str:
+        return f"CompiledTemplate(fields={sorted(self.fields)})"
+
+    def render(self, **values: Any) -> str:
+        """Equivalent to text.format(**values) without re-parsing the template."""
+        out = []
+        for literal, field, spec, conversion in self._parts:
+            if literal:
+                out.append(literal)
+            if field is None:
+                continue
+            value = values[field]
+            if conversion:
+                value = _CONVERTERS[conversion](value)
+            out.append(format(value, spec) if spec else str(value))
+        return "".join(out)
+
+
+def _parse(text: str) -> tuple[tuple[str, str | None, str | None, str | None], ...]:
+    try:
+        parts = tuple(_formatter.parse(text))
+    except ValueError as exc:  # unbalanced braces, bad conversion, ...
+        raise TemplateError(f"Malformed template: {exc}") from exc
+
+    for _, field, spec, conversion in parts:
+        if field is None:
+            continue
+        if not field.isidentifier():
+            # Positional ({}), index ({a[0]}) and attribute ({a.b}) fields are never supplied
+            raise TemplateError(f"Unsupported placeholder '{{{field}}}': use a plain variable name")
+        if conversion and conversion not in _CONVERTERS:
+            raise TemplateError(f"Unsupported conversion '!{conversion}' in '{{{field}}}'")
+        if "{" in spec:
+            raise TemplateError(f"Nested placeholders are not supported in '{{{field}:{spec}}}'")
+    return parts
+
+
+@lru_cache(maxsize=256)
+def _compile(text: str) -> CompiledTemplate:
+    return CompiledTemplate(text, _parse(text))
+
+
+def compile_template(text: str, step: str | None = None) -> CompiledTemplate:
+    """
+    Parse a template (cached by its text) and, for a known step, check its placeholders.
+
+    Raises:
+        TemplateError: If the template is malformed or uses a variable the step does not supply
+    """
+    if not isinstance(text, str):
+        raise TemplateError(f"Template must be a string, got {type(text).__name__}")
+    compiled = _compile(text)
+    allowed = STEP_TEMPLATE_VARIABLES.get(step) if step else None
+    if allowed is not None:
+        unknown = compiled.fields - allowed
+        if unknown:
+            raise TemplateError(
+                f"Unknown placeholder(s) for {step}: {', '.join(sorted(unknown))}. "
+                f"Available: {', '.join(sorted(allowed))}"
+            )
+    return compiled
+
+
+def template_text(entry: Any) -> str | None:
+    """Template string of a prompts.json entry (either {"template": ...} or a bare string)."""
+    template = entry.get("template") if isinstance(entry, Mapping) else entry
+    return template if isinstance(template, str) else None
+
+
+def compile_step_templates(prompts: Mapping[str, Any]) -> FrozenDict:
+    """Compile and validate every step template in a merged prompt configuration."""
+    compiled = {}
+    for step, entry in prompts.items():
+        text = template_text(entry)
+        if step.startswith("_") or text is None:
+            continue
+        try:
+            compiled[step] = compile_template(text, step)
+        except TemplateError as exc:
+            raise TemplateError(f"Prompt '{step}': {exc}") from exc
+    return FrozenDict(compiled)
@@ -0,0 +1,56 @@
+"""
+Precompiled tool specifications.
+
+A ToolSpec is the read-only list of tool definitions sent with one step's model
+call, together with its JSON encoding computed once when the config is loaded.
+Runtimes splice ToolSpec.json into the request body instead of copying and
+re-serialising the same schemas on every call.
+"""
+
+from __future__ import annotations
+
+import json
+from collections.abc import Iterable, Mapping, Sequence
+from typing import Any
+
+from .frozen import FrozenDict, FrozenList, freeze, thaw
+
+
+class ToolSpec(FrozenList):
+    """Frozen list of tool definitions with a pre-serialised JSON fragment."""
+
+    __slots__ = ("json",)
+
+    def __init__(self, tools: Iterable[Mapping[str, Any]]):
+        super().__init__(freeze(dict(tool)) for tool in tools)
+        self.json = json.dumps(self)
+
+    def __reduce__(self):
+        return (ToolSpec, (thaw(self),))
+
+    def with_property_enum(self, prop: str, values: Sequence[str], index: int = 0) -> ToolSpec:
+        """Variant whose tool at `index` restricts input property `prop` to `values`."""
+        tools = thaw(self)
+        if index < len(tools):
+            schema = tools[index].get("input_schema", {}).get("properties", {}).get(prop)
+            if isinstance(schema, dict):
+                schema["enum"] = list(values)
+        return ToolSpec(tools)
+
+
+def compile_tool_spec(entry: Mapping[str, Any] | Sequence[Mapping[str, Any]]) -> ToolSpec:
+    """Compile one tools.json entry (a single tool or a list of tools)."""
+    if isinstance(entry, ToolSpec):
+        return entry
+    if isinstance(entry, Mapping):
+        return ToolSpec([entry])
+    return ToolSpec(entry)
+
+
+def compile_tool_specs(tools: Mapping[str, Any]) -> FrozenDict:
+    """Compile every step entry of a merged tool configuration."""
+    return FrozenDict(
+        (key, compile_tool_spec(entry))
+        for key, entry in tools.items()
+        if not key.startswith("_") and isinstance(entry, (Mapping, list))
+    )
@@ -5,7 +5,6 @@ Utilities for loading pipeline tool specifications with UI-managed overrides.
 from __future__ import annotations
 
 import json
-from copy import deepcopy
 from pathlib import Path
 from typing import Any
 
@@ -39,25 +38,19 @@ def merge_tool_changes(
     """
     Merge override entries into the base tool specification.
     """
-    merged: dict[str, Any] = {}
-
-    for key, value in base_tools.items():
-        merged[key] = deepcopy(value)
+    # Shallow merge: nested schemas are shared with the inputs, so callers must
+    # treat the result as read-only (the config registry freezes it).
+    merged: dict[str, Any] = dict(base_tools)
 
     for step, override in overrides.items():
         if step.startswith("_"):
             continue
 
-        if isinstance(override, dict):
-            base_entry = merged.get(step, {})
-            if isinstance(base_entry, dict):
-                merged_entry = deepcopy(base_entry)
-                merged_entry.update({k: deepcopy(v) for k, v in override.items()})
-                merged[step] = merged_entry
-            else:
-                merged[step] = deepcopy(override)
+        base_entry = merged.get(step, {})
+        if isinstance(override, dict) and isinstance(base_entry, dict):
+            merged[step] = {**base_entry, **override}
         else:
-            merged[step] = deepcopy(override)
+            merged[step] = override
 
     return merged
 
@@ -48,8 +48,6 @@ class CorrectedSevenStepPipeline:
         self.invoker = self._orchestrator.invoker
         self.script_dir = self._orchestrator.script_dir
         self.db_path = self._orchestrator.db_path
-        self.prompts = self._orchestrator.prompts
-        self.tools = self._orchestrator.tools
 
         # These will be set on each run now (lazy initialization)
         self.run_timestamp = None
@@ -73,6 +71,16 @@ class CorrectedSevenStepPipeline:
         self.min_error_span = self._orchestrator.config.MIN_ERROR_SPAN
         self.max_error_span = self._orchestrator.config.MAX_ERROR_SPAN
 
+    @property
+    def prompts(self):
+        """Merged prompt configuration currently used by the orchestrator."""
+        return self._orchestrator.prompts
+
+    @property
+    def tools(self):
+        """Merged tool configuration currently used by the orchestrator."""
+        return self._orchestrator.tools
+
     def run_full_pipeline(self, topic: str, max_attempts: int = 3) -> SevenStepResult:
         """
         Run the complete corrected 7-step pipeline.
@@ -156,7 +164,7 @@ class CorrectedSevenStepPipeline:
 
     def step1_generate_difficulty_categories(self, topic: str) -> tuple[bool, dict, "PipelineStep"]:
         """Execute Step 1: Generate difficulty categories (exposed for API)."""
-        success, categories, step1, _ = self._orchestrator.step1.execute(topic)
+        success, categories, step1, _ = self._orchestrator.current_step_executors().step1.execute(topic)
         return success, categories, step1
 
     def invoke_model(self, model_id: str, prompt: str, max_tokens: int = 2048, temperature: float = 0.0) -> str:
@@ -13,6 +13,7 @@ class PipelineStep:
     success: bool
     response: str
     timestamp: str
+    provider: str = ""  # Provider that served the step (set by the orchestrator)
 
 
 @dataclass
@@ -29,3 +30,4 @@ class SevenStepResult:
     student_assessment_created: bool
     total_attempts: int
     weak_model_failures: list[str]  # Track actual failure patterns
+    stop_reason: str = ""  # Why a run stopped early (e.g. STOP_BUDGET_REFUSED in services.budget); else empty
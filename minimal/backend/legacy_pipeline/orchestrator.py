@@ -4,14 +4,30 @@ import json
 import logging
 import os
 import random
-from datetime import datetime
+import threading
+from collections import Counter
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import datetime, timedelta
 from typing import Any
 
-from clients.provider import get_model_provider
-from config.prompts_loader import load_prompts
-from config.tools_loader import load_tools
+from analytics.catalog_kb import CATALOG_KB_MODEL, ErrorCatalogKB, normalize_key
+from analytics.dedup import (
+    DEDUP_ACTIONS,
+    KIND_ASSESSMENT,
+    KIND_QUESTION,
+    DedupIndex,
+    Match,
+    assessment_text,
+    question_text,
+)
+from analytics.rewards import StepRewardsReport
+from clients.context import current_run, run_scope
+from clients.provider import get_model_provider, get_provider_info
+from clients.routing import pop_served_by
+from config.registry import ConfigSnapshot, get_registry
 from legacy_pipeline.config import PipelineConfig
-from legacy_pipeline.models import SevenStepResult
+from legacy_pipeline.models import PipelineStep, SevenStepResult
 from legacy_pipeline.persistence.pipeline_logger import PipelineLogger
 from legacy_pipeline.steps import (
     AssessmentStep,
@@ -21,11 +37,43 @@ from legacy_pipeline.steps import (
     ModelTestingStep,
     QuestionGenerationStep,
 )
+from observability.metrics import DIFFERENTIATION_ATTEMPTS, PIPELINE_RUNS
+from observability.tracing import span
 from roles import load_model_roles
+from services.budget import STOP_BUDGET_REFUSED, BudgetExceededError, get_governor
 from services.invoke import Invoker
 
 logger = logging.getLogger(__name__)
 
+_run_timestamp_lock = threading.Lock()
+_last_run_start = datetime.min
+
+
+def new_run_timestamp() -> str:
+    """
+    Sortable id for a new run (YYYYmmdd_HHMMSS_micro).
+
+    Strictly increasing within the process, so runs started in the same second
+    by concurrent workers never share log files or database rows.
+    """
+    global _last_run_start
+    with _run_timestamp_lock:
+        _last_run_start = max(datetime.now(), _last_run_start + timedelta(microseconds=1))
+        return _last_run_start.strftime("%Y%m%d_%H%M%S_%f")
+
+
+@dataclass(frozen=True)
+class StepExecutors:
+    """Step executors bound to one prompt/tool config snapshot."""
+
+    config_version: str
+    step1: DifficultyStep
+    step2: ErrorCatalogStep
+    step3: QuestionGenerationStep
+    step4_5: ModelTestingStep
+    step6: JudgmentStep
+    step7: AssessmentStep
+
 
 class LegacyPipelineOrchestrator:
     """
@@ -35,19 +83,26 @@ class LegacyPipelineOrchestrator:
     with step logic extracted into focused modules.
     """
 
-    def __init__(self, provider: str = "anthropic"):
+    def __init__(self, provider: str = "anthropic", repo: Any | None = None, runtime: Any | None = None):
         """
         Initialize the pipeline orchestrator.
 
         Args:
             provider: Model provider to use - either "anthropic" (default) or "openai"
+            repo: Repository for run persistence (default: a Repo on db_path per run;
+                  batch workers pass a persistence.queue_repo.QueueRepo)
+            runtime: Model runtime to use instead of the provider's default
+                     (batch waves pass a batch.waves.WaveRuntime)
         """
         self.provider = provider
         self.config = PipelineConfig()
 
         # Get client and models for the specified provider
         try:
-            self.runtime_client, models = get_model_provider(provider)
+            if runtime is None:
+                self.runtime_client, models = get_model_provider(provider)
+            else:
+                self.runtime_client, models = runtime, get_provider_info(provider)["models"]
             self.model_strong = models["strong"]
             self.model_mid = models["mid"]
             self.model_weak = models["weak"]
@@ -73,6 +128,9 @@ class LegacyPipelineOrchestrator:
 
         self.invoker = Invoker(self.runtime_client)
 
+        # Optional spend caps; runs over budget drop thinking, move to the mid tier, then stop
+        self.budget_governor = get_governor()
+
         # Set up directory structure
         script_dir = os.path.dirname(os.path.abspath(__file__))
         # Go up one level from legacy_pipeline to backend
@@ -83,52 +141,88 @@ class LegacyPipelineOrchestrator:
 
         # Initialize database path
         self.db_path = os.path.join(self.script_dir, "pipeline_results.db")
+        self.repo = repo
+
+        # Optional near-duplicate index kept next to the database (AQU_DEDUP=1)
+        self.dedup_index = DedupIndex.from_env(os.path.join(self.script_dir, "dedup_index.sqlite"))
+        self.dedup_action = os.getenv("AQU_DEDUP_ACTION", "reseed").strip().lower()
+        if self.dedup_action not in DEDUP_ACTIONS:
+            logger.warning(f"Unknown AQU_DEDUP_ACTION={self.dedup_action!r}; using 'reseed'")
+            self.dedup_action = "reseed"
+
+        # Optional store of past catalogs and weak-model failures (AQU_CATALOG_KB=1)
+        self.catalog_kb = ErrorCatalogKB.from_env(self.db_path, repo=repo)
 
         # Logger will be initialized per run
         self.logger = None
 
-        # Load prompts and tools
+        # Load prompts and tools (hot-reloaded by the registry between runs)
         try:
-            self.prompts = load_prompts()
-            self.tools = load_tools()
+            self.config_registry = get_registry()
         except Exception as exc:
             logger.error(f"Failed to load prompt/tool configuration: {exc}")
             raise
 
         # Initialize step executors
-        self._init_step_executors()
-
-    def _init_step_executors(self) -> None:
-        """Initialize all step executor modules."""
-        self.step1 = DifficultyStep(self.invoker, self.model_mid, self.prompts, self.tools)
-
-        self.step2 = ErrorCatalogStep(self.invoker, self.model_mid, self.prompts, self.tools)
-
-        self.step3 = QuestionGenerationStep(
-            self.invoker,
-            self.model_strong,
-            self.prompts,
-            self.tools,
-            self.judge_supports_thinking,
-        )
+        self._executors_lock = threading.Lock()
+        self._executors: StepExecutors | None = None
+        self.current_step_executors()
 
-        self.step4_5 = ModelTestingStep(self.invoker, self.model_mid, self.model_weak, self.prompts)
-
-        self.step6 = JudgmentStep(self.invoker, self.model_strong, self.prompts, self.tools)
+    def current_step_executors(self) -> StepExecutors:
+        """
+        Return step executors for the latest config snapshot, rebuilding them if it changed.
 
-        self.step7 = AssessmentStep(
-            self.invoker,
-            self.model_strong,
-            self.prompts,
-            self.tools,
-            self.judge_supports_thinking,
-            self.config,
+        The current executors are also exposed as self.step1 ... self.step7 for
+        callers that use them directly.
+        """
+        snapshot = self.config_registry.snapshot()
+        with self._executors_lock:
+            if self._executors is None or self._executors.config_version != snapshot.version:
+                self._executors = self._build_step_executors(snapshot)
+                self.prompts = snapshot.prompts
+                self.tools = snapshot.tools
+                self.step1 = self._executors.step1
+                self.step2 = self._executors.step2
+                self.step3 = self._executors.step3
+                self.step4_5 = self._executors.step4_5
+                self.step6 = self._executors.step6
+                self.step7 = self._executors.step7
+            return self._executors
+
+    def _build_step_executors(self, snapshot: ConfigSnapshot) -> StepExecutors:
+        """Initialize all step executor modules against one config snapshot."""
+        prompts, tools, templates = snapshot.prompts, snapshot.tool_specs, snapshot.templates
+        return StepExecutors(
+            config_version=snapshot.version,
+            step1=DifficultyStep(self.invoker, self.model_mid, prompts, tools, templates=templates),
+            step2=ErrorCatalogStep(self.invoker, self.model_mid, prompts, tools, self.catalog_kb, templates=templates),
+            step3=QuestionGenerationStep(
+                self.invoker,
+                self.model_strong,
+                prompts,
+                tools,
+                self.judge_supports_thinking,
+                templates=templates,
+            ),
+            step4_5=ModelTestingStep(self.invoker, self.model_mid, self.model_weak, prompts, templates=templates),
+            step6=JudgmentStep(self.invoker, self.model_strong, prompts, tools, templates=templates),
+            step7=AssessmentStep(
+                self.invoker,
+                self.model_strong,
+                prompts,
+                tools,
+                self.judge_supports_thinking,
+                self.config,
+                templates=templates,
+            ),
         )
 
     def run_full_pipeline(self, topic: str, max_attempts: int = 3) -> SevenStepResult:
         """
         Run the complete corrected 7-step pipeline.
 
+        Drains run_full_pipeline_streaming so both entry points share one flow.
+
         Args:
             topic: The topic to generate questions for
             max_attempts: Maximum retry attempts for differentiation (default: 3)
@@ -136,169 +230,13 @@ class LegacyPipelineOrchestrator:
         Returns:
             SevenStepResult with complete execution details
         """
-        # Generate fresh timestamp for this run to avoid collisions
-        self.run_timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        self.logger = PipelineLogger(self.script_dir, self.run_timestamp, self.db_path)
-
-        logger.info(f"Starting corrected 7-step pipeline for: {topic}")
-
-        # Initialize logging
-        self.logger.initialize_run(topic)
-
-        steps_completed = []
-
-        # Step 1: Generate difficulty categories
-        success, categories, step1, reward1 = self.step1.execute(topic)
-        steps_completed.append(step1)
-        self.logger.log_step(step1)
-        self.logger.log_step_reward(1, reward1)
-
-        if not success:
-            result = SevenStepResult(topic, "", "", steps_completed, False, 1, False, False, 1, [])
-            self.logger.finalize_run(result)
-            return result
-
-        # Randomly select difficulty level and subtopic for testing
-        available_difficulties = [
-            d for d in ["Beginner", "Intermediate", "Advanced"] if d in categories and categories[d]
-        ]
-        if available_difficulties:
-            difficulty = random.choice(available_difficulties)
-            subtopics = categories.get(difficulty, ["General concepts"])
-            subtopic = random.choice(subtopics) if subtopics else "General concepts"
-        else:
-            difficulty = "Intermediate"
-            subtopic = "General concepts"
-
-        # Step 2: Generate error catalog (run once)
-        success, error_catalog, step2, reward2 = self.step2.execute(topic, subtopic, difficulty)
-        steps_completed.append(step2)
-        self.logger.log_step(step2)
-        self.logger.log_step_reward(2, reward2)
-
-        if not success:
-            result = SevenStepResult(topic, subtopic, difficulty, steps_completed, False, 2, False, False, 1, [])
-            self.logger.finalize_run(result)
-            return result
-
-        # Retry loop for steps 3-6 (strategic question → implementation testing → differentiation judgment)
-        previous_failures = []
-        for attempt in range(1, max_attempts + 1):
-            logger.info(f"Strategic differentiation attempt {attempt} for {topic}")
-            attempt_steps = []
-
-            # Enable thinking mode on retries
-            use_thinking = attempt > 1 and self.judge_supports_thinking
-
-            # Step 3: Generate strategic implementation challenge
-            success, question, step3, reward3 = self.step3.execute(
-                topic,
-                subtopic,
-                difficulty,
-                error_catalog,
-                previous_failures,
-                use_thinking=use_thinking,
-            )
-            attempt_steps.append(step3)
-            self.logger.log_step(step3)
-            self.logger.log_step_reward(3, reward3)
-
-            if not success:
-                steps_completed.extend(attempt_steps)
-                continue
-
-            # Step 4: Test Sonnet implementation
-            (
-                sonnet_success,
-                sonnet_response,
-                step4,
-                reward4,
-            ) = self.step4_5.execute_step4_sonnet(question)
-            attempt_steps.append(step4)
-            self.logger.log_step(step4)
-            self.logger.log_step_reward(4, reward4)
-
-            # Step 5: Test Haiku implementation
-            (
-                haiku_success,
-                haiku_response,
-                step5,
-                reward5,
-            ) = self.step4_5.execute_step5_haiku(question)
-            attempt_steps.append(step5)
-            self.logger.log_step(step5)
-            self.logger.log_step_reward(5, reward5)
-
-            # Step 6: Judge differentiation (KEY DECISION POINT)
-            (
-                differentiation_achieved,
-                judge_payload,
-                haiku_failures,
-                step6,
-                reward6,
-            ) = self.step6.execute(question, sonnet_response, haiku_response, error_catalog)
-            attempt_steps.append(step6)
-            self.logger.log_step(step6)
-            self.logger.log_step_reward(6, reward6)
-
-            steps_completed.extend(attempt_steps)
-
-            # Extract judge reasoning for feedback
-            judge_reasoning_text = self._extract_judge_reasoning(judge_payload)
-            judge_reasoning_lower = judge_reasoning_text.lower()
-
-            if differentiation_achieved:
-                logger.info(f"✅ Differentiation achieved on attempt {attempt}")
-
-                # Step 7: Create student assessment based on actual weak model failures
-                success, assessment, step7, reward7 = self.step7.execute(
-                    question, sonnet_response, haiku_response, haiku_failures
-                )
-                steps_completed.append(step7)
-                self.logger.log_step(step7)
-                self.logger.log_step_reward(7, reward7)
+        result: SevenStepResult | None = None
+        for item in self.run_full_pipeline_streaming(topic, max_attempts):
+            if isinstance(item, dict) and "final_result" in item:
+                result = item["final_result"]
 
-                result = SevenStepResult(
-                    topic=topic,
-                    subtopic=subtopic,
-                    difficulty=difficulty,
-                    steps_completed=steps_completed,
-                    final_success=True,
-                    stopped_at_step=7,
-                    differentiation_achieved=True,
-                    student_assessment_created=success,
-                    total_attempts=attempt,
-                    weak_model_failures=haiku_failures,
-                )
-                self.logger.finalize_run(result, assessment if success else None)
-                return result
-            else:
-                logger.info(f"❌ Attempt {attempt} failed differentiation - Step 6 blocked progression")
-
-                # Build detailed failure context for next attempt
-                failure_text = self._build_failure_feedback(
-                    attempt,
-                    judge_reasoning_text,
-                    judge_reasoning_lower,
-                    sonnet_response,
-                    haiku_response,
-                )
-                previous_failures.append(failure_text)
-
-        # All attempts failed - stopped at Step 6
-        result = SevenStepResult(
-            topic=topic,
-            subtopic=subtopic,
-            difficulty=difficulty,
-            steps_completed=steps_completed,
-            final_success=False,
-            stopped_at_step=6,
-            differentiation_achieved=False,
-            student_assessment_created=False,
-            total_attempts=max_attempts,
-            weak_model_failures=[],
-        )
-        self.logger.finalize_run(result)
+        if result is None:  # pragma: no cover - the generator always yields a final result
+            raise RuntimeError("Pipeline finished without producing a final result")
         return result
 
     def run_full_pipeline_streaming(self, topic: str, max_attempts: int = 3):
@@ -314,182 +252,308 @@ class LegacyPipelineOrchestrator:
         Yields:
             PipelineStep objects as each step completes
             Final yield contains dict with final result including all metadata
-        """
-        # Generate fresh timestamp for this run to avoid collisions
-        self.run_timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        self.logger = PipelineLogger(self.script_dir, self.run_timestamp, self.db_path)
-
-        logger.info(f"Starting streaming 7-step pipeline for: {topic}")
-
-        # Initialize logging
-        self.logger.initialize_run(topic)
-
-        steps_completed = []
-
-        # Step 1: Generate difficulty categories
-        success, categories, step1, reward1 = self.step1.execute(topic)
-        steps_completed.append(step1)
-        self.logger.log_step(step1)
-        self.logger.log_step_reward(1, reward1)
-        yield step1  # ← Yield immediately!
 
-        if not success:
-            result = SevenStepResult(topic, "", "", steps_completed, False, 1, False, False, 1, [])
-            self.logger.finalize_run(result)
-            yield {"final_result": result}
-            return
-
-        # Randomly select difficulty level and subtopic
-        available_difficulties = [
-            d for d in ["Beginner", "Intermediate", "Advanced"] if d in categories and categories[d]
-        ]
-        if available_difficulties:
-            difficulty = random.choice(available_difficulties)
-            subtopics = categories.get(difficulty, ["General concepts"])
-            subtopic = random.choice(subtopics) if subtopics else "General concepts"
-        else:
-            difficulty = "Intermediate"
-            subtopic = "General concepts"
-
-        # Step 2: Generate error catalog
-        success, error_catalog, step2, reward2 = self.step2.execute(topic, subtopic, difficulty)
-        steps_completed.append(step2)
-        self.logger.log_step(step2)
-        self.logger.log_step_reward(2, reward2)
-        yield step2  # ← Yield immediately!
-
-        if not success:
-            result = SevenStepResult(topic, subtopic, difficulty, steps_completed, False, 2, False, False, 1, [])
-            self.logger.finalize_run(result)
-            yield {"final_result": result}
-            return
+        Raises:
+            BudgetExceededError: If the daily or topic spend cap is already reached. A call
+                refused by the run cap instead ends the run with stop_reason "budget_refused".
+        """
+        # Refuse the run before anything is logged once today's or the topic's budget is spent
+        budget = None
+        if self.budget_governor is not None:
+            budget = self.budget_governor.start_run(topic, downgrades={self.model_strong: self.model_mid})
 
-        # Retry loop for steps 3-6
-        previous_failures = []
-        for attempt in range(1, max_attempts + 1):
-            logger.info(f"Strategic differentiation attempt {attempt} for {topic}")
-            attempt_steps = []
-
-            # Enable thinking mode on retries
-            use_thinking = attempt > 1 and self.judge_supports_thinking
-
-            # Step 3: Generate strategic implementation challenge
-            success, question, step3, reward3 = self.step3.execute(
-                topic,
-                subtopic,
-                difficulty,
-                error_catalog,
-                previous_failures,
-                use_thinking=use_thinking,
-            )
-            attempt_steps.append(step3)
-            self.logger.log_step(step3)
-            self.logger.log_step_reward(3, reward3)
-            yield step3  # ← Yield immediately!
-
-            if not success:
-                steps_completed.extend(attempt_steps)
-                continue
-
-            # Step 4: Test Sonnet implementation
-            (
-                sonnet_success,
-                sonnet_response,
-                step4,
-                reward4,
-            ) = self.step4_5.execute_step4_sonnet(question)
-            attempt_steps.append(step4)
-            self.logger.log_step(step4)
-            self.logger.log_step_reward(4, reward4)
-            yield step4  # ← Yield immediately!
-
-            # Step 5: Test Haiku implementation
-            (
-                haiku_success,
-                haiku_response,
-                step5,
-                reward5,
-            ) = self.step4_5.execute_step5_haiku(question)
-            attempt_steps.append(step5)
-            self.logger.log_step(step5)
-            self.logger.log_step_reward(5, reward5)
-            yield step5  # ← Yield immediately!
-
-            # Step 6: Judge differentiation
-            (
-                differentiation_achieved,
-                judge_payload,
-                haiku_failures,
-                step6,
-                reward6,
-            ) = self.step6.execute(question, sonnet_response, haiku_response, error_catalog)
-            attempt_steps.append(step6)
-            self.logger.log_step(step6)
-            self.logger.log_step_reward(6, reward6)
-            yield step6  # ← Yield immediately!
-
-            steps_completed.extend(attempt_steps)
-
-            # Extract judge reasoning
-            judge_reasoning_text = self._extract_judge_reasoning(judge_payload)
-            judge_reasoning_lower = judge_reasoning_text.lower()
-
-            if differentiation_achieved:
-                logger.info(f"✅ Differentiation achieved on attempt {attempt}")
-
-                # Step 7: Create student assessment
-                success, assessment, step7, reward7 = self.step7.execute(
-                    question, sonnet_response, haiku_response, haiku_failures
+        # Generate fresh timestamp for this run to avoid collisions
+        self.run_timestamp = new_run_timestamp()
+        self.logger = PipelineLogger(self.script_dir, self.run_timestamp, self.db_path, repo=self.repo)
+        # Pin this run to the current config; later edits only affect later runs
+        steps = self.current_step_executors()
+
+        with span("run", topic=topic, run_timestamp=self.run_timestamp), run_scope(self.run_timestamp) as run:
+            run.budget = budget
+            logger.info(f"Starting streaming 7-step pipeline for: {topic} (config {steps.config_version})")
+
+            # Initialize logging
+            self.logger.initialize_run(topic)
+
+            steps_completed = []
+            # Run state the budget handler reports if a refused call ends the run early
+            subtopic = difficulty = ""
+            attempt, attempt_steps = 1, []
+            try:
+                # Step 1: Generate difficulty categories
+                success, categories, step1, reward1 = steps.step1.execute(topic)
+                steps_completed.append(step1)
+                self._record_step(step1, reward1)
+                yield step1  # ← Yield immediately!
+
+                if not success:
+                    result = SevenStepResult(topic, "", "", steps_completed, False, 1, False, False, 1, [])
+                    self._finalize_run(result)
+                    yield {"final_result": result}
+                    return
+
+                # Randomly select difficulty level and subtopic
+                available_difficulties = [
+                    d for d in ["Beginner", "Intermediate", "Advanced"] if d in categories and categories[d]
+                ]
+                if available_difficulties:
+                    difficulty = random.choice(available_difficulties)
+                    subtopics = categories.get(difficulty, ["General concepts"])
+                    subtopic = random.choice(subtopics) if subtopics else "General concepts"
+                else:
+                    difficulty = "Intermediate"
+                    subtopic = "General concepts"
+
+                # Step 2: Generate error catalog
+                success, error_catalog, step2, reward2 = steps.step2.execute(topic, subtopic, difficulty)
+                steps_completed.append(step2)
+                self._record_step(step2, reward2)
+                yield step2  # ← Yield immediately!
+
+                if not success:
+                    result = SevenStepResult(
+                        topic, subtopic, difficulty, steps_completed, False, 2, False, False, 1, []
+                    )
+                    self._finalize_run(result)
+                    yield {"final_result": result}
+                    return
+                if step2.model_used != CATALOG_KB_MODEL:
+                    self._record_catalog(topic, subtopic, difficulty, error_catalog)
+
+                # Retry loop for steps 3-6
+                previous_failures = []
+                attempts_made = max_attempts
+                for attempt in range(1, max_attempts + 1):
+                    if budget is not None and not budget.allow_attempt(attempt):
+                        attempts_made = attempt - 1
+                        break
+                    with span("attempt", attempt=attempt):
+                        logger.info(f"Strategic differentiation attempt {attempt} for {topic}")
+                        attempt_steps = []
+
+                        # Enable thinking mode on retries
+                        use_thinking = attempt > 1 and self.judge_supports_thinking
+
+                        # Step 3: Generate strategic implementation challenge
+                        success, question, step3, reward3 = steps.step3.execute(
+                            topic,
+                            subtopic,
+                            difficulty,
+                            error_catalog,
+                            previous_failures,
+                            use_thinking=use_thinking,
+                        )
+                        attempt_steps.append(step3)
+                        self._record_step(step3, reward3)
+                        yield step3  # ← Yield immediately!
+
+                        if not success:
+                            steps_completed.extend(attempt_steps)
+                            continue
+
+                        # Don't spend Steps 4-7 on a question we have already served
+                        duplicate = self._find_duplicate_question(question)
+                        if duplicate is not None:
+                            steps_completed.extend(attempt_steps)
+                            if self.dedup_action == "reject":
+                                result = SevenStepResult(
+                                    topic, subtopic, difficulty, steps_completed, False, 3, False, False, attempt, []
+                                )
+                                self._finalize_run(result)
+                                yield {"final_result": result}
+                                return
+                            previous_failures.append(self._build_duplicate_feedback(attempt, duplicate))
+                            continue
+
+                        # Step 4: Test Sonnet implementation
+                        (
+                            sonnet_success,
+                            sonnet_response,
+                            step4,
+                            reward4,
+                        ) = steps.step4_5.execute_step4_sonnet(question)
+                        attempt_steps.append(step4)
+                        self._record_step(step4, reward4)
+                        yield step4  # ← Yield immediately!
+
+                        # Step 5: Test Haiku implementation
+                        (
+                            haiku_success,
+                            haiku_response,
+                            step5,
+                            reward5,
+                        ) = steps.step4_5.execute_step5_haiku(question)
+                        attempt_steps.append(step5)
+                        self._record_step(step5, reward5)
+                        yield step5  # ← Yield immediately!
+
+                        # Step 6: Judge differentiation
+                        (
+                            differentiation_achieved,
+                            judge_payload,
+                            haiku_failures,
+                            step6,
+                            reward6,
+                        ) = steps.step6.execute(question, sonnet_response, haiku_response, error_catalog)
+                        attempt_steps.append(step6)
+                        self._record_step(step6, reward6)
+                        self._record_failures(topic, subtopic, haiku_failures)
+                        yield step6  # ← Yield immediately!
+                        DIFFERENTIATION_ATTEMPTS.inc(
+                            attempt=str(attempt), outcome="achieved" if differentiation_achieved else "not_achieved"
+                        )
+
+                        steps_completed.extend(attempt_steps)
+
+                        # Extract judge reasoning
+                        judge_reasoning_text = self._extract_judge_reasoning(judge_payload)
+                        judge_reasoning_lower = judge_reasoning_text.lower()
+
+                        if differentiation_achieved:
+                            logger.info(f"✅ Differentiation achieved on attempt {attempt}")
+
+                            # Step 7: Create student assessment
+                            success, assessment, step7, reward7 = steps.step7.execute(
+                                question, sonnet_response, haiku_response, haiku_failures
+                            )
+                            steps_completed.append(step7)
+                            self._record_step(step7, reward7)
+                            yield step7  # ← Yield immediately!
+
+                            # Yield final result
+                            final_result = SevenStepResult(
+                                topic=topic,
+                                subtopic=subtopic,
+                                difficulty=difficulty,
+                                steps_completed=steps_completed,
+                                final_success=True,
+                                stopped_at_step=7,
+                                differentiation_achieved=True,
+                                student_assessment_created=success,
+                                total_attempts=attempt,
+                                weak_model_failures=haiku_failures,
+                            )
+                            if success:
+                                self._index_served(topic, question, assessment)
+                            self._finalize_run(final_result, assessment if success else None)
+                            yield {"final_result": final_result, "assessment": assessment}
+                            return
+                        else:
+                            logger.info(f"❌ Attempt {attempt} failed differentiation")
+
+                            # Build failure feedback
+                            failure_text = self._build_failure_feedback(
+                                attempt,
+                                judge_reasoning_text,
+                                judge_reasoning_lower,
+                                sonnet_response,
+                                haiku_response,
+                            )
+                            previous_failures.append(failure_text)
+
+                # All attempts failed - stopped at Step 6
+                final_result = SevenStepResult(
+                    topic=topic,
+                    subtopic=subtopic,
+                    difficulty=difficulty,
+                    steps_completed=steps_completed,
+                    final_success=False,
+                    stopped_at_step=6,
+                    differentiation_achieved=False,
+                    student_assessment_created=False,
+                    total_attempts=attempts_made,
+                    weak_model_failures=[],
                 )
-                steps_completed.append(step7)
-                self.logger.log_step(step7)
-                self.logger.log_step_reward(7, reward7)
-                yield step7  # ← Yield immediately!
-
-                # Yield final result
+                self._finalize_run(final_result)
+                yield {"final_result": final_result}
+            except BudgetExceededError as exc:
+                # The run cap refused a call: stop here instead of scoring the refusal as a model answer
+                logger.warning(f"Run {self.run_timestamp} for {topic} stopped by its budget: {exc}")
+                pending = [s for s in attempt_steps if not any(s is done for done in steps_completed)]
+                steps_completed.extend(pending)
+                last_step = steps_completed[-1].step_number if steps_completed else 0
                 final_result = SevenStepResult(
                     topic=topic,
                     subtopic=subtopic,
                     difficulty=difficulty,
                     steps_completed=steps_completed,
-                    final_success=True,
-                    stopped_at_step=7,
-                    differentiation_achieved=True,
-                    student_assessment_created=success,
+                    final_success=False,
+                    stopped_at_step=int(exc.step) if exc.step else last_step,
+                    differentiation_achieved=False,
+                    student_assessment_created=False,
                     total_attempts=attempt,
-                    weak_model_failures=haiku_failures,
-                )
-                self.logger.finalize_run(final_result, assessment if success else None)
-                yield {"final_result": final_result, "assessment": assessment}
-                return
-            else:
-                logger.info(f"❌ Attempt {attempt} failed differentiation")
-
-                # Build failure feedback
-                failure_text = self._build_failure_feedback(
-                    attempt,
-                    judge_reasoning_text,
-                    judge_reasoning_lower,
-                    sonnet_response,
-                    haiku_response,
+                    weak_model_failures=[],
+                    stop_reason=STOP_BUDGET_REFUSED,
                 )
-                previous_failures.append(failure_text)
-
-        # All attempts failed - stopped at Step 6
-        final_result = SevenStepResult(
-            topic=topic,
-            subtopic=subtopic,
-            difficulty=difficulty,
-            steps_completed=steps_completed,
-            final_success=False,
-            stopped_at_step=6,
-            differentiation_achieved=False,
-            student_assessment_created=False,
-            total_attempts=max_attempts,
-            weak_model_failures=[],
+                self._finalize_run(final_result)
+                yield {"final_result": final_result}
+
+    def _record_step(self, step: PipelineStep, reward: StepRewardsReport | None) -> None:
+        """Tag the step with the provider that served it, then log the step and its reward."""
+        served = pop_served_by()
+        if served is not None:
+            step.provider = served.provider
+            step.model_used = served.model
+        elif not step.provider:
+            step.provider = self.provider
+        self.logger.log_step(step)
+        self.logger.log_step_reward(step.step_number, reward)
+
+    def _finalize_run(self, result: SevenStepResult, assessment: dict[str, Any] | None = None) -> None:
+        """Persist the final result and record the run outcome metric."""
+        self.logger.finalize_run(result, assessment)
+        run = current_run()
+        if run is not None and run.budget is not None:
+            run.budget.finish()
+        PIPELINE_RUNS.inc(
+            stopped_at_step=str(result.stopped_at_step),
+            outcome="success" if result.final_success else result.stop_reason or "failure",
+        )
+
+    def _record_catalog(self, topic: str, subtopic: str, difficulty: str, error_catalog: list[dict[str, Any]]) -> None:
+        """Add a freshly generated Step 2 catalog to the knowledge base."""
+        if self.catalog_kb is None:
+            return
+        try:
+            self.catalog_kb.record_catalog(self.run_timestamp, topic, subtopic, difficulty, error_catalog)
+        except Exception as exc:
+            logger.warning(f"Could not record error catalog in the knowledge base: {exc}")
+
+    def _record_failures(self, topic: str, subtopic: str, failures: list[str]) -> None:
+        """Add the weak-model failures named by the judge to the knowledge base."""
+        if self.catalog_kb is None or not failures:
+            return
+        try:
+            self.catalog_kb.record_failures(self.run_timestamp, topic, subtopic, failures)
+        except Exception as exc:
+            logger.warning(f"Could not record weak-model failures in the knowledge base: {exc}")
+
+    def _find_duplicate_question(self, question: dict[str, Any]) -> Match | None:
+        """Closest previously served question, if this one nearly duplicates it."""
+        if self.dedup_index is None:
+            return None
+        duplicate = self.dedup_index.find_duplicate(KIND_QUESTION, question_text(question))
+        if duplicate is not None:
+            logger.warning(
+                f"Step 3 question nearly duplicates run {duplicate.key} "
+                f"(similarity {duplicate.similarity:.2f}); action: {self.dedup_action}"
+            )
+        return duplicate
+
+    def _index_served(self, topic: str, question: dict[str, Any], assessment: dict[str, Any]) -> None:
+        """Record a served question and assessment so later runs can detect repeats."""
+        if self.dedup_index is None:
+            return
+        self.dedup_index.add(KIND_QUESTION, self.run_timestamp, question_text(question), topic)
+        self.dedup_index.add(KIND_ASSESSMENT, self.run_timestamp, assessment_text(assessment), topic)
+
+    def _build_duplicate_feedback(self, attempt: int, duplicate: Match) -> str:
+        """Feedback that re-seeds Step 3 away from an already served question."""
+        return (
+            f"Attempt {attempt}: The question nearly duplicates one already served "
+            f"(similarity {duplicate.similarity:.2f}). "
+            "Write a DIFFERENT scenario: new context, new artifact and different requirements"
         )
-        self.logger.finalize_run(final_result)
-        yield {"final_result": final_result}
 
     def _extract_judge_reasoning(self, judge_payload: dict[str, Any]) -> str:
         """Extract reasoning text from judge payload."""
@@ -561,7 +625,7 @@ class LegacyPipelineOrchestrator:
 
     @staticmethod
     def extract_common_failures(
-        results: list[SevenStepResult],
+        results: Iterable[SevenStepResult],
     ) -> dict[str, int]:
         """
         Extract common patterns from weak model failures.
@@ -572,14 +636,10 @@ class LegacyPipelineOrchestrator:
         Returns:
             Dictionary of failure patterns with their counts
         """
-        failure_counts = {}
-        for result in results:
-            for failure in result.weak_model_failures:
-                # Normalize failure text for counting
-                normalized = failure.lower().strip()
-                if normalized:
-                    failure_counts[normalized] = failure_counts.get(normalized, 0) + 1
-
-        # Return top 5 most common failures
-        sorted_failures = sorted(failure_counts.items(), key=lambda x: x[1], reverse=True)
-        return dict(sorted_failures[:5])
+        # Normalized keys merge case/punctuation variants; results are consumed one at a time
+        failure_counts = Counter(
+            key for result in results for key in map(normalize_key, result.weak_model_failures) if key
+        )
+
+        # Return top 5 most common failures (stored history: ErrorCatalogKB.failure_stats)
+        return dict(failure_counts.most_common(5))
@@ -16,7 +16,7 @@ logger = logging.getLogger(__name__)
 class PipelineLogger:
     """Handles logging and database persistence for pipeline execution."""
 
-    def __init__(self, script_dir: str, run_timestamp: str, db_path: str):
+    def __init__(self, script_dir: str, run_timestamp: str, db_path: str, repo: Any | None = None):
         """
         Initialize the pipeline logger.
 
@@ -24,11 +24,12 @@ class PipelineLogger:
             script_dir: Base directory for log files and results
             run_timestamp: Timestamp identifier for this run
             db_path: Path to SQLite database
+            repo: Repository to write to (default: a Repo on db_path)
         """
         self.script_dir = script_dir
         self.run_timestamp = run_timestamp
         self.db_path = db_path
-        self.repo = Repo(db_path)
+        self.repo = repo if repo is not None else Repo(db_path)
 
         # Set up log and results paths
         log_dir = os.path.join(script_dir, "logs", "current")
@@ -72,6 +73,8 @@ class PipelineLogger:
             f.write(f"\n{'=' * 80}\n")
             f.write(f"STEP {step.step_number}: {step.step_name}\n")
             f.write(f"MODEL: {step.model_used}\n")
+            if step.provider:
+                f.write(f"PROVIDER: {step.provider}\n")
             f.write(f"TIMESTAMP: {step.timestamp}\n")
             f.write(f"SUCCESS: {step.success}\n")
             f.write(f"RESPONSE:\n{step.response}\n")
@@ -86,6 +89,7 @@ class PipelineLogger:
             step.success,
             step.response,
             step.timestamp,
+            provider=step.provider,
         )
 
     def log_step_reward(self, step_number: int, report: StepRewardsReport | None) -> None:
@@ -146,6 +150,7 @@ class PipelineLogger:
                     "step_number": step.step_number,
                     "step_name": step.step_name,
                     "model_used": step.model_used,
+                    "provider": step.provider,
                     "success": bool(step.success),
                     "timestamp": step.timestamp,
                     "response": step.response,
@@ -159,6 +164,7 @@ class PipelineLogger:
             "difficulty": final_result.difficulty,
             "final_success": bool(final_result.final_success),
             "stopped_at_step": final_result.stopped_at_step,
+            "stop_reason": final_result.stop_reason,
             "differentiation_achieved": bool(final_result.differentiation_achieved),
             "student_assessment_created": bool(final_result.student_assessment_created),
             "total_attempts": final_result.total_attempts,
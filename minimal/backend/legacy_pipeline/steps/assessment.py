@@ -3,17 +3,20 @@
 import json
 import logging
 from datetime import datetime
-from typing import Any
+from functools import cached_property
 
 from analytics.rewards import StepRewardsReport, rewards_step7
+from config.tool_specs import ToolSpec
 from legacy_pipeline.config import PipelineConfig
 from legacy_pipeline.models import PipelineStep
+from legacy_pipeline.steps.base import StepBase
 from legacy_pipeline.validators.assessment_validator import AssessmentValidator
+from observability import instrument_step
 
 logger = logging.getLogger(__name__)
 
 
-class AssessmentStep:
+class AssessmentStep(StepBase):
     """Handles Step 7: Create student assessment from weak model failures."""
 
     def __init__(
@@ -24,6 +27,7 @@ class AssessmentStep:
         tools: dict,
         judge_supports_thinking: bool = False,
         config: PipelineConfig | None = None,
+        templates: dict | None = None,
     ):
         """
         Initialize the assessment creation step.
@@ -35,15 +39,18 @@ class AssessmentStep:
             tools: Tool specifications dictionary
             judge_supports_thinking: Whether the model supports thinking mode
             config: Pipeline configuration (uses default if None)
+            templates: Compiled templates from the config snapshot (compiled on demand when omitted)
         """
         self.invoker = invoker
         self.model_strong = model_strong
         self.prompts = prompts
         self.tools = tools
+        self.templates = templates or {}
         self.judge_supports_thinking = judge_supports_thinking
         self.config = config or PipelineConfig()
         self.validator = AssessmentValidator(self.config)
 
+    @instrument_step("7")
     def execute(
         self,
         question: dict,
@@ -146,7 +153,7 @@ class AssessmentStep:
         haiku_response: str,
         sonnet_response: str,
         validation_feedback: list[str] | None = None,
-    ) -> tuple[str, list[dict[str, Any]]]:
+    ) -> tuple[str, ToolSpec]:
         """
         Compose the Step 7 prompt (optionally injecting feedback from validation failures).
 
@@ -170,8 +177,8 @@ class AssessmentStep:
                 f"{feedback_lines}\n"
             )
 
-        template = self._get_prompt_template("step7_student_assessment")
-        prompt = template.format(
+        prompt = self._render_prompt(
+            "step7_student_assessment",
             haiku_failures="\n".join(f"- {failure}" for failure in haiku_failures),
             haiku_response_preview=haiku_response[:2000],
             sonnet_response_preview=sonnet_response[:1000],
@@ -187,37 +194,10 @@ class AssessmentStep:
             validation_feedback=validation_block,
         )
 
-        tools = self._get_tools("step7_student_assessment")
-        if tools:
-            difficulty_schema = tools[0].get("input_schema", {}).get("properties", {}).get("difficulty")
-            if isinstance(difficulty_schema, dict):
-                difficulty_schema["enum"] = sorted(self.config.ALLOWED_DIFFICULTIES)
-
-        return prompt, tools
-
-    def _get_prompt_template(self, step_key: str) -> str:
-        """Retrieve the prompt template string for a pipeline step."""
-        entry = self.prompts.get(step_key)
-        if isinstance(entry, dict):
-            template = entry.get("template")
-        else:
-            template = entry
-
-        if not isinstance(template, str):
-            raise KeyError(f"Prompt template missing for step '{step_key}'")
-
-        return template
+        return prompt, self._assessment_tools
 
-    def _get_tools(self, step_key: str) -> list[dict[str, Any]]:
-        """Retrieve tool specifications for a pipeline step."""
-        from copy import deepcopy
-
-        tool_entry = self.tools.get(step_key)
-
-        if tool_entry is None:
-            raise KeyError(f"Tool configuration missing for step '{step_key}'")
-
-        if isinstance(tool_entry, list):
-            return deepcopy(tool_entry)
-
-        return [deepcopy(tool_entry)]
+    @cached_property
+    def _assessment_tools(self) -> ToolSpec:
+        """Step 7 tools with the difficulty field restricted to the configured levels (built once)."""
+        tools = self._get_tools("step7_student_assessment")
+        return tools.with_property_enum("difficulty", sorted(self.config.ALLOWED_DIFFICULTIES))
@@ -0,0 +1,47 @@
+"""Shared prompt/tool lookups for pipeline step executors."""
+
+from config.templates import compile_template
+from config.tool_specs import ToolSpec, compile_tool_spec
+
+
+class StepBase:
+    """Mixin for steps that read `self.prompts` and (optionally) `self.tools`."""
+
+    prompts: dict
+    tools: dict
+    templates: dict  # step key -> CompiledTemplate from the config snapshot
+
+    def _get_prompt_template(self, step_key: str) -> str:
+        """Retrieve the prompt template string for a pipeline step."""
+        entry = self.prompts.get(step_key)
+        if isinstance(entry, dict):
+            template = entry.get("template")
+        else:
+            template = entry
+
+        if not isinstance(template, str):
+            raise KeyError(f"Prompt template missing for step '{step_key}'")
+
+        return template
+
+    def _render_prompt(self, step_key: str, **values) -> str:
+        """Render a step's prompt from the snapshot's compiled templates (no per-call parsing)."""
+        compiled = self.templates.get(step_key)
+        if compiled is None:
+            compiled = compile_template(self._get_prompt_template(step_key), step_key)
+        return compiled.render(**values)
+
+    def _get_tools(self, step_key: str) -> ToolSpec:
+        """
+        Retrieve the read-only tool specification for a pipeline step.
+
+        Precompiled specs from the config registry are returned as-is; raw
+        tools.json entries are compiled on the fly. Callers must not mutate the
+        result - build a variant (e.g. ToolSpec.with_property_enum) instead.
+        """
+        tool_entry = self.tools.get(step_key)
+
+        if tool_entry is None:
+            raise KeyError(f"Tool configuration missing for step '{step_key}'")
+
+        return compile_tool_spec(tool_entry)
@@ -2,18 +2,19 @@
 
 import logging
 from datetime import datetime
-from typing import Any
 
 from analytics.rewards import StepRewardsReport, rewards_step1
 from legacy_pipeline.models import PipelineStep
+from legacy_pipeline.steps.base import StepBase
+from observability import instrument_step
 
 logger = logging.getLogger(__name__)
 
 
-class DifficultyStep:
+class DifficultyStep(StepBase):
     """Handles Step 1: Generate difficulty categories."""
 
-    def __init__(self, invoker, model_mid: str, prompts: dict, tools: dict):
+    def __init__(self, invoker, model_mid: str, prompts: dict, tools: dict, templates: dict | None = None):
         """
         Initialize the difficulty category generation step.
 
@@ -22,12 +23,15 @@ class DifficultyStep:
             model_mid: Mid-tier model ID to use
             prompts: Prompt templates dictionary
             tools: Tool specifications dictionary
+            templates: Compiled templates from the config snapshot (compiled on demand when omitted)
         """
         self.invoker = invoker
         self.model_mid = model_mid
         self.prompts = prompts
         self.tools = tools
+        self.templates = templates or {}
 
+    @instrument_step("1")
     def execute(self, topic: str) -> tuple[bool, dict[str, list[str]], PipelineStep, StepRewardsReport | None]:
         """
         Execute Step 1: Generate difficulty categories.
@@ -40,8 +44,7 @@ class DifficultyStep:
         """
         logger.info(f"Step 1: Generating difficulty categories for topic: {topic}")
 
-        template = self._get_prompt_template("step1_difficulty_categories")
-        prompt = template.format(topic=topic)
+        prompt = self._render_prompt("step1_difficulty_categories", topic=topic)
         tools = self._get_tools("step1_difficulty_categories")
 
         response = self.invoker.tools(self.model_mid, prompt, tools)
@@ -82,30 +85,3 @@ class DifficultyStep:
             categories = {}
 
         return step.success, categories, step, reward_report
-
-    def _get_prompt_template(self, step_key: str) -> str:
-        """Retrieve the prompt template string for a pipeline step."""
-        entry = self.prompts.get(step_key)
-        if isinstance(entry, dict):
-            template = entry.get("template")
-        else:
-            template = entry
-
-        if not isinstance(template, str):
-            raise KeyError(f"Prompt template missing for step '{step_key}'")
-
-        return template
-
-    def _get_tools(self, step_key: str) -> list[dict[str, Any]]:
-        """Retrieve tool specifications for a pipeline step."""
-        from copy import deepcopy
-
-        tool_entry = self.tools.get(step_key)
-
-        if tool_entry is None:
-            raise KeyError(f"Tool configuration missing for step '{step_key}'")
-
-        if isinstance(tool_entry, list):
-            return deepcopy(tool_entry)
-
-        return [deepcopy(tool_entry)]
@@ -4,16 +4,21 @@ import logging
 from datetime import datetime
 from typing import Any
 
+from analytics.catalog_kb import CATALOG_KB_MODEL
 from analytics.rewards import StepRewardsReport, rewards_step2
 from legacy_pipeline.models import PipelineStep
+from legacy_pipeline.steps.base import StepBase
+from observability import instrument_step
 
 logger = logging.getLogger(__name__)
 
 
-class ErrorCatalogStep:
+class ErrorCatalogStep(StepBase):
     """Handles Step 2: Generate conceptual error catalog."""
 
-    def __init__(self, invoker, model_mid: str, prompts: dict, tools: dict):
+    def __init__(
+        self, invoker, model_mid: str, prompts: dict, tools: dict, knowledge_base=None, templates: dict | None = None
+    ):
         """
         Initialize the error catalog generation step.
 
@@ -22,12 +27,17 @@ class ErrorCatalogStep:
             model_mid: Mid-tier model ID to use
             prompts: Prompt templates dictionary
             tools: Tool specifications dictionary
+            knowledge_base: Optional ErrorCatalogKB; proven past mistakes replace the model call
+            templates: Compiled templates from the config snapshot (compiled on demand when omitted)
         """
         self.invoker = invoker
         self.model_mid = model_mid
         self.prompts = prompts
         self.tools = tools
+        self.templates = templates or {}
+        self.knowledge_base = knowledge_base
 
+    @instrument_step("2")
     def execute(
         self, topic: str, subtopic: str, difficulty: str
     ) -> tuple[bool, list[dict], PipelineStep, StepRewardsReport | None]:
@@ -44,8 +54,21 @@ class ErrorCatalogStep:
         """
         logger.info(f"Step 2: Generating error catalog for {topic} - {subtopic} ({difficulty})")
 
-        template = self._get_prompt_template("step2_error_catalog")
-        prompt = template.format(topic=topic, difficulty=difficulty, subtopic=subtopic)
+        proven = self._proven_catalog(topic, subtopic)
+        if proven is not None:
+            logger.info(f"Step 2: Reusing {len(proven)} proven mistakes from the error-catalog knowledge base")
+            step = PipelineStep(
+                2,
+                "Generate conceptual error catalog",
+                CATALOG_KB_MODEL,
+                True,
+                str({"errors": proven}),
+                datetime.now().isoformat(),
+                provider=CATALOG_KB_MODEL,
+            )
+            return True, proven, step, rewards_step2(proven)
+
+        prompt = self._render_prompt("step2_error_catalog", topic=topic, difficulty=difficulty, subtopic=subtopic)
         tools = self._get_tools("step2_error_catalog")
 
         response = self.invoker.tools(self.model_mid, prompt, tools)
@@ -86,29 +109,12 @@ class ErrorCatalogStep:
 
         return step.success, errors, step, reward_report
 
-    def _get_prompt_template(self, step_key: str) -> str:
-        """Retrieve the prompt template string for a pipeline step."""
-        entry = self.prompts.get(step_key)
-        if isinstance(entry, dict):
-            template = entry.get("template")
-        else:
-            template = entry
-
-        if not isinstance(template, str):
-            raise KeyError(f"Prompt template missing for step '{step_key}'")
-
-        return template
-
-    def _get_tools(self, step_key: str) -> list[dict[str, Any]]:
-        """Retrieve tool specifications for a pipeline step."""
-        from copy import deepcopy
-
-        tool_entry = self.tools.get(step_key)
-
-        if tool_entry is None:
-            raise KeyError(f"Tool configuration missing for step '{step_key}'")
-
-        if isinstance(tool_entry, list):
-            return deepcopy(tool_entry)
-
-        return [deepcopy(tool_entry)]
+    def _proven_catalog(self, topic: str, subtopic: str) -> list[dict[str, Any]] | None:
+        """Catalog assembled from the knowledge base, or None to ask the model."""
+        if self.knowledge_base is None:
+            return None
+        try:
+            return self.knowledge_base.proven_catalog(topic, subtopic)
+        except Exception as exc:
+            logger.warning(f"Step 2: error-catalog knowledge base lookup failed, asking the model: {exc}")
+            return None
@@ -7,14 +7,16 @@ from typing import Any
 
 from analytics.rewards import StepRewardsReport, rewards_step6
 from legacy_pipeline.models import PipelineStep
+from legacy_pipeline.steps.base import StepBase
+from observability import instrument_step
 
 logger = logging.getLogger(__name__)
 
 
-class JudgmentStep:
+class JudgmentStep(StepBase):
     """Handles Step 6: Judge if differentiation was achieved between implementations."""
 
-    def __init__(self, invoker, model_strong: str, prompts: dict, tools: dict):
+    def __init__(self, invoker, model_strong: str, prompts: dict, tools: dict, templates: dict | None = None):
         """
         Initialize the judgment step.
 
@@ -23,12 +25,15 @@ class JudgmentStep:
             model_strong: Strong model ID to use
             prompts: Prompt templates dictionary
             tools: Tool specifications dictionary
+            templates: Compiled templates from the config snapshot (compiled on demand when omitted)
         """
         self.invoker = invoker
         self.model_strong = model_strong
         self.prompts = prompts
         self.tools = tools
+        self.templates = templates or {}
 
+    @instrument_step("6")
     def execute(
         self,
         question: dict,
@@ -59,8 +64,8 @@ class JudgmentStep:
                 f"   Code pattern: {error.get('code_pattern', error.get('match_hint', 'Not specified'))}"
             )
 
-        template = self._get_prompt_template("step6_judge_responses")
-        prompt = template.format(
+        prompt = self._render_prompt(
+            "step6_judge_responses",
             question_text=question.get("question_text", ""),
             context=question.get("context", ""),
             requirements=", ".join(question.get("requirements", [])),
@@ -134,30 +139,3 @@ class JudgmentStep:
             step,
             reward_report,
         )
-
-    def _get_prompt_template(self, step_key: str) -> str:
-        """Retrieve the prompt template string for a pipeline step."""
-        entry = self.prompts.get(step_key)
-        if isinstance(entry, dict):
-            template = entry.get("template")
-        else:
-            template = entry
-
-        if not isinstance(template, str):
-            raise KeyError(f"Prompt template missing for step '{step_key}'")
-
-        return template
-
-    def _get_tools(self, step_key: str) -> list[dict[str, Any]]:
-        """Retrieve tool specifications for a pipeline step."""
-        from copy import deepcopy
-
-        tool_entry = self.tools.get(step_key)
-
-        if tool_entry is None:
-            raise KeyError(f"Tool configuration missing for step '{step_key}'")
-
-        if isinstance(tool_entry, list):
-            return deepcopy(tool_entry)
-
-        return [deepcopy(tool_entry)]
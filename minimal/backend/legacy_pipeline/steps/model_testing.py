@@ -5,14 +5,16 @@ from datetime import datetime
 
 from analytics.rewards import StepRewardsReport, rewards_step45
 from legacy_pipeline.models import PipelineStep
+from legacy_pipeline.steps.base import StepBase
+from observability import instrument_step
 
 logger = logging.getLogger(__name__)
 
 
-class ModelTestingStep:
+class ModelTestingStep(StepBase):
     """Handles Steps 4-5: Test mid-tier and weak-tier model implementations."""
 
-    def __init__(self, invoker, model_mid: str, model_weak: str, prompts: dict):
+    def __init__(self, invoker, model_mid: str, model_weak: str, prompts: dict, templates: dict | None = None):
         """
         Initialize the model testing step.
 
@@ -21,12 +23,15 @@ class ModelTestingStep:
             model_mid: Mid-tier model ID (Sonnet/Haiku 3.5)
             model_weak: Weak-tier model ID (Haiku 3)
             prompts: Prompt templates dictionary
+            templates: Compiled templates from the config snapshot (compiled on demand when omitted)
         """
         self.invoker = invoker
         self.model_mid = model_mid
         self.model_weak = model_weak
         self.prompts = prompts
+        self.templates = templates or {}
 
+    @instrument_step("4")
     def execute_step4_sonnet(self, question: dict) -> tuple[bool, str, PipelineStep, StepRewardsReport | None]:
         """
         Execute Step 4: Test Sonnet (mid-tier) implementation response.
@@ -39,9 +44,9 @@ class ModelTestingStep:
         """
         logger.info("Step 4: Testing Sonnet (mid-tier) implementation")
 
-        template = self._get_prompt_template("step4_test_sonnet")
         requirements = question.get("requirements", []) or []
-        prompt = template.format(
+        prompt = self._render_prompt(
+            "step4_test_sonnet",
             context=question.get("context", "the domain"),
             artifact=question.get("artifact_type", "artifact"),
             title=question.get("title", "Implementation Challenge"),
@@ -70,6 +75,7 @@ class ModelTestingStep:
 
         return True, response, step, reward_report
 
+    @instrument_step("5")
     def execute_step5_haiku(self, question: dict) -> tuple[bool, str, PipelineStep, StepRewardsReport | None]:
         """
         Execute Step 5: Test Haiku (weak-tier) implementation response.
@@ -82,9 +88,9 @@ class ModelTestingStep:
         """
         logger.info("Step 5: Testing Haiku (weak-tier) implementation")
 
-        template = self._get_prompt_template("step5_test_haiku")
         requirements = question.get("requirements", []) or []
-        prompt = template.format(
+        prompt = self._render_prompt(
+            "step5_test_haiku",
             context=question.get("context", "the domain"),
             artifact=question.get("artifact_type", "artifact"),
             title=question.get("title", "Implementation Challenge"),
@@ -112,16 +118,3 @@ class ModelTestingStep:
         reward_report = rewards_step45(response, requirements)
 
         return True, response, step, reward_report
-
-    def _get_prompt_template(self, step_key: str) -> str:
-        """Retrieve the prompt template string for a pipeline step."""
-        entry = self.prompts.get(step_key)
-        if isinstance(entry, dict):
-            template = entry.get("template")
-        else:
-            template = entry
-
-        if not isinstance(template, str):
-            raise KeyError(f"Prompt template missing for step '{step_key}'")
-
-        return template
@@ -6,11 +6,13 @@ from typing import Any
 
 from analytics.rewards import StepRewardsReport, rewards_step3
 from legacy_pipeline.models import PipelineStep
+from legacy_pipeline.steps.base import StepBase
+from observability import instrument_step
 
 logger = logging.getLogger(__name__)
 
 
-class QuestionGenerationStep:
+class QuestionGenerationStep(StepBase):
     """Handles Step 3: Generate strategic implementation challenge questions."""
 
     def __init__(
@@ -20,6 +22,7 @@ class QuestionGenerationStep:
         prompts: dict,
         tools: dict,
         judge_supports_thinking: bool = False,
+        templates: dict | None = None,
     ):
         """
         Initialize the question generation step.
@@ -30,13 +33,16 @@ class QuestionGenerationStep:
             prompts: Prompt templates dictionary
             tools: Tool specifications dictionary
             judge_supports_thinking: Whether the model supports thinking mode
+            templates: Compiled templates from the config snapshot (compiled on demand when omitted)
         """
         self.invoker = invoker
         self.model_strong = model_strong
         self.prompts = prompts
         self.tools = tools
+        self.templates = templates or {}
         self.judge_supports_thinking = judge_supports_thinking
 
+    @instrument_step("3")
     def execute(
         self,
         topic: str,
@@ -62,8 +68,6 @@ class QuestionGenerationStep:
         """
         logger.info(f"Step 3: Generating strategic question for {topic} - {subtopic} ({difficulty})")
 
-        template = self._get_prompt_template("step3_strategic_question")
-
         failure_feedback = ""
         if previous_failures:
             failure_feedback = "\nVALIDATION FEEDBACK (resolve before returning a new challenge):\n" + "\n".join(
@@ -76,7 +80,8 @@ class QuestionGenerationStep:
             if isinstance(name, str) and name.strip():
                 catalog_names.append(f"- {name.strip()}")
 
-        prompt = template.format(
+        prompt = self._render_prompt(
+            "step3_strategic_question",
             topic=topic,
             subtopic=subtopic,
             difficulty=difficulty,
@@ -91,7 +96,6 @@ class QuestionGenerationStep:
             prompt,
             tools,
             use_thinking=use_thinking and self.judge_supports_thinking,
-            thinking_budget=2048,
         )
         step = PipelineStep(
             3,
@@ -149,30 +153,3 @@ class QuestionGenerationStep:
             question = {}
 
         return step.success, question, step, reward_report
-
-    def _get_prompt_template(self, step_key: str) -> str:
-        """Retrieve the prompt template string for a pipeline step."""
-        entry = self.prompts.get(step_key)
-        if isinstance(entry, dict):
-            template = entry.get("template")
-        else:
-            template = entry
-
-        if not isinstance(template, str):
-            raise KeyError(f"Prompt template missing for step '{step_key}'")
-
-        return template
-
-    def _get_tools(self, step_key: str) -> list[dict[str, Any]]:
-        """Retrieve tool specifications for a pipeline step."""
-        from copy import deepcopy
-
-        tool_entry = self.tools.get(step_key)
-
-        if tool_entry is None:
-            raise KeyError(f"Tool configuration missing for step '{step_key}'")
-
-        if isinstance(tool_entry, list):
-            return deepcopy(tool_entry)
-
-        return [deepcopy(tool_entry)]
@@ -2,9 +2,9 @@
 
 import json
 import logging
-import re
 from typing import Any
 
+from analytics.spans import scan_spans
 from legacy_pipeline.config import PipelineConfig
 
 logger = logging.getLogger(__name__)
@@ -104,16 +104,16 @@ class AssessmentValidator:
                 f"{self.config.MAX_ERRORS} entries (found {len(errors_list)})."
             )
 
-        # Validate error spans in content
-        joined_content = "\n".join(content_lines)
-        marked_spans = re.findall(r"<<([^<>]+)>>", joined_content)
+        # Validate error spans in content (one pass; the scan is shared with rewards_step7)
+        span_scan = scan_spans(content_lines)
 
-        if not marked_spans:
+        if not span_scan.spans:
             errors.append("No << >> error spans were found in the content.")
 
         # Ensure raw delimiter counts are balanced
-        if joined_content.count("<<") != joined_content.count(">>"):
-            errors.append("Unbalanced number of << and >> delimiters in the content.")
+        if not span_scan.balanced:
+            detail = f" ({'; '.join(span_scan.issues)})" if span_scan.issues else ""
+            errors.append(f"Unbalanced number of << and >> delimiters in the content{detail}.")
 
         # Validate individual error entries
         sanitized_errors = []
@@ -139,11 +139,11 @@ class AssessmentValidator:
                     f"{self.config.MAX_ERROR_SPAN} characters (found {len(error_id)})."
                 )
 
-            occurrences = joined_content.count(f"<<{error_id}>>")
+            occurrences = span_scan.occurrences(error_id)
             if occurrences != 1:
                 errors.append(f"Error id '{error_id}' must appear exactly once in the content; found {occurrences}.")
 
-            if error_id not in marked_spans:
+            if occurrences == 0:
                 errors.append(f"Error id '{error_id}' is not wrapped in << >> within the content.")
 
             if not isinstance(description, str) or not description.strip():
@@ -157,9 +157,9 @@ class AssessmentValidator:
             sanitized_errors.append({"id": error_id, "description": description})
 
         # Check span count matches error count
-        if marked_spans and errors_list and len(marked_spans) != len(errors_list):
+        if span_scan.spans and errors_list and len(span_scan.spans) != len(errors_list):
             errors.append(
-                f"Number of marked spans ({len(marked_spans)}) does not match "
+                f"Number of marked spans ({len(span_scan.spans)}) does not match "
                 f"number of error entries ({len(errors_list)})."
             )
 
@@ -2,7 +2,8 @@
 """
 Load pipeline results from database to dev mode demo assessments.
 
-Extracts data by timestamp and topic combinations from the database.
+Extracts data by timestamp and topic combinations from the database and
+appends them to the sharded demo export (see persistence/demo_shards.py).
 """
 
 import json
@@ -10,6 +11,9 @@ import sqlite3
 import sys
 from pathlib import Path
 
+from analytics.dedup import DEFAULT_INDEX_PATH, DedupIndex
+from persistence.demo_shards import DEFAULT_EXPORT_DIR, DemoShardStore, pair_steps
+
 
 def connect_to_database(db_path: str) -> sqlite3.Connection:
     """Connect to the SQLite database."""
@@ -31,9 +35,11 @@ def get_pipeline_runs_by_topics(db_path: str, topics: list[str], run_timestamp:
     conn = connect_to_database(db_path)
 
     try:
-        # Build query to get all relevant data for the topics
+        # Build query to get all relevant data for the topics (values are always bound parameters)
+        params = list(topics)
         if run_timestamp:
-            timestamp_filter = f"AND run_timestamp = '{run_timestamp}'"
+            timestamp_filter = "AND run_timestamp = ?"
+            params.append(run_timestamp)
         else:
             timestamp_filter = ""
 
@@ -52,7 +58,7 @@ def get_pipeline_runs_by_topics(db_path: str, topics: list[str], run_timestamp:
         ORDER BY run_timestamp DESC, step_number ASC
         """
 
-        cursor = conn.execute(query, topics)
+        cursor = conn.execute(query, params)
         rows = cursor.fetchall()
 
         # Group data by run_timestamp and topic
@@ -203,111 +209,28 @@ def load_assessments_from_database(topics: list[str], db_path: str = None, run_t
     return assessments, all_pipeline_steps
 
 
-def load_existing_demo_data(output_file: str) -> tuple[list[dict], list[dict]]:
-    """Load existing demo data from file if it exists."""
+def export_demo_data(
+    assessments: list[dict], pipeline_steps: list[dict], export_dir: str | Path = DEFAULT_EXPORT_DIR, deduplicate: bool = True
+) -> tuple[list[str], list[str]]:
+    """
+    Append assessments to the sharded demo export (one JSON shard each + manifest.jsonl).
+
+    Only the new shards are written; runs that were already exported and, with
+    deduplicate, near-duplicates of exported assessments are skipped.
+    """
+    dedup_index = DedupIndex(DEFAULT_INDEX_PATH) if deduplicate else None
     try:
-        if not Path(output_file).exists():
-            return [], []
-
-        # Read the existing file and extract data
-        with open(output_file) as f:
-            content = f.read()
-
-        # Simple parsing to extract existing assessments and pipeline steps
-        existing_assessments = []
-        existing_pipeline_steps = []
-
-        # Look for existing assessments array
-        if 'export const demoAssessments' in content:
-            start_marker = 'export const demoAssessments = '
-            start_idx = content.find(start_marker)
-            if start_idx != -1:
-                start_idx += len(start_marker)
-                # Find the end of the array (next semicolon)
-                bracket_count = 0
-                end_idx = start_idx
-                for i, char in enumerate(content[start_idx:], start_idx):
-                    if char == '[':
-                        bracket_count += 1
-                    elif char == ']':
-                        bracket_count -= 1
-                        if bracket_count == 0:
-                            end_idx = i + 1
-                            break
-
-                assessments_str = content[start_idx:end_idx]
-                existing_assessments = json.loads(assessments_str)
-
-        # Look for existing pipeline steps array
-        if 'export const demoPipelineSteps' in content:
-            start_marker = 'export const demoPipelineSteps = '
-            start_idx = content.find(start_marker)
-            if start_idx != -1:
-                start_idx += len(start_marker)
-                # Find the end of the array (next semicolon)
-                bracket_count = 0
-                end_idx = start_idx
-                for i, char in enumerate(content[start_idx:], start_idx):
-                    if char == '[':
-                        bracket_count += 1
-                    elif char == ']':
-                        bracket_count -= 1
-                        if bracket_count == 0:
-                            end_idx = i + 1
-                            break
-
-                pipeline_steps_str = content[start_idx:end_idx]
-                existing_pipeline_steps = json.loads(pipeline_steps_str)
-
-        return existing_assessments, existing_pipeline_steps
-
-    except Exception as e:
-        print(f"  ⚠️  Could not read existing demo data: {e}")
-        return [], []
-
-
-def write_demo_data(assessments: list[dict], pipeline_steps: list[dict], output_file: str):
-    """Append demo data to JavaScript file."""
-    # Load existing data first
-    existing_assessments, existing_pipeline_steps = load_existing_demo_data(output_file)
-
-    # Get the next available IDs for new assessments
-    next_assessment_id = len(existing_assessments) + 1
-    next_step_id = len(existing_pipeline_steps) + 1
-
-    # Update IDs for new assessments to avoid conflicts
-    for assessment in assessments:
-        # Update the ID to be unique
-        old_id = assessment['id']
-        new_id = f'demo-assessment-{next_assessment_id}'
-        assessment['id'] = new_id
-        next_assessment_id += 1
-
-        # Update pipeline step IDs to reference the new assessment ID
-        # Extract the original index from the old ID and use it to find matching steps
-        old_index = old_id.replace('demo-assessment-', '')
-        for step in pipeline_steps:
-            if step['_id'].startswith(f'demo-{old_index}-step-'):
-                step['_id'] = f'demo-{next_assessment_id - 1}-step-' + step['_id'].split('-')[-1]
-
-    # Combine existing and new data
-    all_assessments = existing_assessments + assessments
-    all_pipeline_steps = existing_pipeline_steps + pipeline_steps
-
-    # Write the combined data
-    js_content = "// demoData.dev.js\n"
-    js_content += "// Dev mode demo assessments with full 7-step pipeline data\n"
-    js_content += f"// Generated from database: {len(all_assessments)} assessments (total)\n\n"
-    js_content += f"export const demoAssessments = {json.dumps(all_assessments, indent=2)};\n\n"
-    js_content += f"export const demoPipelineSteps = {json.dumps(all_pipeline_steps, indent=2)};\n\n"
-    js_content += "export default demoAssessments;\n"
-
-    with open(output_file, 'w') as f:
-        f.write(js_content)
-
-    print(f"\n✅ Appended {len(assessments)} new assessments and {len(pipeline_steps)} new pipeline steps to {output_file}")
-    print(f"   Total assessments: {len(all_assessments)}, Total pipeline steps: {len(all_pipeline_steps)}")
-    print("   These will appear as options in Dev + Demo mode with full pipeline visualization")
+        store = DemoShardStore(export_dir, dedup_index=dedup_index)
+        added, skipped = store.append(pair_steps(assessments, pipeline_steps))
+    finally:
+        if dedup_index is not None:
+            dedup_index.close()
+
+    for entry_id in skipped:
+        print(f"  ⚠️  Skipped (already exported or near-duplicate): {entry_id}")
+    print(f"\n✅ Exported {len(added)} new assessments to {export_dir}")
+    print(f"   Manifest: {Path(export_dir) / 'manifest.jsonl'} (loaded lazily by Dev + Demo mode)")
+    return added, skipped
 
 
 def main():
@@ -316,17 +239,22 @@ def main():
         print("\nExamples:")
         print("  python load_from_database.py 'LangChain' 'Prompt Engineering'")
         print("  python load_from_database.py 'LangChain' 'Prompt Engineering' --timestamp 20251012_213045")
+        print("  python load_from_database.py 'LangChain' --keep-duplicates")
         sys.exit(1)
 
     # Parse arguments
     topics = []
     run_timestamp = None
+    deduplicate = True
 
     i = 1
     while i < len(sys.argv):
         if sys.argv[i] == '--timestamp' and i + 1 < len(sys.argv):
             run_timestamp = sys.argv[i + 1]
             i += 2
+        elif sys.argv[i] == '--keep-duplicates':
+            deduplicate = False
+            i += 1
         else:
             topics.append(sys.argv[i])
             i += 1
@@ -338,9 +266,8 @@ def main():
     # Load data from database
     assessments, pipeline_steps = load_assessments_from_database(topics, run_timestamp=run_timestamp)
 
-    # Write to frontend
-    output_file = Path(__file__).parent.parent / 'frontend' / 'src' / 'demoData.dev.js'
-    write_demo_data(assessments, pipeline_steps, str(output_file))
+    # Write shards for the frontend
+    export_demo_data(assessments, pipeline_steps, deduplicate=deduplicate)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,18 @@
+"""
+Observability helpers (metrics registry, tracing, step instrumentation).
+"""
+
+from .instrument import current_step, instrument_step
+from .metrics import REGISTRY, render_metrics
+from .tracing import configure_tracing, current_span, span, traced
+
+__all__ = [
+    "REGISTRY",
+    "configure_tracing",
+    "current_span",
+    "current_step",
+    "instrument_step",
+    "render_metrics",
+    "span",
+    "traced",
+]
@@ -0,0 +1,69 @@
+"""
+Decorators that attach observability to pipeline step executors.
+"""
+
+from __future__ import annotations
+
+import functools
+from collections.abc import Callable
+from contextvars import ContextVar
+from typing import Any, TypeVar
+
+from observability.metrics import STEP_DURATION, STEP_RESULTS
+from observability.tracing import span
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+_current_step: ContextVar[str | None] = ContextVar("aqumen_current_step", default=None)
+
+
+def current_step() -> str | None:
+    """Label of the step executor currently running in this context (e.g. "3"), if any."""
+    return _current_step.get()
+
+
+def _find_pipeline_step(result: Any) -> Any | None:
+    """Locate the PipelineStep inside a step executor's return tuple."""
+    candidates = result if isinstance(result, tuple) else (result,)
+    for item in candidates:
+        if hasattr(item, "step_number") and hasattr(item, "success"):
+            return item
+    return None
+
+
+def instrument_step(step: str) -> Callable[[F], F]:
+    """
+    Time a step executor, count its outcome and wrap it in a "step" span.
+
+    While the executor runs, current_step() returns its label so the runtime
+    layer can apply per-step policies (caching, token limits).
+
+    Args:
+        step: Step label used for metrics (e.g. "1", "4", "7")
+    """
+
+    def decorator(func: F) -> F:
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            previous_step = _current_step.get()
+            _current_step.set(step)
+            with span("step", step=step) as step_span, STEP_DURATION.time(step=step):
+                try:
+                    result = func(*args, **kwargs)
+                except Exception:
+                    STEP_RESULTS.inc(step=step, outcome="exception")
+                    raise
+                finally:
+                    _current_step.set(previous_step)
+
+                pipeline_step = _find_pipeline_step(result)
+                outcome = "success" if pipeline_step is not None and pipeline_step.success else "failure"
+                step_span.set_attributes(outcome=outcome)
+                if pipeline_step is not None:
+                    step_span.set_attributes(model=getattr(pipeline_step, "model_used", ""))
+            STEP_RESULTS.inc(step=step, outcome=outcome)
+            return result
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
@@ -0,0 +1,387 @@
+"""
+Lightweight in-process metrics registry with Prometheus text exposition.
+
+Counters, gauges and histograms are keyed by label values and guarded by a
+single lock per metric, which is plenty for the call rates this service sees.
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+import time
+from contextlib import ContextDecorator
+from typing import Any
+
+# Model calls routinely take tens of seconds (and minutes when throttled), so the
+# default buckets extend well past the usual Prometheus web-latency range.
+DEFAULT_BUCKETS: tuple[float, ...] = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0,
+)
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{name}="{_escape_label(value)}"' for name, value in zip(names, values, strict=True)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    """Shared label handling for all metric types."""
+
+    type_name = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict[str, Any]) -> tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(
+                f"Metric '{self.name}' expects labels {list(self.labelnames)}, got {sorted(labels)}"
+            )
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def collect(self) -> list[str]:  # pragma: no cover - implemented by subclasses
+        raise NotImplementedError
+
+    def expose(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        lines.extend(self.collect())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """Monotonically increasing value per label set."""
+
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: Any) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def collect(self) -> list[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(val)}" for key, val in items]
+
+
+class Gauge(_Metric):
+    """Value that can go up and down (connections, limits, queue depth)."""
+
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def set(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: Any) -> None:
+        self.inc(-amount, **labels)
+
+    def value(self, **labels: Any) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def collect(self) -> list[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(val)}" for key, val in items]
+
+
+class _HistogramTimer(ContextDecorator):
+    """Times a block (or decorated function) into a histogram."""
+
+    def __init__(self, histogram: Histogram, labels: dict[str, Any]):
+        self._histogram = histogram
+        self._labels = labels
+        self._starts = threading.local()
+
+    def __enter__(self) -> _HistogramTimer:
+        stack = getattr(self._starts, "stack", None)
+        if stack is None:
+            stack = self._starts.stack = []
+        stack.append(time.perf_counter())
+        return self
+
+    def __exit__(self, *exc_info: Any) -> bool:
+        start = self._starts.stack.pop()
+        self._histogram.observe(time.perf_counter() - start, **self._labels)
+        return False
+
+
+class Histogram(_Metric):
+    """Cumulative bucketed distribution with running sum and count."""
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._counts: dict[tuple[str, ...], list[int]] = {}
+        self._sums: dict[tuple[str, ...], float] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            counts = self._counts.get(key)
+            if counts is None:
+                counts = self._counts[key] = [0] * (len(self.buckets) + 1)
+                self._sums[key] = 0.0
+            for idx, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[idx] += 1
+                    break
+            else:
+                counts[-1] += 1
+            self._sums[key] += value
+
+    def time(self, **labels: Any) -> _HistogramTimer:
+        """Return a context manager / decorator that observes elapsed seconds."""
+        self._key(labels)  # validate eagerly so typos fail at import time
+        return _HistogramTimer(self, labels)
+
+    def snapshot(self, **labels: Any) -> tuple[int, float]:
+        """Return (count, sum) for a label set."""
+        key = self._key(labels)
+        with self._lock:
+            counts = self._counts.get(key)
+            if counts is None:
+                return 0, 0.0
+            return sum(counts), self._sums[key]
+
+    def collect(self) -> list[str]:
+        with self._lock:
+            items = [(key, list(counts), self._sums[key]) for key, counts in sorted(self._counts.items())]
+        lines: list[str] = []
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts, strict=True):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Holds named metrics; registering an existing name returns the original."""
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, cls: type[_Metric], name: str, documentation: str, labelnames: tuple[str, ...], **kwargs):
+        with self._lock:
+            existing = self._metrics.get(name)
+            if existing is not None:
+                if not isinstance(existing, cls) or existing.labelnames != tuple(labelnames):
+                    raise ValueError(f"Metric '{name}' already registered with a different type or labels")
+                return existing
+            metric = cls(name, documentation, tuple(labelnames), **kwargs)
+            self._metrics[name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Gauge:
+        return self._register(Gauge, name, documentation, labelnames)
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def render(self) -> str:
+        """Render every registered metric in Prometheus text format (0.0.4)."""
+        with self._lock:
+            metrics = [self._metrics[name] for name in sorted(self._metrics)]
+        return "\n".join(metric.expose() for metric in metrics) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+# Pipeline-level metrics
+STEP_DURATION = REGISTRY.histogram(
+    "aqumen_step_duration_seconds", "Wall-clock time spent executing a pipeline step.", ("step",)
+)
+STEP_RESULTS = REGISTRY.counter(
+    "aqumen_step_results_total", "Pipeline step executions by outcome.", ("step", "outcome")
+)
+DIFFERENTIATION_ATTEMPTS = REGISTRY.counter(
+    "aqumen_differentiation_attempts_total",
+    "Step 6 differentiation outcomes per attempt number.",
+    ("attempt", "outcome"),
+)
+PIPELINE_RUNS = REGISTRY.counter(
+    "aqumen_pipeline_runs_total", "Completed pipeline runs by the step they stopped at.", ("stopped_at_step", "outcome")
+)
+
+# Model invocation metrics
+MODEL_CALL_DURATION = REGISTRY.histogram(
+    "aqumen_model_call_duration_seconds",
+    "Latency of a single successful model invocation.",
+    ("provider", "model"),
+)
+MODEL_CALLS = REGISTRY.counter(
+    "aqumen_model_calls_total", "Model invocations by final outcome.", ("provider", "model", "outcome")
+)
+MODEL_RETRIES = REGISTRY.counter(
+    "aqumen_model_retries_total", "Retried model invocations by error reason.", ("provider", "model", "reason")
+)
+MODEL_THROTTLES = REGISTRY.counter(
+    "aqumen_model_throttles_total", "Throttling / rate-limit responses from the provider.", ("provider", "model")
+)
+MODEL_TRUNCATIONS = REGISTRY.counter(
+    "aqumen_model_truncations_total", "Responses cut off at max_tokens.", ("provider", "model")
+)
+MODEL_TOKENS = REGISTRY.counter(
+    "aqumen_model_tokens_total", "Tokens consumed per model and direction.", ("provider", "model", "direction")
+)
+MODEL_COST = REGISTRY.counter(
+    "aqumen_model_cost_usd_total", "Estimated spend per model in USD.", ("provider", "model")
+)
+MODEL_CALLS_IN_FLIGHT = REGISTRY.gauge(
+    "aqumen_model_calls_in_flight", "Model requests currently holding a concurrency slot."
+)
+MODEL_CONCURRENCY_LIMIT = REGISTRY.gauge(
+    "aqumen_model_concurrency_limit", "Adaptive (AIMD) limit on concurrent requests per model.", ("model",)
+)
+RESPONSE_CACHE_LOOKUPS = REGISTRY.counter(
+    "aqumen_response_cache_lookups_total", "Model response cache lookups by result.", ("model", "result")
+)
+DEDUP_CHECKS = REGISTRY.counter(
+    "aqumen_dedup_checks_total", "Near-duplicate index lookups by kind and result.", ("kind", "result")
+)
+
+# Provider routing metrics
+CIRCUIT_BREAKER_STATE = REGISTRY.gauge(
+    "aqumen_circuit_breaker_state",
+    "Circuit breaker state per provider/model (0=closed, 1=half-open, 2=open).",
+    ("provider", "model"),
+)
+PROVIDER_FAILOVERS = REGISTRY.counter(
+    "aqumen_provider_failovers_total",
+    "Calls served by a fallback provider, by why the preferred route was skipped.",
+    ("from_provider", "to_provider", "reason"),
+)
+HEDGED_CALLS = REGISTRY.counter(
+    "aqumen_hedged_calls_total", "Hedged model calls by which request answered first.", ("model", "winner")
+)
+HEDGE_BUDGET_EXHAUSTED = REGISTRY.counter(
+    "aqumen_hedge_budget_exhausted_total", "Slow calls not hedged because the run's hedge budget was spent.", ("model",)
+)
+
+# Model-call scheduler metrics
+SCHEDULER_WAIT = REGISTRY.histogram(
+    "aqumen_scheduler_wait_seconds", "Time a model call queued in the scheduler before dispatch.", ("priority",)
+)
+SCHEDULER_QUEUED = REGISTRY.gauge(
+    "aqumen_scheduler_queued", "Model calls waiting in the scheduler per priority class.", ("priority",)
+)
+SCHEDULER_PREEMPTIONS = REGISTRY.counter(
+    "aqumen_scheduler_preemptions_total",
+    "Calls dispatched ahead of queued lower-priority calls.",
+    ("priority",),
+)
+
+# Batch runner metrics
+BATCH_ITEMS = REGISTRY.counter(
+    "aqumen_batch_items_total", "Batch manifest items finished, by outcome.", ("outcome",)
+)
+BATCH_WAVE_RECORDS = REGISTRY.counter(
+    "aqumen_batch_wave_records_total", "Model calls sent in batch waves, by how they ran (batch or on_demand).", ("mode",)
+)
+
+# Persistence metrics
+DB_WRITE_DURATION = REGISTRY.histogram(
+    "aqumen_db_write_duration_seconds", "Latency of Repo write operations.", ("operation",)
+)
+
+# Output sizing metrics
+TOKEN_LIMITS = REGISTRY.gauge(
+    "aqumen_token_limit",
+    "Latest adaptive max_tokens / thinking budget chosen per step and model.",
+    ("step", "model", "kind"),
+)
+
+# Budget governor metrics
+BUDGET_SPEND_USD = REGISTRY.gauge(
+    "aqumen_budget_spend_usd", "Model spend counted by the budget governor in the current period.", ("scope",)
+)
+BUDGET_ACTIONS = REGISTRY.counter(
+    "aqumen_budget_actions_total",
+    "Budget governor interventions (skip_thinking, switch_tier, cap_attempts, refuse_call, refuse_run).",
+    ("action",),
+)
+BUDGET_AVOIDED_USD = REGISTRY.counter(
+    "aqumen_budget_avoided_usd_total", "Estimated spend avoided by budget governor interventions.", ("action",)
+)
+
+# Readiness probe metrics
+DEPENDENCY_PROBE_DURATION = REGISTRY.histogram(
+    "aqumen_dependency_probe_seconds", "Latency of readiness probes per dependency.", ("dependency",)
+)
+DEPENDENCY_PROBES = REGISTRY.counter(
+    "aqumen_dependency_probes_total", "Readiness probes per dependency and outcome.", ("dependency", "outcome")
+)
+DEPENDENCY_UP = REGISTRY.gauge(
+    "aqumen_dependency_up", "Whether a dependency's latest readiness probe passed (1) or failed (0).", ("dependency",)
+)
+
+# API metrics
+SSE_CONNECTIONS = REGISTRY.gauge("aqumen_sse_connections", "Currently open SSE streams.")
+SSE_CONNECTIONS_TOTAL = REGISTRY.counter("aqumen_sse_connections_total", "SSE streams opened since start.")
+SSE_BYTES = REGISTRY.counter("aqumen_sse_bytes_total", "SSE bytes written, by content encoding.", ("encoding",))
+
+
+def render_metrics() -> str:
+    """Render the default registry."""
+    return REGISTRY.render()
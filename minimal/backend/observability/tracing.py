@@ -0,0 +1,269 @@
+"""
+Opt-in structured tracing with nested spans.
+
+Spans nest through a context variable (run → attempt → step → model call →
+retry → DB write) and are handed to an exporter when they end. Tracing is off
+unless AQU_TRACE_EXPORT is set to "jsonl" or "chrome" (or configure_tracing()
+is called); while off, span() returns a shared no-op object.
+
+Exports land in AQU_TRACE_DIR (default: backend/logs/traces):
+- jsonl:  one JSON object per finished span appended to spans.jsonl
+- chrome: one trace_<trace_id>.json per root span, loadable in chrome://tracing
+  or https://ui.perfetto.dev
+"""
+
+from __future__ import annotations
+
+import functools
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Protocol, TypeVar
+
+logger = logging.getLogger(__name__)
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_TRACE_DIR = BASE_DIR / "logs" / "traces"
+
+
+@dataclass
+class Span:
+    """A timed operation with attributes and point-in-time events."""
+
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: str | None
+    start_time: float  # epoch seconds
+    thread_id: int
+    attributes: dict[str, Any] = field(default_factory=dict)
+    events: list[dict[str, Any]] = field(default_factory=list)
+    end_time: float | None = None
+    status: str = "ok"
+    _start_perf: float = field(default=0.0, repr=False)
+
+    @property
+    def duration_ms(self) -> float:
+        if self.end_time is None:
+            return 0.0
+        return (self.end_time - self.start_time) * 1000
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def set_attributes(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+    def add_event(self, name: str, **attributes: Any) -> None:
+        self.events.append({"name": name, "time": time.time(), "attributes": attributes})
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_time": self.start_time,
+            "end_time": self.end_time,
+            "duration_ms": round(self.duration_ms, 3),
+            "thread_id": self.thread_id,
+            "status": self.status,
+            "attributes": self.attributes,
+            "events": self.events,
+        }
+
+
+class _NoopSpan:
+    """Stand-in returned while tracing is disabled."""
+
+    name = ""
+    attributes: dict[str, Any] = {}
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_attributes(self, **attributes: Any) -> None:
+        pass
+
+    def add_event(self, name: str, **attributes: Any) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class SpanExporter(Protocol):
+    def export(self, span: Span) -> None: ...
+
+
+class InMemorySpanExporter:
+    """Collects finished spans in a list (useful for tests and ad-hoc analysis)."""
+
+    def __init__(self) -> None:
+        self.spans: list[Span] = []
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+
+class JsonLinesExporter:
+    """Appends one JSON line per finished span."""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        line = json.dumps(span.to_dict(), default=str)
+        with self._lock, self.path.open("a", encoding="utf-8") as fh:
+            fh.write(line + "\n")
+
+
+class ChromeTraceExporter:
+    """Buffers spans per trace and writes a Chrome trace file when the root span ends."""
+
+    def __init__(self, directory: str | Path):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._pending: dict[str, list[Span]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def to_event(span: Span) -> dict[str, Any]:
+        return {
+            "name": span.name,
+            "cat": span.name.split(".", 1)[0],
+            "ph": "X",
+            "ts": int(span.start_time * 1_000_000),
+            "dur": int(span.duration_ms * 1000),
+            "pid": os.getpid(),
+            "tid": span.thread_id,
+            "args": {**span.attributes, "span_id": span.span_id, "parent_id": span.parent_id, "status": span.status},
+        }
+
+    def export(self, span: Span) -> None:
+        with self._lock:
+            spans = self._pending.setdefault(span.trace_id, [])
+            spans.append(span)
+            if span.parent_id is not None:
+                return
+            del self._pending[span.trace_id]
+
+        events = [self.to_event(s) for s in sorted(spans, key=lambda s: s.start_time)]
+        path = self.directory / f"trace_{span.trace_id}.json"
+        with path.open("w", encoding="utf-8") as fh:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, fh, default=str)
+
+
+_current_span: ContextVar[Span | None] = ContextVar("aqumen_current_span", default=None)
+
+
+class Tracer:
+    """Creates spans and forwards finished ones to an exporter."""
+
+    def __init__(self, exporter: SpanExporter | None = None):
+        self.exporter = exporter
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Span | _NoopSpan]:
+        if self.exporter is None:
+            yield NOOP_SPAN
+            return
+
+        parent = _current_span.get()
+        span = Span(
+            name=name,
+            trace_id=parent.trace_id if parent else uuid.uuid4().hex[:16],
+            span_id=uuid.uuid4().hex[:16],
+            parent_id=parent.span_id if parent else None,
+            start_time=time.time(),
+            thread_id=threading.get_ident(),
+            attributes=dict(attributes),
+            _start_perf=time.perf_counter(),
+        )
+        # Restore the parent explicitly rather than via a reset token: pipeline
+        # generators may resume on a different executor thread.
+        _current_span.set(span)
+        try:
+            yield span
+        except BaseException as exc:
+            span.status = "error"
+            span.set_attribute("error", f"{type(exc).__name__}: {exc}")
+            raise
+        finally:
+            span.end_time = span.start_time + (time.perf_counter() - span._start_perf)
+            _current_span.set(parent)
+            try:
+                self.exporter.export(span)
+            except Exception as exc:  # pragma: no cover - exporting must never break a run
+                logger.warning("Failed to export span %s: %s", name, exc)
+
+
+def _tracer_from_env() -> Tracer:
+    mode = os.getenv("AQU_TRACE_EXPORT", "").strip().lower()
+    if not mode:
+        return Tracer()
+    directory = Path(os.getenv("AQU_TRACE_DIR") or DEFAULT_TRACE_DIR)
+    if mode == "jsonl":
+        return Tracer(JsonLinesExporter(directory / "spans.jsonl"))
+    if mode == "chrome":
+        return Tracer(ChromeTraceExporter(directory))
+    logger.warning("Unknown AQU_TRACE_EXPORT=%r; tracing disabled (use 'jsonl' or 'chrome')", mode)
+    return Tracer()
+
+
+_tracer: Tracer | None = None
+
+
+def get_tracer() -> Tracer:
+    global _tracer
+    if _tracer is None:
+        _tracer = _tracer_from_env()
+    return _tracer
+
+
+def configure_tracing(exporter: SpanExporter | None) -> Tracer:
+    """Install an exporter (or None to disable tracing) for the whole process."""
+    global _tracer
+    _tracer = Tracer(exporter)
+    return _tracer
+
+
+def span(name: str, **attributes: Any):
+    """Open a span on the process tracer."""
+    return get_tracer().span(name, **attributes)
+
+
+def current_span() -> Span | _NoopSpan:
+    return _current_span.get() or NOOP_SPAN
+
+
+def traced(name: str) -> Callable[[F], F]:
+    """Decorator form of span() for functions and methods."""
+
+    def decorator(func: F) -> F:
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with span(name):
+                return func(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
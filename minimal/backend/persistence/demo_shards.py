@@ -0,0 +1,186 @@
+"""
+Sharded demo-data export for the dev-mode frontend.
+
+Each exported assessment is written to its own JSON shard together with its
+pipeline steps, and a one-line summary is appended to manifest.jsonl:
+
+    frontend/public/demo/manifest.jsonl
+    frontend/public/demo/shards/<id>.json   {"assessment": {...}, "pipeline_steps": [...]}
+
+Appending touches only the new shards and adds lines to the manifest, so the
+cost is proportional to the new items, not the archive. Shard ids are derived
+from (run_timestamp, topic), which makes re-exporting the same run a no-op.
+The frontend reads the manifest and fetches shards on demand
+(src/utils/demoShards.js).
+
+Migrate an old demoData.dev.js bundle:
+    python -m persistence.demo_shards --import-bundle ../frontend/src/demoData.dev.js
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import tempfile
+from collections.abc import Iterable
+from pathlib import Path
+from typing import Any
+
+from analytics.dedup import DedupIndex, assessment_text
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_EXPORT_DIR = BASE_DIR.parent / "frontend" / "public" / "demo"
+MANIFEST_NAME = "manifest.jsonl"
+SHARD_DIR = "shards"
+
+# Near-duplicate kind used for exported assessments in the shared dedup index
+KIND_EXPORT = "export"
+
+_SLUG = re.compile(r"[^a-z0-9]+")
+
+
+def shard_id(run_timestamp: str, topic: str) -> str:
+    """Stable, URL-safe id for one exported run."""
+    slug = _SLUG.sub("-", str(topic).lower()).strip("-")[:48] or "topic"
+    if run_timestamp:
+        return f"{_SLUG.sub('-', str(run_timestamp).lower()).strip('-')}-{slug}"
+    return f"{slug}-{hashlib.sha1(str(topic).encode()).hexdigest()[:8]}"
+
+
+def _write_atomic(path: Path, text: str) -> None:
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+class DemoShardStore:
+    """
+    Append-only directory of assessment shards plus a JSONL manifest.
+
+    Args:
+        root: Export directory (default frontend/public/demo)
+        dedup_index: Optional DedupIndex; near-duplicates of exported assessments are skipped
+    """
+
+    def __init__(self, root: str | Path = DEFAULT_EXPORT_DIR, dedup_index: DedupIndex | None = None):
+        self.root = Path(root)
+        self.shard_dir = self.root / SHARD_DIR
+        self.manifest_path = self.root / MANIFEST_NAME
+        self.shard_dir.mkdir(parents=True, exist_ok=True)
+        self.dedup_index = dedup_index
+        self._ids: set[str] | None = None
+
+    def manifest(self) -> list[dict[str, Any]]:
+        """All manifest entries, oldest first."""
+        if not self.manifest_path.exists():
+            return []
+        with open(self.manifest_path, encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def ids(self) -> set[str]:
+        if self._ids is None:
+            self._ids = {entry["id"] for entry in self.manifest()}
+        return self._ids
+
+    def load(self, entry_id: str) -> dict[str, Any]:
+        with open(self.shard_dir / f"{entry_id}.json", encoding="utf-8") as f:
+            return json.load(f)
+
+    def append(self, items: Iterable[tuple[dict[str, Any], list[dict[str, Any]]]]) -> tuple[list[str], list[str]]:
+        """
+        Export (assessment, pipeline_steps) pairs.
+
+        Returns:
+            (added ids, skipped ids) - already exported runs and near-duplicates are skipped
+        """
+        added: list[str] = []
+        skipped: list[str] = []
+        lines: list[str] = []
+        ids = self.ids()
+
+        for assessment, steps in items:
+            entry_id = shard_id(assessment.get("run_timestamp", ""), assessment.get("topic", ""))
+            text = assessment_text(assessment)
+            if entry_id in ids or (
+                self.dedup_index is not None and self.dedup_index.find_duplicate(KIND_EXPORT, text) is not None
+            ):
+                skipped.append(entry_id)
+                continue
+
+            shard = {"assessment": {**assessment, "id": entry_id}, "pipeline_steps": steps}
+            _write_atomic(self.shard_dir / f"{entry_id}.json", json.dumps(shard, ensure_ascii=False))
+            entry = {
+                "id": entry_id,
+                "file": f"{SHARD_DIR}/{entry_id}.json",
+                "title": assessment.get("title", ""),
+                "topic": assessment.get("topic", ""),
+                "subtopic": assessment.get("subtopic", ""),
+                "difficulty": assessment.get("difficulty", ""),
+                "content_type": assessment.get("content_type", ""),
+                "error_count": len(assessment.get("errors") or []),
+                "step_count": len(steps),
+                "run_timestamp": assessment.get("run_timestamp", ""),
+            }
+            lines.append(json.dumps(entry, ensure_ascii=False) + "\n")
+            ids.add(entry_id)
+            if self.dedup_index is not None:
+                self.dedup_index.add(KIND_EXPORT, entry_id, text, assessment.get("topic", ""))
+            added.append(entry_id)
+
+        # Shards are in place before their manifest lines, so readers never see a dangling entry
+        if lines:
+            with open(self.manifest_path, "a", encoding="utf-8") as f:
+                f.writelines(lines)
+        return added, skipped
+
+
+def read_legacy_bundle(path: str | Path) -> list[tuple[dict[str, Any], list[dict[str, Any]]]]:
+    """(assessment, pipeline_steps) pairs from an old demoData.dev.js bundle."""
+    content = Path(path).read_text(encoding="utf-8")
+    decoder = json.JSONDecoder()
+
+    def array(name: str) -> list[dict[str, Any]]:
+        marker = f"export const {name} = "
+        start = content.find(marker)
+        if start == -1:
+            return []
+        value, _ = decoder.raw_decode(content, start + len(marker))
+        return value
+
+    return pair_steps(array("demoAssessments"), array("demoPipelineSteps"))
+
+
+def pair_steps(
+    assessments: list[dict[str, Any]], pipeline_steps: list[dict[str, Any]]
+) -> list[tuple[dict[str, Any], list[dict[str, Any]]]]:
+    """Attach steps to assessments by the legacy ids ("demo-assessment-N" owns "demo-N-step-K")."""
+    by_index: dict[str, list[dict[str, Any]]] = {}
+    for step in pipeline_steps:
+        index = str(step.get("_id", "")).removeprefix("demo-").split("-step-")[0]
+        by_index.setdefault(index, []).append(step)
+    return [
+        (assessment, by_index.get(str(assessment.get("id", "")).replace("demo-assessment-", ""), []))
+        for assessment in assessments
+    ]
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Manage sharded demo-data exports.")
+    parser.add_argument("--import-bundle", required=True, help="demoData.dev.js bundle to convert into shards")
+    parser.add_argument("--out", default=str(DEFAULT_EXPORT_DIR), help="Export directory")
+    args = parser.parse_args(argv)
+
+    added, skipped = DemoShardStore(args.out).append(read_legacy_bundle(args.import_bundle))
+    print(f"✅ Wrote {len(added)} shards to {args.out} ({len(skipped)} already present)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Repo writes forwarded over a queue to a single writer process.
+
+In the batch runner's process-pool mode every worker process runs pipelines
+with a QueueRepo: its write methods put a message on a multiprocessing queue
+instead of opening a database connection, and one writer process applies the
+messages in order with the only writing Repo (see drain()). Reads are served
+by a Repo the worker opens on first use, so lookups such as the error-catalog
+knowledge base still work.
+
+Messages from one worker reach the writer in the order they were sent, so a
+run's rows are committed before anything the same worker sends afterwards.
+"""
+
+from __future__ import annotations
+
+import logging
+from collections.abc import Callable
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+# Repo methods that QueueRepo forwards instead of executing
+WRITE_METHODS = frozenset(
+    {
+        "mark_run_start",
+        "mark_run_end",
+        "save_step",
+        "save_rewards",
+        "save_rewards_batch",
+        "save_catalog_entries",
+        "save_weak_failures",
+    }
+)
+
+MSG_WRITE = "write"
+
+
+class QueueRepo:
+    """
+    Repo stand-in whose writes are applied by another process.
+
+    Args:
+        queue: multiprocessing queue read by the writer process
+        db_url: Database used for reads (opened lazily, one connection per worker)
+
+    Write methods return None; they are applied asynchronously.
+    """
+
+    def __init__(self, queue: Any, db_url: str | None = None):
+        self.queue = queue
+        self.db_url = db_url
+        self._reader = None
+
+    def __getattr__(self, name: str) -> Any:
+        if name in WRITE_METHODS:
+
+            def forward(*args: Any, **kwargs: Any) -> None:
+                if name == "save_rewards_batch":
+                    args = (list(args[0]), *args[1:])  # generators do not pickle
+                self.queue.put((MSG_WRITE, name, args, kwargs))
+
+            return forward
+        if name.startswith("_"):
+            raise AttributeError(name)
+        if self._reader is None:
+            from persistence.repo import Repo
+
+            self._reader = Repo(self.db_url)
+        return getattr(self._reader, name)
+
+
+def drain(queue: Any, repo: Any, handlers: dict[str, Callable[..., None]] | None = None) -> int:
+    """
+    Apply queued messages until a None sentinel arrives; returns the number applied.
+
+    MSG_WRITE messages call the named Repo method. Other message kinds go to
+    `handlers[kind](*payload)`. A failing message is logged and skipped so one
+    bad row does not stop the writer.
+    """
+    handlers = handlers or {}
+    applied = 0
+    while True:
+        message = queue.get()
+        if message is None:
+            return applied
+        kind, *payload = message
+        try:
+            if kind == MSG_WRITE:
+                name, args, kwargs = payload
+                if name not in WRITE_METHODS:
+                    raise ValueError(f"not a Repo write method: {name}")
+                getattr(repo, name)(*args, **kwargs)
+            else:
+                handlers[kind](*payload)
+            applied += 1
+        except Exception:
+            logger.exception(f"Writer could not apply {kind} message")
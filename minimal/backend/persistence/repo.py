@@ -1,14 +1,38 @@
+import importlib.util
 import json
 import os
 import sqlite3
+from collections.abc import Iterable, Iterator
 from typing import Any
 
-try:
-    import psycopg2
-    from psycopg2 import pool
-    PSYCOPG2_AVAILABLE = True
-except ImportError:
-    PSYCOPG2_AVAILABLE = False
+from observability.metrics import DB_WRITE_DURATION
+from observability.tracing import traced
+
+# psycopg2 is imported when a PostgreSQL repo connects, not when this module loads
+PSYCOPG2_AVAILABLE = importlib.util.find_spec("psycopg2") is not None
+
+
+# Columns returned by the run-history queries (full_response is opt-in for steps)
+RUN_COLUMNS = (
+    "run_timestamp",
+    "topic",
+    "started_at",
+    "completed_at",
+    "total_steps",
+    "differentiation_achieved",
+    "final_success",
+)
+STEP_COLUMNS = (
+    "id",
+    "run_timestamp",
+    "step_number",
+    "step_name",
+    "model_used",
+    "provider",
+    "success",
+    "response_length",
+    "timestamp",
+)
 
 
 class Repo:
@@ -48,6 +72,8 @@ class Repo:
 
         if Repo._connection_pool is None and self.db_url:
             try:
+                from psycopg2 import pool
+
                 Repo._connection_pool = pool.SimpleConnectionPool(
                     minconn=1,
                     maxconn=10,
@@ -57,14 +83,16 @@ class Repo:
                 print(f"Warning: Could not create connection pool: {e}")
                 print("Falling back to direct connections")
 
-    def _get_connection(self):
+    def _get_connection(self, check_same_thread: bool = True):
         """Get a database connection (PostgreSQL from pool, SQLite direct)."""
         if self.use_postgres:
             if Repo._connection_pool:
                 return Repo._connection_pool.getconn()
+            import psycopg2
+
             return psycopg2.connect(self.db_url)
         else:
-            return sqlite3.connect(self.db_url)
+            return sqlite3.connect(self.db_url, check_same_thread=check_same_thread)
 
     def _return_connection(self, conn):
         """Return connection to pool (PostgreSQL) or close it (SQLite)."""
@@ -108,10 +136,18 @@ class Repo:
                 response_length INTEGER NOT NULL,
                 full_response TEXT NOT NULL,
                 timestamp TEXT NOT NULL,
+                provider TEXT NOT NULL DEFAULT '',
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
             """
         )
+        # Databases created before provider routing lack this column
+        self._ensure_column(cursor, "enhanced_step_responses", "provider", "TEXT NOT NULL DEFAULT ''")
+        # Run-history browsing: a run's steps in order, and newest runs per topic
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_step_responses_run ON enhanced_step_responses (run_timestamp, id)"
+        )
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_runs_topic ON enhanced_pipeline_runs (topic, run_timestamp)")
         cursor.execute(
             f"""
             CREATE TABLE IF NOT EXISTS step_rewards (
@@ -121,13 +157,64 @@ class Repo:
                 pass_rate REAL NOT NULL,
                 num_tests INTEGER NOT NULL,
                 detail_json TEXT NOT NULL,
+                reward_version TEXT NOT NULL DEFAULT 'live',
+                step_response_id INTEGER,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            """
+        )
+        # Batch re-scoring tags rows with a rule version and the step response they score
+        self._ensure_column(cursor, "step_rewards", "reward_version", "TEXT NOT NULL DEFAULT 'live'")
+        self._ensure_column(cursor, "step_rewards", "step_response_id", "INTEGER")
+        # Error-catalog knowledge base: past Step 2 entries and the mistakes the weak model actually made
+        cursor.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS error_catalog_entries (
+                id {id_type},
+                run_timestamp TEXT NOT NULL,
+                topic TEXT NOT NULL,
+                subtopic TEXT NOT NULL,
+                difficulty TEXT NOT NULL,
+                mistake_key TEXT NOT NULL,
+                entry_json TEXT NOT NULL,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
             """
         )
+        cursor.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS weak_model_failures (
+                id {id_type},
+                run_timestamp TEXT NOT NULL,
+                topic TEXT NOT NULL,
+                subtopic TEXT NOT NULL,
+                failure_key TEXT NOT NULL,
+                failure TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            """
+        )
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_catalog_topic ON error_catalog_entries (topic, subtopic, mistake_key)"
+        )
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_failures_topic ON weak_model_failures (topic, subtopic, failure_key)"
+        )
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_failures_key ON weak_model_failures (failure_key)")
         conn.commit()
         self._return_connection(conn)
 
+    def _ensure_column(self, cursor, table: str, column: str, definition: str) -> None:
+        """Add a column to an existing table if it is missing."""
+        if self.use_postgres:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {column} {definition}")
+            return
+        cursor.execute(f"PRAGMA table_info({table})")
+        if column not in {row[1] for row in cursor.fetchall()}:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+    @DB_WRITE_DURATION.time(operation="save_step")
+    @traced("db.save_step")
     def save_step(
         self,
         run_timestamp: str,
@@ -138,6 +225,7 @@ class Repo:
         success: bool,
         response: str,
         timestamp: str,
+        provider: str = "",
     ) -> None:
         conn = self._get_connection()
         cursor = conn.cursor()
@@ -149,8 +237,8 @@ class Repo:
             f"""
             INSERT INTO enhanced_step_responses
             (run_timestamp, topic, step_number, step_name, model_used, success,
-             response_length, full_response, timestamp)
-            VALUES ({placeholder}, {placeholder}, {placeholder}, {placeholder}, {placeholder}, {placeholder}, {placeholder}, {placeholder}, {placeholder})
+             response_length, full_response, timestamp, provider)
+            VALUES ({placeholder}, {placeholder}, {placeholder}, {placeholder}, {placeholder}, {placeholder}, {placeholder}, {placeholder}, {placeholder}, {placeholder})
             """,
             (
                 run_timestamp,
@@ -162,11 +250,14 @@ class Repo:
                 len(response or ""),
                 response or "",
                 timestamp,
+                provider,
             ),
         )
         conn.commit()
         self._return_connection(conn)
 
+    @DB_WRITE_DURATION.time(operation="save_rewards")
+    @traced("db.save_rewards")
     def save_rewards(
         self,
         run_timestamp: str,
@@ -194,6 +285,338 @@ class Repo:
         conn.commit()
         self._return_connection(conn)
 
+    @DB_WRITE_DURATION.time(operation="save_rewards_batch")
+    @traced("db.save_rewards_batch")
+    def save_rewards_batch(self, rows: Iterable[tuple[Any, ...]], reward_version: str) -> int:
+        """
+        Insert many step_rewards rows in one transaction.
+
+        Args:
+            rows: (step_response_id, run_timestamp, step_number, pass_rate, num_tests, detail_json) tuples
+            reward_version: Label of the reward rules that produced the rows
+
+        Returns:
+            Number of rows written
+        """
+        placeholder = "%s" if self.use_postgres else "?"
+        values = [(*row, reward_version) for row in rows]
+        if not values:
+            return 0
+
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        cursor.executemany(
+            f"""
+            INSERT INTO step_rewards
+            (step_response_id, run_timestamp, step_number, pass_rate, num_tests, detail_json, reward_version)
+            VALUES ({placeholder}, {placeholder}, {placeholder}, {placeholder}, {placeholder}, {placeholder}, {placeholder})
+            """,
+            values,
+        )
+        conn.commit()
+        self._return_connection(conn)
+        return len(values)
+
+    def iter_step_responses(self, batch_size: int = 10_000) -> Iterator[list[tuple[Any, ...]]]:
+        """
+        Stream enhanced_step_responses ordered by run, then insertion order.
+
+        Yields lists of (id, run_timestamp, step_number, success, full_response)
+        tuples. Each batch is a keyset-paginated query whose cursor is closed
+        before the batch is yielded, so callers can write between batches (an
+        open SQLite read cursor would hold the lock their writes need) and the
+        table is never held in memory at once.
+        """
+        placeholder = "%s" if self.use_postgres else "?"
+        after: tuple[Any, ...] = ()
+        while True:
+            where = f"WHERE (run_timestamp, id) > ({placeholder}, {placeholder})" if after else ""
+            query = f"""
+                SELECT id, run_timestamp, step_number, success, full_response
+                FROM enhanced_step_responses
+                {where}
+                ORDER BY run_timestamp, id
+                LIMIT {placeholder}
+            """
+            page = [
+                row
+                for batch in self._stream(query, (*after, batch_size), "step_responses_stream", batch_size)
+                for row in batch
+            ]
+            if not page:
+                return
+            yield page
+            if len(page) < batch_size:
+                return
+            after = (page[-1][1], page[-1][0])
+
+    def _stream(
+        self, query: str, params: tuple[Any, ...], cursor_name: str, batch_size: int
+    ) -> Iterator[list[tuple[Any, ...]]]:
+        """Run a read query and yield its rows in batches (server-side cursor on PostgreSQL)."""
+        # A streaming response resumes its iterator on whichever threadpool worker is free
+        conn = self._get_connection(check_same_thread=False)
+        cursor = conn.cursor(cursor_name) if self.use_postgres else conn.cursor()
+        try:
+            cursor.execute(query, params)
+            while True:
+                batch = cursor.fetchmany(batch_size)
+                if not batch:
+                    break
+                yield batch
+        finally:
+            cursor.close()
+            if self.use_postgres:
+                conn.rollback()  # end the read transaction before the connection goes back to the pool
+            self._return_connection(conn)
+
+    def iter_runs(
+        self,
+        limit: int,
+        after: tuple[str, str] | None = None,
+        topic: str | None = None,
+        success: bool | None = None,
+        since: str | None = None,
+        until: str | None = None,
+    ) -> Iterator[dict[str, Any]]:
+        """
+        Stream pipeline runs, newest first, with keyset pagination.
+
+        Args:
+            limit: Maximum rows to return
+            after: (run_timestamp, topic) of the last row of the previous page
+            topic: Only runs for this topic
+            success: Only runs whose final_success matches
+            since: Only runs with run_timestamp >= since (e.g. "20251001")
+            until: Only runs with run_timestamp < until
+
+        Yields:
+            Dicts with the RUN_COLUMNS keys
+        """
+        placeholder = "%s" if self.use_postgres else "?"
+        clauses: list[str] = []
+        params: list[Any] = []
+        if after is not None:
+            clauses.append(f"(run_timestamp, topic) < ({placeholder}, {placeholder})")
+            params.extend(after)
+        if topic is not None:
+            clauses.append(f"topic = {placeholder}")
+            params.append(topic)
+        if success is not None:
+            clauses.append(f"final_success = {placeholder}")
+            params.append(success if self.use_postgres else int(success))
+        if since is not None:
+            clauses.append(f"run_timestamp >= {placeholder}")
+            params.append(since)
+        if until is not None:
+            clauses.append(f"run_timestamp < {placeholder}")
+            params.append(until)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        params.append(limit)
+
+        query = f"""
+            SELECT {", ".join(RUN_COLUMNS)}
+            FROM enhanced_pipeline_runs
+            {where}
+            ORDER BY run_timestamp DESC, topic DESC
+            LIMIT {placeholder}
+        """
+        for batch in self._stream(query, tuple(params), "runs_stream", min(limit, 1000)):
+            yield from (dict(zip(RUN_COLUMNS, row, strict=True)) for row in batch)
+
+    def iter_run_steps(
+        self,
+        run_timestamp: str,
+        limit: int,
+        after_id: int | None = None,
+        include_response: bool = False,
+    ) -> Iterator[dict[str, Any]]:
+        """
+        Stream one run's step responses in insertion order, with keyset pagination.
+
+        full_response is only read when include_response is set.
+        """
+        placeholder = "%s" if self.use_postgres else "?"
+        columns = STEP_COLUMNS + (("full_response",) if include_response else ())
+        params: list[Any] = [run_timestamp]
+        after = ""
+        if after_id is not None:
+            after = f"AND id > {placeholder}"
+            params.append(after_id)
+        params.append(limit)
+
+        query = f"""
+            SELECT {", ".join(columns)}
+            FROM enhanced_step_responses
+            WHERE run_timestamp = {placeholder} {after}
+            ORDER BY id
+            LIMIT {placeholder}
+        """
+        for batch in self._stream(query, tuple(params), "run_steps_stream", min(limit, 1000)):
+            yield from (dict(zip(columns, row, strict=True)) for row in batch)
+
+    def ping(self) -> None:
+        """Round-trip a trivial query; raises if the database is unreachable."""
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+        finally:
+            cursor.close()
+            self._return_connection(conn)
+
+    def run_exists(self, run_timestamp: str) -> bool:
+        placeholder = "%s" if self.use_postgres else "?"
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute(
+                f"SELECT 1 FROM enhanced_pipeline_runs WHERE run_timestamp = {placeholder} LIMIT 1", (run_timestamp,)
+            )
+            return cursor.fetchone() is not None
+        finally:
+            cursor.close()
+            self._return_connection(conn)
+
+    @DB_WRITE_DURATION.time(operation="save_catalog_entries")
+    @traced("db.save_catalog_entries")
+    def save_catalog_entries(
+        self,
+        run_timestamp: str,
+        topic: str,
+        subtopic: str,
+        difficulty: str,
+        entries: Iterable[tuple[str, str]],
+    ) -> int:
+        """
+        Store one run's Step 2 error catalog.
+
+        Args:
+            entries: (mistake_key, entry_json) pairs
+
+        Returns:
+            Number of rows written
+        """
+        placeholder = "%s" if self.use_postgres else "?"
+        values = [(run_timestamp, topic, subtopic, difficulty, key, entry_json) for key, entry_json in entries]
+        if not values:
+            return 0
+
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        cursor.executemany(
+            f"""
+            INSERT INTO error_catalog_entries (run_timestamp, topic, subtopic, difficulty, mistake_key, entry_json)
+            VALUES ({placeholder}, {placeholder}, {placeholder}, {placeholder}, {placeholder}, {placeholder})
+            """,
+            values,
+        )
+        conn.commit()
+        self._return_connection(conn)
+        return len(values)
+
+    @DB_WRITE_DURATION.time(operation="save_weak_failures")
+    @traced("db.save_weak_failures")
+    def save_weak_failures(
+        self, run_timestamp: str, topic: str, subtopic: str, failures: Iterable[tuple[str, str]]
+    ) -> int:
+        """
+        Store the mistakes the judge saw the weak model make.
+
+        Args:
+            failures: (failure_key, failure) pairs
+
+        Returns:
+            Number of rows written
+        """
+        placeholder = "%s" if self.use_postgres else "?"
+        values = [(run_timestamp, topic, subtopic, key, failure) for key, failure in failures]
+        if not values:
+            return 0
+
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        cursor.executemany(
+            f"""
+            INSERT INTO weak_model_failures (run_timestamp, topic, subtopic, failure_key, failure)
+            VALUES ({placeholder}, {placeholder}, {placeholder}, {placeholder}, {placeholder})
+            """,
+            values,
+        )
+        conn.commit()
+        self._return_connection(conn)
+        return len(values)
+
+    def catalog_summary(self, topic: str) -> list[tuple[str, str, int, int, str]]:
+        """
+        Distinct catalog mistakes recorded for a topic.
+
+        Returns (subtopic, mistake_key, times_seen, times_weak_model_made_it,
+        latest entry_json) rows; counting happens in the database.
+        """
+        placeholder = "%s" if self.use_postgres else "?"
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute(
+                f"""
+                WITH catalog AS (
+                    SELECT subtopic, mistake_key, COUNT(*) AS seen, MAX(id) AS latest_id
+                    FROM error_catalog_entries
+                    WHERE topic = {placeholder}
+                    GROUP BY subtopic, mistake_key
+                ),
+                failures AS (
+                    SELECT subtopic, failure_key, COUNT(*) AS proven
+                    FROM weak_model_failures
+                    WHERE topic = {placeholder}
+                    GROUP BY subtopic, failure_key
+                )
+                SELECT c.subtopic, c.mistake_key, c.seen, COALESCE(f.proven, 0), e.entry_json
+                FROM catalog c
+                JOIN error_catalog_entries e ON e.id = c.latest_id
+                LEFT JOIN failures f ON f.subtopic = c.subtopic AND f.failure_key = c.mistake_key
+                ORDER BY c.subtopic, c.mistake_key
+                """,
+                (topic, topic),
+            )
+            return cursor.fetchall()
+        finally:
+            cursor.close()
+            self._return_connection(conn)
+
+    def failure_stats(self, topic: str | None = None, limit: int = 20) -> list[tuple[str, int, int, str]]:
+        """
+        Most frequent weak-model failures, aggregated in the database.
+
+        Returns (failure_key, occurrences, distinct_runs, example_text) rows,
+        most frequent first; only `limit` rows ever leave the database.
+        """
+        placeholder = "%s" if self.use_postgres else "?"
+        where = f"WHERE topic = {placeholder}" if topic is not None else ""
+        params = (topic, limit) if topic is not None else (limit,)
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute(
+                f"""
+                SELECT failure_key, COUNT(*) AS occurrences, COUNT(DISTINCT run_timestamp), MIN(failure)
+                FROM weak_model_failures
+                {where}
+                GROUP BY failure_key
+                ORDER BY occurrences DESC, failure_key
+                LIMIT {placeholder}
+                """,
+                params,
+            )
+            return cursor.fetchall()
+        finally:
+            cursor.close()
+            self._return_connection(conn)
+
+    @DB_WRITE_DURATION.time(operation="mark_run_start")
+    @traced("db.mark_run_start")
     def mark_run_start(self, run_timestamp: str, topic: str) -> None:
         conn = self._get_connection()
         cursor = conn.cursor()
@@ -222,6 +645,8 @@ class Repo:
         conn.commit()
         self._return_connection(conn)
 
+    @DB_WRITE_DURATION.time(operation="mark_run_end")
+    @traced("db.mark_run_end")
     def mark_run_end(
         self,
         run_timestamp: str,
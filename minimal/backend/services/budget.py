@@ -0,0 +1,316 @@
+"""
+Spend governor for pipeline runs.
+
+Runtimes already price every call (BedrockRuntime.PRICING, OpenAIRuntime.PRICING),
+but nothing acted on that price. A run that needs three differentiation
+attempts with thinking on the strong tier can cost many times the median run.
+The governor tracks actual and projected spend against three caps:
+
+- per run: one pipeline run (AQU_BUDGET_RUN_USD)
+- per topic: all runs for one topic today (AQU_BUDGET_TOPIC_USD)
+- daily: all runs in this process today, UTC (AQU_BUDGET_DAILY_USD)
+
+Actual spend is what the runtimes report through RunContext.record_usage().
+Before each model call the Invoker asks the run's RunBudget for a plan. The
+call is projected at its worst case (prompt tokens plus max_tokens and any
+thinking budget), and the projection is added to what has been spent. The
+pressure is the highest spent-plus-projected fraction of any cap:
+
+- from AQU_BUDGET_SOFT (default 0.6): drop extended thinking
+- from AQU_BUDGET_HARD (default 0.8): run strong-tier calls on the mid tier,
+  and start no further differentiation attempts
+- at 1.0 of the run cap: refuse the call
+
+New runs are refused with BudgetExceededError (HTTP 429) once the day's
+spend or the topic's spend has reached its cap. Runs already admitted finish
+in degraded form; only the per-run cap stops calls mid-run, and the refused
+call ends the run with stop_reason "budget_refused". Every downgrade
+adds its estimated saving to aqumen_budget_avoided_usd_total.
+
+Totals are kept in memory, so they start again from zero when the process
+restarts.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import UTC, date, datetime, timedelta
+
+from clients.bedrock import BedrockRuntime
+from clients.openai_client import OpenAIRuntime
+from observability.instrument import current_step
+from observability.metrics import BUDGET_ACTIONS, BUDGET_AVOIDED_USD, BUDGET_SPEND_USD
+
+logger = logging.getLogger(__name__)
+
+SCOPE_RUN = "run"
+SCOPE_TOPIC = "topic"
+SCOPE_DAILY = "daily"
+
+SKIP_THINKING = "skip_thinking"
+SWITCH_TIER = "switch_tier"
+CAP_ATTEMPTS = "cap_attempts"
+REFUSE_CALL = "refuse_call"
+REFUSE_RUN = "refuse_run"
+
+STOP_BUDGET_REFUSED = "budget_refused"  # SevenStepResult.stop_reason of a run ended by a refused call
+
+CHARS_PER_TOKEN = 4
+PRICING = {**BedrockRuntime.PRICING, **OpenAIRuntime.PRICING}
+
+
+class BudgetExceededError(RuntimeError):
+    """A run or call was refused because a spend cap is exhausted."""
+
+    def __init__(
+        self, scope: str, spent: float, limit: float, retry_after_s: int | None = None, step: str | None = None
+    ):
+        super().__init__(f"{scope} budget exhausted: ${spent:.2f} of ${limit:.2f} spent")
+        self.scope = scope
+        self.spent = spent
+        self.limit = limit
+        self.retry_after_s = retry_after_s
+        self.step = step  # pipeline step whose call was refused, for refusals mid-run
+
+
+def estimate_call_cost(model_id: str, prompt: str, max_tokens: int, thinking_budget: int = 0) -> float:
+    """Worst-case cost of one call: the whole prompt plus every output token it may bill."""
+    pricing = PRICING.get(model_id)
+    if pricing is None:
+        # Provider model ids embed the price-table key (e.g. gpt-5-mini-2025-08-07)
+        keys = [key for key in PRICING if key in model_id]
+        pricing = PRICING[max(keys, key=len)] if keys else {"input": 0.0, "output": 0.0}
+    input_tokens = len(prompt) // CHARS_PER_TOKEN
+    output_tokens = max_tokens + thinking_budget
+    return (input_tokens * pricing["input"] + output_tokens * pricing["output"]) / 1_000_000
+
+
+@dataclass(frozen=True)
+class CallPlan:
+    """How a model call should run under the current budget."""
+
+    model_id: str
+    use_thinking: bool
+    actions: tuple[str, ...] = ()
+
+
+class RunBudget:
+    """
+    Spend of one admitted run, charged as its calls are billed.
+
+    Args:
+        governor: Governor holding the topic and daily totals
+        topic: Topic the run counts against
+        downgrades: Model to use instead of a model once the hard threshold is reached
+    """
+
+    def __init__(self, governor: BudgetGovernor, topic: str, downgrades: dict[str, str] | None = None):
+        self.governor = governor
+        self.topic = topic
+        self.downgrades = dict(downgrades or {})
+        self.spent = 0.0
+        self._attempts_start: float | None = None
+        self._lock = threading.Lock()
+
+    def charge(self, cost: float) -> None:
+        with self._lock:
+            self.spent += cost
+        self.governor._charge(self.topic, cost)
+
+    def pressure(self, projected: float = 0.0) -> float:
+        """Highest fraction of any cap that spend plus `projected` would use."""
+        governor = self.governor
+        spent = {
+            SCOPE_RUN: self.spent,
+            SCOPE_TOPIC: governor.spent_topic(self.topic),
+            SCOPE_DAILY: governor.spent_today(),
+        }
+        return max(
+            ((spent[scope] + projected) / limit for scope, limit in governor.limits().items() if limit),
+            default=0.0,
+        )
+
+    def plan_call(
+        self, model_id: str, prompt: str, max_tokens: int, use_thinking: bool = False, thinking_budget: int = 0
+    ) -> CallPlan:
+        """Downgrade a call as pressure rises; raises BudgetExceededError if it would overrun the run cap."""
+        governor = self.governor
+        actions = []
+        cost = estimate_call_cost(model_id, prompt, max_tokens, thinking_budget if use_thinking else 0)
+        if use_thinking and self.pressure(cost) >= governor.soft:
+            cheaper = estimate_call_cost(model_id, prompt, max_tokens)
+            governor._avoided(SKIP_THINKING, cost - cheaper)
+            use_thinking, cost = False, cheaper
+            actions.append(SKIP_THINKING)
+        downgrade = self.downgrades.get(model_id)
+        if downgrade and self.pressure(cost) >= governor.hard:
+            cheaper = estimate_call_cost(downgrade, prompt, max_tokens)
+            governor._avoided(SWITCH_TIER, cost - cheaper)
+            model_id, cost = downgrade, cheaper
+            actions.append(SWITCH_TIER)
+        if governor.run_usd and self.spent + cost > governor.run_usd:
+            governor._avoided(REFUSE_CALL, cost)
+            raise BudgetExceededError(SCOPE_RUN, self.spent, governor.run_usd, step=current_step())
+        if actions:
+            logger.info(f"Budget pressure {self.pressure(cost):.0%} for {self.topic!r}: {', '.join(actions)}")
+        return CallPlan(model_id, use_thinking, tuple(actions))
+
+    def allow_attempt(self, attempt: int) -> bool:
+        """Whether another differentiation attempt may start; False past the hard threshold."""
+        with self._lock:
+            if self._attempts_start is None:
+                self._attempts_start = self.spent
+            attempts_spent = self.spent - self._attempts_start
+        if attempt <= 1 or self.pressure() < self.governor.hard:
+            return True
+        # An attempt like the ones already made is what stopping avoids
+        self.governor._avoided(CAP_ATTEMPTS, attempts_spent / (attempt - 1))
+        logger.info(f"Budget pressure {self.pressure():.0%} for {self.topic!r}: no attempt {attempt}")
+        return False
+
+    def finish(self) -> None:
+        self.governor._finish_run(self.spent)
+
+
+class BudgetGovernor:
+    """
+    Process-wide spend caps in USD (None for no cap).
+
+    Args:
+        run_usd: Cap for one run
+        topic_usd: Cap for one topic per UTC day
+        daily_usd: Cap for all runs per UTC day
+        soft: Pressure at which thinking is dropped
+        hard: Pressure at which strong-tier calls move to the mid tier and attempts stop
+        clock: Wall-clock time source (for the day boundary)
+    """
+
+    def __init__(
+        self,
+        run_usd: float | None = None,
+        topic_usd: float | None = None,
+        daily_usd: float | None = None,
+        soft: float = 0.6,
+        hard: float = 0.8,
+        clock: Callable[[], float] = time.time,
+    ):
+        if not 0 < soft <= hard <= 1:
+            raise ValueError(f"thresholds must satisfy 0 < soft <= hard <= 1, got {soft} and {hard}")
+        self.run_usd = run_usd
+        self.topic_usd = topic_usd
+        self.daily_usd = daily_usd
+        self.soft = soft
+        self.hard = hard
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._day = self._today()
+        self._daily = 0.0
+        self._topics: dict[str, float] = defaultdict(float)
+        self._runs = 0
+        self._run_spend = 0.0
+
+    @classmethod
+    def from_env(cls) -> BudgetGovernor | None:
+        caps = [_usd_from_env(f"AQU_BUDGET_{scope.upper()}_USD") for scope in (SCOPE_RUN, SCOPE_TOPIC, SCOPE_DAILY)]
+        if not any(caps):
+            return None
+        soft = float(os.getenv("AQU_BUDGET_SOFT", "0.6"))
+        hard = float(os.getenv("AQU_BUDGET_HARD", "0.8"))
+        logger.info(f"Budget governor enabled (run {caps[0]}, topic {caps[1]}, daily {caps[2]} USD)")
+        return cls(*caps, soft=soft, hard=hard)
+
+    def limits(self) -> dict[str, float | None]:
+        return {SCOPE_RUN: self.run_usd, SCOPE_TOPIC: self.topic_usd, SCOPE_DAILY: self.daily_usd}
+
+    def _today(self) -> date:
+        return datetime.fromtimestamp(self.clock(), UTC).date()
+
+    def _roll_day(self) -> None:
+        """Start new daily totals at UTC midnight (caller holds the lock)."""
+        today = self._today()
+        if today != self._day:
+            self._day, self._daily = today, 0.0
+            self._topics.clear()
+
+    def _seconds_to_midnight(self) -> int:
+        now = datetime.fromtimestamp(self.clock(), UTC)
+        midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time(), UTC)
+        return max(1, int((midnight - now).total_seconds()))
+
+    def spent_today(self) -> float:
+        with self._lock:
+            self._roll_day()
+            return self._daily
+
+    def spent_topic(self, topic: str) -> float:
+        with self._lock:
+            self._roll_day()
+            return self._topics.get(topic, 0.0)
+
+    def _charge(self, topic: str, cost: float) -> None:
+        with self._lock:
+            self._roll_day()
+            self._daily += cost
+            self._topics[topic] += cost
+            BUDGET_SPEND_USD.set(self._daily, scope=SCOPE_DAILY)
+
+    def _avoided(self, action: str, amount: float) -> None:
+        BUDGET_ACTIONS.inc(action=action)
+        if amount > 0:
+            BUDGET_AVOIDED_USD.inc(amount, action=action)
+
+    def _finish_run(self, spent: float) -> None:
+        with self._lock:
+            self._runs += 1
+            self._run_spend += spent
+
+    def admit(self, topic: str) -> None:
+        """Raise BudgetExceededError if a new run for `topic` would start over the daily or topic cap."""
+        with self._lock:
+            self._roll_day()
+            spent = {SCOPE_DAILY: self._daily, SCOPE_TOPIC: self._topics.get(topic, 0.0)}
+            mean_run = self._run_spend / self._runs if self._runs else 0.0
+        for scope in (SCOPE_DAILY, SCOPE_TOPIC):
+            limit = self.limits()[scope]
+            if limit and spent[scope] >= limit:
+                self._avoided(REFUSE_RUN, mean_run)
+                logger.warning(f"Refusing run for {topic!r}: {scope} budget ${spent[scope]:.2f} of ${limit:.2f}")
+                raise BudgetExceededError(scope, spent[scope], limit, self._seconds_to_midnight())
+
+    def start_run(self, topic: str, downgrades: dict[str, str] | None = None) -> RunBudget:
+        """Admit a run and return the budget its calls are charged to."""
+        self.admit(topic)
+        return RunBudget(self, topic, downgrades)
+
+
+def _usd_from_env(name: str) -> float | None:
+    raw = os.getenv(name, "").strip()
+    if not raw:
+        return None
+    try:
+        value = float(raw)
+    except ValueError:
+        logger.warning(f"Ignoring invalid {name}={raw!r}")
+        return None
+    return value if value > 0 else None
+
+
+_governor_lock = threading.Lock()
+_governor: BudgetGovernor | None = None
+_governor_loaded = False
+
+
+def get_governor() -> BudgetGovernor | None:
+    """The process-wide governor (None unless an AQU_BUDGET_*_USD cap is set)."""
+    global _governor, _governor_loaded
+    with _governor_lock:
+        if not _governor_loaded:
+            _governor = BudgetGovernor.from_env()
+            _governor_loaded = True
+        return _governor
@@ -1,15 +1,86 @@
+from collections.abc import Iterator
+from contextlib import contextmanager, nullcontext
 from typing import Any
 
 from clients.bedrock import BedrockRuntime
+from clients.concurrency import request_slot
+from clients.context import current_run, observe_calls
+from observability.instrument import current_step
+from services.budget import BudgetExceededError
+from services.output_sizing import DEFAULT_MAX_TOKENS, DEFAULT_THINKING_BUDGET, OutputSizer, get_sizer
+from services.scheduler import ModelCallScheduler, get_scheduler
 
 
 class Invoker:
-    def __init__(self, runtime: BedrockRuntime):
+    def __init__(
+        self,
+        runtime: BedrockRuntime,
+        scheduler: ModelCallScheduler | None = None,
+        sizer: OutputSizer | None = None,
+    ):
         self.runtime = runtime
+        # Provider requests queue here by priority class (AQU_SCHEDULER=1); the runtime takes the
+        # slot inside its retry loop, so back-off sleeps and post-call pauses do not hold it
+        self.scheduler = scheduler if scheduler is not None else get_scheduler()
+        # max_tokens/thinking budgets follow observed output lengths per current_step() (AQU_ADAPTIVE_TOKENS=1)
+        self.sizer = sizer if sizer is not None else get_sizer()
+
+    def _slot(self):
+        return request_slot(self.scheduler.slot) if self.scheduler is not None else nullcontext()
+
+    @staticmethod
+    def _budget():
+        # Runs admitted by the budget governor (AQU_BUDGET_*_USD) downgrade their calls under pressure
+        run = current_run()
+        return run.budget if run is not None else None
+
+    def _size(
+        self, step: str | None, model_id: str, max_tokens: int | None, use_thinking: bool, thinking_budget: int | None
+    ) -> tuple[int, int]:
+        """Explicit limits win; otherwise the sizer's choice for this step, or the defaults."""
+        default_tokens = max_tokens or DEFAULT_MAX_TOKENS
+        default_budget = thinking_budget or DEFAULT_THINKING_BUDGET
+        if self.sizer is None or step is None or max_tokens is not None:
+            return default_tokens, default_budget
+        sized_tokens, sized_budget = self.sizer.size(step, model_id, default_tokens, use_thinking, default_budget)
+        return sized_tokens, (default_budget if thinking_budget is not None else sized_budget)
+
+    def _plan(
+        self,
+        step: str | None,
+        model_id: str,
+        prompt: str,
+        max_tokens: int | None,
+        use_thinking: bool = False,
+        thinking_budget: int | None = None,
+    ) -> tuple[str, int, bool, int]:
+        """Model and limits for one call after output sizing and any budget downgrade."""
+        tokens, budget_tokens = self._size(step, model_id, max_tokens, use_thinking, thinking_budget)
+        if (budget := self._budget()) is not None:
+            plan = budget.plan_call(model_id, prompt, tokens, use_thinking, budget_tokens)
+            if (plan.model_id, plan.use_thinking) != (model_id, use_thinking):
+                model_id, use_thinking = plan.model_id, plan.use_thinking
+                tokens, budget_tokens = self._size(step, model_id, max_tokens, use_thinking, thinking_budget)
+        return model_id, tokens, use_thinking, budget_tokens
+
+    @contextmanager
+    def _observed(self, step: str | None, model_id: str, use_thinking: bool, max_tokens: int) -> Iterator[None]:
+        if self.sizer is None or step is None:
+            yield
+            return
+        with observe_calls() as calls:
+            yield
+        for metrics in calls:
+            self.sizer.observe(step, model_id, use_thinking, max_tokens, metrics)
 
-    def text(self, model_id: str, prompt: str, max_tokens: int = 2048) -> str:
+    def text(self, model_id: str, prompt: str, max_tokens: int | None = None) -> str:
+        step = current_step()
         try:
-            return self.runtime.invoke(model_id, prompt, max_tokens)
+            model_id, max_tokens, _, _ = self._plan(step, model_id, prompt, max_tokens)
+            with self._slot(), self._observed(step, model_id, False, max_tokens):
+                return self.runtime.invoke(model_id, prompt, max_tokens)
+        except BudgetExceededError:
+            raise  # the run is over; let the orchestrator end it rather than score an error string
         except Exception as exc:  # pragma: no cover - runtime safeguard
             return f"Error: {exc}"
 
@@ -18,18 +89,25 @@ class Invoker:
         model_id: str,
         prompt: str,
         tools: list[dict[str, Any]],
-        max_tokens: int = 2048,
+        max_tokens: int | None = None,
         use_thinking: bool = False,
-        thinking_budget: int = 2048,
+        thinking_budget: int | None = None,
     ) -> dict[str, Any]:
+        step = current_step()
         try:
-            return self.runtime.invoke_with_tools(
-                model_id,
-                prompt,
-                tools,
-                max_tokens=max_tokens,
-                use_thinking=use_thinking,
-                thinking_budget=thinking_budget,
+            model_id, max_tokens, use_thinking, thinking_budget = self._plan(
+                step, model_id, prompt, max_tokens, use_thinking, thinking_budget
             )
+            with self._slot(), self._observed(step, model_id, use_thinking, max_tokens):
+                return self.runtime.invoke_with_tools(
+                    model_id,
+                    prompt,
+                    tools,
+                    max_tokens=max_tokens,
+                    use_thinking=use_thinking,
+                    thinking_budget=thinking_budget,
+                )
+        except BudgetExceededError:
+            raise
         except Exception as exc:  # pragma: no cover - runtime safeguard
             return {"error": f"Error: {exc}"}
@@ -0,0 +1,140 @@
+"""
+Adaptive max_tokens and thinking budgets from observed output lengths.
+
+A fixed max_tokens=2048 truncates the longest Step 7 payloads (which costs a
+full retry) and over-reserves for short steps such as Step 1. Providers also
+count the reserved max_tokens against output-token quotas, so the slack shows
+up as throttling. The sizer keeps recent output lengths per (step, model,
+thinking) and sizes the next call at a target percentile plus headroom:
+
+- max_tokens covers the answer: output tokens minus any thinking tokens
+- thinking_budget covers the thinking tokens of thinking calls (at least 1024)
+
+A response cut off at max_tokens is recorded as twice its limit, since its
+real length is unknown but larger, so the next call for that step gets more
+room at once. Until a key has min_samples outputs the caller's default is
+kept as a floor.
+
+Enabled with AQU_ADAPTIVE_TOKENS=1:
+- AQU_TOKENS_PERCENTILE: output-length percentile to cover (default 0.95)
+- AQU_TOKENS_HEADROOM:   multiplier on that percentile (default 1.25)
+- AQU_TOKENS_MAX:        largest max_tokens or thinking budget chosen (default 8192)
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+import os
+import threading
+from collections import defaultdict, deque
+from collections.abc import Iterable
+from typing import Any
+
+from clients.bedrock import MIN_THINKING_BUDGET, STOP_MAX_TOKENS
+from observability.metrics import TOKEN_LIMITS
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_TOKENS = 2048
+DEFAULT_THINKING_BUDGET = 2048
+
+
+def _percentile(samples: Iterable[int], q: float) -> int:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))]
+
+
+class OutputSizer:
+    """
+    Picks max_tokens and thinking budgets per step and model from recent outputs.
+
+    Args:
+        percentile: Fraction of observed outputs the limit should cover
+        headroom: Multiplier applied to that percentile
+        min_samples: Outputs needed before a key may go below the caller's default
+        floor: Smallest max_tokens chosen
+        ceiling: Largest max_tokens or thinking budget chosen
+        window: Outputs kept per key
+    """
+
+    def __init__(
+        self,
+        percentile: float = 0.95,
+        headroom: float = 1.25,
+        min_samples: int = 5,
+        floor: int = 256,
+        ceiling: int = 8192,
+        window: int = 200,
+    ):
+        if not 0 < percentile <= 1:
+            raise ValueError(f"percentile must be in (0, 1], got {percentile}")
+        self.percentile = percentile
+        self.headroom = headroom
+        self.min_samples = min_samples
+        self.floor = floor
+        self.ceiling = ceiling
+        self._lock = threading.Lock()
+        self._answers: dict[tuple[str, str, bool], deque[int]] = defaultdict(lambda: deque(maxlen=window))
+        self._thinking: dict[tuple[str, str, bool], deque[int]] = defaultdict(lambda: deque(maxlen=window))
+
+    @classmethod
+    def from_env(cls) -> OutputSizer | None:
+        if os.getenv("AQU_ADAPTIVE_TOKENS", "").lower() not in ("1", "true", "yes"):
+            return None
+        percentile = float(os.getenv("AQU_TOKENS_PERCENTILE", "0.95"))
+        headroom = float(os.getenv("AQU_TOKENS_HEADROOM", "1.25"))
+        ceiling = int(os.getenv("AQU_TOKENS_MAX", "8192"))
+        logger.info(f"Adaptive max_tokens enabled (p{percentile * 100:g} x {headroom}, max {ceiling})")
+        return cls(percentile, headroom, ceiling=ceiling)
+
+    def _limit(self, samples: dict[tuple[str, str, bool], deque[int]], key: tuple, default: int, floor: int) -> int:
+        with self._lock:
+            observed = list(samples.get(key, ()))
+        if not observed:
+            return default
+        limit = math.ceil(_percentile(observed, self.percentile) * self.headroom)
+        if len(observed) < self.min_samples:
+            limit = max(limit, default)
+        return min(self.ceiling, max(floor, limit))
+
+    def size(
+        self, step: str, model_id: str, default_max_tokens: int, use_thinking: bool = False, thinking_budget: int = 0
+    ) -> tuple[int, int]:
+        """Return (max_tokens, thinking_budget) for the next call of `step` (a current_step() label) on `model_id`."""
+        key = (step, model_id, use_thinking)
+        max_tokens = self._limit(self._answers, key, default_max_tokens, self.floor)
+        TOKEN_LIMITS.set(max_tokens, step=step, model=model_id, kind="max_tokens")
+        if use_thinking:
+            thinking_budget = self._limit(self._thinking, key, thinking_budget, MIN_THINKING_BUDGET)
+            TOKEN_LIMITS.set(thinking_budget, step=step, model=model_id, kind="thinking_budget")
+        return max_tokens, thinking_budget
+
+    def observe(self, step: str, model_id: str, use_thinking: bool, max_tokens: int, metrics: Any) -> None:
+        """Record one billed call's output length (a truncated answer counts as twice its limit)."""
+        if not metrics.output_tokens:
+            return  # response-cache hit: nothing was generated
+        thinking = metrics.thinking_tokens if use_thinking else 0
+        answer = metrics.output_tokens - thinking
+        if metrics.stop_reason == STOP_MAX_TOKENS:
+            answer = max(answer, max_tokens) * 2
+        key = (step, model_id, use_thinking)
+        with self._lock:
+            self._answers[key].append(answer)
+            if use_thinking:
+                self._thinking[key].append(thinking)
+
+
+_sizer_lock = threading.Lock()
+_sizer: OutputSizer | None = None
+_sizer_loaded = False
+
+
+def get_sizer() -> OutputSizer | None:
+    """The process-wide sizer (None unless AQU_ADAPTIVE_TOKENS=1)."""
+    global _sizer, _sizer_loaded
+    with _sizer_lock:
+        if not _sizer_loaded:
+            _sizer = OutputSizer.from_env()
+            _sizer_loaded = True
+        return _sizer
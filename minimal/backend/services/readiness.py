@@ -0,0 +1,332 @@
+"""
+Readiness probes for the API server's dependencies.
+
+/health only says the process is up. /ready asks the dependencies:
+
+- One probe per provider and tier sends a minimal request to the model
+  (a one-token Bedrock call, a few-token chat completion), without the
+  runtime's retry loop or usage log. Probes take a model-call slot like any
+  other call, so they stay inside the adaptive limit. One more probe
+  round-trips SELECT 1 through the Repo.
+- A probe the provider throttles counts as reachable but busy: the
+  dependency is up, and the outcome is not fed to the circuit breakers.
+- All probes run concurrently. A probe that has not answered within
+  `timeout_s` counts as failed, and it is not started again while it is
+  still running.
+- Rounds run in a background thread every `interval_s`, started by the
+  first get_readiness(). /ready only reads the latest round, so its request
+  rate does not change how often the models are called.
+- Each dependency keeps a rolling window of outcomes (error rate, p50/p95
+  latency). Listeners receive every probe outcome; attach_router() feeds
+  them to a RoutingRuntime's circuit breakers.
+
+The server is ready when the database answers and every tier has at least
+one provider whose latest probe passed.
+
+Configured with:
+- AQU_READINESS_INTERVAL_S: seconds between probe rounds (default 60)
+- AQU_READINESS_TIMEOUT_S:  seconds to wait for a probe (default 10)
+- AQU_READINESS_PROVIDERS:  providers to probe (default: anthropic, plus
+  openai when OpenAI or Azure credentials are set)
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+import os
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from typing import Any
+
+from clients.bedrock import BedrockRuntime
+from clients.openai_client import OpenAIRuntime
+from clients.provider import get_provider_info
+from observability.metrics import DEPENDENCY_PROBE_DURATION, DEPENDENCY_PROBES, DEPENDENCY_UP
+from persistence.repo import Repo
+
+logger = logging.getLogger(__name__)
+
+DATABASE = "database"
+
+
+@dataclass(frozen=True)
+class Probe:
+    """A cheap check of one dependency; `check` raises when it is unhealthy, `is_busy` tells load apart."""
+
+    name: str
+    check: Callable[[], Any]
+    provider: str = ""
+    model: str = ""
+    tier: str = ""
+    is_busy: Callable[[BaseException], bool] | None = None
+
+
+@dataclass(frozen=True)
+class ProbeResult:
+    ok: bool
+    latency_s: float
+    error: str = ""
+    busy: bool = False  # throttled: reachable, but refusing calls for load
+
+
+class DependencyStats:
+    """Rolling window of probe outcomes for one dependency."""
+
+    def __init__(self, window: int = 20):
+        self._results: deque[ProbeResult] = deque(maxlen=window)
+
+    def add(self, result: ProbeResult) -> None:
+        self._results.append(result)
+
+    @property
+    def latest(self) -> ProbeResult | None:
+        return self._results[-1] if self._results else None
+
+    def _percentile(self, pct: float) -> float | None:
+        latencies = sorted(result.latency_s for result in self._results if result.ok and not result.busy)
+        if not latencies:
+            return None
+        return latencies[max(1, math.ceil(pct * len(latencies))) - 1]
+
+    def summary(self) -> dict[str, Any]:
+        latest = self.latest
+        p50, p95 = self._percentile(0.5), self._percentile(0.95)
+        failures = sum(not result.ok for result in self._results)
+        return {
+            "ok": latest is not None and latest.ok,
+            "busy": latest is not None and latest.busy,
+            "latency_ms": round(latest.latency_s * 1000, 1) if latest else None,
+            "error": latest.error if latest else "",
+            "error_rate": round(failures / len(self._results), 3) if self._results else None,
+            "p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+            "samples": len(self._results),
+        }
+
+
+class ReadinessMonitor:
+    """
+    Runs probe rounds concurrently and keeps the latest readiness report.
+
+    Args:
+        probes: Dependencies to check
+        interval_s: Seconds between rounds once start() is called
+        timeout_s: Seconds to wait for a probe before counting it as failed
+        window: Probe outcomes kept per dependency for error rate and latency percentiles
+        clock: Monotonic time source (overridable for tests)
+    """
+
+    def __init__(
+        self,
+        probes: list[Probe],
+        interval_s: float = 60.0,
+        timeout_s: float = 10.0,
+        window: int = 20,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.probes = probes
+        self.interval_s = interval_s
+        self.timeout_s = timeout_s
+        self._clock = clock
+        self._lock = threading.Lock()  # stats, listeners and the report
+        self._round_lock = threading.RLock()  # one round at a time
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._stats = {probe.name: DependencyStats(window) for probe in probes}
+        self._running: dict[str, Future] = {}
+        self._listeners: list[Callable[[Probe, ProbeResult], None]] = []
+        self._executor = ThreadPoolExecutor(max_workers=max(1, len(probes)), thread_name_prefix="readiness")
+        self._checked_at: float | None = None
+        self._checked_at_iso = ""
+
+    @classmethod
+    def from_env(cls) -> ReadinessMonitor:
+        providers = [p.strip() for p in os.getenv("AQU_READINESS_PROVIDERS", "").split(",") if p.strip()]
+        if not providers:
+            azure = os.getenv("AZURE_OPENAI_ENDPOINT") and os.getenv("AZURE_OPENAI_API_KEY")
+            providers = ["anthropic", "openai"] if os.getenv("OPENAI_API_KEY") or azure else ["anthropic"]
+        return cls(
+            default_probes(providers),
+            interval_s=float(os.getenv("AQU_READINESS_INTERVAL_S", "60")),
+            timeout_s=float(os.getenv("AQU_READINESS_TIMEOUT_S", "10")),
+        )
+
+    def subscribe(self, listener: Callable[[Probe, ProbeResult], None]) -> None:
+        """Call listener(probe, result) after every probe."""
+        with self._lock:
+            self._listeners.append(listener)
+
+    def attach_router(self, router: Any) -> None:
+        """Feed model probes to a RoutingRuntime's circuit breakers."""
+
+        def feed(probe: Probe, result: ProbeResult) -> None:
+            # A throttled probe says nothing about whether the route works; live calls count their own throttles
+            if probe.model and not result.busy:
+                router.record_probe(probe.provider, probe.model, result.ok, result.latency_s)
+
+        self.subscribe(feed)
+
+    def _timed(self, probe: Probe) -> ProbeResult:
+        start = time.perf_counter()
+        try:
+            probe.check()
+        except Exception as exc:
+            error = f"{type(exc).__name__}: {exc}"[:300]
+            busy = probe.is_busy is not None and probe.is_busy(exc)
+            return ProbeResult(busy, time.perf_counter() - start, error, busy=busy)
+        return ProbeResult(True, time.perf_counter() - start)
+
+    def run_round(self) -> None:
+        """Probe every dependency once and record the outcomes; rounds never overlap."""
+        with self._round_lock:
+            for probe in self.probes:
+                if probe.name not in self._running:
+                    self._running[probe.name] = self._executor.submit(self._timed, probe)
+            wait(list(self._running.values()), timeout=self.timeout_s)
+
+            results = []
+            for probe in self.probes:
+                future = self._running[probe.name]
+                if future.done():
+                    del self._running[probe.name]
+                    results.append((probe, future.result()))
+                else:
+                    error = f"no answer within {self.timeout_s:g}s"
+                    results.append((probe, ProbeResult(False, self.timeout_s, error)))
+            with self._lock:
+                for probe, result in results:
+                    self._stats[probe.name].add(result)
+                self._checked_at = self._clock()
+                self._checked_at_iso = datetime.now(UTC).isoformat()
+                listeners = list(self._listeners)
+            for probe, result in results:
+                self._record(probe, result, listeners)
+
+    def start(self) -> None:
+        """Run a round every interval_s in a background thread (idempotent)."""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run_rounds, name="readiness-rounds", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background rounds, waiting for the current one to finish."""
+        self._stop.set()
+        with self._lock:
+            thread = self._thread
+        if thread is not None:
+            thread.join()
+
+    def _run_rounds(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.run_round()
+            except Exception:
+                logger.exception("Readiness probe round failed")
+            self._stop.wait(self.interval_s)
+
+    def _record(self, probe: Probe, result: ProbeResult, listeners: list[Callable[[Probe, ProbeResult], None]]) -> None:
+        DEPENDENCY_PROBE_DURATION.observe(result.latency_s, dependency=probe.name)
+        outcome = "busy" if result.busy else "ok" if result.ok else "error"
+        DEPENDENCY_PROBES.inc(dependency=probe.name, outcome=outcome)
+        DEPENDENCY_UP.set(1 if result.ok else 0, dependency=probe.name)
+        if result.busy:
+            logger.info(f"Readiness probe {probe.name} was throttled: {result.error}")
+        elif not result.ok:
+            logger.warning(f"Readiness probe {probe.name} failed: {result.error}")
+        for listener in listeners:
+            try:
+                listener(probe, result)
+            except Exception:
+                logger.exception(f"Readiness listener failed for {probe.name}")
+
+    def _ready(self) -> bool:
+        tiers: dict[str, bool] = {}
+        for probe in self.probes:
+            ok = self._stats[probe.name].summary()["ok"]
+            if not probe.tier:
+                if not ok:
+                    return False
+                continue
+            tiers[probe.tier] = tiers.get(probe.tier, False) or ok
+        return all(tiers.values())
+
+    def report(self, refresh: bool = False) -> dict[str, Any]:
+        """The latest readiness report; probes first only before the first round (or when refresh is set)."""
+        if refresh or self._checked_at is None:
+            with self._round_lock:
+                # Concurrent first requests share the round that ran while they waited
+                if refresh or self._checked_at is None:
+                    self.run_round()
+        with self._lock:
+            dependencies = {}
+            for probe in self.probes:
+                entry = self._stats[probe.name].summary()
+                if probe.model:
+                    entry.update(provider=probe.provider, tier=probe.tier, model=probe.model)
+                dependencies[probe.name] = entry
+            return {
+                "ready": self._ready(),
+                "checked_at": self._checked_at_iso,
+                "age_s": round(self._clock() - self._checked_at, 1),
+                "dependencies": dependencies,
+            }
+
+
+def default_probes(providers: list[str]) -> list[Probe]:
+    """One probe per tier of each provider, plus the database."""
+    probes = []
+    for provider in providers:
+        runtime = _probe_runtime(provider)
+        for tier, model in get_provider_info(provider)["models"].items():
+            probes.append(
+                Probe(
+                    f"{provider}/{tier}",
+                    lambda m=model, r=runtime: r.probe(m),
+                    provider,
+                    model,
+                    tier,
+                    is_busy=runtime.is_throttle,
+                )
+            )
+
+    repo: list[Repo] = []
+
+    def ping_database() -> None:
+        # Repo() creates the tables on first connect; reuse it afterwards
+        if not repo:
+            repo.append(Repo())
+        repo[0].ping()
+
+    probes.append(Probe(DATABASE, ping_database))
+    return probes
+
+
+def _probe_runtime(provider: str) -> Any:
+    # A runtime of its own: probes must not share retry settings or usage logs with pipeline calls
+    if provider == "anthropic":
+        return BedrockRuntime(region="us-west-2")
+    if provider == "openai":
+        return OpenAIRuntime()
+    raise ValueError(f"Unsupported provider: {provider}. Must be 'anthropic' or 'openai'")
+
+
+_monitor: ReadinessMonitor | None = None
+_monitor_lock = threading.Lock()
+
+
+def get_readiness() -> ReadinessMonitor:
+    """The process-wide readiness monitor, probing in the background from its first use."""
+    global _monitor
+    with _monitor_lock:
+        if _monitor is None:
+            _monitor = ReadinessMonitor.from_env()
+            _monitor.start()
+        return _monitor
@@ -0,0 +1,211 @@
+"""
+Central scheduler for model calls.
+
+Interactive requests (/api/generate-stream, /api/generate), pool refills and
+batch jobs compete for the same provider quota. Every provider request made
+through an Invoker takes a slot from one ModelCallScheduler. The runtime takes
+it inside its retry loop (clients.concurrency.request_slot), so a slot covers
+the request itself and not retry back-off or the pause after a call:
+
+- Priority classes: interactive, refill and batch. The class comes from the
+  caller's context (priority_scope); unscoped calls count as interactive.
+- Weighted fair queuing between classes: each queued call gets a virtual
+  finish tag of 1/weight past its class's previous tag, and the smallest tag
+  runs next. Under contention refill and batch share slots 3:1 rather than
+  one starving the other.
+- Preemption: a waiting interactive call runs before every queued call of a
+  lower class, whatever their tags are.
+- Reserved capacity: the last `reserved` slots only go to interactive calls.
+  This stops a batch from filling every slot with long requests while a
+  student waits.
+
+Calls that have already been dispatched are never interrupted. Only queued
+calls are reordered. The scheduler is per process: the API server and any
+batch it runs in-process share it.
+
+Enabled with AQU_SCHEDULER=1:
+- AQU_SCHED_CAPACITY: model calls dispatched at once (default 4)
+- AQU_SCHED_RESERVED: slots kept free for interactive calls (default 1)
+- AQU_SCHED_WEIGHTS:  e.g. "interactive=8,refill=3,batch=1"
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from collections import deque
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from observability.metrics import SCHEDULER_PREEMPTIONS, SCHEDULER_QUEUED, SCHEDULER_WAIT
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = "interactive"
+REFILL = "refill"
+BATCH = "batch"
+PRIORITIES = (INTERACTIVE, REFILL, BATCH)  # highest first
+PREEMPTIVE = frozenset({INTERACTIVE})
+DEFAULT_WEIGHTS = {INTERACTIVE: 8.0, REFILL: 3.0, BATCH: 1.0}
+
+_priority: ContextVar[str] = ContextVar("aqumen_call_priority", default=INTERACTIVE)
+
+
+def current_priority() -> str:
+    return _priority.get()
+
+
+@contextmanager
+def priority_scope(priority: str) -> Iterator[None]:
+    """Run model calls made in this block (and threads that copy its context) at `priority`."""
+    if priority not in PRIORITIES:
+        raise ValueError(f"Unknown priority {priority!r}; expected one of {PRIORITIES}")
+    previous = _priority.get()
+    # Restore explicitly (not via token): pipeline generators may resume on another thread
+    _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.set(previous)
+
+
+@dataclass
+class _Ticket:
+    priority: str
+    tag: float
+    enqueued: float
+    granted: bool = False
+
+
+class ModelCallScheduler:
+    """
+    Admission queue for model calls with priority classes and weighted fair queuing.
+
+    Args:
+        capacity: Calls dispatched at once
+        reserved: Slots only interactive (preemptive) calls may use
+        weights: Relative share per priority class under contention
+    """
+
+    def __init__(self, capacity: int = 4, reserved: int = 1, weights: dict[str, float] | None = None):
+        if capacity < 1:
+            raise ValueError(f"capacity must be >= 1, got {capacity}")
+        if not 0 <= reserved < capacity:
+            raise ValueError(f"reserved must be in [0, capacity), got {reserved}")
+        self.capacity = capacity
+        self.reserved = reserved
+        self.weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+        if any(weight <= 0 for weight in self.weights.values()):
+            raise ValueError(f"weights must be positive, got {self.weights}")
+        self._cond = threading.Condition()
+        self._queues: dict[str, deque[_Ticket]] = {priority: deque() for priority in PRIORITIES}
+        self._last_tag = dict.fromkeys(PRIORITIES, 0.0)
+        self._virtual_time = 0.0
+        self._in_flight = 0
+
+    @classmethod
+    def from_env(cls) -> ModelCallScheduler | None:
+        if os.getenv("AQU_SCHEDULER", "").lower() not in ("1", "true", "yes"):
+            return None
+        capacity = int(os.getenv("AQU_SCHED_CAPACITY", "4"))
+        reserved = int(os.getenv("AQU_SCHED_RESERVED", "1"))
+        weights = {}
+        for part in filter(None, os.getenv("AQU_SCHED_WEIGHTS", "").split(",")):
+            name, _, value = part.partition("=")
+            weights[name.strip()] = float(value)
+        logger.info(f"Model-call scheduler enabled (capacity {capacity}, {reserved} reserved for interactive)")
+        return cls(capacity, reserved, weights)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def queued(self, priority: str | None = None) -> int:
+        with self._cond:
+            if priority is not None:
+                return len(self._queues[priority])
+            return sum(len(queue) for queue in self._queues.values())
+
+    def _next_ticket(self) -> _Ticket | None:
+        """The ticket to dispatch next, or None if nothing may run now."""
+        free = self.capacity - self._in_flight
+        if free <= 0:
+            return None
+        for priority in PRIORITIES:
+            if priority in PREEMPTIVE and self._queues[priority]:
+                return self._queues[priority][0]
+        if free <= self.reserved:
+            return None
+        heads = [queue[0] for priority, queue in self._queues.items() if queue and priority not in PREEMPTIVE]
+        return min(heads, key=lambda ticket: (ticket.tag, ticket.enqueued), default=None)
+
+    def _dispatch(self) -> None:
+        woke = False
+        while (ticket := self._next_ticket()) is not None:
+            self._queues[ticket.priority].popleft()
+            SCHEDULER_QUEUED.set(len(self._queues[ticket.priority]), priority=ticket.priority)
+            if ticket.priority in PREEMPTIVE:
+                overtaken = sum(1 for q in self._queues.values() for other in q if other.priority not in PREEMPTIVE)
+                if overtaken:
+                    SCHEDULER_PREEMPTIONS.inc(priority=ticket.priority)
+            self._virtual_time = max(self._virtual_time, ticket.tag)
+            ticket.granted = True
+            self._in_flight += 1
+            woke = True
+        if woke:
+            self._cond.notify_all()
+
+    def acquire(self, priority: str | None = None) -> None:
+        """Block until a call of this priority may run."""
+        priority = priority or current_priority()
+        with self._cond:
+            tag = max(self._virtual_time, self._last_tag[priority]) + 1.0 / self.weights[priority]
+            self._last_tag[priority] = tag
+            ticket = _Ticket(priority, tag, time.monotonic())
+            self._queues[priority].append(ticket)
+            SCHEDULER_QUEUED.set(len(self._queues[priority]), priority=priority)
+            try:
+                self._dispatch()
+                while not ticket.granted:
+                    self._cond.wait()
+            except BaseException:
+                if ticket.granted:
+                    self._in_flight -= 1
+                else:
+                    self._queues[priority].remove(ticket)
+                    SCHEDULER_QUEUED.set(len(self._queues[priority]), priority=priority)
+                self._dispatch()
+                raise
+        SCHEDULER_WAIT.observe(time.monotonic() - ticket.enqueued, priority=priority)
+
+    def release(self) -> None:
+        with self._cond:
+            self._in_flight -= 1
+            self._dispatch()
+
+    @contextmanager
+    def slot(self, priority: str | None = None) -> Iterator[None]:
+        self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release()
+
+
+_scheduler_lock = threading.Lock()
+_scheduler: ModelCallScheduler | None = None
+_scheduler_loaded = False
+
+
+def get_scheduler() -> ModelCallScheduler | None:
+    """The process-wide scheduler (None unless AQU_SCHEDULER=1)."""
+    global _scheduler, _scheduler_loaded
+    with _scheduler_lock:
+        if not _scheduler_loaded:
+            _scheduler = ModelCallScheduler.from_env()
+            _scheduler_loaded = True
+        return _scheduler
@@ -0,0 +1,20 @@
+"""
+Integration tests for API server cold start.
+
+Each test starts a fresh interpreter and imports the whole server; deselect
+with `pytest -m "not slow"`.
+"""
+
+import pytest
+
+from bench_cold_start import measure_cold_start
+
+
+@pytest.mark.slow
+class TestColdStart:
+    """Test suite for the first /health of a fresh server process."""
+
+    def test_health_answers_before_sdks_load(self):
+        result = measure_cold_start()
+        assert result["status"] == 200
+        assert result["eager_modules"] == []
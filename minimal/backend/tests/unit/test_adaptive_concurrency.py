@@ -0,0 +1,99 @@
+"""
+Unit tests for per-model adaptive (AIMD) concurrency limits.
+"""
+
+import contextlib
+import io
+import json
+import threading
+
+import pytest
+from botocore.exceptions import ClientError
+
+from clients import bedrock, concurrency
+from clients.bedrock import BedrockRuntime
+from clients.concurrency import AdaptiveConcurrency, AdaptiveLimiter
+from observability.metrics import MODEL_CONCURRENCY_LIMIT
+
+
+class Throttled(Exception):
+    pass
+
+
+def _throttle(limiter):
+    with pytest.raises(Throttled):
+        with limiter.slot(lambda exc: isinstance(exc, Throttled)):
+            raise Throttled()
+
+
+class TestAdaptiveLimiter:
+    """Test suite for additive increase / multiplicative decrease."""
+
+    def test_limit_grows_by_one_per_window_of_successes(self):
+        limiter = AdaptiveLimiter("grow", initial=2, maximum=4)
+        for expected in (2, 3, 3, 3, 4):
+            with limiter.slot():
+                pass
+            assert limiter.limit == expected
+        for _ in range(10):
+            with limiter.slot():
+                pass
+        assert limiter.limit == 4
+        assert MODEL_CONCURRENCY_LIMIT.value(model="grow") == 4
+
+    def test_one_throttling_burst_cuts_the_limit_once(self):
+        limiter = AdaptiveLimiter("burst", initial=8)
+        # Three calls in flight when the quota runs out: only the first throttle counts
+        in_flight = threading.Barrier(3)
+
+        def call():
+            with contextlib.suppress(Throttled), limiter.slot(lambda exc: isinstance(exc, Throttled)):
+                in_flight.wait(timeout=1)
+                raise Throttled()
+
+        threads = [threading.Thread(target=call) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert limiter.limit == 4 and limiter.in_flight == 0
+
+        _throttle(limiter)
+        assert limiter.limit == 2
+        _throttle(limiter)
+        _throttle(limiter)
+        assert limiter.limit == 1
+        assert MODEL_CONCURRENCY_LIMIT.value(model="burst") == 1
+
+    def test_other_errors_leave_the_limit_alone(self):
+        limiter = AdaptiveLimiter("errors", initial=3)
+        with pytest.raises(ValueError):
+            with limiter.slot(lambda exc: isinstance(exc, Throttled)):
+                raise ValueError("bad request")
+        assert limiter.limit == 3
+
+
+class TestRuntimeThrottling:
+    """Test suite for BedrockRuntime reporting throttles to its model's limiter."""
+
+    def test_throttled_calls_cut_the_models_limit(self, monkeypatch):
+        adaptive = AdaptiveConcurrency(initial=4)
+        monkeypatch.setattr(concurrency, "_adaptive", adaptive)
+        monkeypatch.setattr(concurrency, "_adaptive_loaded", True)
+        monkeypatch.setattr(bedrock.time, "sleep", lambda _: None)
+        data = {"content": [{"type": "text", "text": "ok"}], "usage": {}, "stop_reason": "end_turn"}
+        responses = [ClientError({"Error": {"Code": "ThrottlingException"}}, "InvokeModel"), data]
+
+        class Client:
+            def invoke_model(self, **kwargs):
+                response = responses.pop(0)
+                if isinstance(response, Exception):
+                    raise response
+                return {"body": io.BytesIO(json.dumps(response).encode())}
+
+        runtime = BedrockRuntime()
+        runtime._client = Client()
+        runtime.response_cache = None
+        assert runtime.invoke("aimd-model", "prompt") == "ok"
+        # Halved to 2 by the throttle; the successful retry adds half a slot
+        assert adaptive.limits() == {"aimd-model": 2}
@@ -0,0 +1,153 @@
+"""
+Unit tests for vectorised batch re-scoring of stored step responses.
+"""
+
+import json
+import sqlite3
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+from analytics.batch_rewards import STEP_COLUMNS, iter_run_frames, rescore, score_frame  # noqa: E402
+from analytics.rewards import (  # noqa: E402
+    rewards_step1,
+    rewards_step2,
+    rewards_step3,
+    rewards_step6,
+    rewards_step7,
+    rewards_step45,
+)
+from persistence.repo import Repo  # noqa: E402
+
+CATEGORIES = {
+    "Beginner": ["Cache hit ratios", "TTL basics", "Write through caching"],
+    "Intermediate": ["Cache stampede protection", "LRU eviction policy", "Write behind queues"],
+    "Advanced": ["Distributed cache coherence", "Consistent hashing rings", "Hot key sharding"],
+}
+CATALOG = [
+    {
+        "mistake": f"Mistake {i}",
+        "why_wrong": "Because",
+        "match_hint": "look for the pattern" if i % 2 else "bad",
+        "impact": "Major" if i < 5 else "Huge",
+        "domain_specific": True,
+        "likelihood_strong_avoids": 0.9,
+        "likelihood_weak_makes": 0.7 if i else 1.5,
+    }
+    for i in range(6)
+]
+QUESTION = {
+    "title": "Build a cache",
+    "question_text": "Implement a read-through cache with TTLs",
+    "context": "A busy API",
+    "artifact_type": "code",
+    "requirements": ["read through", "ttl expiry", "bounded memory", "metrics"],
+    "success_criteria": "All requirements met",
+}
+SONNET = "\n".join(["### OUTPUT", "read through cache with ttl", "### RATIONALE", "### CONSIDERATIONS"] + ["line"] * 25)
+HAIKU = "\n".join(["### OUTPUT", "a cache that never expires entries"] + ["line"] * 10)
+JUDGE = {
+    "differentiation_achieved": True,
+    "failures_weaker": ["Mistake 1", "Not in catalog"],
+    "reasoning": "Weak model skipped expiry",
+    "evidence_spans": ["never expires entries"],
+}
+ASSESSMENT = {
+    "title": "Cache review",
+    "content": ["x = 1"] * 23 + ["cache[key] = <<value_stored_without_ttl>>"],
+    "errors": [{"id": "value_stored_without_ttl", "description": "No expiry"}],
+}
+
+
+def _rows():
+    """One complete run as the pipeline logger stores it (repr for steps 1-3, JSON for 6-7)."""
+    run = "20251019_120000"
+    return [
+        (1, run, 1, 1, str(CATEGORIES)),
+        (2, run, 2, 1, str({"errors": CATALOG})),
+        (3, run, 3, 1, str(QUESTION)),
+        (4, run, 4, 1, SONNET),
+        (5, run, 5, 1, HAIKU),
+        (6, run, 6, 1, json.dumps(JUDGE)),
+        (7, run, 7, 0, json.dumps({"model_response": ASSESSMENT, "validation_errors": ["x"]})),
+    ]
+
+
+def _expected():
+    catalog_names = [entry["mistake"] for entry in CATALOG]
+    return {
+        1: rewards_step1(CATEGORIES),
+        2: rewards_step2(CATALOG),
+        3: rewards_step3(QUESTION),
+        4: rewards_step45(SONNET, QUESTION["requirements"]),
+        5: rewards_step45(HAIKU, QUESTION["requirements"]),
+        6: rewards_step6(JUDGE, catalog_names, HAIKU),
+        7: rewards_step7(ASSESSMENT),
+    }
+
+
+class TestScoreFrame:
+    """The batch scorer must agree with the live per-step scorers."""
+
+    def test_matches_live_scorers(self):
+        scored = score_frame(pd.DataFrame(_rows(), columns=STEP_COLUMNS)).set_index("step_response_id")
+        for step_id, report in _expected().items():
+            row = scored.loc[step_id]
+            expected = [{"name": r.name, "passed": bool(r.passed), "detail": r.detail} for r in report.results]
+            assert json.loads(row["detail_json"]) == expected, f"step {step_id}"
+            assert row["pass_rate"] == pytest.approx(report.pass_rate)
+            assert row["num_tests"] == len(report.results)
+
+    def test_failed_steps_score_empty_payload(self):
+        rows = [(1, "run", 1, 0, str(CATEGORIES)), (2, "run", 3, 0, str(QUESTION))]
+        scored = score_frame(pd.DataFrame(rows, columns=STEP_COLUMNS)).set_index("step_response_id")
+        assert scored.loc[1, "pass_rate"] == pytest.approx(rewards_step1({}).pass_rate)
+        assert scored.loc[2, "pass_rate"] == pytest.approx(rewards_step3({}).pass_rate)
+
+    def test_runs_are_not_split_between_frames(self):
+        rows = _rows() + [(8, "20251019_130000", 1, 1, str(CATEGORIES))]
+        batches = [rows[:3], rows[3:5], rows[5:]]
+        frames = list(iter_run_frames(batches))
+        assert [len(frame) for frame in frames] == [7, 1]
+        assert all(frame["run_timestamp"].nunique() == 1 for frame in frames)
+
+
+class TestRescore:
+    """End-to-end re-scoring against a SQLite repo."""
+
+    def test_rescore_writes_versioned_rows(self, tmp_path):
+        repo = Repo(str(tmp_path / "pipeline.db"))
+        for _, run, step, success, response in _rows():
+            repo.save_step(run, "Caching", step, f"step {step}", "model", bool(success), response, "now")
+        repo.save_rewards("20251019_120000", 1, 1.0, [])
+
+        summary = rescore(repo, "rules-v2", batch_size=3)
+
+        assert summary["scored"] == summary["written"] == 7
+        with sqlite3.connect(repo.db_url) as conn:
+            versions = dict(conn.execute("SELECT reward_version, COUNT(*) FROM step_rewards GROUP BY reward_version"))
+            linked = conn.execute(
+                "SELECT COUNT(*) FROM step_rewards r JOIN enhanced_step_responses s ON s.id = r.step_response_id"
+            ).fetchone()[0]
+        assert versions == {"live": 1, "rules-v2": 7}
+        assert linked == 7
+
+    def test_rescore_writes_while_streaming_several_runs(self, tmp_path):
+        repo = Repo(str(tmp_path / "pipeline.db"))
+        for run in ("20251019_120000", "20251019_130000", "20251019_140000"):
+            for _, _, step, success, response in _rows():
+                repo.save_step(run, "Caching", step, f"step {step}", "model", bool(success), response, "now")
+
+        summary = rescore(repo, "rules-v2", batch_size=3)
+
+        assert summary["scored"] == summary["written"] == 21
+        with sqlite3.connect(repo.db_url) as conn:
+            runs = dict(conn.execute("SELECT run_timestamp, COUNT(*) FROM step_rewards GROUP BY run_timestamp"))
+        assert runs == {"20251019_120000": 7, "20251019_130000": 7, "20251019_140000": 7}
+
+    def test_dry_run_writes_nothing(self, tmp_path):
+        repo = Repo(str(tmp_path / "pipeline.db"))
+        repo.save_step("run", "Caching", 1, "step 1", "model", True, str(CATEGORIES), "now")
+        summary = rescore(repo, "rules-v2", dry_run=True)
+        assert summary["scored"] == 1 and summary["written"] == 0
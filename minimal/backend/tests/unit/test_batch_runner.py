@@ -0,0 +1,267 @@
+"""
+Unit tests for the resumable batch runner, its manifests and the model-call limiter.
+"""
+
+import json
+import queue
+import threading
+import time
+
+import pytest
+
+from batch.checkpoint import Checkpoint
+from batch.manifest import items_from_topics, read_manifest
+from batch.progress import ProgressTracker
+from batch.runner import BatchRunner
+from clients.bedrock import UsageMetrics
+from clients.concurrency import ConcurrencyLimiter
+from clients.context import current_run, run_scope
+from legacy_pipeline.models import SevenStepResult
+from legacy_pipeline.orchestrator import new_run_timestamp
+from persistence.queue_repo import QueueRepo, drain
+from persistence.repo import Repo
+
+
+class FakePipeline:
+    """Pipeline double: opens its own run scope and bills one call per run, like the orchestrator."""
+
+    def __init__(self, fail_topics=(), raise_topics=(), delay=0.0):
+        self.fail_topics = set(fail_topics)
+        self.raise_topics = set(raise_topics)
+        self.delay = delay
+        self.run_timestamp = None
+        self.topics = []
+
+    def run_full_pipeline(self, topic, max_attempts=3):
+        self.run_timestamp = new_run_timestamp()
+        self.topics.append(topic)
+        with run_scope(self.run_timestamp):
+            time.sleep(self.delay)
+            current_run().record_usage(UsageMetrics(input_tokens=100, output_tokens=50, total_cost_usd=0.25))
+            if topic in self.raise_topics:
+                raise RuntimeError("provider down")
+        success = topic not in self.fail_topics
+        return SevenStepResult(topic, "sub", "Advanced", [], success, 7 if success else 6, success, success, 1, [])
+
+
+class RepoPipeline(FakePipeline):
+    """Picklable pipeline factory for process mode: persists through the injected repo."""
+
+    def __init__(self, repo):
+        super().__init__(raise_topics={"C"})
+        self.repo = repo
+
+    def run_full_pipeline(self, topic, max_attempts=3):
+        result = super().run_full_pipeline(topic, max_attempts)
+        assert isinstance(self.repo, QueueRepo)
+        self.repo.mark_run_start(self.run_timestamp, topic)
+        self.repo.save_step(self.run_timestamp, topic, 1, "Step", "m", True, "{}", "now")
+        self.repo.mark_run_end(self.run_timestamp, 1, True, True)
+        return result
+
+
+class TestManifest:
+    """Test suite for manifest parsing."""
+
+    def test_csv_manifest(self, tmp_path):
+        path = tmp_path / "topics.csv"
+        path.write_text("topic,id,max_attempts\nLangChain,lc,2\nGradio,,\n")
+        items = read_manifest(path)
+        assert [(i.id, i.topic, i.max_attempts) for i in items] == [("lc", "LangChain", 2), ("gradio", "Gradio", 3)]
+
+    def test_jsonl_manifest_accepts_strings_and_dedupes_ids(self, tmp_path):
+        path = tmp_path / "topics.jsonl"
+        path.write_text('"AI Agents"\n\n{"topic": "AI Agents", "max_attempts": 1}\n')
+        items = read_manifest(path)
+        assert [i.id for i in items] == ["ai-agents", "ai-agents-2"]
+        assert items[1].max_attempts == 1
+
+    def test_errors_name_the_line(self, tmp_path):
+        path = tmp_path / "topics.jsonl"
+        path.write_text('{"topic": "A"}\n{"id": "x"}\n')
+        with pytest.raises(ValueError, match="topics.jsonl:2: missing topic"):
+            read_manifest(path)
+
+    def test_duplicate_ids_are_rejected(self, tmp_path):
+        path = tmp_path / "dup.csv"
+        path.write_text("topic,id\nA,x\nB,x\n")
+        with pytest.raises(ValueError, match="Duplicate manifest id"):
+            read_manifest(path)
+
+
+class TestCheckpoint:
+    """Test suite for the JSONL checkpoint."""
+
+    def test_completed_excludes_errors_and_latest_record_wins(self, tmp_path):
+        checkpoint = Checkpoint(tmp_path / "cp.jsonl")
+        checkpoint.record("a", "success")
+        checkpoint.record("b", "error", error="boom")
+        checkpoint.record("c", "error")
+        checkpoint.record("c", "failed")
+        assert Checkpoint(tmp_path / "cp.jsonl").completed() == {"a", "c"}
+
+    def test_torn_last_line_is_ignored_and_not_glued_to_the_next(self, tmp_path):
+        path = tmp_path / "cp.jsonl"
+        path.write_text('{"id": "a", "status": "success"}\n{"id": "b", "sta')
+        checkpoint = Checkpoint(path)
+        assert checkpoint.completed() == {"a"}
+        checkpoint.record("b", "success")
+        assert Checkpoint(path).completed() == {"a", "b"}
+
+
+class TestBatchRunner:
+    """Test suite for BatchRunner."""
+
+    def test_runs_items_and_reports_real_cost(self, tmp_path):
+        checkpoint = Checkpoint(tmp_path / "cp.jsonl")
+        snapshots = []
+        runner = BatchRunner(
+            lambda: FakePipeline(fail_topics={"B"}, raise_topics={"C"}),
+            checkpoint=checkpoint,
+            workers=2,
+            report=snapshots.append,
+            report_interval_s=0,
+        )
+        summary = runner.run(items_from_topics(["A", "B", "C"]))
+
+        progress = summary.progress
+        assert (progress.succeeded, progress.failed, progress.errors) == (1, 1, 1)
+        assert progress.cost_usd == pytest.approx(0.75)
+        assert progress.input_tokens == 300 and progress.remaining == 0
+        assert len(snapshots) == 3
+        assert summary.records["a"]["cost_usd"] == pytest.approx(0.25)
+        assert summary.records["a"]["run_timestamp"] and summary.records["c"]["error"] == "RuntimeError: provider down"
+
+    def test_resume_skips_completed_items(self, tmp_path):
+        items = items_from_topics(["A", "B", "C"])
+        BatchRunner(
+            lambda: FakePipeline(raise_topics={"C"}), Checkpoint(tmp_path / "cp.jsonl"), report_interval_s=0
+        ).run(items)
+
+        pipeline = FakePipeline()
+        summary = BatchRunner(lambda: pipeline, Checkpoint(tmp_path / "cp.jsonl"), report_interval_s=0).run(items)
+        assert pipeline.topics == ["C"]
+        assert summary.progress.resumed == 2 and summary.progress.succeeded == 1
+        assert {record["status"] for record in summary.records.values()} == {"success"}
+        lines = (tmp_path / "cp.jsonl").read_text().splitlines()
+        assert [json.loads(line)["id"] for line in lines] == ["a", "b", "c", "c"]
+
+    def test_each_worker_gets_its_own_pipeline(self):
+        pipelines = []
+
+        def factory():
+            pipelines.append(FakePipeline(delay=0.05))
+            return pipelines[-1]
+
+        BatchRunner(factory, workers=3, report_interval_s=0).run(items_from_topics(["A", "B", "C", "D", "E", "F"]))
+        assert 1 < len(pipelines) <= 3
+        assert sum(len(p.topics) for p in pipelines) == 6
+
+
+class TestProcessPool:
+    """Test suite for process-pool mode with a single writer process."""
+
+    def test_workers_report_through_the_writer(self, tmp_path):
+        db = tmp_path / "pipeline.db"
+        runner = BatchRunner(
+            RepoPipeline, Checkpoint(tmp_path / "cp.jsonl"), processes=2, db_url=db, report_interval_s=0
+        )
+        summary = runner.run(items_from_topics(["A", "B", "C"]))
+
+        assert (summary.progress.succeeded, summary.progress.errors) == (2, 1)
+        assert summary.progress.cost_usd == pytest.approx(0.75)
+        assert {item_id: r["status"] for item_id, r in summary.records.items()} == {
+            "a": "success",
+            "b": "success",
+            "c": "error",
+        }
+        runs = list(Repo(str(db)).iter_runs(10))
+        assert sorted(run["topic"] for run in runs) == ["A", "B"]
+        assert all(run["final_success"] for run in runs)
+
+    def test_queue_repo_forwards_writes_and_reads_directly(self, tmp_path):
+        db = str(tmp_path / "pipeline.db")
+        write_queue = queue.Queue()
+        repo = QueueRepo(write_queue, db)
+        repo.mark_run_start("20250101_000000_000001", "Topic")
+        repo.save_weak_failures("20250101_000000_000001", "Topic", "Sub", [("off by one", "Off-by-one")])
+        assert not repo.run_exists("20250101_000000_000001")  # not applied yet
+
+        write_queue.put(("unknown", 1))
+        write_queue.put(None)
+        assert drain(write_queue, Repo(db)) == 2
+        assert repo.run_exists("20250101_000000_000001")
+        assert repo.failure_stats("Topic")[0][0] == "off by one"
+
+
+class TestProgress:
+    """Test suite for throughput / ETA math."""
+
+    def test_eta_and_projection(self):
+        now = [0.0]
+        tracker = ProgressTracker(10, resumed=2, clock=lambda: now[0])
+        assert tracker.snapshot().eta_s is None
+        for _ in range(2):
+            tracker.start_item()
+            tracker.finish_item("success", {"cost_usd": 0.5, "input_tokens": 10, "output_tokens": 5})
+        now[0] = 60.0
+        snapshot = tracker.snapshot()
+        assert snapshot.runs_per_minute == pytest.approx(2.0)
+        assert snapshot.remaining == 6 and snapshot.eta_s == pytest.approx(180.0)
+        assert snapshot.projected_cost_usd == pytest.approx(4.0)
+        assert "4/10 done" in snapshot.format() and "ETA 3m00s" in snapshot.format()
+
+
+class TestConcurrencyLimiter:
+    """Test suite for the process-wide model-call limiter."""
+
+    def test_caps_in_flight_holders(self):
+        limiter = ConcurrencyLimiter(2)
+        peak = []
+        lock = threading.Lock()
+
+        def call():
+            with limiter.slot():
+                with lock:
+                    peak.append(limiter.in_flight)
+                time.sleep(0.02)
+
+        threads = [threading.Thread(target=call) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert max(peak) <= 2 and limiter.in_flight == 0
+
+    def test_raising_the_limit_wakes_waiters(self):
+        limiter = ConcurrencyLimiter(1)
+        limiter.acquire()
+        acquired = threading.Event()
+
+        def waiter():
+            with limiter.slot():
+                acquired.set()
+
+        thread = threading.Thread(target=waiter)
+        thread.start()
+        assert not acquired.wait(0.05)
+        limiter.set_limit(None)
+        assert acquired.wait(1)
+        thread.join()
+        limiter.release()
+
+
+class TestRunContextUsage:
+    """Test suite for per-run usage accounting."""
+
+    def test_usage_rolls_up_to_enclosing_scopes(self):
+        with run_scope("batch") as outer:
+            with run_scope("run") as inner:
+                current_run().record_usage(UsageMetrics(input_tokens=7, output_tokens=3, total_cost_usd=0.01))
+        assert inner.usage()["input_tokens"] == 7
+        assert outer.usage() == {"model_calls": 1, "input_tokens": 7, "output_tokens": 3, "cost_usd": 0.01}
+        assert current_run() is None
+
+    def test_run_timestamps_are_unique(self):
+        stamps = [new_run_timestamp() for _ in range(200)]
+        assert len(set(stamps)) == 200 and stamps == sorted(stamps)
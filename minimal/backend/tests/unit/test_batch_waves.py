@@ -0,0 +1,97 @@
+"""
+Unit tests for wave mode: model calls submitted as batch-inference jobs step by step.
+"""
+
+import io
+import json
+
+import pytest
+
+from batch.checkpoint import Checkpoint
+from batch.manifest import items_from_topics
+from batch.runner import BatchRunner
+from clients import bedrock
+from clients.batch_inference import LocalFileSubmitter, parse_output
+from clients.context import run_scope
+from legacy_pipeline.models import SevenStepResult
+from legacy_pipeline.orchestrator import new_run_timestamp
+from observability.metrics import BATCH_WAVE_RECORDS
+
+MID = "us.anthropic.claude-sonnet-4-5-20250929-v1:0"
+STRONG = "us.anthropic.claude-opus-4-1-20250805-v1:0"
+TOOLS = [{"name": "answer_tool", "input_schema": {"type": "object"}}]
+RESPONSE = {
+    "content": [{"type": "tool_use", "input": {"ok": True}}],
+    "usage": {"input_tokens": 1000, "output_tokens": 1000},
+    "stop_reason": "tool_use",
+}
+
+
+def respond(model_id, model_input):
+    if "bad" in model_input["messages"][0]["content"]:
+        raise ValueError("invalid request")
+    return RESPONSE
+
+
+class WavePipeline:
+    """Pipeline double: Steps 1-2 on the mid tier, Step 3 on the strong tier; "short" topics stop after Step 1."""
+
+    def __init__(self, runtime):
+        self.runtime = runtime
+        self.run_timestamp = None
+
+    def run_full_pipeline(self, topic, max_attempts=3):
+        self.run_timestamp = new_run_timestamp()
+        models = [MID] if topic.startswith("short") else [MID, MID, STRONG]
+        with run_scope(self.run_timestamp):
+            for step, model in enumerate(models, 1):
+                assert self.runtime.invoke_with_tools(model, f"{topic} step {step}", TOOLS) == {"ok": True}
+        return SevenStepResult(topic, "sub", "Advanced", [], True, 7, True, True, 1, [])
+
+
+class TestWaves:
+    """Test suite for BatchRunner in wave mode."""
+
+    def test_runs_move_through_the_steps_in_waves(self, tmp_path):
+        submitter = LocalFileSubmitter(tmp_path / "jobs", respond)
+        runner = BatchRunner(WavePipeline, Checkpoint(tmp_path / "ck.jsonl"), report_interval_s=0, submitter=submitter)
+        summary = runner.run(items_from_topics(["Caching", "Transformers", "short topic"]))
+
+        assert [(model, records) for _, model, records in submitter.jobs] == [(MID, 3), (MID, 2), (STRONG, 2)]
+        first_job = submitter.jobs[0][0]
+        records = parse_output((tmp_path / "jobs" / f"{first_job}.jsonl.out").read_text())
+        assert all(line["modelOutput"] == RESPONSE for line in records.values())
+
+        assert {record["status"] for record in summary.records.values()} == {"success"}
+        # Batch inference bills half the on-demand price: 1k in + 1k out on Sonnet is $0.018 on demand
+        assert summary.records["short-topic"]["cost_usd"] == pytest.approx(0.009)
+
+    def test_failed_records_drop_the_run_from_later_waves(self, tmp_path):
+        submitter = LocalFileSubmitter(tmp_path / "jobs", respond)
+        runner = BatchRunner(WavePipeline, report_interval_s=0, submitter=submitter)
+        summary = runner.run(items_from_topics(["Caching", "bad topic"]))
+
+        assert summary.progress.errors == 1
+        assert [records for _, _, records in submitter.jobs] == [2, 1, 1]
+        input_lines = (tmp_path / "jobs" / f"{submitter.jobs[0][0]}.jsonl").read_text().splitlines()
+        assert {json.loads(line)["recordId"] for line in input_lines} == {"000000", "000001"}
+
+    def test_groups_below_min_records_run_on_demand(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(bedrock.time, "sleep", lambda _: None)
+
+        class Client:
+            def invoke_model(self, **kwargs):
+                return {"body": io.BytesIO(json.dumps(RESPONSE).encode())}
+
+        def factory(runtime):
+            runtime._client = Client()
+            return WavePipeline(runtime)
+
+        submitter = LocalFileSubmitter(tmp_path / "jobs", respond, min_records=2)
+        before = BATCH_WAVE_RECORDS.value(mode="on_demand")
+        runner = BatchRunner(factory, Checkpoint(tmp_path / "ck.jsonl"), report_interval_s=0, submitter=submitter)
+        summary = runner.run(items_from_topics(["short topic"]))
+
+        assert submitter.jobs == []
+        assert BATCH_WAVE_RECORDS.value(mode="on_demand") - before == 1
+        assert summary.records["short-topic"]["cost_usd"] == pytest.approx(0.018)
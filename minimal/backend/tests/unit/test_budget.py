@@ -0,0 +1,176 @@
+"""
+Unit tests for the spend budget governor.
+"""
+
+from datetime import UTC, datetime
+
+import pytest
+
+from clients.bedrock import UsageMetrics
+from clients.context import current_run, run_scope
+from legacy_pipeline.orchestrator import LegacyPipelineOrchestrator
+from observability.instrument import instrument_step
+from observability.metrics import BUDGET_AVOIDED_USD
+from services.budget import (
+    CAP_ATTEMPTS,
+    SCOPE_DAILY,
+    SCOPE_RUN,
+    SCOPE_TOPIC,
+    SKIP_THINKING,
+    STOP_BUDGET_REFUSED,
+    SWITCH_TIER,
+    BudgetExceededError,
+    BudgetGovernor,
+    estimate_call_cost,
+)
+from services.invoke import Invoker
+
+OPUS = "us.anthropic.claude-opus-4-1-20250805-v1:0"
+SONNET = "us.anthropic.claude-sonnet-4-5-20250929-v1:0"
+
+
+class Clock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class TestCallPlanning:
+    """Test suite for downgrading calls as a run's budget runs out."""
+
+    def test_estimate_uses_price_table_key_inside_model_id(self):
+        assert estimate_call_cost("gpt-5-mini-2025-08-07", "x" * 4000, 1000) == pytest.approx(0.015)
+        assert estimate_call_cost(OPUS, "", 1000, thinking_budget=1000) == pytest.approx(0.15)
+        assert estimate_call_cost("unknown-model", "prompt", 1000) == 0.0
+
+    def test_calls_run_unchanged_under_the_soft_threshold(self):
+        budget = BudgetGovernor(run_usd=1.0).start_run("Caching", {OPUS: SONNET})
+        plan = budget.plan_call(OPUS, "", 1000, use_thinking=True, thinking_budget=2048)
+        assert (plan.model_id, plan.use_thinking, plan.actions) == (OPUS, True, ())
+
+    def test_thinking_is_dropped_past_the_soft_threshold(self):
+        budget = BudgetGovernor(run_usd=1.0).start_run("Caching", {OPUS: SONNET})
+        budget.charge(0.5)
+        before = BUDGET_AVOIDED_USD.value(action=SKIP_THINKING)
+        plan = budget.plan_call(OPUS, "", 1000, use_thinking=True, thinking_budget=2048)
+        assert (plan.model_id, plan.use_thinking, plan.actions) == (OPUS, False, (SKIP_THINKING,))
+        assert BUDGET_AVOIDED_USD.value(action=SKIP_THINKING) - before == pytest.approx(2048 * 75 / 1_000_000)
+
+    def test_strong_tier_moves_to_mid_tier_past_the_hard_threshold(self):
+        budget = BudgetGovernor(run_usd=1.0).start_run("Caching", {OPUS: SONNET})
+        budget.charge(0.75)
+        before = BUDGET_AVOIDED_USD.value(action=SWITCH_TIER)
+        plan = budget.plan_call(OPUS, "", 1000)
+        assert (plan.model_id, plan.actions) == (SONNET, (SWITCH_TIER,))
+        assert BUDGET_AVOIDED_USD.value(action=SWITCH_TIER) - before == pytest.approx(0.075 - 0.015)
+
+    def test_calls_that_would_overrun_the_run_cap_are_refused(self):
+        budget = BudgetGovernor(run_usd=1.0).start_run("Caching")
+        budget.charge(0.99)
+        with pytest.raises(BudgetExceededError) as excinfo:
+            budget.plan_call(SONNET, "", 1000)
+        assert excinfo.value.scope == SCOPE_RUN
+
+    def test_no_further_attempts_past_the_hard_threshold(self):
+        budget = BudgetGovernor(run_usd=1.0).start_run("Caching")
+        assert budget.allow_attempt(1)
+        budget.charge(0.3)
+        assert budget.allow_attempt(2)
+        budget.charge(0.55)
+        before = BUDGET_AVOIDED_USD.value(action=CAP_ATTEMPTS)
+        assert not budget.allow_attempt(3)
+        assert BUDGET_AVOIDED_USD.value(action=CAP_ATTEMPTS) - before == pytest.approx(0.85 / 2)
+
+    def test_invoker_applies_the_plan_and_usage_is_charged(self):
+        calls = []
+
+        class Runtime:
+            def invoke_with_tools(self, model_id, prompt, tools, max_tokens, use_thinking, thinking_budget):
+                calls.append((model_id, use_thinking))
+                return {"ok": True}
+
+        governor = BudgetGovernor(daily_usd=1.0)
+        invoker = Invoker(Runtime())
+        with run_scope("run-1") as run:
+            run.budget = governor.start_run("Caching", {OPUS: SONNET})
+            invoker.tools(OPUS, "", [], max_tokens=1000, use_thinking=True)
+            run.record_usage(UsageMetrics(input_tokens=10, output_tokens=10, total_cost_usd=0.9))
+            invoker.tools(OPUS, "", [], max_tokens=1000, use_thinking=True)
+        assert calls == [(OPUS, True), (SONNET, False)]
+        assert run.budget.spent == governor.spent_today() == pytest.approx(0.9)
+
+
+class TestAdmission:
+    """Test suite for refusing new runs over the daily and topic caps."""
+
+    def test_runs_are_refused_until_the_next_utc_day(self):
+        clock = Clock(datetime(2026, 10, 19, 23, 0, tzinfo=UTC).timestamp())
+        governor = BudgetGovernor(daily_usd=1.0, clock=clock)
+        governor.start_run("Caching").charge(1.0)
+        with pytest.raises(BudgetExceededError) as excinfo:
+            governor.admit("Transformers")
+        assert excinfo.value.scope == SCOPE_DAILY and excinfo.value.retry_after_s == 3600
+
+        clock.now += 7200
+        governor.admit("Transformers")
+        assert governor.spent_today() == 0.0
+
+    def test_topic_cap_only_refuses_that_topic(self):
+        governor = BudgetGovernor(topic_usd=0.5)
+        governor.start_run("Caching").charge(0.5)
+        with pytest.raises(BudgetExceededError) as excinfo:
+            governor.admit("Caching")
+        assert excinfo.value.scope == SCOPE_TOPIC
+        governor.admit("Transformers")
+
+    def test_from_env_is_disabled_without_caps(self, monkeypatch):
+        for scope in ("RUN", "TOPIC", "DAILY"):
+            monkeypatch.delenv(f"AQU_BUDGET_{scope}_USD", raising=False)
+        assert BudgetGovernor.from_env() is None
+        monkeypatch.setenv("AQU_BUDGET_DAILY_USD", "25")
+        governor = BudgetGovernor.from_env()
+        assert governor.limits() == {SCOPE_RUN: None, SCOPE_TOPIC: None, SCOPE_DAILY: 25.0}
+        with pytest.raises(ValueError):
+            BudgetGovernor(soft=0.9, hard=0.5)
+
+
+class TestRunCapRefusal:
+    """Test suite for calls the run cap refuses mid-run."""
+
+    def test_invoker_lets_refusals_through_instead_of_an_error_answer(self):
+        class Runtime:
+            def invoke(self, model_id, prompt, max_tokens):
+                raise AssertionError("a refused call must not reach the runtime")
+
+        @instrument_step("4")
+        def step(invoker):
+            return invoker.text(SONNET, "", max_tokens=1000)
+
+        with run_scope("run-1") as run:
+            run.budget = BudgetGovernor(run_usd=1.0).start_run("Caching")
+            run.budget.charge(0.99)
+            with pytest.raises(BudgetExceededError) as excinfo:
+                step(Invoker(Runtime()))
+        assert (excinfo.value.scope, excinfo.value.step) == (SCOPE_RUN, "4")
+
+    def test_refused_call_ends_the_run_as_budget_refused(self, tmp_path):
+        calls = []
+
+        class Runtime:
+            def invoke_with_tools(self, model_id, prompt, tools, max_tokens, use_thinking, thinking_budget):
+                calls.append(tools[0]["name"])
+                current_run().record_usage(UsageMetrics(total_cost_usd=0.99))
+                return {
+                    level: [f"{level} subtopic {i}" for i in range(3)]
+                    for level in ("Beginner", "Intermediate", "Advanced")
+                }
+
+        pipeline = LegacyPipelineOrchestrator(runtime=Runtime())
+        pipeline.script_dir, pipeline.db_path = str(tmp_path), str(tmp_path / "results.db")
+        pipeline.budget_governor = BudgetGovernor(run_usd=1.0)
+        result = pipeline.run_full_pipeline("Caching")
+        assert len(calls) == 1
+        assert [step.step_number for step in result.steps_completed] == [1]
+        assert (result.final_success, result.stopped_at_step, result.stop_reason) == (False, 2, STOP_BUDGET_REFUSED)
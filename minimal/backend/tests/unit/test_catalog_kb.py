@@ -0,0 +1,112 @@
+"""
+Unit tests for the error-catalog knowledge base.
+"""
+
+import pytest
+
+from analytics.catalog_kb import CATALOG_KB_MODEL, CharNgramIndex, ErrorCatalogKB, normalize_key
+from legacy_pipeline.models import SevenStepResult
+from legacy_pipeline.orchestrator import LegacyPipelineOrchestrator
+from legacy_pipeline.steps import ErrorCatalogStep
+from persistence.repo import Repo
+
+
+def _entry(mistake):
+    return {
+        "mistake": mistake,
+        "why_wrong": "Because it breaks under load",
+        "match_hint": "look for the pattern",
+        "impact": "Major",
+        "domain_specific": True,
+        "likelihood_strong_avoids": 0.9,
+        "likelihood_weak_makes": 0.7,
+    }
+
+
+MISTAKES = [f"Mistake number {word}" for word in ("alpha", "bravo", "charlie", "delta", "echo", "foxtrot")]
+
+
+@pytest.fixture
+def kb(tmp_path):
+    return ErrorCatalogKB(Repo(str(tmp_path / "pipeline.db")))
+
+
+class TestNormalization:
+    """Test suite for keys and character n-gram similarity."""
+
+    def test_normalize_key(self):
+        assert normalize_key("  Off-by-one in loop bounds. ") == normalize_key("off by one in LOOP bounds")
+        assert normalize_key("!!!") == ""
+
+    def test_char_ngram_search_ranks_closest_first(self):
+        index = CharNgramIndex(["LRU cache eviction policy", "Consistent hashing rings", "TTL basics"])
+        (best, score), *_ = index.search("LRU eviction")
+        assert best == 0 and score > 0.4
+        assert index.search("zzzz qqqq", min_score=0.1) == []
+
+
+class TestErrorCatalogKB:
+    """Test suite for recording, lookup and aggregate statistics."""
+
+    def test_top_mistakes_prefers_proven_and_similar_subtopics(self, kb):
+        kb.record_catalog(
+            "run-1", "Caching", "LRU cache eviction policy", "Intermediate", [_entry(m) for m in MISTAKES]
+        )
+        kb.record_catalog("run-2", "Caching", "Consistent hashing rings", "Advanced", [_entry("Hash ring skew")])
+        kb.record_failures("run-1", "Caching", "LRU cache eviction policy", ["mistake number BRAVO!", "Unrelated"])
+        kb.record_failures("run-3", "Caching", "LRU cache eviction policy", ["Mistake number bravo"])
+
+        top = kb.top_mistakes("Caching", "LRU eviction", limit=3)
+        assert top[0].key == "mistake number bravo" and top[0].proven == 2
+        assert all(m.subtopic == "LRU cache eviction policy" for m in top)
+        assert kb.top_mistakes("Other topic", "LRU eviction") == []
+
+    def test_near_identical_mistakes_are_merged(self, kb):
+        entries = [_entry("Stale reads after invalidation"), _entry("Stale reads after invalidations")]
+        kb.record_catalog("run-1", "Caching", "Invalidation", "Advanced", entries)
+        assert len(kb.top_mistakes("Caching", "Invalidation")) == 1
+
+    def test_proven_catalog_requires_a_full_set(self, kb):
+        kb.record_catalog("run-1", "Caching", "TTL basics", "Beginner", [_entry(m) for m in MISTAKES])
+        kb.record_failures("run-1", "Caching", "TTL basics", MISTAKES[:5])
+        assert kb.proven_catalog("Caching", "TTL basics") is None
+
+        kb.record_failures("run-2", "Caching", "TTL basics", MISTAKES[5:])
+        catalog = kb.proven_catalog("Caching", "TTL basics")
+        assert catalog is not None and {e["mistake"] for e in catalog} == set(MISTAKES)
+
+    def test_failure_stats_are_aggregated_in_the_database(self, kb):
+        kb.record_failures("run-1", "Caching", "TTL", ["Forgot TTL", "No jitter"])
+        kb.record_failures("run-2", "Caching", "TTL", ["forgot ttl."])
+        kb.record_failures("run-3", "Queues", "Retries", ["Forgot TTL"])
+
+        stats = kb.failure_stats(limit=1)
+        assert [(s.key, s.occurrences, s.runs) for s in stats] == [("forgot ttl", 3, 3)]
+        assert {s.key: s.occurrences for s in kb.failure_stats(topic="Caching")} == {"forgot ttl": 2, "no jitter": 1}
+
+
+class TestPipelineIntegration:
+    """Step 2 reuse and the normalised common-failure summary."""
+
+    def test_step2_reuses_proven_catalog_without_calling_the_model(self, kb):
+        kb.record_catalog("run-1", "Caching", "TTL basics", "Beginner", [_entry(m) for m in MISTAKES])
+        kb.record_failures("run-1", "Caching", "TTL basics", MISTAKES)
+
+        class NoCalls:
+            def tools(self, *args, **kwargs):
+                raise AssertionError("model should not be called")
+
+        step = ErrorCatalogStep(NoCalls(), "mid-model", {}, {}, knowledge_base=kb)
+        success, errors, pipeline_step, reward = step.execute("Caching", "TTL basics", "Beginner")
+        assert success and len(errors) == 6
+        assert pipeline_step.model_used == CATALOG_KB_MODEL
+        assert reward.pass_rate > 0
+
+    def test_extract_common_failures_merges_variants(self):
+        def result(failures):
+            return SevenStepResult("t", "s", "d", [], True, 7, True, True, 1, failures)
+
+        counts = LegacyPipelineOrchestrator.extract_common_failures(
+            iter([result(["Forgot TTL.", "No jitter"]), result(["forgot ttl"])])
+        )
+        assert counts == {"forgot ttl": 2, "no jitter": 1}
@@ -0,0 +1,79 @@
+"""
+Unit tests for the hot-reloading prompt/tool registry.
+"""
+
+import copy
+import json
+import os
+
+import pytest
+
+from config.registry import ConfigRegistry
+
+
+def _write(path, data):
+    path.write_text(json.dumps(data), encoding="utf-8")
+
+
+@pytest.fixture
+def config_files(tmp_path):
+    """Minimal prompt/tool files with an empty overrides file for prompts."""
+    files = {
+        "prompts_path": tmp_path / "prompts.json",
+        "prompts_changes_path": tmp_path / "prompts_changes.json",
+        "tools_path": tmp_path / "tools.json",
+        "tools_changes_path": tmp_path / "tools_changes.json",
+    }
+    _write(files["prompts_path"], {"step1": {"template": "base {topic}", "notes": "keep"}})
+    _write(files["prompts_changes_path"], {})
+    _write(files["tools_path"], {"step1": {"name": "tool", "input_schema": {"required": ["a"]}}})
+    return files
+
+
+def _touch_later(path):
+    """Bump mtime so the change is visible even on coarse-grained filesystems."""
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+class TestConfigRegistry:
+    """Test suite for snapshots, versioning and reloads."""
+
+    def test_snapshot_is_merged_and_read_only(self, config_files):
+        """Snapshots merge overrides and reject mutation."""
+        snapshot = ConfigRegistry(**config_files).snapshot()
+        assert snapshot.prompts["step1"]["template"] == "base {topic}"
+        with pytest.raises(TypeError):
+            snapshot.prompts["step1"]["template"] = "changed"
+        with pytest.raises(TypeError):
+            snapshot.tools["step1"]["input_schema"]["required"].append("b")
+
+    def test_deepcopy_returns_mutable_plain_containers(self, config_files):
+        """Steps that deepcopy tool specs get ordinary dicts and lists back."""
+        tools = ConfigRegistry(**config_files).snapshot().tools
+        tool = copy.deepcopy(tools["step1"])
+        tool["input_schema"]["required"].append("b")
+        assert type(tool) is dict and type(tool["input_schema"]["required"]) is list
+        assert list(tools["step1"]["input_schema"]["required"]) == ["a"]
+
+    def test_refresh_swaps_snapshot_on_change(self, config_files):
+        """An override edit yields a new version; old snapshots stay untouched."""
+        registry = ConfigRegistry(**config_files)
+        before = registry.snapshot()
+        assert registry.refresh() is before  # nothing changed
+
+        _write(config_files["prompts_changes_path"], {"step1": {"template": "edited"}})
+        _touch_later(config_files["prompts_changes_path"])
+        after = registry.refresh()
+
+        assert after.version != before.version
+        assert after.prompts["step1"] == {"template": "edited", "notes": "keep"}
+        assert before.prompts["step1"]["template"] == "base {topic}"
+        assert registry.snapshot() is after
+
+    def test_invalid_json_keeps_previous_snapshot(self, config_files):
+        """A half-written file does not replace the current snapshot."""
+        registry = ConfigRegistry(**config_files)
+        before = registry.snapshot()
+        config_files["tools_changes_path"].write_text("{not json", encoding="utf-8")
+        assert registry.refresh() is before
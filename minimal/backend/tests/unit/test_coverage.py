@@ -0,0 +1,73 @@
+"""
+Unit tests for the token-based requirement coverage engine.
+"""
+
+import pytest
+
+from analytics.coverage import TokenIndex, stem, tokenize
+from analytics.rewards import rewards_step45
+
+
+class TestTokenIndex:
+    """Test suite for tokenisation, stemming and coverage."""
+
+    def test_tokenize_drops_stop_words_and_punctuation(self):
+        assert tokenize("Use the LRU-cache, with TTL!", use_stemming=False) == ["lru", "cache", "ttl"]
+
+    def test_stemming_groups_inflections(self):
+        assert {stem(word) for word in ("cache", "caches", "cached", "caching")} == {"cach"}
+        assert stem("validation") == stem("validate")
+        assert stem("ttl") == "ttl"
+
+    @pytest.mark.parametrize(
+        "singular, plural",
+        [
+            ("class", "classes"),
+            ("process", "processes"),
+            ("access", "accesses"),
+            ("address", "addresses"),
+            ("status", "statuses"),
+            ("box", "boxes"),
+            ("file", "files"),
+            ("entry", "entries"),
+            ("validation", "validations"),
+        ],
+    )
+    def test_singular_and_plural_share_a_stem(self, singular, plural):
+        assert stem(singular) == stem(plural)
+        assert TokenIndex(f"Spawn {plural}").covers(singular)
+
+    def test_whole_words_only(self):
+        index = TokenIndex("We concatenate the strings")
+        assert not index.covers("cat")
+        assert index.covers("concatenation of strings")
+
+    def test_stemming_is_optional(self):
+        assert TokenIndex("entries are cached").covers("caching layer")
+        assert not TokenIndex("entries are cached", use_stemming=False).covers("caching")
+
+    def test_stop_word_only_requirement_is_not_covered(self):
+        assert not TokenIndex("the cache is warm").covers("the")
+
+    def test_coverage_ratio(self):
+        index = TokenIndex("Read-through cache with TTL expiry")
+        assert index.coverage(["read through", "ttl", "bounded memory", "metrics"]) == 0.5
+        assert index.coverage([]) == 0.0
+
+
+class TestRewardsStep45Coverage:
+    """rewards_step45 must use whole-token coverage."""
+
+    def _coverage(self, text, requirements):
+        report = rewards_step45(text, requirements)
+        return next(r for r in report.results if r.name == "coverage_soft>=0.5")
+
+    def test_sub_word_fragments_do_not_count(self):
+        result = self._coverage("### OUTPUT\nconcatenate and scatter", ["cat", "at"])
+        assert not result.passed
+        assert result.detail == "coverage=0.00"
+
+    def test_inflected_mentions_count(self):
+        result = self._coverage("### OUTPUT\nresults are cached and expiring", ["caching", "expires entries"])
+        assert result.passed
+        assert result.detail == "coverage=1.00"
@@ -0,0 +1,119 @@
+"""
+Unit tests for the MinHash/LSH near-duplicate index.
+"""
+
+import pytest
+
+from analytics.dedup import (
+    KIND_ASSESSMENT,
+    KIND_QUESTION,
+    DedupIndex,
+    assessment_text,
+    backfill,
+    dedupe,
+    question_text,
+)
+from persistence.repo import Repo
+
+QUESTION = {
+    "title": "Read-through cache for a product catalog",
+    "question_text": (
+        "Implement a read-through cache in front of the product catalog service. Entries must expire after a "
+        "configurable TTL, memory must stay bounded under load, and hit and miss counts must be exported as metrics "
+        "so the on-call engineer can see when the cache stops helping."
+    ),
+}
+REWORDED = dict(QUESTION, title="Read-through cache for a product catalog!")
+OTHER = {
+    "title": "Idempotent payment webhooks",
+    "question_text": (
+        "Design a webhook handler for payment provider callbacks that processes each event exactly once even when "
+        "the provider retries deliveries, and reconciles missed events with a nightly job."
+    ),
+}
+
+
+@pytest.fixture
+def index():
+    idx = DedupIndex(":memory:", threshold=0.8)
+    yield idx
+    idx.close()
+
+
+class TestDedupIndex:
+    """Test suite for signatures, LSH lookup and persistence."""
+
+    def test_signature_is_deterministic(self, tmp_path):
+        a = DedupIndex(":memory:")
+        b = DedupIndex(tmp_path / "index.sqlite")
+        assert a.signature(question_text(QUESTION)) == b.signature(question_text(QUESTION))
+
+    def test_finds_near_duplicates_only(self, index):
+        index.add(KIND_QUESTION, "run-1", question_text(QUESTION), "Caching")
+
+        match = index.find_duplicate(KIND_QUESTION, question_text(REWORDED))
+        assert match is not None and match.key == "run-1" and match.topic == "Caching"
+        assert match.similarity >= 0.8
+        assert index.find_duplicate(KIND_QUESTION, question_text(OTHER)) is None
+
+    def test_kinds_are_separate(self, index):
+        index.add(KIND_QUESTION, "run-1", question_text(QUESTION))
+        assert index.find_duplicate(KIND_ASSESSMENT, question_text(QUESTION)) is None
+
+    def test_re_adding_replaces_entry(self, index):
+        index.add(KIND_QUESTION, "run-1", question_text(QUESTION))
+        index.add(KIND_QUESTION, "run-1", question_text(OTHER))
+        assert index.count(KIND_QUESTION) == 1
+        assert index.find_duplicate(KIND_QUESTION, question_text(QUESTION)) is None
+
+    def test_persists_across_instances(self, tmp_path):
+        path = tmp_path / "index.sqlite"
+        first = DedupIndex(path)
+        first.add(KIND_QUESTION, "run-1", question_text(QUESTION))
+        first.close()
+
+        second = DedupIndex(path)
+        assert second.find_duplicate(KIND_QUESTION, question_text(REWORDED)).key == "run-1"
+        second.close()
+
+    def test_rejects_bad_banding(self):
+        with pytest.raises(ValueError):
+            DedupIndex(":memory:", num_perm=64, bands=10)
+
+    def test_from_env(self, monkeypatch, tmp_path):
+        monkeypatch.delenv("AQU_DEDUP", raising=False)
+        assert DedupIndex.from_env(tmp_path / "index.sqlite") is None
+
+        monkeypatch.setenv("AQU_DEDUP", "1")
+        monkeypatch.setenv("AQU_DEDUP_THRESHOLD", "0.6")
+        index = DedupIndex.from_env(tmp_path / "index.sqlite")
+        assert index is not None and index.threshold == 0.6
+        index.close()
+
+
+class TestDedupe:
+    """Test suite for export-side deduplication and backfill."""
+
+    def test_dedupe_keeps_first_occurrence(self):
+        items = [
+            {"id": 1, "content": QUESTION["question_text"].split(". ")},
+            {"id": 2, "content": OTHER["question_text"].split(". ")},
+            {"id": 3, "content": (QUESTION["question_text"] + " Thanks.").split(". ")},
+        ]
+        kept, dropped = dedupe(items, assessment_text)
+        assert [item["id"] for item in kept] == [1, 2]
+        assert [item["id"] for item in dropped] == [3]
+
+    def test_dedupe_against_seen_items(self):
+        existing = [{"content": [OTHER["question_text"]]}]
+        kept, dropped = dedupe([{"content": [OTHER["question_text"]]}], assessment_text, seen=existing)
+        assert kept == [] and len(dropped) == 1
+
+    def test_backfill_from_repo(self, tmp_path, index):
+        repo = Repo(str(tmp_path / "pipeline.db"))
+        repo.save_step("run-1", "Caching", 3, "step 3", "model", True, str(QUESTION), "now")
+        repo.save_step("run-2", "Caching", 3, "step 3", "model", False, str(OTHER), "now")
+        repo.save_step("run-1", "Caching", 7, "step 7", "model", True, '{"content": ["x = <<bug_here>>"]}', "now")
+
+        assert backfill(repo, index) == {KIND_QUESTION: 1, KIND_ASSESSMENT: 1}
+        assert index.find_duplicate(KIND_QUESTION, question_text(REWORDED)).key == "run-1"
@@ -0,0 +1,102 @@
+"""
+Unit tests for the sharded demo-data export.
+"""
+
+import json
+import sqlite3
+
+from analytics.dedup import DedupIndex
+from load_from_database import get_pipeline_runs_by_topics
+from persistence.demo_shards import DemoShardStore, pair_steps, read_legacy_bundle, shard_id
+
+
+def _assessment(index, run, topic, content=None):
+    return {
+        "id": f"demo-assessment-{index}",
+        "title": f"{topic} review",
+        "topic": topic,
+        "subtopic": "Unknown",
+        "difficulty": "Intermediate",
+        "content_type": "code",
+        "content": content or [f"line {i} of {topic} {run}" for i in range(30)],
+        "errors": [{"id": "bug", "description": "A bug"}],
+        "run_timestamp": run,
+    }
+
+
+def _steps(index, count=7):
+    return [{"_id": f"demo-{index}-step-{n}", "step_number": n, "response_full": "..."} for n in range(1, count + 1)]
+
+
+class TestDemoShardStore:
+    """Test suite for incremental shard export."""
+
+    def test_append_writes_shards_and_manifest(self, tmp_path):
+        store = DemoShardStore(tmp_path)
+        added, skipped = store.append([(_assessment(1, "20251001_090000", "Prompt Engineering"), _steps(1))])
+
+        assert added == ["20251001-090000-prompt-engineering"] and skipped == []
+        (entry,) = store.manifest()
+        assert entry["file"] == "shards/20251001-090000-prompt-engineering.json"
+        assert entry["error_count"] == 1 and entry["step_count"] == 7
+        shard = json.loads((tmp_path / entry["file"]).read_text())
+        assert shard["assessment"]["id"] == entry["id"] and len(shard["pipeline_steps"]) == 7
+
+    def test_append_only_touches_new_items(self, tmp_path):
+        store = DemoShardStore(tmp_path)
+        store.append([(_assessment(1, "20251001_090000", "Caching"), _steps(1))])
+        first_shard = tmp_path / "shards" / f"{shard_id('20251001_090000', 'Caching')}.json"
+        mtime = first_shard.stat().st_mtime_ns
+
+        added, skipped = DemoShardStore(tmp_path).append(
+            [
+                (_assessment(1, "20251001_090000", "Caching"), _steps(1)),
+                (_assessment(2, "20251002_090000", "Queues"), _steps(2)),
+            ]
+        )
+        assert len(added) == 1 and len(skipped) == 1
+        assert first_shard.stat().st_mtime_ns == mtime
+        assert [e["topic"] for e in store.manifest()] == ["Caching", "Queues"]
+
+    def test_near_duplicates_are_skipped(self, tmp_path):
+        index = DedupIndex(":memory:")
+        store = DemoShardStore(tmp_path, dedup_index=index)
+        content = [f"shared line {i}" for i in range(30)]
+        added, skipped = store.append(
+            [
+                (_assessment(1, "20251001_090000", "Caching", content), _steps(1)),
+                (_assessment(2, "20251002_090000", "Caching", content + ["extra"]), _steps(2)),
+            ]
+        )
+        assert len(added) == 1 and len(skipped) == 1
+        index.close()
+
+    def test_legacy_bundle_import(self, tmp_path):
+        assessments = [_assessment(1, "r1", "A"), _assessment(2, "r2", "B")]
+        steps = _steps(1, 3) + _steps(2, 2)
+        bundle = tmp_path / "demoData.dev.js"
+        bundle.write_text(
+            "// demoData.dev.js\n\n"
+            f"export const demoAssessments = {json.dumps(assessments, indent=2)};\n\n"
+            f"export const demoPipelineSteps = {json.dumps(steps, indent=2)};\n\n"
+            "export default demoAssessments;\n"
+        )
+        pairs = read_legacy_bundle(bundle)
+        assert [len(s) for _, s in pairs] == [3, 2]
+        assert pair_steps(assessments, steps) == pairs
+
+
+class TestDatabaseQuery:
+    """load_from_database must bind the timestamp filter as a parameter."""
+
+    def test_timestamp_is_a_bound_parameter(self, tmp_path):
+        db = tmp_path / "pipeline.db"
+        with sqlite3.connect(db) as conn:
+            conn.execute(
+                "CREATE TABLE enhanced_step_responses (topic TEXT, run_timestamp TEXT, step_number INTEGER, "
+                "step_name TEXT, model_used TEXT, success BOOLEAN, full_response TEXT, timestamp TEXT)"
+            )
+            conn.execute("INSERT INTO enhanced_step_responses VALUES ('A', 'r1', 7, 's', 'm', 1, '{}', 'now')")
+
+        assert len(get_pipeline_runs_by_topics(str(db), ["A"], "r1")) == 1
+        assert get_pipeline_runs_by_topics(str(db), ["A"], "r1' OR '1'='1") == []
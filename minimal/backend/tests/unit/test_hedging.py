@@ -0,0 +1,88 @@
+"""
+Unit tests for request hedging.
+"""
+
+import threading
+import time
+
+from clients.context import current_run, run_scope
+from clients.hedging import HedgedRuntime, LatencyTracker
+
+
+class SlowFirstRuntime:
+    """Runtime whose first call hangs until released; later calls answer immediately."""
+
+    def __init__(self):
+        self.calls = 0
+        self.release = threading.Event()
+        self.usage_log = []
+        self._lock = threading.Lock()
+
+    def invoke(self, model_id, prompt, max_tokens=2048, temperature=0.0):
+        with self._lock:
+            self.calls += 1
+            call = self.calls
+        if call == 1:
+            self.release.wait(5)
+            return "slow"
+        return "fast"
+
+
+def _warm(tracker, model, seconds=0.01, count=20):
+    for _ in range(count):
+        tracker.record(model, seconds)
+
+
+class TestLatencyTracker:
+    """Test suite for the rolling latency percentile."""
+
+    def test_percentile_needs_min_samples(self):
+        """No threshold is reported until enough samples exist."""
+        tracker = LatencyTracker(min_samples=3)
+        tracker.record("m", 1.0)
+        assert tracker.percentile("m", 0.95) is None
+        tracker.record("m", 2.0)
+        tracker.record("m", 10.0)
+        assert tracker.percentile("m", 0.5) == 2.0
+        assert tracker.percentile("m", 0.99) == 10.0
+
+
+class TestHedgedRuntime:
+    """Test suite for hedged calls and the per-run budget."""
+
+    def test_slow_call_is_hedged_within_run(self):
+        """A call past the percentile gets a duplicate and the faster answer wins."""
+        runtime = SlowFirstRuntime()
+        hedged = HedgedRuntime(runtime, {"opus"}, percentile=0.95, budget_per_run=1)
+        _warm(hedged.tracker, "opus")
+
+        with run_scope("run-1") as run:
+            assert hedged.invoke("opus", "hi") == "fast"
+            assert run.hedges_used == 1
+        runtime.release.set()
+        assert current_run() is None
+
+    def test_budget_limits_hedges(self):
+        """Once the run's budget is spent the slow call is simply awaited."""
+        runtime = SlowFirstRuntime()
+        hedged = HedgedRuntime(runtime, {"opus"}, budget_per_run=0)
+        _warm(hedged.tracker, "opus")
+
+        with run_scope("run-2"):
+            threading.Timer(0.1, runtime.release.set).start()
+            assert hedged.invoke("opus", "hi") == "slow"
+        assert runtime.calls == 1
+
+    def test_unhedged_models_and_no_run_call_directly(self):
+        """Models outside the hedge set, or calls outside a run, are never duplicated."""
+        runtime = SlowFirstRuntime()
+        runtime.release.set()
+        hedged = HedgedRuntime(runtime, {"opus"})
+        _warm(hedged.tracker, "opus", seconds=0.0)
+
+        start = time.monotonic()
+        assert hedged.invoke("opus", "hi") == "slow"
+        assert hedged.invoke("haiku", "hi") == "fast"
+        assert runtime.calls == 2
+        assert time.monotonic() - start < 1
+        assert hedged.usage_log is runtime.usage_log
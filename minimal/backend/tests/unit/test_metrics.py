@@ -0,0 +1,80 @@
+"""
+Unit tests for the in-process metrics registry and /metrics endpoint.
+"""
+
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+os.environ["AQU_MOCK_PIPELINE"] = "1"
+
+from api.main import app  # noqa: E402
+from observability.metrics import MetricsRegistry  # noqa: E402
+
+
+class TestMetricsRegistry:
+    """Test suite for counters, gauges and histograms."""
+
+    def test_counter_renders_labels(self):
+        """Counters accumulate per label set and render in Prometheus format."""
+        registry = MetricsRegistry()
+        calls = registry.counter("test_calls_total", "Calls.", ("model",))
+        calls.inc(model="opus")
+        calls.inc(2, model="opus")
+
+        text = registry.render()
+        assert "# TYPE test_calls_total counter" in text
+        assert 'test_calls_total{model="opus"} 3' in text
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Histogram buckets are cumulative and end with +Inf equal to count."""
+        registry = MetricsRegistry()
+        latency = registry.histogram("test_latency_seconds", "Latency.", ("step",), buckets=(1.0, 5.0))
+        latency.observe(0.5, step="1")
+        latency.observe(3.0, step="1")
+        latency.observe(10.0, step="1")
+
+        text = registry.render()
+        assert 'test_latency_seconds_bucket{step="1",le="1"} 1' in text
+        assert 'test_latency_seconds_bucket{step="1",le="5"} 2' in text
+        assert 'test_latency_seconds_bucket{step="1",le="+Inf"} 3' in text
+        assert 'test_latency_seconds_count{step="1"} 3' in text
+        assert latency.snapshot(step="1") == (3, 13.5)
+
+    def test_histogram_timer_decorates_functions(self):
+        """Histogram.time() works as a decorator."""
+        registry = MetricsRegistry()
+        latency = registry.histogram("test_timer_seconds", "Timer.", ("op",))
+
+        @latency.time(op="write")
+        def write():
+            return "ok"
+
+        assert write() == "ok"
+        assert latency.snapshot(op="write")[0] == 1
+
+    def test_label_mismatch_raises(self):
+        """Using the wrong label names fails loudly."""
+        registry = MetricsRegistry()
+        gauge = registry.gauge("test_open", "Open.", ("kind",))
+        with pytest.raises(ValueError):
+            gauge.inc(other="x")
+
+    def test_reregistering_returns_same_metric(self):
+        """Registering an existing name returns the original metric."""
+        registry = MetricsRegistry()
+        first = registry.counter("test_dupe_total", "Dupe.")
+        assert registry.counter("test_dupe_total", "Dupe.") is first
+
+
+class TestMetricsEndpoint:
+    """Test suite for the /metrics endpoint."""
+
+    def test_metrics_endpoint_exposes_default_registry(self):
+        """/metrics returns Prometheus text including pipeline metric families."""
+        response = TestClient(app).get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert "# TYPE aqumen_step_duration_seconds histogram" in response.text
+        assert "# TYPE aqumen_sse_connections gauge" in response.text
@@ -0,0 +1,130 @@
+"""
+Unit tests for adaptive max_tokens / thinking budgets and truncation detection.
+"""
+
+import io
+import json
+
+from clients import bedrock
+from clients.bedrock import BedrockRuntime, UsageMetrics
+from clients.context import observe_call
+from observability.instrument import instrument_step
+from observability.metrics import MODEL_TRUNCATIONS
+from services.invoke import Invoker
+from services.output_sizing import OutputSizer
+
+
+def _usage(output_tokens, stop_reason="end_turn", thinking_tokens=0):
+    return UsageMetrics(output_tokens=output_tokens, stop_reason=stop_reason, thinking_tokens=thinking_tokens)
+
+
+class TestOutputSizer:
+    """Test suite for sizing limits from observed output lengths."""
+
+    def test_keeps_the_default_until_enough_samples(self):
+        sizer = OutputSizer(percentile=1.0, headroom=1.0, min_samples=3)
+        assert sizer.size("1", "m", 2048) == (2048, 0)
+        for tokens in (300, 400):
+            sizer.observe("1", "m", False, 2048, _usage(tokens))
+        assert sizer.size("1", "m", 2048) == (2048, 0)
+
+        sizer.observe("1", "m", False, 2048, _usage(500))
+        assert sizer.size("1", "m", 2048) == (500, 0)
+        assert sizer.size("1", "other-model", 2048) == (2048, 0)
+
+    def test_limit_is_percentile_plus_headroom_within_bounds(self):
+        sizer = OutputSizer(percentile=0.9, headroom=1.5, min_samples=1, floor=256, ceiling=4000)
+        for tokens in range(100, 1100, 100):
+            sizer.observe("7", "m", False, 2048, _usage(tokens))
+        assert sizer.size("7", "m", 2048)[0] == 1350  # p90 = 900
+
+        sizer = OutputSizer(min_samples=1, floor=256, ceiling=4000)
+        sizer.observe("1", "m", False, 2048, _usage(10))
+        sizer.observe("7", "m", False, 2048, _usage(9000))
+        assert sizer.size("1", "m", 2048)[0] == 256
+        assert sizer.size("7", "m", 2048)[0] == 4000
+
+    def test_truncated_output_doubles_the_next_limit(self):
+        sizer = OutputSizer(percentile=1.0, headroom=1.0, min_samples=5)
+        sizer.observe("7", "m", False, 2048, _usage(2048, stop_reason="max_tokens"))
+        assert sizer.size("7", "m", 2048)[0] == 4096
+
+    def test_thinking_calls_size_answer_and_thinking_separately(self):
+        sizer = OutputSizer(percentile=1.0, headroom=1.0, min_samples=1)
+        sizer.observe("3", "m", True, 2048, _usage(1800, thinking_tokens=1500))
+        assert sizer.size("3", "m", 2048, use_thinking=True, thinking_budget=2048) == (300, 1500)
+        sizer.observe("3", "m", True, 300, _usage(700, thinking_tokens=600))
+        assert sizer.size("3", "m", 2048, use_thinking=True, thinking_budget=2048)[1] == 1500
+
+        sizer.observe("6", "m", True, 2048, _usage(1000, thinking_tokens=200))
+        assert sizer.size("6", "m", 2048, use_thinking=True, thinking_budget=2048) == (800, 1024)
+
+    def test_cache_hits_are_not_samples(self):
+        sizer = OutputSizer(min_samples=1)
+        sizer.observe("1", "m", False, 2048, UsageMetrics())
+        assert sizer.size("1", "m", 2048) == (2048, 0)
+
+
+class TestInvokerSizing:
+    """Test suite for the Invoker's use of the sizer."""
+
+    def test_calls_are_sized_per_step_and_explicit_limits_win(self):
+        limits = []
+
+        class Runtime:
+            def invoke(self, model_id, prompt, max_tokens):
+                limits.append(max_tokens)
+                observe_call(_usage(400))
+                return "ok"
+
+        invoker = Invoker(Runtime(), sizer=OutputSizer(percentile=1.0, headroom=1.0, min_samples=2))
+
+        @instrument_step("4")
+        def step4(max_tokens=None):
+            return invoker.text("m", "p", max_tokens=max_tokens)
+
+        for _ in range(3):
+            step4()
+        step4(max_tokens=1000)
+        invoker.text("m", "p")
+        assert limits == [2048, 2048, 400, 1000, 2048]
+        assert set(invoker.sizer._answers) == {("4", "m", False)}
+
+
+class TestBedrockStopReason:
+    """Test suite for truncation detection and thinking budgets in BedrockRuntime."""
+
+    def _runtime(self, monkeypatch, data):
+        monkeypatch.setattr(bedrock.time, "sleep", lambda _: None)
+        bodies = []
+
+        class Client:
+            def invoke_model(self, **kwargs):
+                bodies.append(json.loads(kwargs["body"]))
+                return {"body": io.BytesIO(json.dumps(data).encode())}
+
+        runtime = BedrockRuntime()
+        runtime._client = Client()
+        runtime.response_cache = None
+        return runtime, bodies
+
+    def test_truncation_is_recorded_and_counted(self, monkeypatch):
+        data = {
+            "content": [{"type": "thinking", "thinking": "x" * 400}, {"type": "tool_use", "input": {}}],
+            "usage": {"input_tokens": 10, "output_tokens": 300},
+            "stop_reason": "max_tokens",
+        }
+        runtime, _ = self._runtime(monkeypatch, data)
+        before = MODEL_TRUNCATIONS.value(provider="anthropic", model="m")
+        runtime.invoke_with_tools("m", "prompt", [{"name": "t", "input_schema": {}}])
+        metrics = runtime.usage_log[-1]
+        assert (metrics.stop_reason, metrics.thinking_tokens) == ("max_tokens", 100)
+        assert MODEL_TRUNCATIONS.value(provider="anthropic", model="m") - before == 1
+
+    def test_thinking_budget_is_reserved_on_top_of_max_tokens(self, monkeypatch):
+        data = {"content": [{"type": "tool_use", "input": {}}], "usage": {}, "stop_reason": "tool_use"}
+        runtime, bodies = self._runtime(monkeypatch, data)
+        tools = [{"name": "t", "input_schema": {}}]
+        runtime.invoke_with_tools("m", "p", tools, max_tokens=1500, use_thinking=True, thinking_budget=3000)
+        runtime.invoke_with_tools("m", "p", tools, max_tokens=1500, use_thinking=True, thinking_budget=10)
+        assert [(b["max_tokens"], b["thinking"]["budget_tokens"]) for b in bodies] == [(4500, 3000), (2524, 1024)]
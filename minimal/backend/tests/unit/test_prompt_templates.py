@@ -0,0 +1,98 @@
+"""
+Unit tests for precompiled prompt templates and load-time placeholder validation.
+"""
+
+import json
+from pathlib import Path
+
+import pytest
+
+from config.registry import ConfigRegistry
+from config.templates import TemplateError, compile_step_templates, compile_template
+from legacy_pipeline.steps.difficulty import DifficultyStep
+
+SHIPPED_PROMPTS = Path(__file__).resolve().parents[2] / "prompts.json"
+
+
+class TestCompiledTemplate:
+    """Test suite for parsing and rendering."""
+
+    @pytest.mark.parametrize(
+        "text",
+        [
+            "Plain text with no placeholders",
+            "Topic: {topic}, again {topic}",
+            "Escaped {{braces}} around {topic!r} and {topic:>12}",
+            "{topic}",
+        ],
+    )
+    def test_render_matches_str_format(self, text):
+        compiled = compile_template(text)
+        assert compiled.render(topic="Caching") == text.format(topic="Caching")
+
+    def test_render_non_string_values(self):
+        compiled = compile_template("{min_errors}-{max_errors} errors", "step7_student_assessment")
+        assert compiled.render(min_errors=1, max_errors=3) == "1-3 errors"
+
+    def test_compile_is_cached_by_text(self):
+        assert compile_template("Hello {topic}") is compile_template("Hello {topic}")
+
+    def test_unknown_placeholder_rejected_for_step(self):
+        with pytest.raises(TemplateError, match="subtopicc"):
+            compile_template("Explain {subtopicc}", "step2_error_catalog")
+
+    def test_unknown_step_is_not_checked(self):
+        assert compile_template("Explain {anything}", "custom_prompt").fields == {"anything"}
+
+    @pytest.mark.parametrize("text", ["Unclosed {topic", "Stray } brace", "{}", "{0}", "{topic.upper}", "{topic[0]}"])
+    def test_malformed_templates_rejected(self, text):
+        with pytest.raises(TemplateError):
+            compile_template(text, "step1_difficulty_categories")
+
+    def test_non_string_rejected(self):
+        with pytest.raises(TemplateError):
+            compile_template(["not", "a", "string"])
+
+    def test_shipped_prompts_compile(self):
+        with SHIPPED_PROMPTS.open(encoding="utf-8") as fh:
+            prompts = json.load(fh)
+        templates = compile_step_templates(prompts)
+        assert "step7_student_assessment" in templates
+
+
+class TestStepRendering:
+    """Steps render from the snapshot's compiled templates."""
+
+    def test_render_uses_the_snapshot_templates(self):
+        prompts = {"step1_difficulty_categories": {"template": "Stale {topic}"}}
+        step = DifficultyStep(None, "m", prompts, {})
+        assert step._render_prompt("step1_difficulty_categories", topic="Caching") == "Stale Caching"
+
+        templates = compile_step_templates({"step1_difficulty_categories": "Pinned {topic}"})
+        step = DifficultyStep(None, "m", prompts, {}, templates=templates)
+        assert step._render_prompt("step1_difficulty_categories", topic="Caching") == "Pinned Caching"
+
+
+class TestRegistryValidation:
+    """A bad override must not replace a working snapshot."""
+
+    def test_invalid_override_keeps_previous_snapshot(self, tmp_path):
+        paths = {
+            "prompts_path": tmp_path / "prompts.json",
+            "prompts_changes_path": tmp_path / "prompts_changes.json",
+            "tools_path": tmp_path / "tools.json",
+            "tools_changes_path": tmp_path / "tools_changes.json",
+        }
+        paths["prompts_path"].write_text(json.dumps({"step1_difficulty_categories": {"template": "About {topic}"}}))
+        paths["tools_path"].write_text(json.dumps({}))
+        registry = ConfigRegistry(**paths)
+        version = registry.version
+        assert registry.snapshot().templates["step1_difficulty_categories"].fields == {"topic"}
+
+        paths["prompts_changes_path"].write_text(
+            json.dumps({"step1_difficulty_categories": {"template": "About {topics}"}})
+        )
+        snapshot = registry.refresh(force=True)
+
+        assert snapshot.version == version
+        assert snapshot.prompts["step1_difficulty_categories"]["template"] == "About {topic}"
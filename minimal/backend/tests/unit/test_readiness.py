@@ -0,0 +1,185 @@
+"""
+Unit tests for readiness probes, their background rounds and the /ready endpoint.
+"""
+
+import threading
+import time
+
+from botocore.exceptions import ClientError
+from fastapi.testclient import TestClient
+
+import api.endpoints as endpoints
+from api.main import app
+from clients import concurrency
+from clients.bedrock import BedrockRuntime
+from clients.concurrency import AdaptiveConcurrency
+from clients.routing import OPEN, BreakerConfig, RoutingRuntime
+from services.readiness import DATABASE, Probe, ReadinessMonitor
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _ok():
+    return None
+
+
+def _down():
+    raise ConnectionError("unreachable")
+
+
+class Throttled(Exception):
+    pass
+
+
+def _throttled():
+    raise Throttled("too many requests")
+
+
+def _is_throttle(exc):
+    return isinstance(exc, Throttled)
+
+
+class TestReadinessMonitor:
+    """Test suite for probing dependencies and reporting the latest round."""
+
+    def test_probes_run_concurrently_and_reports_do_not_probe_again(self):
+        calls = []
+
+        def slow():
+            calls.append(1)
+            time.sleep(0.1)
+
+        probes = [
+            Probe(f"anthropic/{tier}", slow, "anthropic", f"m-{tier}", tier) for tier in ("strong", "mid", "weak")
+        ]
+        clock = FakeClock()
+        monitor = ReadinessMonitor(probes + [Probe(DATABASE, _ok)], clock=clock)
+
+        started = time.perf_counter()
+        report = monitor.report()
+        assert time.perf_counter() - started < 0.25
+        assert report["ready"] and len(calls) == 3
+        assert report["dependencies"]["anthropic/mid"]["model"] == "m-mid"
+
+        clock.now = 3600
+        assert monitor.report()["age_s"] == 3600 and len(calls) == 3
+        monitor.run_round()
+        assert len(calls) == 6
+        assert monitor.report()["dependencies"]["anthropic/weak"]["samples"] == 2
+
+    def test_rounds_run_in_the_background_at_their_interval(self):
+        calls = []
+        monitor = ReadinessMonitor([Probe(DATABASE, lambda: calls.append(1))], interval_s=0.02)
+        monitor.start()
+        monitor.start()
+        try:
+            deadline = time.monotonic() + 2
+            while len(calls) < 3 and time.monotonic() < deadline:
+                time.sleep(0.01)
+        finally:
+            monitor.stop()
+        assert len(calls) >= 3
+        assert monitor.report()["dependencies"][DATABASE]["samples"] == len(calls)
+
+    def test_a_tier_needs_one_provider_and_the_database_must_answer(self):
+        probes = [
+            Probe("anthropic/strong", _down, "anthropic", "opus", "strong"),
+            Probe("openai/strong", _ok, "openai", "gpt-5", "strong"),
+            Probe(DATABASE, _ok),
+        ]
+        report = ReadinessMonitor(probes).report()
+        assert report["ready"]
+        strong = report["dependencies"]["anthropic/strong"]
+        assert not strong["ok"] and strong["error"] == "ConnectionError: unreachable" and strong["error_rate"] == 1.0
+
+        assert not ReadinessMonitor([probes[0], Probe(DATABASE, _ok)]).report()["ready"]
+        assert not ReadinessMonitor([probes[1], Probe(DATABASE, _down)]).report()["ready"]
+
+    def test_hung_probe_times_out_and_is_not_restarted(self):
+        release = threading.Event()
+        calls = []
+
+        def hung():
+            calls.append(1)
+            release.wait(5)
+
+        monitor = ReadinessMonitor([Probe(DATABASE, hung)], timeout_s=0.05)
+        try:
+            first = monitor.report()["dependencies"][DATABASE]
+            monitor.run_round()
+            assert not first["ok"] and "no answer within" in first["error"]
+            assert len(calls) == 1
+        finally:
+            release.set()
+
+    def test_probe_failures_open_the_routers_breaker(self):
+        router = RoutingRuntime(
+            {"anthropic": (object(), {"strong": "opus"}), "openai": (object(), {"strong": "gpt-5"})},
+            config=BreakerConfig(min_calls=2),
+        )
+        monitor = ReadinessMonitor(
+            [
+                Probe("anthropic/strong", _down, "anthropic", "opus", "strong"),
+                Probe("openai/strong", _ok, "openai", "gpt-5", "strong"),
+            ]
+        )
+        monitor.attach_router(router)
+        monitor.run_round()
+        monitor.run_round()
+        assert router.breaker_states() == {"anthropic/opus": OPEN, "openai/gpt-5": "closed"}
+
+    def test_throttled_probes_are_busy_not_failed(self):
+        router = RoutingRuntime({"anthropic": (object(), {"strong": "opus"})}, config=BreakerConfig(min_calls=2))
+        probe = Probe("anthropic/strong", _throttled, "anthropic", "opus", "strong", is_busy=_is_throttle)
+        monitor = ReadinessMonitor([probe, Probe(DATABASE, _ok)])
+        monitor.attach_router(router)
+        report = monitor.report()
+        monitor.run_round()
+
+        strong = report["dependencies"]["anthropic/strong"]
+        assert report["ready"] and strong["ok"] and strong["busy"]
+        assert strong["error"] == "Throttled: too many requests"
+        assert router.breaker_states() == {}
+
+    def test_model_probes_take_a_call_slot(self, monkeypatch):
+        adaptive = AdaptiveConcurrency(initial=4)
+        monkeypatch.setattr(concurrency, "_adaptive", adaptive)
+        monkeypatch.setattr(concurrency, "_adaptive_loaded", True)
+
+        class Client:
+            def invoke_model(self, **kwargs):
+                raise ClientError({"Error": {"Code": "ThrottlingException"}}, "InvokeModel")
+
+        runtime = BedrockRuntime()
+        runtime._client = Client()
+        probe = Probe(
+            "anthropic/strong",
+            lambda: runtime.probe("probe-model"),
+            "anthropic",
+            "probe-model",
+            "strong",
+            is_busy=runtime.is_throttle,
+        )
+        strong = ReadinessMonitor([probe]).report()["dependencies"]["anthropic/strong"]
+        assert strong["ok"] and strong["busy"]
+        # The throttled probe backed off the model's adaptive limit like any other call
+        assert adaptive.limits() == {"probe-model": 2}
+
+
+class TestReadyEndpoint:
+    """Test suite for GET /ready."""
+
+    def test_not_ready_is_503(self, monkeypatch):
+        monitor = ReadinessMonitor([Probe(DATABASE, _down)])
+        monkeypatch.setattr(endpoints, "MOCK_PIPELINE", False)
+        monkeypatch.setattr(endpoints, "get_readiness", lambda: monitor)
+
+        response = TestClient(app).get("/ready")
+        assert response.status_code == 503
+        assert response.json()["dependencies"][DATABASE]["ok"] is False
@@ -0,0 +1,93 @@
+"""
+Unit tests for the content-addressed model response cache.
+"""
+
+import io
+import json
+
+from clients import bedrock
+from clients.bedrock import BedrockRuntime
+from clients.response_cache import ResponseCache, cache_key, is_cacheable
+from observability.instrument import instrument_step
+
+BODY = {"anthropic_version": "bedrock-2023-05-31", "max_tokens": 100, "messages": [], "temperature": 0.0}
+
+
+class FakeBedrockClient:
+    """Counts invoke_model calls and returns a fixed tool_use response."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def invoke_model(self, **kwargs):
+        self.calls += 1
+        data = {
+            "content": [{"type": "tool_use", "input": {"answer": 42}}],
+            "usage": {"input_tokens": 10, "output_tokens": 5},
+        }
+        return {"body": io.BytesIO(json.dumps(data).encode())}
+
+
+class TestResponseCache:
+    """Test suite for keys, eligibility, storage and eviction."""
+
+    def test_key_ignores_dict_order_but_not_content(self):
+        """Keys are canonical over key order and change with the body or model."""
+        reordered = dict(reversed(list(BODY.items())))
+        assert cache_key("m", BODY) == cache_key("m", reordered)
+        assert cache_key("m", BODY) != cache_key("other", BODY)
+        assert cache_key("m", BODY) != cache_key("m", {**BODY, "max_tokens": 101})
+
+    def test_only_deterministic_calls_are_cacheable(self):
+        """Thinking-enabled and temperature>0 bodies are excluded."""
+        assert is_cacheable(BODY)
+        assert not is_cacheable({**BODY, "temperature": 0.7})
+        assert not is_cacheable({**BODY, "temperature": 1.0, "thinking": {"type": "enabled"}})
+
+    def test_round_trip_and_lru_eviction(self, tmp_path):
+        """Stored responses come back; the least recently used go first when over budget."""
+        cache = ResponseCache(tmp_path / "c.sqlite", max_bytes=80)  # ~34 bytes per entry: room for two
+        first, second = {**BODY, "max_tokens": 1}, {**BODY, "max_tokens": 2}
+        cache.put("m", first, {"content": "a" * 20})
+        cache.put("m", second, {"content": "b" * 20})
+        assert cache.get("m", first) == {"content": "a" * 20}  # touch first
+
+        cache.put("m", {**BODY, "max_tokens": 3}, {"content": "c" * 20})
+        assert cache.get("m", second) is None
+        assert cache.get("m", first) is not None
+        assert cache.stats()["entries"] == 2
+
+    def test_step_filter(self, tmp_path):
+        """With a step allow-list only calls made inside those steps use the cache."""
+        cache = ResponseCache(tmp_path / "c.sqlite", steps={"4"})
+
+        @instrument_step("4")
+        def step4():
+            return cache.applies(BODY)
+
+        @instrument_step("6")
+        def step6():
+            return cache.applies(BODY)
+
+        assert step4() and not step6()
+        assert not cache.applies(BODY)
+
+
+class TestBedrockCaching:
+    """Test suite for the cache hook in BedrockRuntime."""
+
+    def test_repeated_call_is_served_from_cache(self, tmp_path, monkeypatch):
+        """The second identical temperature-0 call never reaches Bedrock and costs nothing."""
+        monkeypatch.setattr(bedrock.time, "sleep", lambda _: None)
+        runtime = BedrockRuntime()
+        runtime._client = FakeBedrockClient()
+        runtime.response_cache = ResponseCache(tmp_path / "c.sqlite")
+
+        tools = [{"name": "t", "input_schema": {"type": "object"}}]
+        assert runtime.invoke_with_tools("m", "prompt", tools) == {"answer": 42}
+        assert runtime.invoke_with_tools("m", "prompt", tools) == {"answer": 42}
+        assert runtime._client.calls == 1
+        assert len(runtime.usage_log) == 1
+
+        runtime.invoke_with_tools("m", "prompt", tools, use_thinking=True)
+        assert runtime._client.calls == 2
@@ -0,0 +1,191 @@
+"""
+Unit tests for circuit breakers and provider failover routing.
+"""
+
+import pytest
+from botocore.exceptions import ClientError, ReadTimeoutError
+
+from clients import bedrock, openai_client
+from clients.openai_client import to_openai_tools
+from clients.routing import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    BreakerConfig,
+    CircuitBreaker,
+    CircuitOpenError,
+    RoutingRuntime,
+    pop_served_by,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeRuntime:
+    """Minimal runtime that returns a canned answer or raises."""
+
+    def __init__(self, name, fail=False, error=RuntimeError):
+        self.name = name
+        self.fail = fail
+        self.error = error
+        self.calls = []
+        self.usage_log = []
+
+    def invoke(self, model_id, prompt, max_tokens=2048, temperature=0.0):
+        self.calls.append(model_id)
+        if self.fail:
+            raise self.error(f"{self.name} throttled")
+        return f"{self.name}:{model_id}"
+
+    def invoke_with_tools(self, model_id, prompt, tools, **kwargs):
+        self.calls.append(model_id)
+        if self.fail:
+            raise self.error(f"{self.name} throttled")
+        return {"served": self.name}
+
+    @staticmethod
+    def is_transient(exc):
+        return not isinstance(exc, ValueError)
+
+
+ANTHROPIC = {"strong": "opus", "mid": "sonnet", "weak": "haiku"}
+OPENAI = {"strong": "gpt-5", "mid": "gpt-5-mini", "weak": "gpt-5-nano"}
+
+
+class TestCircuitBreaker:
+    """Test suite for breaker state transitions."""
+
+    def test_opens_on_error_rate_and_recovers_after_probe(self):
+        """Failures open the breaker; a successful half-open probe closes it."""
+        clock = FakeClock()
+        breaker = CircuitBreaker("anthropic", "opus", BreakerConfig(min_calls=2, cooldown_s=30), clock=clock)
+
+        breaker.record_failure()
+        assert breaker.state == CLOSED
+        breaker.record_failure()
+        assert breaker.state == OPEN
+        assert not breaker.allow_request()
+
+        clock.now = 31
+        assert breaker.state == HALF_OPEN
+        assert breaker.allow_request()
+        assert not breaker.allow_request()  # only one probe at a time
+        breaker.record_success(1.0)
+        assert breaker.state == CLOSED
+
+    def test_slow_calls_open_breaker(self):
+        """A window dominated by slow successes also opens the breaker."""
+        breaker = CircuitBreaker("anthropic", "opus", BreakerConfig(min_calls=2, slow_call_s=10, slow_call_rate=1.0))
+        breaker.record_success(12.0)
+        breaker.record_success(15.0)
+        assert breaker.state == OPEN
+
+    def test_failed_probe_reopens(self):
+        """A failing half-open probe re-opens the breaker."""
+        clock = FakeClock()
+        breaker = CircuitBreaker("openai", "gpt-5", BreakerConfig(min_calls=1, cooldown_s=5), clock=clock)
+        breaker.record_failure()
+        clock.now = 6
+        assert breaker.allow_request()
+        breaker.record_failure()
+        assert breaker.state == OPEN
+
+
+class TestRoutingRuntime:
+    """Test suite for failover between providers."""
+
+    def _router(self, primary_fails=False, fallback_fails=False, config=None):
+        primary = FakeRuntime("anthropic", fail=primary_fails)
+        fallback = FakeRuntime("openai", fail=fallback_fails)
+        router = RoutingRuntime(
+            {"anthropic": (primary, ANTHROPIC), "openai": (fallback, OPENAI)},
+            config=config or BreakerConfig(min_calls=1),
+        )
+        return router, primary, fallback
+
+    def test_primary_serves_when_healthy(self):
+        """Healthy primary serves the call and is recorded as the route."""
+        router, _, fallback = self._router()
+        assert router.invoke("sonnet", "hi") == "anthropic:sonnet"
+        assert pop_served_by().provider == "anthropic"
+        assert fallback.calls == []
+
+    def test_error_fails_over_to_equivalent_tier(self):
+        """A failing primary call is retried on the same tier of the other provider."""
+        router, _, fallback = self._router(primary_fails=True)
+        assert router.invoke_with_tools("haiku", "hi", []) == {"served": "openai"}
+        served = pop_served_by()
+        assert (served.provider, served.model) == ("openai", "gpt-5-nano")
+        assert fallback.calls == ["gpt-5-nano"]
+
+    def test_open_breaker_skips_primary(self):
+        """While the primary's breaker is open it is not called at all."""
+        router, primary, _ = self._router(primary_fails=True)
+        router.invoke("opus", "hi")
+        assert router.breaker("anthropic", "opus").state == OPEN
+
+        router.invoke("opus", "again")
+        assert primary.calls == ["opus"]
+
+    def test_all_routes_down(self):
+        """When every route fails the last error propagates, then breakers short-circuit."""
+        router, _, _ = self._router(primary_fails=True, fallback_fails=True)
+        with pytest.raises(RuntimeError, match="openai throttled"):
+            router.invoke("opus", "hi")
+        with pytest.raises(CircuitOpenError):
+            router.invoke("opus", "hi")
+        assert pop_served_by() is None
+
+    def test_request_errors_are_raised_without_failover(self):
+        """An error caused by the request goes back to the caller and leaves the breaker closed."""
+        router, primary, fallback = self._router()
+        primary.fail, primary.error = True, ValueError
+        for _ in range(3):
+            with pytest.raises(ValueError):
+                router.invoke("opus", "hi")
+        assert fallback.calls == []
+        assert router.breaker("anthropic", "opus").state == CLOSED
+        assert pop_served_by() is None
+
+    def test_runtimes_classify_transient_errors(self):
+        """Only throttling, availability and timeout errors count as transient."""
+        httpx = pytest.importorskip("httpx")
+        openai = pytest.importorskip("openai")
+
+        def client_error(code):
+            return ClientError({"Error": {"Code": code, "Message": code}}, "InvokeModel")
+
+        assert bedrock.is_transient(client_error("ThrottlingException"))
+        assert bedrock.is_transient(client_error("ServiceUnavailableException"))
+        assert bedrock.is_transient(ReadTimeoutError(endpoint_url="https://bedrock"))
+        assert not bedrock.is_transient(client_error("ValidationException"))
+        assert not bedrock.is_transient(client_error("AccessDeniedException"))
+
+        request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+
+        def status_error(cls, status):
+            return cls("error", response=httpx.Response(status, request=request), body=None)
+
+        assert openai_client.is_transient(status_error(openai.RateLimitError, 429))
+        assert openai_client.is_transient(status_error(openai.InternalServerError, 503))
+        assert openai_client.is_transient(openai.APITimeoutError(request=request))
+        assert not openai_client.is_transient(status_error(openai.BadRequestError, 400))
+        assert not openai_client.is_transient(ValueError("bad tool schema"))
+
+
+class TestOpenAIToolConversion:
+    """Test suite for Anthropic -> OpenAI tool spec conversion."""
+
+    def test_converts_input_schema(self):
+        """Anthropic tool specs become OpenAI function tools; OpenAI specs pass through."""
+        schema = {"type": "object", "properties": {}}
+        native = {"type": "function", "function": {"name": "b", "parameters": schema}}
+        converted = to_openai_tools([{"name": "a", "description": "d", "input_schema": schema}, native])
+        assert converted[0] == {"type": "function", "function": {"name": "a", "description": "d", "parameters": schema}}
+        assert converted[1] is native
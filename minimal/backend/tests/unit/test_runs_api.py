@@ -0,0 +1,126 @@
+"""
+Unit tests for the paginated run-history endpoints.
+"""
+
+import itertools
+import json
+import os
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+os.environ.setdefault("AQU_MOCK_PIPELINE", "1")
+
+from api.main import app  # noqa: E402
+from api.runs import decode_cursor, encode_cursor, get_repo  # noqa: E402
+from persistence.repo import Repo  # noqa: E402
+
+RUNS = [
+    ("20251001_090000", "Caching", True),
+    ("20251001_100000", "Queues", False),
+    ("20251002_090000", "Caching", False),
+    ("20251003_090000", "Caching", True),
+    ("20251003_090000", "Indexes", True),
+]
+
+
+@pytest.fixture
+def repo(tmp_path):
+    repo = Repo(str(tmp_path / "pipeline.db"))
+    for run, topic, success in RUNS:
+        repo.mark_run_start(run, topic)
+        repo.mark_run_end(run, 7, success, success)
+    for step in range(1, 8):
+        repo.save_step("20251002_090000", "Caching", step, f"Step {step}", "model", True, "x" * 100, "now")
+    return repo
+
+
+@pytest.fixture
+def client(repo):
+    app.dependency_overrides[get_repo] = lambda: repo
+    yield TestClient(app)
+    app.dependency_overrides.pop(get_repo, None)
+
+
+def _pages(client, url, key, **params):
+    pages, cursor = [], None
+    while True:
+        body = client.get(url, params={**params, **({"cursor": cursor} if cursor else {})}).json()
+        pages.append(body[key])
+        cursor = body["next_cursor"]
+        if cursor is None:
+            return pages
+
+
+class TestListRuns:
+    """Test suite for /api/runs."""
+
+    def test_keyset_pages_cover_every_run_once(self, client):
+        pages = _pages(client, "/api/runs", "runs", limit=2)
+        assert [len(page) for page in pages] == [2, 2, 1]
+        seen = [(r["run_timestamp"], r["topic"]) for page in pages for r in page]
+        assert seen == sorted(((run, topic) for run, topic, _ in RUNS), reverse=True)
+        assert isinstance(pages[0][0]["final_success"], bool)
+
+    def test_filters(self, client):
+        runs = client.get("/api/runs", params={"topic": "Caching", "success": "true"}).json()["runs"]
+        assert [r["run_timestamp"] for r in runs] == ["20251003_090000", "20251001_090000"]
+
+        runs = client.get("/api/runs", params={"since": "2025-10-02", "until": "2025-10-02"}).json()["runs"]
+        assert [r["run_timestamp"] for r in runs] == ["20251002_090000"]
+
+    def test_ndjson_stream(self, client):
+        response = client.get("/api/runs", params={"limit": 3, "format": "ndjson"})
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert len(lines) == 4 and lines[-1]["next_cursor"]
+
+        rest = client.get(
+            "/api/runs", params={"cursor": lines[-1]["next_cursor"]}, headers={"Accept": "application/x-ndjson"}
+        )
+        lines = [json.loads(line) for line in rest.text.splitlines()]
+        assert len(lines) == 3 and lines[-1] == {"next_cursor": None}
+
+    def test_bad_cursor_and_limit(self, client):
+        assert client.get("/api/runs", params={"cursor": "not-a-cursor"}).status_code == 400
+        assert client.get("/api/runs", params={"cursor": encode_cursor([1])}).status_code == 400
+        assert client.get("/api/runs", params={"limit": 501}).status_code == 400
+        assert client.get("/api/runs", params={"limit": 501, "format": "ndjson"}).status_code == 200
+
+
+class TestListRunSteps:
+    """Test suite for /api/runs/{run_id}/steps."""
+
+    def test_steps_without_full_response_by_default(self, client):
+        pages = _pages(client, "/api/runs/20251002_090000/steps", "steps", limit=3)
+        steps = [step for page in pages for step in page]
+        assert [s["step_number"] for s in steps] == list(range(1, 8))
+        assert all("full_response" not in s and s["response_length"] == 100 for s in steps)
+
+    def test_include_response(self, client):
+        steps = client.get("/api/runs/20251002_090000/steps", params={"include_response": "true"}).json()["steps"]
+        assert steps[0]["full_response"] == "x" * 100
+
+    def test_unknown_run(self, client):
+        assert client.get("/api/runs/19990101_000000/steps").status_code == 404
+
+    def test_stream_resumes_on_other_threads(self, repo):
+        for step in range(1, 1501):
+            repo.save_step("20251004_090000", "Caching", step, f"Step {step}", "model", True, "x", "now")
+        rows = repo.iter_run_steps("20251004_090000", 1500)
+        seen = [next(rows)["step_number"]]
+
+        def advance():
+            seen.extend(row["step_number"] for row in itertools.islice(rows, 1200))
+
+        worker = threading.Thread(target=advance)
+        worker.start()
+        worker.join()
+        closer = threading.Thread(target=rows.close)
+        closer.start()
+        closer.join()
+        assert seen == list(range(1, 1202))
+
+    def test_cursor_round_trip(self):
+        assert decode_cursor(encode_cursor(["20251002_090000", "Caching"])) == ["20251002_090000", "Caching"]
@@ -0,0 +1,145 @@
+"""
+Unit tests for the priority model-call scheduler.
+"""
+
+import threading
+import time
+
+import pytest
+
+from clients.concurrency import model_slot
+from services.invoke import Invoker
+from services.scheduler import BATCH, INTERACTIVE, REFILL, ModelCallScheduler, current_priority, priority_scope
+
+
+def _wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not reached")
+        time.sleep(0.001)
+
+
+class Recorder:
+    """Queues calls one at a time (so their arrival order is fixed) and records dispatch order."""
+
+    def __init__(self, scheduler):
+        self.scheduler = scheduler
+        self.order = []
+        self.threads = []
+        self._lock = threading.Lock()
+
+    def enqueue(self, priority, label):
+        before = self.scheduler.queued(priority)
+
+        def call():
+            with self.scheduler.slot(priority):
+                with self._lock:
+                    self.order.append(label)
+
+        thread = threading.Thread(target=call)
+        thread.start()
+        self.threads.append(thread)
+        _wait_for(lambda: self.scheduler.queued(priority) > before)
+
+    def join(self):
+        for thread in self.threads:
+            thread.join(2)
+
+
+class TestModelCallScheduler:
+    """Test suite for ModelCallScheduler."""
+
+    def test_interactive_preempts_queued_batch_calls(self):
+        scheduler = ModelCallScheduler(capacity=1, reserved=0)
+        recorder = Recorder(scheduler)
+        scheduler.acquire(BATCH)
+        recorder.enqueue(BATCH, "batch-1")
+        recorder.enqueue(BATCH, "batch-2")
+        recorder.enqueue(INTERACTIVE, "student")
+        scheduler.release()
+        recorder.join()
+        assert recorder.order == ["student", "batch-1", "batch-2"]
+
+    def test_weighted_fair_share_between_refill_and_batch(self):
+        scheduler = ModelCallScheduler(capacity=1, reserved=0)
+        recorder = Recorder(scheduler)
+        scheduler.acquire(BATCH)
+        for n in range(4):
+            recorder.enqueue(BATCH, f"b{n}")
+        for n in range(6):
+            recorder.enqueue(REFILL, f"r{n}")
+        scheduler.release()
+        recorder.join()
+        first_four = recorder.order[:4]
+        assert sum(label.startswith("r") for label in first_four) == 3
+        assert recorder.order.index("b3") == len(recorder.order) - 1
+
+    def test_reserved_slots_are_kept_for_interactive_calls(self):
+        scheduler = ModelCallScheduler(capacity=2, reserved=1)
+        scheduler.acquire(BATCH)
+        recorder = Recorder(scheduler)
+        recorder.enqueue(BATCH, "batch")
+        assert scheduler.in_flight == 1  # the free slot is reserved
+
+        scheduler.acquire(INTERACTIVE)  # does not block
+        assert scheduler.in_flight == 2
+        scheduler.release()
+        scheduler.release()
+        recorder.join()
+        assert recorder.order == ["batch"] and scheduler.in_flight == 0
+
+    def test_rejects_bad_configuration(self):
+        with pytest.raises(ValueError):
+            ModelCallScheduler(capacity=2, reserved=2)
+        with pytest.raises(ValueError):
+            ModelCallScheduler(weights={BATCH: 0})
+
+
+class TestPriorityScope:
+    """Test suite for the caller's priority class."""
+
+    def test_scope_sets_and_restores_priority(self):
+        assert current_priority() == INTERACTIVE
+        with priority_scope(BATCH):
+            assert current_priority() == BATCH
+        assert current_priority() == INTERACTIVE
+        with pytest.raises(ValueError):
+            with priority_scope("urgent"):
+                pass
+
+    def test_invoker_queues_calls_under_the_callers_priority(self):
+        seen = []
+
+        class Scheduler(ModelCallScheduler):
+            def acquire(self, priority=None):
+                seen.append(priority or current_priority())
+                super().acquire(priority)
+
+        class Runtime:
+            def invoke(self, model_id, prompt, max_tokens=2048):
+                with model_slot(model_id):
+                    return "ok"
+
+        invoker = Invoker(Runtime(), scheduler=Scheduler())
+        with priority_scope(REFILL):
+            assert invoker.text("m", "p") == "ok"
+        assert seen == [REFILL] and invoker.scheduler.in_flight == 0
+
+    def test_slot_is_only_held_for_each_request(self):
+        scheduler = ModelCallScheduler(capacity=2, reserved=1)
+        in_flight = []
+
+        class Runtime:
+            """Two throttled attempts and a success, with back-off between them."""
+
+            def invoke(self, model_id, prompt, max_tokens=2048):
+                for _ in range(3):
+                    with model_slot(model_id):
+                        in_flight.append(scheduler.in_flight)
+                    in_flight.append(scheduler.in_flight)  # back-off / post-call pause
+                return "ok"
+
+        with priority_scope(BATCH):
+            assert Invoker(Runtime(), scheduler=scheduler).text("m", "p") == "ok"
+        assert in_flight == [1, 0] * 3
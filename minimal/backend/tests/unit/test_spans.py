@@ -0,0 +1,111 @@
+"""
+Unit tests for the single-pass << >> span scanner and its consumers.
+"""
+
+import re
+
+import pytest
+
+from analytics.rewards import rewards_step7
+from analytics.spans import scan_spans
+from legacy_pipeline.config import PipelineConfig
+from legacy_pipeline.validators.assessment_validator import AssessmentValidator
+
+SPAN_RE = re.compile(r"<<([^<>]+)>>")
+
+
+class TestScanSpans:
+    """Test suite for span positions, counts and balance diagnostics."""
+
+    @pytest.mark.parametrize(
+        "content",
+        [
+            "",
+            "no spans at all",
+            "x = <<first bug>> + <<second bug>>",
+            "<<a<<b>>",
+            "<<<a>>",
+            "<<a>b>>",
+            "<<>>",
+            "<<multi\nline>>",
+            ">> stray <<",
+            "a << b > c >> d",
+        ],
+    )
+    def test_matches_historical_regex(self, content):
+        scan = scan_spans(content)
+        assert scan.texts == SPAN_RE.findall(content)
+        assert scan.open_count == content.count("<<")
+        assert scan.close_count == content.count(">>")
+
+    def test_positions_and_lines(self):
+        lines = ["def f(x):", "    return <<x + 1>>", "", "y = <<f(2)>> * 2"]
+        scan = scan_spans(lines)
+        joined = "\n".join(lines)
+
+        assert [(s.text, s.line) for s in scan.spans] == [("x + 1", 2), ("f(2)", 4)]
+        for span in scan.spans:
+            assert joined[span.start : span.end] == f"<<{span.text}>>"
+        assert scan.balanced and not scan.issues and not scan.unbalanced_lines
+
+    def test_balance_diagnostics(self):
+        scan = scan_spans(["ok <<span one>>", "broken <<never closed", "stray >> here"])
+        assert scan.unbalanced_lines == (2, 3)
+        assert scan.balanced  # raw counts happen to agree ...
+        assert scan.texts == ["span one", "never closed\nstray "]  # ... and the regex would span the lines
+
+        scan = scan_spans(["<<open", "still open"])
+        assert not scan.balanced
+        assert any("never closed" in issue for issue in scan.issues)
+
+    def test_occurrences(self):
+        scan = scan_spans("<<dup>> and <<dup>> and <<once>>")
+        assert scan.occurrences("dup") == 2
+        assert scan.occurrences("once") == 1
+        assert scan.occurrences("missing") == 0
+
+    def test_results_are_shared(self):
+        lines = ["a <<shared span>> b"]
+        assert scan_spans(lines) is scan_spans(list(lines))
+
+
+def _payload(content, errors):
+    return {
+        "title": "Cache invalidation",
+        "difficulty": "Intermediate",
+        "content_type": "code",
+        "content": content,
+        "errors": errors,
+    }
+
+
+class TestConsumers:
+    """The validator and rewards_step7 must agree with the scanner."""
+
+    config = PipelineConfig()
+
+    def _content(self, marked):
+        filler = [f"line_{i} = {i}" for i in range(self.config.MIN_CODE_LINES)]
+        return filler[:5] + marked + filler[5:]
+
+    def test_validator_accepts_well_formed_spans(self):
+        content = self._content(["cache[key] = <<value_stored_without_any_ttl>>"])
+        ok, sanitized, issues = AssessmentValidator(self.config).validate_assessment(
+            _payload(content, [{"id": "value_stored_without_any_ttl", "description": "Entries never expire."}])
+        )
+        assert ok, issues
+        assert sanitized["errors"][0]["id"] == "value_stored_without_any_ttl"
+
+        report = rewards_step7(sanitized)
+        results = {r.name: r.passed for r in report.results}
+        assert results["spans_match_errors_len"] and results["span_lengths_10_120"]
+
+    def test_validator_reports_missing_and_unbalanced_spans(self):
+        content = self._content(["cache[key] = <<value_stored_without_any_ttl", "x = 1"])
+        ok, _, issues = AssessmentValidator(self.config).validate_assessment(
+            _payload(content, [{"id": "value_stored_without_any_ttl", "description": "Entries never expire."}])
+        )
+        assert not ok
+        assert any(issue.startswith("Unbalanced number of << and >>") and "never closed" in issue for issue in issues)
+        assert any("must appear exactly once" in issue and "found 0" in issue for issue in issues)
+        assert any("is not wrapped in << >>" in issue for issue in issues)
@@ -0,0 +1,101 @@
+"""
+Unit tests for lean SSE step events, the step store and gzip-encoded streams.
+"""
+
+import asyncio
+import json
+import zlib
+
+from fastapi.testclient import TestClient
+
+import api.endpoints  # noqa: F401 - registers the routes
+from api import streaming
+from api.main import app
+from api.streaming import (
+    BODY_PREVIEW,
+    PREVIEW_CHARS,
+    StepBodyStore,
+    encode_events,
+    format_sse_message,
+    run_pipeline_streaming,
+    step_store,
+)
+from legacy_pipeline.models import PipelineStep
+
+
+class StreamingPipeline:
+    def __init__(self, responses):
+        self.responses = responses
+
+    def run_full_pipeline_streaming(self, topic, max_attempts=3):
+        for number, response in enumerate(self.responses, 1):
+            yield PipelineStep(number, f"Step {number}", "m", True, response, "2025-01-01T00:00:00")
+
+
+def _collect(agen):
+    async def run():
+        return [item async for item in agen]
+
+    return asyncio.run(run())
+
+
+async def _messages(messages):
+    for message in messages:
+        yield message
+
+
+class TestStepEvents:
+    """Test suite for the step event schema."""
+
+    def test_full_body_is_sent_once(self):
+        events = _collect(run_pipeline_streaming(StreamingPipeline(["x" * 800]), "topic", 1))
+        assert events[0]["response_full"] == "x" * 800
+        assert "response_preview" not in events[0] and "step_id" not in events[0]
+        assert events[0]["response_length"] == 800
+
+    def test_preview_events_fetch_the_body_by_step_id(self):
+        events = _collect(run_pipeline_streaming(StreamingPipeline(["y" * 800, ""]), "topic", 1, body=BODY_PREVIEW))
+        assert "response_full" not in events[0]
+        assert events[0]["response_preview"] == "y" * PREVIEW_CHARS
+        assert events[1]["response_preview"] is None
+
+        client = TestClient(app)
+        response = client.get(f"/api/steps/{events[0]['step_id']}")
+        assert response.status_code == 200
+        assert response.json()["response_full"] == "y" * 800
+        assert step_store.get(events[1]["step_id"])["step_number"] == 2
+        assert client.get("/api/steps/unknown").status_code == 404
+
+    def test_store_evicts_the_oldest_steps_past_its_cap(self):
+        store = StepBodyStore(max_chars=10)
+        first = store.put({"response_full": "a" * 6})
+        second = store.put({"response_full": "b" * 6})
+        assert store.get(first) is None and store.get(second) is not None
+
+
+class TestEncoding:
+    """Test suite for event serialisation and gzip streams."""
+
+    def test_events_are_compact_json(self, monkeypatch):
+        data = {"event": "step", "text": "naïve", "n": 1}
+        message = format_sse_message(data, event_type="step")
+        monkeypatch.setattr(streaming, "orjson", None)
+        assert format_sse_message(data, event_type="step") == message
+        assert message == 'event: step\ndata: {"event":"step","text":"naïve","n":1}\n\n'
+
+    def test_gzip_chunks_decode_as_they_arrive(self):
+        messages = [format_sse_message({"step": n, "body": "z" * 2000}, "step") for n in range(3)]
+        chunks = _collect(encode_events(_messages(messages), gzip=True))
+
+        decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        assert decoder.decompress(chunks[0]).decode() == messages[0]
+        assert b"".join(decoder.decompress(chunk) for chunk in chunks[1:]).decode() == "".join(messages[1:])
+        assert sum(map(len, chunks)) < len("".join(messages)) / 10
+        assert json.loads(messages[2].split("data: ", 1)[1])["step"] == 2
+
+    def test_gzip_needs_the_flag_and_the_client(self, monkeypatch):
+        monkeypatch.delenv("AQU_SSE_GZIP", raising=False)
+        assert not streaming.gzip_requested("gzip, deflate")
+        monkeypatch.setenv("AQU_SSE_GZIP", "1")
+        assert streaming.gzip_requested("gzip, deflate")
+        assert not streaming.gzip_requested("identity")
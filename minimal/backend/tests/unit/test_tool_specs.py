@@ -0,0 +1,112 @@
+"""
+Unit tests for precompiled tool specs and request-body splicing.
+"""
+
+import copy
+import json
+import pickle
+
+import pytest
+
+from clients.bedrock import encode_body
+from config.prompts_loader import merge_prompt_changes
+from config.tool_specs import ToolSpec, compile_tool_spec, compile_tool_specs
+from config.tools_loader import merge_tool_changes
+
+TOOL = {
+    "name": "create_assessment",
+    "description": "Return the assessment",
+    "input_schema": {
+        "type": "object",
+        "properties": {"difficulty": {"type": "string"}, "code": {"type": "string"}},
+        "required": ["difficulty", "code"],
+    },
+}
+
+
+class TestToolSpec:
+    """Test suite for ToolSpec compilation and variants."""
+
+    def test_json_matches_plain_encoding(self):
+        spec = compile_tool_spec(TOOL)
+        assert spec.json == json.dumps([TOOL])
+        assert spec == [TOOL]
+
+    def test_spec_is_read_only(self):
+        spec = compile_tool_spec([TOOL])
+        with pytest.raises(TypeError):
+            spec.append({})
+        with pytest.raises(TypeError):
+            spec[0]["input_schema"]["properties"]["difficulty"]["enum"] = ["Easy"]
+
+    def test_compile_passes_through_existing_spec(self):
+        spec = compile_tool_spec(TOOL)
+        assert compile_tool_spec(spec) is spec
+
+    def test_compile_specs_skips_metadata(self):
+        specs = compile_tool_specs({"_meta": {"description": "x"}, "step7": TOOL})
+        assert list(specs) == ["step7"]
+        assert isinstance(specs["step7"], ToolSpec)
+
+    def test_with_property_enum_builds_new_spec(self):
+        spec = compile_tool_spec(TOOL)
+        variant = spec.with_property_enum("difficulty", ["Easy", "Hard"])
+
+        assert variant[0]["input_schema"]["properties"]["difficulty"]["enum"] == ["Easy", "Hard"]
+        assert "enum" not in spec[0]["input_schema"]["properties"]["difficulty"]
+        assert json.loads(variant.json) == variant
+
+    def test_copies_are_plain_and_mutable(self):
+        spec = compile_tool_spec(TOOL)
+        clone = copy.deepcopy(spec)
+        clone[0]["name"] = "renamed"
+        assert spec[0]["name"] == "create_assessment"
+
+        restored = pickle.loads(pickle.dumps(spec))
+        assert isinstance(restored, ToolSpec)
+        assert restored.json == spec.json
+
+
+class TestEncodeBody:
+    """Test suite for splicing ToolSpec JSON into Bedrock request bodies."""
+
+    def test_spliced_body_equals_full_encoding(self):
+        spec = compile_tool_spec(TOOL)
+        body = {"anthropic_version": "bedrock-2023-05-31", "max_tokens": 512, "tools": spec, "temperature": 0.0}
+
+        encoded = encode_body(body)
+
+        assert json.loads(encoded) == json.loads(json.dumps({**body, "tools": [TOOL]}))
+
+    def test_plain_tools_use_regular_encoding(self):
+        body = {"max_tokens": 512, "tools": [TOOL]}
+        assert encode_body(body) == json.dumps(body)
+
+    def test_tools_only_body(self):
+        spec = compile_tool_spec(TOOL)
+        assert json.loads(encode_body({"tools": spec})) == {"tools": [TOOL]}
+
+
+class TestMergeWithoutCopies:
+    """Merging overrides must not mutate either input."""
+
+    def test_merge_tool_changes_leaves_inputs_untouched(self):
+        base = {"step7": copy.deepcopy(TOOL)}
+        overrides = {"_meta": {}, "step7": {"description": "Updated"}}
+        snapshot = copy.deepcopy((base, overrides))
+
+        merged = merge_tool_changes(base, overrides)
+
+        assert merged["step7"]["description"] == "Updated"
+        assert merged["step7"]["input_schema"] == TOOL["input_schema"]
+        assert (base, overrides) == snapshot
+
+    def test_merge_prompt_changes_leaves_inputs_untouched(self):
+        base = {"step1": {"template": "old", "notes": "keep"}}
+        overrides = {"step1": {"template": "new"}, "step9": "raw"}
+        snapshot = copy.deepcopy((base, overrides))
+
+        merged = merge_prompt_changes(base, overrides)
+
+        assert merged == {"step1": {"template": "new", "notes": "keep"}, "step9": "raw"}
+        assert (base, overrides) == snapshot
@@ -0,0 +1,101 @@
+"""
+Unit tests for structured tracing spans and exporters.
+"""
+
+import json
+
+import pytest
+
+from observability.tracing import (
+    ChromeTraceExporter,
+    InMemorySpanExporter,
+    JsonLinesExporter,
+    Tracer,
+    configure_tracing,
+    current_span,
+    span,
+    traced,
+)
+
+
+@pytest.fixture
+def exporter():
+    """Install an in-memory exporter for the duration of a test."""
+    memory = InMemorySpanExporter()
+    configure_tracing(memory)
+    yield memory
+    configure_tracing(None)
+
+
+class TestSpans:
+    """Test suite for span nesting and attributes."""
+
+    def test_spans_nest_under_parent(self, exporter):
+        """Child spans share the trace id and point at their parent."""
+        with span("run", topic="t") as run_span, span("step", step="1") as step_span:
+            assert current_span() is step_span
+
+        assert current_span().name == ""
+        child, parent = exporter.spans
+        assert child.name == "step" and parent.name == "run"
+        assert child.parent_id == run_span.span_id
+        assert child.trace_id == parent.trace_id
+        assert parent.parent_id is None
+        assert parent.attributes == {"topic": "t"}
+
+    def test_exception_marks_span_as_error(self, exporter):
+        """Exceptions propagate and are recorded on the span."""
+        with pytest.raises(ValueError), span("model_call"):
+            raise ValueError("boom")
+
+        (recorded,) = exporter.spans
+        assert recorded.status == "error"
+        assert "ValueError: boom" in recorded.attributes["error"]
+        assert recorded.end_time is not None
+
+    def test_traced_decorator(self, exporter):
+        """traced() wraps a function call in a span."""
+
+        @traced("db.save_step")
+        def save():
+            return 42
+
+        assert save() == 42
+        assert [s.name for s in exporter.spans] == ["db.save_step"]
+
+    def test_disabled_tracer_is_noop(self):
+        """Without an exporter spans are shared no-op objects."""
+        tracer = Tracer()
+        with tracer.span("run") as first, tracer.span("run") as second:
+            first.set_attribute("k", "v")
+        assert first is second
+        assert not tracer.enabled
+
+
+class TestExporters:
+    """Test suite for file exporters."""
+
+    def test_jsonl_exporter_writes_one_line_per_span(self, tmp_path):
+        """Each finished span becomes one JSON line."""
+        path = tmp_path / "spans.jsonl"
+        tracer = Tracer(JsonLinesExporter(path))
+        with tracer.span("run"), tracer.span("attempt", attempt=1):
+            pass
+
+        records = [json.loads(line) for line in path.read_text().splitlines()]
+        assert [r["name"] for r in records] == ["attempt", "run"]
+        assert records[0]["attributes"] == {"attempt": 1}
+
+    def test_chrome_exporter_writes_trace_on_root_end(self, tmp_path):
+        """The Chrome exporter writes one complete-event file per trace."""
+        tracer = Tracer(ChromeTraceExporter(tmp_path))
+        with tracer.span("run") as root:
+            with tracer.span("step", step="1"):
+                pass
+            assert not list(tmp_path.iterdir())
+
+        trace = json.loads((tmp_path / f"trace_{root.trace_id}.json").read_text())
+        events = trace["traceEvents"]
+        assert [e["name"] for e in events] == ["run", "step"]
+        assert all(e["ph"] == "X" for e in events)
+        assert events[1]["args"]["parent_id"] == root.span_id
@@ -0,0 +1,25 @@
+"""
+Unit tests for API server cold start: background pipeline warm-up.
+"""
+
+import pytest
+from fastapi import HTTPException
+
+from api import main
+
+
+class TestWarmUp:
+    """Test suite for requests that arrive while the pipeline is being built."""
+
+    def test_requests_during_warm_up_get_retry_after(self, monkeypatch):
+        monkeypatch.setattr(main, "MOCK_PIPELINE", False)
+        monkeypatch.setattr(main, "pipelines", {})
+        lock = main._pipeline_locks["openai"]
+        lock.acquire()
+        try:
+            with pytest.raises(HTTPException) as excinfo:
+                main.get_pipeline("openai")
+        finally:
+            lock.release()
+        assert excinfo.value.status_code == 503
+        assert excinfo.value.headers == {"Retry-After": str(main.STARTING_RETRY_AFTER_S)}
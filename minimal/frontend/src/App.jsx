@@ -7,9 +7,9 @@ import LiveEmptyState from './components/LiveEmptyState';
 import QuestionPlayground from './components/QuestionPlayground';
 import FinalResults from './components/FinalResults';
 import { studentModeQuestions } from './demoData.student.js';
-import { demoAssessments, demoPipelineSteps } from './demoData.dev.js';
 import { pipelineBlueprint, pipelineDemoCopy } from './pipelineBlueprint';
 import { parseQuestion } from './utils/parseQuestion.js';
+import { loadDemoManifest, loadDemoShard } from './utils/demoShards.js';
 
 const DemoLoadingScreen = () => (
   <div className="flex justify-center items-center h-screen bg-gradient-to-br from-blue-50 to-indigo-100">
@@ -46,6 +46,7 @@ const App = () => {
   const [selectedSubtopic, setSelectedSubtopic] = useState('');
   const [isStep1Loading, setIsStep1Loading] = useState(false);
   const [currentDevAssessmentIndex, setCurrentDevAssessmentIndex] = useState(0);
+  const [demoManifest, setDemoManifest] = useState([]);
 
   const blueprintSteps = useMemo(() => {
     if (!backendPrompts) {
@@ -93,51 +94,60 @@ const App = () => {
   useEffect(() => {
     if (generationMode === 'demo') {
       if (viewMode === 'dev') {
-        // Load all available assessments (no cap)
-        if (demoAssessments.length > 0) {
+        // Load all available assessments (no cap); each shard is fetched when selected
+        if (demoManifest.length > 0) {
           // Ensure index is within bounds
-          const safeIndex = Math.min(currentDevAssessmentIndex, demoAssessments.length - 1);
+          const safeIndex = Math.min(currentDevAssessmentIndex, demoManifest.length - 1);
           if (safeIndex !== currentDevAssessmentIndex) {
             setCurrentDevAssessmentIndex(safeIndex);
           }
-          const currentAssessment = demoAssessments[safeIndex];
-
-          // Convert demoAssessment to question format
-          const demoQuestion = {
-            title: currentAssessment.title,
-            topic: currentAssessment.topic,
-            subtopic: currentAssessment.subtopic,
-            difficulty: currentAssessment.difficulty,
-            code: currentAssessment.content,
-            errors: currentAssessment.errors,
+          let cancelled = false;
+
+          loadDemoShard(demoManifest[safeIndex])
+            .then(({ assessment: currentAssessment, pipeline_steps: assessmentPipelineSteps }) => {
+              if (cancelled) return;
+
+              // Convert demoAssessment to question format
+              const demoQuestion = {
+                title: currentAssessment.title,
+                topic: currentAssessment.topic,
+                subtopic: currentAssessment.subtopic,
+                difficulty: currentAssessment.difficulty,
+                code: currentAssessment.content,
+                errors: currentAssessment.errors,
+              };
+
+              const parsed = parseQuestion(demoQuestion);
+              setParsedQuestions([parsed]);
+              setCurrentQuestion(0);
+              setGameComplete(false);
+              setTotalScore(0);
+              // Load the corresponding pipeline steps for this assessment
+              setPipelineSteps(assessmentPipelineSteps);
+              setPipelineFinal({
+                title: currentAssessment.title,
+                difficulty: currentAssessment.difficulty,
+                success: true,
+                differentiation_achieved: true,
+                total_attempts: 1,
+                stopped_at_step: 7,
+                metadata: {
+                  topic: currentAssessment.topic,
+                  topic_requested: currentAssessment.topic,
+                  subtopic: currentAssessment.subtopic,
+                  run_timestamp: currentAssessment.run_timestamp,
+                  weak_model_failures: currentAssessment.errors?.length || 0,
+                },
+              });
+              setActivePipelineTab('final');
+            })
+            .catch((error) => {
+              if (!cancelled) setGenerationError(error.message);
+            });
+
+          return () => {
+            cancelled = true;
           };
-
-          const parsed = parseQuestion(demoQuestion);
-          setParsedQuestions([parsed]);
-          setCurrentQuestion(0);
-          setGameComplete(false);
-          setTotalScore(0);
-          // Load the corresponding pipeline steps for this assessment
-          const assessmentPipelineSteps = demoPipelineSteps.filter(
-            step => step._id.includes(`demo-${safeIndex + 1}-step-`)
-          );
-          setPipelineSteps(assessmentPipelineSteps);
-          setPipelineFinal({
-            title: currentAssessment.title,
-            difficulty: currentAssessment.difficulty,
-            success: true,
-            differentiation_achieved: true,
-            total_attempts: 1,
-            stopped_at_step: 7,
-            metadata: {
-              topic: currentAssessment.topic,
-              topic_requested: currentAssessment.topic,
-              subtopic: currentAssessment.subtopic,
-              run_timestamp: currentAssessment.run_timestamp,
-              weak_model_failures: currentAssessment.errors?.length || 0,
-            },
-          });
-          setActivePipelineTab('final');
         } else {
           setParsedQuestions([]);
           setCurrentQuestion(0);
@@ -167,7 +177,13 @@ const App = () => {
         }
       });
     }
-  }, [blueprintSteps, generationMode, rawQuestions, viewMode, currentDevAssessmentIndex]);
+  }, [blueprintSteps, generationMode, rawQuestions, viewMode, currentDevAssessmentIndex, demoManifest]);
+
+  useEffect(() => {
+    if (isDevMode && generationMode === 'demo' && demoManifest.length === 0) {
+      loadDemoManifest().then(setDemoManifest);
+    }
+  }, [isDevMode, generationMode, demoManifest.length]);
 
   useEffect(() => {
     return () => {
@@ -530,7 +546,7 @@ const App = () => {
           totalScore={totalScore}
         />
 
-        {isDevMode && generationMode === 'demo' && demoAssessments.length > 0 && (
+        {isDevMode && generationMode === 'demo' && demoManifest.length > 0 && (
           <div className="mb-4 border-b border-gray-200">
             <div className="flex items-center gap-4 pb-3">
               <label className="text-sm font-medium text-gray-700">Select Assessment:</label>
@@ -539,14 +555,14 @@ const App = () => {
                 onChange={(e) => setCurrentDevAssessmentIndex(parseInt(e.target.value))}
                 className="px-3 py-2 text-sm border border-gray-300 rounded-md focus:outline-none focus:ring-2 focus:ring-indigo-500 focus:border-indigo-500 bg-white"
               >
-                {demoAssessments.map((assessment, index) => (
-                  <option key={assessment.id} value={index}>
-                    {assessment.topic} ({assessment.difficulty} • {assessment.errors?.length || 0} errors)
+                {demoManifest.map((entry, index) => (
+                  <option key={entry.id} value={index}>
+                    {entry.topic} ({entry.difficulty} • {entry.error_count} errors)
                   </option>
                 ))}
               </select>
               <span className="text-xs text-gray-500">
-                {currentDevAssessmentIndex + 1} of {demoAssessments.length} assessments
+                {currentDevAssessmentIndex + 1} of {demoManifest.length} assessments
               </span>
             </div>
           </div>
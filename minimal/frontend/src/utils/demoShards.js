@@ -0,0 +1,85 @@
+/**
+ * Lazy loader for sharded dev-mode demo data.
+ *
+ * The backend export (backend/persistence/demo_shards.py) writes
+ * public/demo/manifest.jsonl, one summary line per assessment, and
+ * public/demo/shards/<id>.json with the assessment and its pipeline steps.
+ * The manifest is fetched once; a shard is fetched the first time its
+ * assessment is shown. Without a manifest the legacy demoData.dev.js bundle
+ * is loaded instead, as its own chunk.
+ */
+
+const DEMO_BASE_URL = `${import.meta.env?.BASE_URL ?? '/'}demo/`;
+
+let manifestPromise = null;
+const shardCache = new Map();
+
+const parseManifest = (text) => {
+  const entries = [];
+  for (const line of text.split('\n')) {
+    if (!line.trim()) continue;
+    try {
+      entries.push(JSON.parse(line));
+    } catch {
+      // Not a manifest (e.g. the dev server's index.html fallback)
+      return [];
+    }
+  }
+  return entries;
+};
+
+const loadLegacyEntries = async () => {
+  const { demoAssessments, demoPipelineSteps } = await import('../demoData.dev.js');
+  return demoAssessments.map((assessment, index) => ({
+    id: assessment.id,
+    title: assessment.title,
+    topic: assessment.topic,
+    subtopic: assessment.subtopic,
+    difficulty: assessment.difficulty,
+    content_type: assessment.content_type,
+    error_count: assessment.errors?.length || 0,
+    run_timestamp: assessment.run_timestamp,
+    shard: {
+      assessment,
+      pipeline_steps: demoPipelineSteps.filter((step) => step._id.includes(`demo-${index + 1}-step-`)),
+    },
+  }));
+};
+
+/**
+ * Load the demo manifest (cached for the session)
+ * @returns {Promise<Array<Object>>} - Manifest entries, oldest first
+ */
+export const loadDemoManifest = () => {
+  if (!manifestPromise) {
+    manifestPromise = fetch(`${DEMO_BASE_URL}manifest.jsonl`)
+      .then((response) => (response.ok ? response.text() : ''))
+      .then(parseManifest)
+      .catch(() => [])
+      .then((entries) => (entries.length > 0 ? entries : loadLegacyEntries()));
+  }
+  return manifestPromise;
+};
+
+/**
+ * Load one assessment shard (cached by id)
+ * @param {Object} entry - Manifest entry from loadDemoManifest()
+ * @returns {Promise<{assessment: Object, pipeline_steps: Array<Object>}>}
+ */
+export const loadDemoShard = (entry) => {
+  if (entry.shard) {
+    return Promise.resolve(entry.shard);
+  }
+  if (!shardCache.has(entry.id)) {
+    const request = fetch(`${DEMO_BASE_URL}${entry.file}`).then((response) => {
+      if (!response.ok) {
+        throw new Error(`Could not load demo shard ${entry.id}: ${response.status}`);
+      }
+      return response.json();
+    });
+    // Forget failed requests so a later selection can retry
+    request.catch(() => shardCache.delete(entry.id));
+    shardCache.set(entry.id, request);
+  }
+  return shardCache.get(entry.id);
+};